@@ -20,7 +20,8 @@ from datetime import datetime
 from flask import Blueprint, jsonify, request, current_app
 from sqlalchemy.exc import SQLAlchemyError
 
-from models import Market, PipelineRun, db
+from models import Market, PipelineRun, StageCounter, STAGE_COUNTER_MODELS, db
+from utils.stage_counters import read_stage_counts
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,16 +36,20 @@ def pipeline_status():
     Get the status of the pipeline.
     
     Returns:
-        JSON response with pipeline status information
+        JSON response with pipeline status information and market counts by stage
     """
     try:
         # Get the latest pipeline run
         latest_run = PipelineRun.query.order_by(PipelineRun.start_time.desc()).first()
         
+        # Market counts by stage, from the stage counters
+        counts = read_stage_counts(db.session, STAGE_COUNTER_MODELS, StageCounter)
+        
         if not latest_run:
             return jsonify({
                 "status": "none",
-                "message": "No pipeline runs found"
+                "message": "No pipeline runs found",
+                "counts": counts
             })
         
         return jsonify({
@@ -54,7 +59,8 @@ def pipeline_status():
             "markets_processed": latest_run.markets_processed,
             "markets_approved": latest_run.markets_approved,
             "markets_deployed": latest_run.markets_deployed,
-            "error": latest_run.error
+            "error": latest_run.error,
+            "counts": counts
         })
     
     except SQLAlchemyError as e:
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""
+Archive Raw Market Data
+
+This script moves the raw_data JSON of older PendingMarket and
+ProcessedMarket rows to the compressed raw data archive (see
+utils/raw_archive.py) and clears the column, so the rows loaded by the
+pipeline stay small.
+
+Archived data is still available through `market.raw_data` and
+MarketTracker.get_market_raw_data().
+
+Usage:
+    python archive_raw_data.py [--days N] [--batch-size N]
+"""
+
+import sys
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Import flask app for database context
+from main import app
+from models import db, PendingMarket, ProcessedMarket
+from utils.raw_archive import archive_raw_data, ARCHIVE_BATCH_SIZE
+
+def archive_old_raw_data(days: int, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Archive the raw data of rows last fetched more than `days` days ago.
+
+    Args:
+        days: Minimum age of the rows to archive
+        batch_size: Rows per committed batch
+
+    Returns:
+        int: Number of rows archived
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    pending = archive_raw_data(
+        db.session,
+        PendingMarket.query.filter(PendingMarket._raw_data.isnot(None), PendingMarket.fetched_at < cutoff),
+        "pending_markets", "poly_id", date_attr="fetched_at", batch_size=batch_size)
+    processed = archive_raw_data(
+        db.session,
+        ProcessedMarket.query.filter(ProcessedMarket._raw_data.isnot(None), ProcessedMarket.last_processed < cutoff),
+        "processed_markets", "condition_id", date_attr="first_seen", batch_size=batch_size)
+
+    return pending["archived"] + processed["archived"]
+
+def main():
+    """
+    Main function to archive raw market data.
+    """
+    parser = argparse.ArgumentParser(description="Move raw market data of older rows to the archive")
+    parser.add_argument("--days", type=int, default=7, help="Archive rows last fetched more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Rows per committed batch")
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            archived = archive_old_raw_data(args.days, args.batch_size)
+            logger.info(f"Summary: Archived raw data of {archived} markets")
+            return 0
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error in process: {str(e)}")
+            return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
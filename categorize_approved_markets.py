@@ -12,9 +12,10 @@ import os
 import logging
 import sys
 import json
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 
 from utils.batch_categorizer import batch_categorize_markets
+from utils.database import CHUNK_SIZE, iter_chunks
 from models import db, Market
 
 # Configure logging
@@ -24,20 +25,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger("categorize_approved_markets")
 
-def get_uncategorized_approved_markets() -> List[Market]:
+def get_uncategorized_approved_markets(chunk_size: int = CHUNK_SIZE) -> Iterator[List[Market]]:
     """
-    Get approved markets that haven't been categorized yet.
+    Get approved markets that haven't been categorized yet, in chunks.
     
+    Changes the caller makes to a chunk are committed before the next chunk
+    is read.
+    
+    Args:
+        chunk_size: Markets per chunk
+        
     Returns:
-        List[Market]: Markets ready for categorization
+        Iterator[List[Market]]: Chunks of markets ready for categorization
     """
     # Find markets that are approved but don't have a category yet
     markets = Market.query.filter(
         Market.status == "new",  # New status means approved but not yet deployed
         (Market.category == None) | (Market.category == "")  # No category assigned
-    ).all()
+    )
     
-    return markets
+    return iter_chunks(markets, Market.id, chunk_size, session=db.session)
 
 def categorize_markets(markets: List[Market]) -> int:
     """
@@ -132,12 +139,13 @@ def main():
     # Use application context for database operations
     with app.app_context():
         try:
-            # Get uncategorized approved markets
-            markets = get_uncategorized_approved_markets()
-            logger.info(f"Found {len(markets)} uncategorized approved markets")
-            
-            # Categorize markets
-            categorized_count = categorize_markets(markets)
+            # Categorize uncategorized approved markets, a chunk at a time
+            found = 0
+            categorized_count = 0
+            for markets in get_uncategorized_approved_markets():
+                found += len(markets)
+                categorized_count += categorize_markets(markets)
+            logger.info(f"Found {found} uncategorized approved markets")
             logger.info(f"Successfully categorized {categorized_count} markets")
             
             return 0
@@ -15,12 +15,17 @@ from typing import Dict, List, Any, Optional, Tuple
 import json
 
 from models import db, Market, ProcessedMarket, ApprovalEvent
-from utils.messaging import get_channel_messages, get_message_reactions, post_formatted_message_to_slack as post_message_to_slack, add_reaction_to_message as add_reaction
+from utils.messaging import get_channel_messages, get_message_reactions, reaction_decision, post_formatted_message_to_slack as post_message_to_slack, add_reaction_to_message as add_reaction
 # We'll create the apechain module later
 from utils.apechain import deploy_market_to_apechain
+from utils.lifecycle import claim, transition, work_queue
+from utils.dates import format_expiry
 
-# Bot user ID to ignore its reactions (this is the ID that's adding the initial reactions)
-BOT_USER_ID = "U08QJHCKABG"
+# Days after which a market pending deployment approval is auto-rejected
+DEPLOYMENT_TIMEOUT_DAYS = 7
+
+# Minutes after which a market still deploying is taken to be interrupted
+DEPLOYING_STALE_MINUTES = 30
 
 # Configure logging
 logging.basicConfig(
@@ -39,99 +44,14 @@ def post_markets_for_deployment_approval() -> List[Market]:
     Returns:
         List[Market]: List of markets posted for deployment approval
     """
-    # Import the new deployment formatter
-    from utils.deployment_formatter import format_deployment_message as new_format_message
-    
     # Find markets that are approved but not yet posted for deployment
-    markets_to_deploy = Market.query.filter(
-        Market.status == "new",  # New status means approved but not yet deployed
+    markets_to_deploy = work_queue(Market, "new").filter(  # New status means approved but not yet deployed
         Market.apechain_market_id == None  # Not yet deployed to Apechain
     ).all()
     
     logger.info(f"Found {len(markets_to_deploy)} markets to post for deployment approval")
     
-    posted_markets = []
-    
-    for market in markets_to_deploy:
-        try:
-            # Format message with market details using the new formatter
-            # Prepare options
-            options = []
-            if market.options:
-                try:
-                    if isinstance(market.options, str):
-                        options_data = json.loads(market.options)
-                        for opt in options_data:
-                            if isinstance(opt, dict) and 'value' in opt:
-                                options.append(opt['value'])
-                            else:
-                                options.append(str(opt))
-                    elif isinstance(market.options, list):
-                        for opt in market.options:
-                            if isinstance(opt, dict) and 'value' in opt:
-                                options.append(opt['value'])
-                            else:
-                                options.append(str(opt))
-                except Exception as e:
-                    logger.error(f"Error parsing options for market {market.id}: {str(e)}")
-                    options = ["Yes", "No"]  # Fallback
-            
-            # Prepare expiry date in human-readable format
-            if market.expiry:
-                try:
-                    expiry_str = datetime.fromtimestamp(market.expiry).strftime('%Y-%m-%d %H:%M:%S UTC')
-                except:
-                    expiry_str = str(market.expiry)
-            else:
-                expiry_str = "Unknown"
-            
-            # Determine market type
-            market_type = "Multiple-Choice Market" if market.type == "multiple" else "Binary Market (Yes/No)"
-            
-            # Format the message with the new formatter
-            message_text, blocks = new_format_message(
-                market_id=market.id,
-                question=market.question,
-                category=market.category or "News",
-                market_type=market_type,
-                options=options or ["Yes", "No"],
-                expiry=expiry_str,
-                banner_uri=market.banner_uri,
-                event_name=getattr(market, 'event_name', None),
-                event_id=getattr(market, 'event_id', None)
-            )
-            
-            # Post to Slack
-            message_id = post_message_to_slack(message_text, blocks=blocks)
-            
-            if message_id:
-                # Add initial reactions (✅ and ❌) for easier voting
-                # These will be ignored in the approval count since they're from the bot
-                add_reaction(message_id, "white_check_mark")
-                add_reaction(message_id, "x")
-                
-                # Small delay to ensure reactions are added
-                import time
-                time.sleep(0.5)
-                # Create approval event
-                event = ApprovalEvent(
-                    market_id=market.id,
-                    stage="final",
-                    status="pending",
-                    message_id=message_id
-                )
-                db.session.add(event)
-                
-                # Update market status
-                market.status = "pending_deployment"
-                
-                posted_markets.append(market)
-                logger.info(f"Posted market {market.id} for deployment approval")
-            else:
-                logger.error(f"Failed to post market {market.id} for deployment approval")
-        
-        except Exception as e:
-            logger.error(f"Error posting market {market.id} for deployment: {str(e)}")
+    posted_markets = [market for market in markets_to_deploy if post_market_for_deployment_approval(market)]
     
     # Save all changes
     if posted_markets:
@@ -139,6 +59,95 @@ def post_markets_for_deployment_approval() -> List[Market]:
     
     return posted_markets
 
+def post_market_for_deployment_approval(market: Market) -> Optional[str]:
+    """
+    Post one approved market to Slack for final deployment approval.
+    
+    The approval event and status change are added to the session; the
+    caller commits.
+    
+    Args:
+        market: Market model instance
+        
+    Returns:
+        Optional[str]: Slack message ID, or None if the market could not be posted
+    """
+    # Import the new deployment formatter
+    from utils.deployment_formatter import format_deployment_message as new_format_message
+    
+    try:
+        # Format message with market details using the new formatter
+        # Prepare options
+        options = []
+        if market.options:
+            try:
+                if isinstance(market.options, str):
+                    options_data = json.loads(market.options)
+                    for opt in options_data:
+                        if isinstance(opt, dict) and 'value' in opt:
+                            options.append(opt['value'])
+                        else:
+                            options.append(str(opt))
+                elif isinstance(market.options, list):
+                    for opt in market.options:
+                        if isinstance(opt, dict) and 'value' in opt:
+                            options.append(opt['value'])
+                        else:
+                            options.append(str(opt))
+            except Exception as e:
+                logger.error(f"Error parsing options for market {market.id}: {str(e)}")
+                options = ["Yes", "No"]  # Fallback
+        
+        # Determine market type
+        market_type = "Multiple-Choice Market" if market.type == "multiple" else "Binary Market (Yes/No)"
+        
+        # Format the message with the new formatter
+        message_text, blocks = new_format_message(
+            market_id=market.id,
+            question=market.question,
+            category=market.category or "News",
+            market_type=market_type,
+            options=options or ["Yes", "No"],
+            expiry=market.expiry,
+            banner_uri=market.banner_uri,
+            event_name=getattr(market, 'event_name', None),
+            event_id=getattr(market, 'event_id', None)
+        )
+        
+        # Post to Slack
+        message_id = post_message_to_slack(message_text, blocks=blocks)
+        
+        if not message_id:
+            logger.error(f"Failed to post market {market.id} for deployment approval")
+            return None
+        
+        # Add initial reactions (✅ and ❌) for easier voting
+        # These will be ignored in the approval count since they're from the bot
+        add_reaction(message_id, "white_check_mark")
+        add_reaction(message_id, "x")
+        
+        # Small delay to ensure reactions are added
+        import time
+        time.sleep(0.5)
+        # Create approval event
+        event = ApprovalEvent(
+            market_id=market.id,
+            stage="final",
+            status="pending",
+            message_id=message_id
+        )
+        db.session.add(event)
+        
+        # Update market status
+        transition(market, "pending_deployment", actor="check_deployment_approvals")
+        
+        logger.info(f"Posted market {market.id} for deployment approval")
+        return message_id
+    
+    except Exception as e:
+        logger.error(f"Error posting market {market.id} for deployment: {str(e)}")
+        return None
+
 def format_deployment_message(market: Market) -> Tuple[str, List[Dict[str, Any]]]:
     """
     Format a market message for deployment approval with rich formatting.
@@ -231,7 +240,7 @@ def format_deployment_message(market: Market) -> Tuple[str, List[Dict[str, Any]]
                 },
                 {
                     "type": "mrkdwn",
-                    "text": f"*Expiry:* {datetime.fromtimestamp(market.expiry).strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    "text": f"*Expiry:* {format_expiry(market.expiry)}"
                 }
             ]
         },
@@ -340,28 +349,17 @@ def check_deployment_approvals() -> Tuple[int, int, int]:
         Tuple[int, int, int]: Count of (pending, approved, rejected) markets
     """
     # Get markets pending deployment approval
-    pending_markets = Market.query.filter(
-        Market.status == "pending_deployment"
-    ).all()
+    pending_markets = work_queue(Market, "pending_deployment").all()
     
     # Find the corresponding approval events to get message IDs
     pending_events = {}
     for market in pending_markets:
-        event = ApprovalEvent.query.filter(
-            ApprovalEvent.market_id == market.id,
-            ApprovalEvent.stage == "final",
-            ApprovalEvent.status == "pending"
-        ).order_by(ApprovalEvent.created_at.desc()).first()
-        
-        if event and event.message_id:
+        event = pending_deployment_event(market.id)
+        if event:
             pending_events[market.id] = event
     
     logger.info(f"Checking deployment approvals for {len(pending_events)} pending markets")
     
-    # Define timeout period (7 days)
-    timeout_days = 7
-    timeout_date = datetime.utcnow() - timedelta(days=timeout_days)
-    
     # Track counts
     still_pending = 0
     approved = 0
@@ -372,112 +370,185 @@ def check_deployment_approvals() -> Tuple[int, int, int]:
         if not market:
             logger.warning(f"Market {market_id} not found")
             continue
-            
-        # Get reactions for this message
-        reactions = get_message_reactions(event.message_id)
         
-        # Debug logging
-        logger.info(f"Processing reactions for market {market_id} (message {event.message_id})")
-        logger.info(f"Got {len(reactions)} reactions: {reactions}")
+        outcome = process_deployment_decision(market, event)
+        if outcome == "ignored":
+            continue
+        if outcome == "pending":
+            still_pending += 1
+        elif outcome == "deployed":
+            approved += 1
+        else:
+            rejected += 1
+    
+    # Save all changes
+    db.session.commit()
+    
+    logger.info(f"Deployment approval results: {still_pending} still pending, {approved} approved, {rejected} rejected")
+    return (still_pending, approved, rejected)
+
+def reconcile_stale_deployments(stale_minutes: int = DEPLOYING_STALE_MINUTES) -> Tuple[int, int]:
+    """
+    Move on markets left in deploying by an interrupted deployment.
+    
+    A market is claimed (committed as deploying) before its transaction is
+    sent, so if the process dies during the deployment the market stays
+    deploying. A market with a recorded transaction moves to
+    deployment_pending, where track_market_id_after_deployment.py picks up
+    its market ID; a market without one moves to deployment_failed.
+    
+    Args:
+        stale_minutes: Minutes a market must have been deploying
+        
+    Returns:
+        Tuple[int, int]: Count of (pending, failed) markets
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=stale_minutes)
+    stale_markets = work_queue(Market, "deploying", claim=True).filter(Market.updated_at < cutoff).all()
+    
+    pending = 0
+    failed = 0
+    for market in stale_markets:
+        if market.blockchain_tx:
+            transition(market, "deployment_pending", actor="reconcile",
+                       reason=f"Deployment interrupted after transaction {market.blockchain_tx}")
+            pending += 1
+        else:
+            transition(market, "deployment_failed", actor="reconcile",
+                       reason="Deployment interrupted before a transaction was recorded")
+            failed += 1
+    
+    # Save all changes
+    db.session.commit()
+    
+    if stale_markets:
+        logger.warning(f"Reconciled {len(stale_markets)} interrupted deployments: {pending} pending, {failed} failed")
+    return (pending, failed)
+
+def pending_deployment_event(market_id: str) -> Optional[ApprovalEvent]:
+    """
+    Get the latest pending deployment approval message of a market.
+    
+    Args:
+        market_id: Market ID
         
-        # Check for approval (white_check_mark) or rejection (x) reactions
-        has_approval = False
-        has_rejection = False
-        approver = None
+    Returns:
+        Optional[ApprovalEvent]: Pending final-stage approval event with a message ID, or None
+    """
+    event = ApprovalEvent.query.filter(
+        ApprovalEvent.market_id == market_id,
+        ApprovalEvent.stage == "final",
+        ApprovalEvent.status == "pending"
+    ).order_by(ApprovalEvent.created_at.desc()).first()
+    
+    return event if event and event.message_id else None
+
+def process_deployment_decision(market: Market, event: ApprovalEvent, timeout_days: int = DEPLOYMENT_TIMEOUT_DAYS) -> str:
+    """
+    Check the reactions on a market's deployment approval message and act on them.
+    
+    Args:
+        market: Market pending deployment approval
+        event: Its pending final-stage ApprovalEvent
+        timeout_days: Days after which an undecided market is auto-rejected
         
-        # Reactions are returned as a dict {reaction_name: [user_ids]}
-        for reaction_name, users in reactions.items():
-            logger.info(f"Processing reaction: {reaction_name}")
-            
-            # Ensure users is a list
-            if not isinstance(users, list):
-                logger.warning(f"Expected list of users for reaction {reaction_name}, but got {type(users)}")
-                continue
-                
-            # Filter out bot user
-            non_bot_users = [user for user in users if user != BOT_USER_ID]
-            
-            # If only the bot reacted, skip this reaction
-            if not non_bot_users:
-                logger.info(f"Skipping reaction '{reaction_name}' - only from bot user {BOT_USER_ID}")
-                continue
-                
-            logger.info(f"Non-bot users who reacted with '{reaction_name}': {non_bot_users}")
-            
-            if reaction_name == "white_check_mark" or reaction_name == "+1" or reaction_name == "thumbsup":
-                has_approval = True
-                # Get first non-bot user who reacted as approver
-                approver = non_bot_users[0]
-                logger.info(f"Found approval reaction from user {approver}")
-            elif reaction_name == "x" or reaction_name == "-1" or reaction_name == "thumbsdown":
-                has_rejection = True
-                # Get first non-bot user who reacted as rejector
-                approver = non_bot_users[0]
-                logger.info(f"Found rejection reaction from user {approver}")
-                
-        logger.info(f"Final result: has_approval={has_approval}, has_rejection={has_rejection}, approver={approver}")
+    Returns:
+        str: "pending", "deployed", "failed", "rejected", "timeout" or "ignored"
+    """
+    # Get reactions for this message
+    reactions = get_message_reactions(event.message_id)
+    
+    # Debug logging
+    logger.info(f"Processing reactions for market {market.id} (message {event.message_id})")
+    logger.info(f"Got {len(reactions)} reactions: {reactions}")
+    
+    decision, approver = reaction_decision(reactions)
+    logger.info(f"Final result: decision={decision}, approver={approver}")
+    
+    return apply_deployment_decision(market, event, decision, approver, timeout_days)
+
+def apply_deployment_decision(market: Market, event: ApprovalEvent, decision: Optional[str], approver: Optional[str],
+                              timeout_days: int = DEPLOYMENT_TIMEOUT_DAYS) -> str:
+    """
+    Act on the deployment decision for a market.
+    
+    An approved market is deployed to Apechain; an undecided market is
+    auto-rejected once its approval message is older than timeout_days.
+    Status changes are added to the session; the caller commits.
+    
+    Before deploying, the market is claimed (moved to deploying and
+    committed under a row lock), so when several consumers see the same
+    approval only one deploys it; the others get "ignored".
+    
+    Args:
+        market: Market pending deployment approval
+        event: Its pending final-stage ApprovalEvent
+        decision: "approved", "rejected" or None (see reaction_decision)
+        approver: Slack user who decided
+        timeout_days: Days after which an undecided market is auto-rejected
+        
+    Returns:
+        str: "pending", "deployed", "failed", "rejected", "timeout" or "ignored"
+    """
+    market_id = market.id
+    timeout_date = datetime.utcnow() - timedelta(days=timeout_days)
+    
+    # Process based on reactions
+    if decision == "approved":
+        # Market is approved for deployment: claim it before sending the transaction
+        if not claim(market, "pending_deployment", "deploying", actor=approver):
+            return "ignored"
+        event.status = "approved"
         
-        # Process based on reactions
-        if has_approval and not has_rejection:
-            # Market is approved for deployment
-            event.status = "approved"
-            market.status = "deploying"
+        # Attempt to deploy to Apechain
+        try:
+            # Deploy market to Apechain
+            apechain_id, tx_hash = deploy_market_to_apechain(market)
             
-            # Attempt to deploy to Apechain
-            try:
-                # Deploy market to Apechain
-                apechain_id, tx_hash = deploy_market_to_apechain(market)
-                
-                if apechain_id:
-                    # Update market with deployment info
-                    market.apechain_market_id = apechain_id
-                    market.blockchain_tx = tx_hash
-                    market.status = "deployed"
-                    
-                    logger.info(f"Market {market_id} deployed to Apechain with ID {apechain_id}")
-                    approved += 1
-                else:
-                    # Deployment failed
-                    market.status = "deployment_failed"
-                    event.reason = "Deployment to Apechain failed"
-                    
-                    logger.error(f"Failed to deploy market {market_id} to Apechain")
-                    rejected += 1
-            except Exception as e:
-                # Deployment error
-                market.status = "deployment_failed"
-                event.reason = f"Deployment error: {str(e)}"
+            if apechain_id:
+                # Update market with deployment info
+                transition(market, "deployed", actor=approver)
+                market.apechain_market_id = apechain_id
+                market.blockchain_tx = tx_hash
                 
-                logger.error(f"Error deploying market {market_id} to Apechain: {str(e)}")
-                rejected += 1
+                logger.info(f"Market {market_id} deployed to Apechain with ID {apechain_id}")
+                return "deployed"
+            else:
+                # Deployment failed
+                transition(market, "deployment_failed", actor=approver, reason="Deployment to Apechain failed")
+                event.reason = "Deployment to Apechain failed"
                 
-        elif has_rejection:
-            # Market is rejected for deployment
-            event.status = "rejected"
-            market.status = "deployment_rejected"
+                logger.error(f"Failed to deploy market {market_id} to Apechain")
+                return "failed"
+        except Exception as e:
+            # Deployment error
+            event.reason = f"Deployment error: {str(e)}"
+            transition(market, "deployment_failed", actor=approver, reason=event.reason)
             
-            logger.info(f"Market {market_id} deployment rejected by {approver}")
-            rejected += 1
+            logger.error(f"Error deploying market {market_id} to Apechain: {str(e)}")
+            return "failed"
+            
+    elif decision == "rejected":
+        # Market is rejected for deployment
+        event.status = "rejected"
+        transition(market, "deployment_rejected", actor=approver)
+        
+        logger.info(f"Market {market_id} deployment rejected by {approver}")
+        return "rejected"
+        
+    else:
+        # Check if market has timed out (posted more than 7 days ago)
+        if event.created_at and event.created_at < timeout_date:
+            # Market has timed out, auto-reject
+            event.status = "timeout"
+            event.reason = f"Auto-rejected after {timeout_days} days"
+            transition(market, "deployment_timeout", reason=event.reason)
             
+            logger.info(f"Market {market_id} deployment auto-rejected due to {timeout_days}-day timeout")
+            return "timeout"
         else:
-            # Check if market has timed out (posted more than 7 days ago)
-            if event.created_at and event.created_at < timeout_date:
-                # Market has timed out, auto-reject
-                event.status = "timeout"
-                market.status = "deployment_timeout"
-                event.reason = f"Auto-rejected after {timeout_days} days"
-                
-                logger.info(f"Market {market_id} deployment auto-rejected due to {timeout_days}-day timeout")
-                rejected += 1
-            else:
-                # Still pending and within timeout period
-                still_pending += 1
-    
-    # Save all changes
-    db.session.commit()
-    
-    logger.info(f"Deployment approval results: {still_pending} still pending, {approved} approved, {rejected} rejected")
-    return (still_pending, approved, rejected)
+            # Still pending and within timeout period
+            return "pending"
 
 def main():
     """
@@ -488,7 +559,10 @@ def main():
     
     # Use application context for database operations
     with app.app_context():
-        # First post any new markets for deployment approval
+        # Move on markets left deploying by an interrupted run
+        reconcile_stale_deployments()
+        
+        # Then post any new markets for deployment approval
         posted = post_markets_for_deployment_approval()
         print(f"Posted {len(posted)} markets for deployment approval")
         
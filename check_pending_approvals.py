@@ -12,13 +12,12 @@ It handles the following steps in the pipeline:
 3. Moves approved markets to the main Market table
 """
 
-import os
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 
-from flask import Flask
+from utils.database import create_app, init_db
 from utils.messaging import get_message_reactions
 from models import db, PendingMarket, ApprovalLog, Market
 
@@ -30,13 +29,8 @@ logging.basicConfig(
 logger = logging.getLogger("approval_checker")
 
 # Import Flask app for database context
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-db.init_app(app)
+app = create_app(__name__)
+init_db(app, db)
 
 def check_market_approvals() -> Tuple[int, int, int]:
     """
@@ -62,53 +56,69 @@ def check_market_approvals() -> Tuple[int, int, int]:
     rejected_count = 0
     
     for market in pending_markets:
-        # Skip if no Slack message ID
-        if not market.slack_message_id:
-            continue
-        
-        # Get reactions on the Slack message
-        reactions = get_message_reactions(market.slack_message_id)
-        
-        # Check for approval (thumbsup)
-        approved = any(
-            reaction in reactions 
-            for reaction in ['thumbsup', '+1']
-        )
-        
-        # Check for rejection (thumbsdown)
-        rejected = any(
-            reaction in reactions 
-            for reaction in ['thumbsdown', '-1']
-        )
-        
-        # Skip if no decision yet
-        if not approved and not rejected:
-            continue
-        
-        # Create approval log entry
-        approval_log = ApprovalLog(
-            poly_id=market.poly_id,
-            slack_msg_id=market.slack_message_id,
-            decision="approved" if approved else "rejected",
-            created_at=datetime.utcnow()
-        )
-        db.session.add(approval_log)
-        
-        # For approved markets, create entry in main Market table
-        if approved:
-            # Create market entry
-            create_market_entry(market)
+        decision = check_market_approval(market)
+        if decision == "approved":
             approved_count += 1
-            logger.info(f"Market approved: {market.question[:50]}...")
-        else:
+        elif decision == "rejected":
             rejected_count += 1
-            logger.info(f"Market rejected: {market.question[:50]}...")
-        
-        # Commit changes
-        db.session.commit()
     
     return len(pending_markets), approved_count, rejected_count
 
+def check_market_approval(market: PendingMarket) -> Optional[str]:
+    """
+    Check the Slack reactions of one posted pending market and record the decision.
+    
+    Args:
+        market: Posted PendingMarket model instance
+        
+    Returns:
+        Optional[str]: "approved" or "rejected", or None if there is no decision yet
+    """
+    # Skip if no Slack message ID
+    if not market.slack_message_id:
+        return None
+    
+    # Get reactions on the Slack message
+    reactions = get_message_reactions(market.slack_message_id)
+    
+    # Check for approval (thumbsup)
+    approved = any(
+        reaction in reactions 
+        for reaction in ['thumbsup', '+1']
+    )
+    
+    # Check for rejection (thumbsdown)
+    rejected = any(
+        reaction in reactions 
+        for reaction in ['thumbsdown', '-1']
+    )
+    
+    # Skip if no decision yet
+    if not approved and not rejected:
+        return None
+    
+    # Create approval log entry
+    approval_log = ApprovalLog(
+        poly_id=market.poly_id,
+        slack_msg_id=market.slack_message_id,
+        decision="approved" if approved else "rejected",
+        created_at=datetime.utcnow()
+    )
+    db.session.add(approval_log)
+    
+    # For approved markets, create entry in main Market table
+    if approved:
+        # Create market entry
+        create_market_entry(market)
+        logger.info(f"Market approved: {market.question[:50]}...")
+    else:
+        logger.info(f"Market rejected: {market.question[:50]}...")
+    
+    # Commit changes
+    db.session.commit()
+    
+    return approval_log.decision
+
 def create_market_entry(pending_market: PendingMarket) -> bool:
     """
     Create an entry in the Market table for an approved market.
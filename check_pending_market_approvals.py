@@ -15,10 +15,8 @@ from typing import Dict, List, Any, Optional, Tuple
 import json
 
 from models import db, Market, PendingMarket, ApprovalLog
-from utils.messaging import get_channel_messages, get_message_reactions
-
-# Bot user ID to ignore its reactions (this is the ID that's adding the initial reactions)
-BOT_USER_ID = "U08QJHCKABG"
+from utils.database import load_scalars
+from utils.messaging import get_channel_messages, get_message_reactions, reaction_decision
 
 # Configure logging
 logging.basicConfig(
@@ -35,9 +33,11 @@ def check_pending_market_approvals() -> Tuple[int, int, int]:
         Tuple[int, int, int]: Count of (pending, approved, rejected) markets
     """
     # Get markets that have been posted to Slack but not yet approved/rejected
-    pending_markets = PendingMarket.query.filter(
+    # Only IDs and message timestamps are needed to check reactions; JSON
+    # columns are loaded for the few markets that get approved
+    pending_markets = load_scalars(PendingMarket.query.filter(
         PendingMarket.slack_message_id.isnot(None)
-    ).all()
+    ), PendingMarket).all()
     
     logger.info(f"Checking approvals for {len(pending_markets)} pending markets")
     
@@ -68,81 +68,20 @@ def check_pending_market_approvals() -> Tuple[int, int, int]:
         logger.info(f"Processing reactions for market {market.poly_id} (message {market.slack_message_id})")
         logger.info(f"Got {len(reactions)} reactions: {reactions}")
         
-        # Check for approval (white_check_mark) or rejection (x) reactions
-        has_approval = False
-        has_rejection = False
-        reviewer = None
-        
-        # Reactions are returned as a dict {reaction_name: [user_ids]}
-        for reaction_name, users in reactions.items():
-            logger.info(f"Processing reaction: {reaction_name}")
-            
-            # Ensure users is a list
-            if not isinstance(users, list):
-                logger.warning(f"Expected list of users for reaction {reaction_name}, but got {type(users)}")
-                continue
-                
-            # Filter out bot user
-            non_bot_users = [user for user in users if user != BOT_USER_ID]
-            
-            # If only the bot reacted, skip this reaction
-            if not non_bot_users:
-                logger.info(f"Skipping reaction '{reaction_name}' - only from bot user {BOT_USER_ID}")
-                continue
-                
-            logger.info(f"Non-bot users who reacted with '{reaction_name}': {non_bot_users}")
-            
-            if reaction_name == "white_check_mark" or reaction_name == "+1" or reaction_name == "thumbsup":
-                has_approval = True
-                # Get first non-bot user who reacted as approver
-                reviewer = non_bot_users[0]
-                logger.info(f"Found approval reaction from user {reviewer}")
-            elif reaction_name == "x" or reaction_name == "-1" or reaction_name == "thumbsdown":
-                has_rejection = True
-                # Get first non-bot user who reacted as rejector
-                reviewer = non_bot_users[0]
-                logger.info(f"Found rejection reaction from user {reviewer}")
-                
-        logger.info(f"Final result: has_approval={has_approval}, has_rejection={has_rejection}, reviewer={reviewer}")
+        decision, reviewer = reaction_decision(reactions)
+        logger.info(f"Final result: decision={decision}, reviewer={reviewer}")
         
         # Process based on reactions
-        if has_approval and not has_rejection:
-            # Market is approved
-            approval_log = ApprovalLog(
-                poly_id=market.poly_id,
-                slack_msg_id=market.slack_message_id,
-                reviewer=reviewer,
-                decision='approved'
-            )
-            db.session.add(approval_log)
-            
-            # Create entry in main Market table
-            success = create_market_entry(market)
-            
-            # Log result
-            if success:
-                logger.info(f"Market {market.poly_id} approved by {reviewer}")
+        if decision == "approved":
+            if record_market_decision(market, decision, reviewer):
                 approved += 1
             else:
-                logger.error(f"Failed to create Market entry for {market.poly_id}")
                 still_pending += 1
                 
-        elif has_rejection:
-            # Market is rejected
-            approval_log = ApprovalLog(
-                poly_id=market.poly_id,
-                slack_msg_id=market.slack_message_id,
-                reviewer=reviewer,
-                decision='rejected'
-            )
-            db.session.add(approval_log)
-            
-            logger.info(f"Market {market.poly_id} rejected by {reviewer}")
+        elif decision == "rejected":
+            record_market_decision(market, decision, reviewer)
             rejected += 1
             
-            # Remove from pending markets
-            db.session.delete(market)
-            
         else:
             # Check if market has timed out
             if market.is_expired():
@@ -171,6 +110,44 @@ def check_pending_market_approvals() -> Tuple[int, int, int]:
     return (still_pending, approved, rejected)
 
 
+def record_market_decision(market: PendingMarket, decision: str, reviewer: Optional[str]) -> bool:
+    """
+    Record the approval or rejection of a pending market.
+    
+    The decision is logged in approvals_log. Approved markets get a Market
+    entry; rejected markets are removed from pending markets. Changes are
+    added to the session; the caller commits.
+    
+    Args:
+        market: PendingMarket model instance
+        decision: "approved" or "rejected"
+        reviewer: Slack user who decided
+        
+    Returns:
+        bool: True if the decision was recorded
+    """
+    approval_log = ApprovalLog(
+        poly_id=market.poly_id,
+        slack_msg_id=market.slack_message_id,
+        reviewer=reviewer,
+        decision=decision
+    )
+    db.session.add(approval_log)
+    
+    if decision == "approved":
+        # Create entry in main Market table
+        if not create_market_entry(market):
+            logger.error(f"Failed to create Market entry for {market.poly_id}")
+            return False
+        logger.info(f"Market {market.poly_id} approved by {reviewer}")
+        return True
+    
+    logger.info(f"Market {market.poly_id} rejected by {reviewer}")
+    
+    # Remove from pending markets
+    db.session.delete(market)
+    return True
+
 def create_market_entry(pending_market: PendingMarket) -> bool:
     """
     Create an entry in the Market table for an approved market.
@@ -6,45 +6,35 @@ This script displays information about the current state of the pipeline,
 including counts of markets at different stages and recent pipeline runs.
 """
 
-import os
 import sys
 from datetime import datetime, timedelta
-from flask import Flask
+from utils.database import create_app, init_db
 from sqlalchemy import desc
 
 # Initialize Flask app for database context
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app = create_app(__name__)
 
 # Import database models
-from models_updated import db, Event, Market, PendingMarket, ProcessedMarket
-db.init_app(app)
+from models_updated import db, Market, ProcessedMarket, StageCounter, STAGE_COUNTER_MODELS
+from utils.stage_counters import read_stage_counts, rebuild_stage_counters, counts_by_prefix
+init_db(app, db)
 
 def check_pipeline_status():
     """Display the current status of the pipeline."""
     with app.app_context():
-        # Get counts of markets at different stages
-        total_events = db.session.query(Event).count()
-        total_markets = db.session.query(Market).count()
-        pending_markets = db.session.query(PendingMarket).count()
-        pending_unposted = db.session.query(PendingMarket).filter_by(posted=False).count()
-        pending_posted = db.session.query(PendingMarket).filter_by(posted=True).count()
+        # Get counts of markets at different stages from the stage counters
+        counts = read_stage_counts(db.session, STAGE_COUNTER_MODELS, StageCounter)
+        total_events = counts.get("events", 0)
+        total_markets = counts.get("markets", 0)
+        pending_markets = counts.get("pending", 0)
+        pending_unposted = counts.get("pending.unposted", 0)
+        pending_posted = counts.get("pending.posted", 0)
         
         # Get counts by category
-        category_counts = db.session.query(
-            Market.category, 
-            db.func.count(Market.id)
-        ).group_by(Market.category).all()
+        category_counts = counts_by_prefix(counts, "markets.category.").items()
         
         # Get counts of markets by status
-        status_counts = db.session.query(
-            Market.status, 
-            db.func.count(Market.id)
-        ).group_by(Market.status).all()
+        status_counts = counts_by_prefix(counts, "markets.status.").items()
         
         # Get recent pipeline runs (if available)
         recent_runs = []
@@ -56,11 +46,8 @@ def check_pipeline_status():
         except:
             pass
         
-        # Get markets ready for deployment
-        deployable_markets = db.session.query(PendingMarket).filter_by(
-            posted=True, 
-            status='approved'
-        ).count()
+        # Get markets ready for deployment (approved markets not yet deployed)
+        deployable_markets = counts.get("markets.status.approved", 0)
         
         # Print status information
         print("\n=== PIPELINE STATUS ===")
@@ -113,6 +100,10 @@ def check_pipeline_status():
 
 def main():
     """Main function."""
+    if "--rebuild-counters" in sys.argv:
+        # Recompute the stage counters, e.g. after rows were changed with raw SQL
+        with app.app_context():
+            rebuild_stage_counters(db.session, STAGE_COUNTER_MODELS, StageCounter)
     check_pipeline_status()
     return 0
 
@@ -103,43 +103,15 @@ def clean_slack_channel(max_messages=50):
     """
     try:
         from utils.slack import slack_client, SLACK_CHANNEL_ID
+        from utils.slack_cleanup import clean_channel_messages
         
         if not slack_client or not SLACK_CHANNEL_ID:
             logger.error("Slack client not initialized - check environment variables")
             return False
         
-        # Get channel history
-        response = slack_client.conversations_history(
-            channel=SLACK_CHANNEL_ID,
-            limit=max_messages
-        )
+        stats = clean_channel_messages(slack_client, SLACK_CHANNEL_ID, max_messages=max_messages)
         
-        if not response.get('ok'):
-            logger.error(f"Failed to get channel history: {response.get('error')}")
-            return False
-            
-        messages = response.get('messages', [])
-        logger.info(f"Found {len(messages)} messages to clean")
-        
-        # Delete each message
-        deleted_count = 0
-        for message in messages:
-            try:
-                result = slack_client.chat_delete(
-                    channel=SLACK_CHANNEL_ID,
-                    ts=message['ts']
-                )
-                
-                if result.get('ok'):
-                    deleted_count += 1
-                    logger.info(f"Deleted message {message['ts']}")
-                else:
-                    logger.warning(f"Failed to delete message {message['ts']}: {result.get('error')}")
-                    
-            except Exception as e:
-                logger.error(f"Error deleting message: {str(e)}")
-        
-        logger.info(f"Successfully cleaned {deleted_count} messages from Slack channel")
+        logger.info(f"Successfully cleaned {stats['deleted']} of {stats['selected']} messages from Slack channel")
         return True
         
     except Exception as e:
@@ -9,24 +9,23 @@ This is typically done as part of the approval process but is being done separat
 
 from main import app
 from models import db, PendingMarket, Market
+from utils.database import iter_chunks
 
 def clean_pending_approved_markets():
     """Remove pending markets that have already been approved and added to the main markets table."""
     
-    # Get all markets from the main table
-    approved_markets = Market.query.all()
-    approved_ids = [market.id for market in approved_markets]
-    
     # Find pending markets with IDs that match approved market IDs
-    pending_to_remove = PendingMarket.query.filter(PendingMarket.poly_id.in_(approved_ids)).all()
+    pending_to_remove = PendingMarket.query.filter(PendingMarket.poly_id.in_(db.session.query(Market.id)))
     
-    print(f"Found {len(pending_to_remove)} pending markets that have already been approved:")
-    for pending in pending_to_remove:
-        print(f"  - {pending.poly_id}: {pending.question}")
-        db.session.delete(pending)
+    print("Pending markets that have already been approved:")
+    removed = 0
+    for chunk in iter_chunks(pending_to_remove, PendingMarket.poly_id, session=db.session):
+        for pending in chunk:
+            print(f"  - {pending.poly_id}: {pending.question}")
+            db.session.delete(pending)
+        removed += len(chunk)
     
-    db.session.commit()
-    print(f"Removed {len(pending_to_remove)} pending markets that were already approved")
+    print(f"Removed {removed} pending markets that were already approved")
 
 if __name__ == "__main__":
     with app.app_context():
@@ -3,16 +3,17 @@
 Clean Slack Channel
 
 This script removes all messages from the Slack channel to provide a clean slate
-for testing the pipeline.
+for testing the pipeline. Messages can be limited to bot messages, a time range
+or the messages recorded for markets in the database (see utils/slack_cleanup.py).
 """
 
-import os
 import sys
-import time
+import argparse
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Optional, Set
 
-from utils.messaging import get_channel_history, delete_message
+from utils.messaging import slack_client, SLACK_CHANNEL_ID
+from utils.slack_cleanup import clean_channel_messages, DEFAULT_WORKERS, DELETE_RATE_PER_MINUTE
 
 # Configure logging
 logging.basicConfig(
@@ -22,77 +23,109 @@ logging.basicConfig(
 )
 logger = logging.getLogger('slack_cleaner')
 
+def market_message_ids() -> Set[str]:
+    """
+    Get the Slack message IDs the pipeline recorded for markets.
+    
+    Returns:
+        Set of message timestamps
+    """
+    from main import app
+    from models import PendingMarket, ProcessedMarket, ApprovalEvent
+    from utils.database import column_values
+    
+    with app.app_context():
+        message_ids = set(column_values(PendingMarket.query.filter(PendingMarket.slack_message_id.isnot(None)),
+                                        PendingMarket.slack_message_id))
+        message_ids.update(column_values(ProcessedMarket.query.filter(ProcessedMarket.message_id.isnot(None)),
+                                         ProcessedMarket.message_id))
+        message_ids.update(column_values(ApprovalEvent.query.filter(ApprovalEvent.message_id.isnot(None)),
+                                         ApprovalEvent.message_id))
+    
+    logger.info(f"Found {len(message_ids)} market message IDs in the database")
+    return message_ids
+
 def clean_channel(
-    batch_size: int = 100, 
-    rate_limit_delay: float = 0.5, 
-    max_messages: int = 1000
+    max_messages: Optional[int] = None,
+    bot_only: bool = False,
+    oldest: Optional[str] = None,
+    latest: Optional[str] = None,
+    market_only: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    rate_per_minute: float = DELETE_RATE_PER_MINUTE,
+    dry_run: bool = False
 ) -> int:
     """
-    Clean all messages from the Slack channel.
+    Clean messages from the Slack channel.
     
     Args:
-        batch_size: Number of messages to fetch and delete at once
-        rate_limit_delay: Delay between deletions to avoid rate limiting
-        max_messages: Maximum number of messages to delete (safety limit)
+        max_messages: Maximum number of messages to delete (None for all)
+        bot_only: Only delete messages posted by bots
+        oldest: Only delete messages after this Slack timestamp
+        latest: Only delete messages before this Slack timestamp
+        market_only: Only delete messages recorded for markets in the database
+        workers: Number of concurrent deletes
+        rate_per_minute: Deletes per minute across all workers
+        dry_run: Only count the messages that would be deleted
         
     Returns:
         Number of messages deleted
     """
-    deleted_count = 0
-    total_fetched = 0
-    cursor = None
+    if not slack_client or not SLACK_CHANNEL_ID:
+        logger.error("Slack client not initialized - check SLACK_BOT_TOKEN and SLACK_CHANNEL_ID")
+        return 0
     
     logger.info("Starting Slack channel cleanup...")
     
-    while total_fetched < max_messages:
-        # Get a batch of messages
-        messages, next_cursor = get_channel_history(limit=batch_size, cursor=cursor)
-        
-        if not messages:
-            logger.info("No more messages found in the channel")
-            break
-        
-        total_fetched += len(messages)
-        logger.info(f"Fetched {len(messages)} messages (total: {total_fetched})")
-        
-        # Delete each message
-        for message in messages:
-            ts = message.get('ts')
-            
-            if not ts:
-                logger.warning("Message missing timestamp, skipping")
-                continue
-            
-            # Skip messages that can't be deleted by bots (e.g., system messages)
-            if message.get('subtype') in ['bot_add', 'channel_join', 'channel_purpose', 'channel_topic']:
-                logger.info(f"Skipping system message with subtype: {message.get('subtype')}")
-                continue
-            
-            # Try to delete the message
-            success = delete_message(ts)
-            
-            if success:
-                deleted_count += 1
-                logger.info(f"Deleted message {ts} ({deleted_count}/{total_fetched})")
-            else:
-                logger.warning(f"Failed to delete message {ts}")
-            
-            # Add delay to avoid rate limiting
-            time.sleep(rate_limit_delay)
-        
-        # Set cursor for next batch if available
-        if next_cursor:
-            cursor = next_cursor
-        else:
-            break
+    stats = clean_channel_messages(
+        slack_client,
+        SLACK_CHANNEL_ID,
+        bot_only=bot_only,
+        oldest=oldest,
+        latest=latest,
+        message_ts=market_message_ids() if market_only else None,
+        max_messages=max_messages,
+        workers=workers,
+        rate_per_minute=rate_per_minute,
+        dry_run=dry_run
+    )
     
-    logger.info(f"Channel cleanup completed. Deleted {deleted_count} out of {total_fetched} messages.")
-    return deleted_count
+    if dry_run:
+        logger.info(f"Dry run: {stats['selected']} of {stats['fetched']} messages would be deleted")
+    return stats['deleted']
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Delete messages from the Slack channel.')
+    parser.add_argument('--max-messages', type=int, default=None,
+                        help='Maximum number of messages to delete (default: all)')
+    parser.add_argument('--bot-only', action='store_true', help='Only delete messages posted by bots')
+    parser.add_argument('--oldest', help='Only delete messages after this Slack timestamp')
+    parser.add_argument('--latest', help='Only delete messages before this Slack timestamp')
+    parser.add_argument('--market-only', action='store_true',
+                        help='Only delete messages recorded for markets in the database')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of concurrent deletes')
+    parser.add_argument('--rate', type=float, default=DELETE_RATE_PER_MINUTE,
+                        help='Deletes per minute across all workers (Slack rate limits slow them down further)')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the messages that would be deleted')
+    return parser.parse_args(argv)
 
-def main():
+def main(args: Optional[argparse.Namespace] = None):
     """Main function to clean the Slack channel."""
+    if args is None:
+        args = parse_args([])
+    
     try:
-        deleted_count = clean_channel()
+        deleted_count = clean_channel(
+            max_messages=args.max_messages,
+            bot_only=args.bot_only,
+            oldest=args.oldest,
+            latest=args.latest,
+            market_only=args.market_only,
+            workers=args.workers,
+            rate_per_minute=args.rate,
+            dry_run=args.dry_run
+        )
         
         if deleted_count > 0:
             logger.info(f"Successfully deleted {deleted_count} messages from Slack channel")
@@ -106,4 +139,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main(parse_args()))
@@ -7,7 +7,6 @@ It will attempt to delete as many messages as possible from the Slack channel.
 
 import sys
 import logging
-import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,73 +24,15 @@ def clean_slack_channel(max_messages=100):
     """
     try:
         from utils.slack import slack_client, SLACK_CHANNEL_ID
+        from utils.slack_cleanup import clean_channel_messages
         
         if not slack_client or not SLACK_CHANNEL_ID:
             logger.error("Slack client not initialized - check environment variables")
             return False
         
-        # Get channel history in batches
-        total_deleted = 0
-        total_attempts = 0
-        cursor = None
+        stats = clean_channel_messages(slack_client, SLACK_CHANNEL_ID, max_messages=max_messages)
         
-        while total_attempts < max_messages:
-            # Get a batch of messages
-            response = slack_client.conversations_history(
-                channel=SLACK_CHANNEL_ID,
-                limit=20,
-                cursor=cursor
-            )
-            
-            if not response.get('ok'):
-                logger.error(f"Failed to get channel history: {response.get('error')}")
-                return False
-                
-            messages = response.get('messages', [])
-            if not messages:
-                logger.info("No more messages to delete")
-                break
-                
-            logger.info(f"Found {len(messages)} messages in this batch")
-            
-            # Try to delete each message
-            for message in messages:
-                ts = message.get('ts')
-                total_attempts += 1
-                
-                if not ts:
-                    continue
-                    
-                try:
-                    result = slack_client.chat_delete(
-                        channel=SLACK_CHANNEL_ID,
-                        ts=ts
-                    )
-                    
-                    if result.get('ok'):
-                        total_deleted += 1
-                        logger.info(f"Deleted message {ts}")
-                    else:
-                        error = result.get('error')
-                        logger.warning(f"Failed to delete message {ts}: {error}")
-                        
-                        # If we get rate limited, pause briefly
-                        if error == 'ratelimited':
-                            logger.info("Rate limited - pausing for 5 seconds")
-                            time.sleep(5)
-                except Exception as e:
-                    logger.error(f"Error deleting message {ts}: {str(e)}")
-                
-                # Small pause to avoid rate limits
-                time.sleep(0.5)
-            
-            # Get next cursor for pagination
-            cursor = response.get('response_metadata', {}).get('next_cursor')
-            if not cursor:
-                logger.info("No more pages of messages")
-                break
-        
-        logger.info(f"Successfully cleaned {total_deleted} of {total_attempts} messages from Slack channel")
+        logger.info(f"Successfully cleaned {stats['deleted']} of {stats['selected']} messages from Slack channel")
         return True
         
     except Exception as e:
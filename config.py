@@ -1,6 +1,11 @@
 """
 Configuration module for the Polymarket pipeline.
 Loads environment variables and sets up configuration parameters.
+
+Importing it has no side effects beyond reading the environment: the data,
+tmp and logs directories are created by ensure_directories(), which the
+entry points writing to them call, and the log file is only opened when a
+record is written.
 """
 
 import os
@@ -22,7 +27,7 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler(f"transform_data.log")
+        logging.FileHandler("transform_data.log", delay=True)
     ]
 )
 
@@ -35,9 +40,10 @@ DATA_DIR = os.path.join(BASE_DIR, "data")
 TMP_DIR = os.path.join(BASE_DIR, "tmp")
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 
-# Create directories if they don't exist
-for directory in [DATA_DIR, TMP_DIR, LOGS_DIR]:
-    os.makedirs(directory, exist_ok=True)
+def ensure_directories():
+    """Create the data, tmp and logs directories if they don't exist."""
+    for directory in [DATA_DIR, TMP_DIR, LOGS_DIR]:
+        os.makedirs(directory, exist_ok=True)
 
 # Polymarket configuration
 POLYMARKET_BASE = os.environ.get("POLYMARKET_BASE", "https://clob.polymarket.com")
@@ -72,22 +78,27 @@ APPROVAL_WINDOW_MINUTES = int(os.environ.get("APPROVAL_WINDOW_MINUTES", "30"))
 MAX_MARKETS_PER_RUN = int(os.environ.get("MAX_MARKETS_PER_RUN", "10"))
 MAX_MARKETS_TO_POST = int(os.environ.get("MAX_MARKETS_TO_POST", "10"))
 
+# Background job queue configuration (web interface)
+JOB_QUEUE_MAX_WORKERS = int(os.environ.get("JOB_QUEUE_MAX_WORKERS", "4"))
+
 # Get the current timestamp
 TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
 
 # Log file path
 LOG_FILE = os.path.join(LOGS_DIR, f"pipeline_{TIMESTAMP}.log")
 
-# State file for the pipeline
+# State file for the pipeline (legacy JSON state is imported from STATE_FILE on first use)
 STATE_FILE = os.path.join(TMP_DIR, "pipeline_state.json")
+STATE_DB_FILE = os.environ.get("STATE_DB_FILE", os.path.join(TMP_DIR, "pipeline_state.db"))
+STATE_CACHE_SIZE = int(os.environ.get("STATE_CACHE_SIZE", "1024"))
 
 # Display configuration summary (excluding secrets)
-logger.info(f"Polymarket base URL: {POLYMARKET_BASE}")
-logger.info(f"Messaging platform: {MESSAGING_PLATFORM}")
-logger.info(f"Approval window: {APPROVAL_WINDOW_MINUTES} minutes")
-logger.info(f"Data directory: {DATA_DIR}")
-logger.info(f"Temporary directory: {TMP_DIR}")
-logger.info(f"Logs directory: {LOGS_DIR}")
+logger.debug(f"Polymarket base URL: {POLYMARKET_BASE}")
+logger.debug(f"Messaging platform: {MESSAGING_PLATFORM}")
+logger.debug(f"Approval window: {APPROVAL_WINDOW_MINUTES} minutes")
+logger.debug(f"Data directory: {DATA_DIR}")
+logger.debug(f"Temporary directory: {TMP_DIR}")
+logger.debug(f"Logs directory: {LOGS_DIR}")
 
 # Check if required environment variables are set
 required_vars = {
@@ -102,4 +113,4 @@ if missing_vars:
     logger.warning(f"Missing required environment variables: {', '.join(missing_vars)}")
     logger.warning("Some functionality may not work correctly.")
 else:
-    logger.info("All required environment variables are set.")
\ No newline at end of file
+    logger.debug("All required environment variables are set.")
\ No newline at end of file
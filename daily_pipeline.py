@@ -4,12 +4,35 @@ Daily Pipeline Runner
 
 This script runs the production pipeline and logs the execution.
 It's designed to be called by a cron job for daily execution.
+
+The run is made of two streams running at the same time (see
+utils/stream_pipeline.py):
+
+1. Intake: fetch -> filter -> categorize -> store -> post to Slack, the
+   streaming stages of run_pipeline_with_events.py
+2. Approvals: approval scan -> deployment approval message (banner) ->
+   deploy. Markets approved in Slack during the approval window are posted
+   for deployment approval as soon as the approval is seen, and deployed as
+   soon as the deployment approval arrives, instead of waiting for someone
+   to run check_pending_approvals.py and check_deployment_approvals.py.
+   Each scan checks the reactions of every market pending deployment
+   approval once and only sends the decided ones (approved, rejected or
+   timed out) to the deploy stage, so undecided markets don't hold a worker.
+
+Markets approved or posted for deployment in earlier runs are picked up
+by the approval stream too. Deployment still needs the final approval
+reaction in Slack.
 """
 
 import sys
+import time
 import logging
+import argparse
 import datetime
+import threading
+import contextvars
 from pathlib import Path
+from typing import List, Optional
 
 # Configure logging to a dated log file
 log_dir = Path("logs")
@@ -26,30 +49,182 @@ logging.basicConfig(
 )
 logger = logging.getLogger("daily_pipeline")
 
-def main():
+# How long the approval stream keeps watching Slack (minutes)
+DEFAULT_APPROVAL_WINDOW = 60
+
+# Seconds between two checks of the Slack reactions
+APPROVAL_POLL_INTERVAL = 60
+
+# Markets deployed concurrently
+DEPLOY_WORKERS = 4
+
+# Market statuses posted for deployment approval by the approval stream
+APPROVED_STATUSES = ("new", "approved")
+
+def approval_pipeline(window: float, poll_interval: float = APPROVAL_POLL_INTERVAL):
+    """
+    Build the approval stream: approval scan -> banner -> deploy.
+
+    Args:
+        window: Seconds during which Slack is watched for decisions
+        poll_interval: Seconds between two checks of the Slack reactions
+
+    Returns:
+        StreamPipeline: The approval stream, ready to run
+    """
+    from sqlalchemy import select
+    from check_pending_approvals import app, check_market_approval
+    from check_deployment_approvals import (post_market_for_deployment_approval, pending_deployment_event,
+                                            process_deployment_decision, get_message_reactions,
+                                            reaction_decision, DEPLOYMENT_TIMEOUT_DAYS)
+    from models import db, Market, PendingMarket, ApprovalLog
+    from utils.lifecycle import work_queue
+    from utils.stream_pipeline import StreamPipeline
+
+    deadline = time.monotonic() + window
+
+    # Markets sent to the deploy stage (until their decision is applied)
+    deciding = set()
+
+    def waiting() -> bool:
+        """Sleep until the next poll; False once the window is over."""
+        if pipeline.stopping or time.monotonic() + poll_interval > deadline:
+            return False
+        time.sleep(poll_interval)
+        return True
+
+    def decided(market) -> bool:
+        """Check whether the deployment approval of a market was decided (or timed out)."""
+        event = pending_deployment_event(market.id)
+        if event is None:
+            return False
+        decision, _ = reaction_decision(get_message_reactions(event.message_id))
+        timeout_date = datetime.datetime.utcnow() - datetime.timedelta(days=DEPLOYMENT_TIMEOUT_DAYS)
+        return decision is not None or (event.created_at is not None and event.created_at < timeout_date)
+
+    def scan(emit):
+        emitted = set()
+        while True:
+            db.session.expire_all()
+
+            # Markets approved in Slack since the last check
+            undecided = PendingMarket.query.filter(
+                PendingMarket.posted == True,
+                PendingMarket.slack_message_id.isnot(None),
+                PendingMarket.poly_id.notin_(select(ApprovalLog.poly_id))
+            ).all()
+            for pending_market in undecided:
+                check_market_approval(pending_market)
+
+            # Approved markets, from this check or earlier runs, not posted for deployment approval yet
+            for status in APPROVED_STATUSES:
+                for market in work_queue(Market, status).filter(Market.apechain_market_id == None).all():
+                    if market.id not in emitted:
+                        emitted.add(market.id)
+                        emit(market.id)
+
+            # Markets whose deployment approval was decided since the last check
+            for market in work_queue(Market, "pending_deployment").filter(Market.apechain_market_id == None).all():
+                if market.id not in deciding and decided(market):
+                    deciding.add(market.id)
+                    emit(market.id)
+
+            if not waiting():
+                return
+
+    def post_banner(market_id, emit):
+        market = Market.query.get(market_id)
+        if market is None:
+            return
+        if market.status == "pending_deployment":
+            # Decided by the scan: on to the deploy stage
+            emit(market_id)
+        elif not post_market_for_deployment_approval(market):
+            db.session.rollback()
+        else:
+            # Its decision is checked by the next scans
+            db.session.commit()
+
+    def deploy(market_id, emit):
+        db.session.expire_all()
+        market = Market.query.get(market_id)
+        event = pending_deployment_event(market_id)
+        if market is None or event is None:
+            return
+
+        outcome = process_deployment_decision(market, event)
+        db.session.commit()
+        if outcome == "deployed":
+            emit(market_id)
+        elif outcome == "pending":
+            # The reaction was removed since the scan: check the market again
+            deciding.discard(market_id)
+
+    pipeline = StreamPipeline("approvals", scan, source_name="approval_scan", source_context=app.app_context)
+    pipeline.stage("banner", post_banner, context=app.app_context)
+    pipeline.stage("deploy", deploy, workers=DEPLOY_WORKERS, context=app.app_context)
+    return pipeline
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Run the daily Polymarket pipeline.')
+    parser.add_argument('--max-markets', type=int, default=20, help='Maximum number of binary markets to process')
+    parser.add_argument('--max-events', type=int, default=10, help='Maximum number of events to process')
+    parser.add_argument('--approval-window', type=float, default=DEFAULT_APPROVAL_WINDOW,
+                        help='Minutes to keep watching Slack for approvals (0 checks once)')
+    parser.add_argument('--poll-interval', type=float, default=APPROVAL_POLL_INTERVAL,
+                        help='Seconds between two checks of the Slack reactions')
+    parser.add_argument('--no-approvals', action='store_true', help='Only run the intake stream')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
     """Run the production pipeline."""
+    args = parse_args(argv)
     logger.info("Starting daily pipeline run")
-    
+
     try:
         # Import and run the actual pipeline
         from run_pipeline_with_events import run_pipeline
-        
-        # Run with standard settings (fetch up to 20 markets, post up to 10 to Slack)
-        result = run_pipeline(max_markets=20)
-        
+        from utils.stream_pipeline import stream_errors
+
+        # The intake stream runs next to the approval stream
+        results = []
+        intake = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(lambda: results.append(run_pipeline(max_markets=args.max_markets, max_events=args.max_events,
+                                                      streaming=True)),),
+            name="intake"
+        )
+        intake.start()
+
+        approval_errors = {}
+        if not args.no_approvals:
+            stats = approval_pipeline(args.approval_window * 60, args.poll_interval).run()
+            logger.info(f"Approval stream: {stats['banner']['items_in'] - stats['deploy']['items_in']} markets "
+                        f"posted for deployment approval, {stats['deploy']['items_in']} decided, "
+                        f"{stats['deploy']['items_out']} deployed")
+            approval_errors = stream_errors(stats)
+            if approval_errors:
+                logger.error(f"Errors in approval stream stages: {approval_errors}")
+
+        intake.join()
+        result = results[0] if results else 1
+        if result == 0 and approval_errors:
+            result = 1
+
         if result == 0:
             logger.info("Pipeline completed successfully")
         else:
             logger.error(f"Pipeline failed with exit code {result}")
-        
+
         return result
-    
+
     except Exception as e:
         logger.exception(f"Unhandled exception in pipeline: {str(e)}")
         return 1
-    
+
     finally:
         logger.info("Daily pipeline run completed")
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -19,9 +19,10 @@ from datetime import datetime
 import time
 from typing import List, Tuple, Optional, Dict, Any
 
-from main import app
 from models import db, Market, PipelineRun
+from utils.database import create_app, init_db
 from utils.apechain import deploy_market_to_apechain, get_deployed_market_id_from_tx
+from utils.lifecycle import transition, work_queue
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +31,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger("deploy_markets")
 
+# Flask app for database context
+app = create_app(__name__)
+init_db(app, db)
+
 def create_pipeline_run() -> Optional[PipelineRun]:
     """Create a new pipeline run record in the database."""
     try:
@@ -79,8 +84,7 @@ def find_markets_for_deployment() -> List[Market]:
     try:
         # Query markets that have been approved for deployment but not yet deployed
         # Status should be 'deployment_approved' and no blockchain_tx
-        markets = Market.query.filter(
-            Market.status == 'deployment_approved',
+        markets = work_queue(Market, 'deployment_approved').filter(
             Market.blockchain_tx.is_(None)
         ).all()
         
@@ -166,9 +170,9 @@ def check_pending_deployments() -> Tuple[int, int, int]:
                 apechain_id = get_deployed_market_id_from_tx(market.blockchain_tx)
                 
                 if apechain_id:
-                    # Update market with Apechain market ID
+                    # Update market with Apechain market ID (the transition is checked first)
+                    transition(market, "deployed", actor="deploy_approved_markets")
                     market.apechain_market_id = apechain_id
-                    market.status = "deployed"
                     db.session.commit()
                     
                     logger.info(f"Updated market {market.id} with Apechain ID {apechain_id}")
@@ -179,6 +183,7 @@ def check_pending_deployments() -> Tuple[int, int, int]:
                     failed += 1
             except Exception as e:
                 logger.error(f"Error checking pending deployment for market {market.id}: {str(e)}")
+                db.session.rollback()
                 failed += 1
         
         return processed, updated, failed
@@ -8,7 +8,6 @@ categorizes them using GPT-4o-mini, and stores them
 in the database as pending markets.
 """
 
-import os
 import sys
 import json
 import logging
@@ -17,13 +16,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple, Optional
 
 # Flask setup for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db, stream_results
+app = create_app(__name__)
 
 # Local imports
 from models import db, Market, PendingMarket, ProcessedMarket, PipelineRun
@@ -31,7 +25,7 @@ from utils.market_categorizer import categorize_market
 from utils.batch_categorizer import batch_categorize_markets
 
 # Initialize app
-db.init_app(app)
+init_db(app, db)
 
 # Setup logging
 logging.basicConfig(
@@ -237,16 +231,16 @@ def filter_new_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     existing_market_ids = set()
     
     # Check pending_markets
-    pending_market_ids = db.session.query(PendingMarket.poly_id).all()
-    existing_market_ids.update([m[0] for m in pending_market_ids])
+    pending_market_ids = stream_results(db.session.query(PendingMarket.poly_id))
+    existing_market_ids.update(m[0] for m in pending_market_ids)
     
     # Check markets
-    market_ids = db.session.query(Market.original_market_id).all()
-    existing_market_ids.update([m[0] for m in market_ids if m[0]])
+    market_ids = stream_results(db.session.query(Market.original_market_id))
+    existing_market_ids.update(m[0] for m in market_ids if m[0])
     
     # Check processed_markets
-    processed_ids = db.session.query(ProcessedMarket.condition_id).all()
-    existing_market_ids.update([m[0] for m in processed_ids])
+    processed_ids = stream_results(db.session.query(ProcessedMarket.condition_id))
+    existing_market_ids.update(m[0] for m in processed_ids)
     
     # Filter out markets that are already in the database
     new_markets = [m for m in markets if m.get('conditionId') not in existing_market_ids and m.get('id') not in existing_market_ids]
@@ -27,6 +27,7 @@ from utils.transform_market_with_events import transform_market_for_apechain, tr
 from utils.market_categorizer import categorize_market
 from utils.batch_categorizer import batch_categorize_markets
 from utils.messaging import post_formatted_message_to_slack, add_reaction_to_message
+from utils.slack_templates import render_market_review
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 # Set up logging
@@ -37,14 +38,9 @@ logging.basicConfig(
 logger = logging.getLogger('fetch_categorize_markets')
 
 # Flask app for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-db.init_app(app)
+from utils.database import create_app, init_db, stream_results
+app = create_app(__name__)
+init_db(app, db)
 
 # Constants
 MARKET_API_URL = "https://gamma-api.polymarket.com/markets?closed=false&archived=false&active=true&limit=200"
@@ -181,12 +177,12 @@ def filter_new_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         existing_market_ids = set()
         
         # Check pending_markets
-        pending_market_ids = db.session.query(PendingMarket.poly_id).all()
-        existing_market_ids.update([m[0] for m in pending_market_ids])
+        pending_market_ids = stream_results(db.session.query(PendingMarket.poly_id))
+        existing_market_ids.update(m[0] for m in pending_market_ids)
         
         # Check markets
-        market_ids = db.session.query(Market.original_market_id).all()
-        existing_market_ids.update([m[0] for m in market_ids if m[0]])
+        market_ids = stream_results(db.session.query(Market.original_market_id))
+        existing_market_ids.update(m[0] for m in market_ids if m[0])
         
         # Filter out markets that are already in the database
         new_markets = [m for m in markets if m.get('conditionId') not in existing_market_ids and m.get('id') not in existing_market_ids]
@@ -292,7 +288,10 @@ def store_pending_markets_with_events(markets: List[Dict[str, Any]]) -> Tuple[Li
 
 def format_market_message(market: PendingMarket) -> Tuple[str, List[Dict[str, Any]]]:
     """
-    Format a market message for posting to Slack with category badge, event images and option images.
+    Format a market message for posting to Slack.
+    
+    All scripts posting pending markets share the review message template,
+    so a market is posted the same way whichever script posts it.
     
     Args:
         market: PendingMarket model instance
@@ -300,165 +299,7 @@ def format_market_message(market: PendingMarket) -> Tuple[str, List[Dict[str, An
     Returns:
         Tuple[str, List[Dict]]: Formatted message text and blocks
     """
-    # Define emoji map for categories
-    category_emoji = {
-        'politics': ':ballot_box_with_ballot:',
-        'crypto': ':coin:',
-        'sports': ':sports_medal:',
-        'business': ':chart_with_upwards_trend:',
-        'culture': ':performing_arts:',
-        'tech': ':computer:',
-        'news': ':newspaper:',
-        # Add fallback for unknown categories
-        'unknown': ':question:'
-    }
-    
-    # Get emoji for this category
-    emoji = category_emoji.get(market.category.lower(), category_emoji['unknown'])
-    
-    # Format message text
-    message_text = f"*{market.question}*\n\nCategory: {emoji} {market.category.capitalize()}"
-    
-    # Create blocks for rich formatting
-    blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "New Market for Approval",
-                "emoji": True
-            }
-        }
-    ]
-    
-    # Add event info and banner if available
-    if market.event_name:
-        # First add the event banner if available
-        if market.banner_url:
-            blocks.append({
-                "type": "image",
-                "title": {
-                    "type": "plain_text",
-                    "text": f"Event: {market.event_name}",
-                    "emoji": True
-                },
-                "image_url": market.banner_url,
-                "alt_text": market.event_name
-            })
-        
-        # Then add the event information
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Event:* {market.event_name} · ID: `{market.event_id or 'N/A'}`"
-            }
-        })
-    
-    # Add the market question
-    blocks.append({
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": f"*Market Question:* {market.question}"
-        }
-    })
-    
-    # Add category section with badge
-    blocks.append({
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": f"*Category:* {emoji} {market.category.capitalize()}"
-        }
-    })
-    
-    # Add market options with images if available
-    if market.options:
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Options:*"
-            }
-        })
-        
-        # Get option images if available
-        option_images = market.option_images or {}
-        
-        # Add each option with its image if available
-        for option in market.options:
-            option_value = option.get('value', 'Unknown')
-            option_id = option.get('id', '')
-            
-            # Create option section
-            option_block = {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"• {option_value}"
-                }
-            }
-            
-            # Add icon image if available (either from option_images or directly from option)
-            icon_url = None
-            if option_value in option_images:
-                icon_url = option_images[option_value]
-            elif 'image_url' in option and option['image_url']:
-                icon_url = option['image_url']
-            elif 'image' in option and option['image']:
-                icon_url = option['image']
-                
-            if icon_url:
-                option_block["accessory"] = {
-                    "type": "image",
-                    "image_url": icon_url,
-                    "alt_text": option_value
-                }
-                
-            blocks.append(option_block)
-    
-    # Show market icon URL if available
-    if market.icon_url:
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Market Icon:*"
-            },
-            "accessory": {
-                "type": "image",
-                "image_url": market.icon_url,
-                "alt_text": "Market Icon"
-            }
-        })
-    
-    # Add divider
-    blocks.append({"type": "divider"})
-    
-    # Add market ID and metadata
-    blocks.append({
-        "type": "context",
-        "elements": [
-            {
-                "type": "mrkdwn",
-                "text": f"Market ID: `{market.poly_id}` · Posted: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            }
-        ]
-    })
-    
-    # Add approval/rejection buttons context
-    blocks.append({
-        "type": "context",
-        "elements": [
-            {
-                "type": "mrkdwn",
-                "text": "React with :white_check_mark: to approve or :x: to reject"
-            }
-        ]
-    })
-    
-    return message_text, blocks
+    return render_market_review(market)
 
 def post_markets_to_slack(markets: List[PendingMarket], max_to_post: int = 20) -> int:
     """
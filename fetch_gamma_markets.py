@@ -7,7 +7,6 @@ processes them for active, non-expired markets, and stores them
 in the database for further pipeline processing.
 """
 
-import os
 import sys
 import json
 import logging
@@ -27,20 +26,17 @@ logging.basicConfig(
 logger = logging.getLogger('fetch_gamma')
 
 # Flask setup for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db, stream_results
+app = create_app(__name__)
 
 # Local imports
 from models import db, Market, PendingMarket, ProcessedMarket, PipelineRun
 from utils.batch_categorizer import batch_categorize_markets
+from utils.metrics import track_call
+from utils.dates import is_expired, now_epoch
 
 # Initialize app
-db.init_app(app)
+init_db(app, db)
 
 # Constants
 GAMMA_API_URL = "https://gamma-api.polymarket.com/markets?closed=false&archived=false&active=true&limit=100"
@@ -97,7 +93,8 @@ def fetch_markets(params: Dict[str, str] = None) -> List[Dict[str, Any]]:
     
     try:
         # Make request to API
-        response = requests.get(GAMMA_API_URL, params=query_params)
+        with track_call("gamma", "markets"):
+            response = requests.get(GAMMA_API_URL, params=query_params)
         response.raise_for_status()
         
         # The Gamma API returns a list of markets directly, not wrapped in an object
@@ -129,9 +126,7 @@ def filter_active_non_expired_markets(markets: List[Dict[str, Any]]) -> List[Dic
     Returns:
         List[Dict[str, Any]]: Filtered list of markets
     """
-    # Get current time in UTC with timezone info
-    from datetime import timezone
-    now = datetime.now(timezone.utc)
+    now = now_epoch()
     
     filtered_markets = []
     for market in markets:
@@ -139,23 +134,10 @@ def filter_active_non_expired_markets(markets: List[Dict[str, Any]]) -> List[Dic
         if market.get('closed') or market.get('archived') or not market.get('active', True):
             continue
         
-        # Skip if market has already expired
-        end_date_str = market.get('endDate')
-        if end_date_str:
-            try:
-                # Parse ISO format date string (e.g. "2024-06-17T12:00:00Z")
-                from dateutil import parser
-                end_date = parser.parse(end_date_str)
-                # Make sure end_date has timezone info
-                if end_date.tzinfo is None:
-                    end_date = end_date.replace(tzinfo=timezone.utc)
-                
-                if end_date < now:
-                    logger.info(f"Skipping expired market ending on {end_date_str}")
-                    continue
-            except Exception as e:
-                logger.warning(f"Could not parse end date '{end_date_str}': {str(e)}")
-                # Don't filter out markets with unparseable dates
+        # Skip if market has already expired (unparseable dates are kept)
+        if is_expired(market.get('endDate'), now):
+            logger.info(f"Skipping expired market ending on {market.get('endDate')}")
+            continue
         
         # Skip if market doesn't have question/title
         if not market.get('question'):
@@ -186,16 +168,16 @@ def filter_new_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     existing_market_ids = set()
     
     # Check pending_markets
-    pending_market_ids = db.session.query(PendingMarket.poly_id).all()
-    existing_market_ids.update([m[0] for m in pending_market_ids])
+    pending_market_ids = stream_results(db.session.query(PendingMarket.poly_id))
+    existing_market_ids.update(m[0] for m in pending_market_ids)
     
     # Check markets
-    market_ids = db.session.query(Market.original_market_id).all()
-    existing_market_ids.update([m[0] for m in market_ids if m[0]])
+    market_ids = stream_results(db.session.query(Market.original_market_id))
+    existing_market_ids.update(m[0] for m in market_ids if m[0])
     
     # Check processed_markets
-    processed_ids = db.session.query(ProcessedMarket.condition_id).all()
-    existing_market_ids.update([m[0] for m in processed_ids])
+    processed_ids = stream_results(db.session.query(ProcessedMarket.condition_id))
+    existing_market_ids.update(m[0] for m in processed_ids)
     
     # Filter out markets that are already in the database
     new_markets = []
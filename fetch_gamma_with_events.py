@@ -10,7 +10,6 @@ IMPORTANT: This script NEVER uses sample or mock data. All data must
 come from the actual Polymarket API via the Gamma Markets endpoint.
 """
 
-import os
 import sys
 import json
 import logging
@@ -18,13 +17,8 @@ from datetime import datetime
 from typing import Dict, List, Any, Tuple, Optional
 
 # Flask setup for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db
+app = create_app(__name__)
 
 # Local imports
 from models import db, PendingMarket, ProcessedMarket, PipelineRun
@@ -44,7 +38,7 @@ from fetch_and_categorize_markets import (
 from utils.transform_market_with_events import transform_with_events
 
 # Initialize app
-db.init_app(app)
+init_db(app, db)
 
 # Setup logging
 logging.basicConfig(
@@ -11,11 +11,13 @@ import os
 import sys
 import json
 import logging
-import requests
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from urllib.parse import urlparse
 from utils.market_transformer import MarketTransformer
+from utils.metrics import track_call
+from utils.profiling import gamma_get
+from utils.dates import now_epoch, to_epoch
 
 # Configure logging
 logging.basicConfig(
@@ -85,7 +87,8 @@ def fetch_markets(limit: int = 200, variant: int = 0) -> List[Dict[str, Any]]:
     try:
         # Use the base parameters without category to get a more comprehensive list
         logger.info(f"Fetching up to 200 markets from Polymarket API (all categories)")
-        response = requests.get(base_url, params=params)
+        with track_call("gamma", "markets"):
+            response = gamma_get(base_url, params=params)
         
         if response.status_code == 200:
             all_category_markets = response.json()
@@ -137,7 +140,8 @@ def fetch_markets(limit: int = 200, variant: int = 0) -> List[Dict[str, Any]]:
             
             logger.info(f"Fetching {count} {category} markets from Polymarket API")
             
-            response = requests.get(base_url, params=category_params)
+            with track_call("gamma", "markets"):
+                response = gamma_get(base_url, params=category_params)
             
             if response.status_code == 200:
                 category_markets = response.json()
@@ -255,8 +259,7 @@ def filter_active_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     if not markets:
         return []
         
-    # Use UTC for consistent timezone-aware comparison
-    now = datetime.now().astimezone()
+    now = now_epoch()
     filtered_markets = []
     
     # Tracking for debugging
@@ -286,23 +289,9 @@ def filter_active_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]
             filter_reasons["inactive"] += 1
             continue
             
-        # Check end date
-        end_date_str = market.get("endDate")
-        if not end_date_str:
-            filter_reasons["expired"] += 1
-            continue
-            
-        try:
-            # Parse ISO format timestamp (strip Z for compatibility)
-            end_date = datetime.fromisoformat(end_date_str.replace("Z", "+00:00"))
-            
-            # Check if end date is in the future
-            if end_date <= now:
-                filter_reasons["expired"] += 1
-                continue
-                
-        except Exception as e:
-            logger.warning(f"Error parsing end date {end_date_str}: {str(e)}")
+        # Check end date (missing or invalid dates count as expired)
+        end_ts = to_epoch(market.get("endDate"))
+        if end_ts is None or end_ts <= now:
             filter_reasons["expired"] += 1
             continue
             
@@ -413,17 +402,18 @@ def display_active_markets(markets: List[Dict[str, Any]], max_display: int = 5):
             
         print()
 
-def transform_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def transform_markets(markets: List[Dict[str, Any]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Transform markets to consolidate multi-option markets.
     
     Args:
         markets: List of market data dictionaries
+        workers: Number of worker processes (see utils/transform_engine.py)
         
     Returns:
         List of transformed market dictionaries
     """
-    transformer = MarketTransformer()
+    transformer = MarketTransformer(workers=workers)
     transformed = transformer.transform_markets(markets)
     
     # Check if we have any multiple-option markets
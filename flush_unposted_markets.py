@@ -24,7 +24,9 @@ logger = logging.getLogger(__name__)
 
 # Import flask app for database context
 from main import app
-from models import db, ProcessedMarket, PendingMarket
+from models import db, ProcessedMarket, PendingMarket, StageCounter, STAGE_COUNTER_MODELS
+from utils.database import iter_chunks
+from utils.stage_counters import read_stage_counts
 
 def flush_unposted_markets():
     """
@@ -34,35 +36,36 @@ def flush_unposted_markets():
     - posted = FALSE
     - message_id = NULL
     
+    Markets are deleted and committed in chunks; if a chunk fails, the
+    chunks before it stay deleted.
+    
     Returns:
         int: Number of markets deleted
     """
+    count = 0
     try:
         # Find all unposted markets
         unposted_markets = ProcessedMarket.query.filter_by(
             posted=False,
             message_id=None
-        ).all()
-        
-        # Get count before deletion
-        count = len(unposted_markets)
-        logger.info(f"Found {count} unposted markets to delete")
+        )
         
-        # Delete records
-        for market in unposted_markets:
-            logger.debug(f"Deleting market {market.condition_id}: {market.question}")
-            db.session.delete(market)
+        # Delete records, committing each chunk
+        for markets in iter_chunks(unposted_markets, ProcessedMarket.condition_id, session=db.session):
+            for market in markets:
+                logger.debug(f"Deleting market {market.condition_id}: {market.question}")
+                db.session.delete(market)
+            count += len(markets)
+            logger.info(f"Deleting unposted markets: {count} so far")
         
-        # Commit changes
-        db.session.commit()
         logger.info(f"Successfully deleted {count} unposted markets")
         
         return count
     
     except Exception as e:
-        logger.error(f"Error deleting unposted markets: {str(e)}")
+        logger.error(f"Error deleting unposted markets after {count} were deleted: {str(e)}")
         db.session.rollback()
-        return 0
+        return count
 
 def flush_pending_markets():
     """
@@ -71,38 +74,34 @@ def flush_pending_markets():
     Returns:
         int: Number of pending markets deleted
     """
+    count = 0
     try:
-        # Find all pending markets
-        pending_markets = PendingMarket.query.all()
+        # Delete all pending markets, committing each chunk
+        for markets in iter_chunks(PendingMarket.query, PendingMarket.poly_id, session=db.session):
+            for market in markets:
+                logger.debug(f"Deleting pending market {market.poly_id}: {market.question}")
+                db.session.delete(market)
+            count += len(markets)
+            logger.info(f"Deleting pending markets: {count} so far")
         
-        # Get count before deletion
-        count = len(pending_markets)
-        logger.info(f"Found {count} pending markets to delete")
-        
-        # Delete records
-        for market in pending_markets:
-            logger.debug(f"Deleting pending market {market.poly_id}: {market.question}")
-            db.session.delete(market)
-        
-        # Commit changes
-        db.session.commit()
         logger.info(f"Successfully deleted {count} pending markets")
         
         return count
     
     except Exception as e:
-        logger.error(f"Error deleting pending markets: {str(e)}")
+        logger.error(f"Error deleting pending markets after {count} were deleted: {str(e)}")
         db.session.rollback()
-        return 0
+        return count
 
 def show_database_stats():
     """
     Show statistics about the current database state.
     """
     try:
-        posted_markets = ProcessedMarket.query.filter_by(posted=True).count()
-        unposted_markets = ProcessedMarket.query.filter_by(posted=False, message_id=None).count()
-        pending_markets = PendingMarket.query.count()
+        counts = read_stage_counts(db.session, STAGE_COUNTER_MODELS, StageCounter)
+        posted_markets = counts.get("processed.posted", 0)
+        unposted_markets = counts.get("processed.unposted", 0)
+        pending_markets = counts.get("pending", 0)
         
         logger.info("Database statistics:")
         logger.info(f"  Posted markets: {posted_markets}")
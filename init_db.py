@@ -25,7 +25,7 @@ logger = logging.getLogger("init_db")
 # Add the current directory to sys.path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask
+from utils.database import create_app, init_db
 from models import db, Market, ApprovalEvent, PipelineRun, ProcessedMarket
 
 def init_database():
@@ -34,18 +34,10 @@ def init_database():
     """
     try:
         # Create Flask app
-        app = Flask(__name__)
-        
-        # Configure database
-        app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-            "pool_recycle": 300,
-            "pool_pre_ping": True,
-        }
-        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        app = create_app(__name__)
         
         # Initialize database with app
-        db.init_app(app)
+        init_db(app, db)
         
         # Create all tables
         with app.app_context():
@@ -9,25 +9,18 @@ for both event banners and market option icons.
 WARNING: Running this script will delete all existing data in the database.
 """
 
-import os
 import sys
 from datetime import datetime
-from flask import Flask
+from utils.database import create_db_engine, create_app
 from sqlalchemy import Column, String, Text, Boolean, Integer, BigInteger, DateTime, ForeignKey, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from sqlalchemy import create_engine
 
 # Set up Flask app to provide context
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app = create_app(__name__)
 
 # Create SQLAlchemy engine
-engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+engine = create_db_engine(app.config["SQLALCHEMY_DATABASE_URI"])
 
 # Create declarative base
 Base = declarative_base()
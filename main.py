@@ -11,10 +11,10 @@ Steps in the pipeline:
 5. Deploy approved markets to ApeChain with proper UI mapping
 6. Generate comprehensive pipeline statistics and logs
 """
-from flask import Flask, jsonify, request, render_template_string, send_from_directory
+from flask import Response, jsonify, request, render_template_string, send_from_directory, stream_with_context
 import os
 import sys
-import threading
+import json
 import time
 from datetime import datetime
 
@@ -23,41 +23,66 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import modules
 from pipeline import PolymarketPipeline
-from models import db, Market, ApprovalEvent, PipelineRun, PendingMarket, ApprovalLog
+from models import db, Market, ApprovalEvent, PipelineRun, PendingMarket, ApprovalLog, PipelineJob, PipelineLogEntry, PipelineStageMetric
 from api_routes import api_bp
+from utils.database import DB_POOL_SIZE, create_app, init_db
+from utils.job_queue import JobQueue
+from utils.run_logs import RunLogRegistry, format_entry
+from utils.metrics import render_prometheus
+from utils.lifecycle import create_work_queue_indexes
+from utils.slack_events import verify_request
+from watch_approvals import ApprovalWatcher
+from config import JOB_QUEUE_MAX_WORKERS
 
-# Create Flask app
-app = Flask(__name__)
+# Create Flask app; the pool has a connection for each job queue worker and
+# the approval watcher besides those of the request threads
+app = create_app(__name__, pool_size=max(DB_POOL_SIZE, JOB_QUEUE_MAX_WORKERS + 2))
 
 # Set secret key for CSRF protection
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "polymarket-pipeline-key")
 
-# Configure database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
 # Initialize database with app
-db.init_app(app)
+init_db(app, db)
 
 # Register API Blueprint
 app.register_blueprint(api_bp)
 
-# Create tables
+# Create tables (and the work queue indexes of existing tables)
 with app.app_context():
     db.create_all()
+    create_work_queue_indexes(db.engine, Market)
+
+# Job types that write to the pipeline tables, the Slack channel and
+# pipeline_status: they form one group running one job at a time, so a
+# cleanup or flush never deletes rows or messages under a running pipeline.
+# Read-only job types can be given their own limits.
+PIPELINE_JOB_TYPES = (
+    "pipeline",
+    "deployment_approvals",
+    "clean_environment",
+    "sync_slack_db",
+    "check_market_approvals",
+    "post_unposted_markets",
+    "post_unposted_pending_markets",
+    "flush_unposted_markets",
+)
+
+# Background job queue
+job_queue = JobQueue(
+    app, db, PipelineJob,
+    max_workers=JOB_QUEUE_MAX_WORKERS,
+    concurrency_limits={"pipeline_tables": 1},
+    concurrency_groups={job_type: "pipeline_tables" for job_type in PIPELINE_JOB_TYPES}
+)
+job_queue.recover_interrupted_jobs()
 
-# Global variables to track pipeline status
+# Global variables to track pipeline status (the running flag and logs are
+# derived from the job queue, see current_status)
 pipeline_status = {
     "running": False,
     "start_time": None,
     "end_time": None,
-    "status": "idle",
-    "last_message": None,
-    "log_messages": []
+    "status": "idle"
 }
 
 # HTML template for the main page
@@ -165,7 +190,7 @@ HTML_TEMPLATE = """
                 <p>Running since: {{ status.start_time }}</p>
                 <p>Last message: {{ status.last_message }}</p>
                 <div class="alert alert-info">
-                    <strong>Pipeline in progress!</strong> The page will automatically refresh to show updates.
+                    <strong>Pipeline in progress!</strong> Log messages below update live and the page refreshes when it finishes.
                 </div>
             {% elif status.end_time %}
                 <p>Last run: {{ status.start_time }} to {{ status.end_time }}</p>
@@ -338,8 +363,21 @@ HTML_TEMPLATE = """
                 }
             });
             
-            // Auto-refresh if the pipeline is running
-            {% if status.running %}
+            // Tail the job log while the pipeline is running and refresh when it ends
+            {% if status.running and status.job_id %}
+            var logStream = new EventSource("/jobs/{{ status.job_id }}/logs/stream?after={{ status.last_seq }}");
+            logStream.onmessage = function(event) {
+                var entry = JSON.parse(event.data);
+                $("<div>").addClass("log-line")
+                    .text("[" + entry.timestamp + "] " + entry.message)
+                    .appendTo("#log-container");
+                $("#log-container").scrollTop($("#log-container")[0].scrollHeight);
+            };
+            logStream.addEventListener("end", function() {
+                logStream.close();
+                window.location.reload();
+            });
+            {% elif status.running %}
             setTimeout(function() {
                 window.location.reload();
             }, 5000);
@@ -353,46 +391,111 @@ HTML_TEMPLATE = """
 </html>
 """
 
-class LogCapture:
-    """Custom handler to capture log messages"""
-    def __init__(self):
-        self.messages = []
+def persist_run_logs(sink, entries):
+    """Persist a batch of captured log entries for a job"""
+    with app.app_context():
+        db.session.execute(db.insert(PipelineLogEntry), [
+            {
+                "job_id": sink.job_id,
+                "run_id": sink.run_id,
+                "seq": entry["seq"],
+                "level": entry["level"],
+                "source": entry["source"][:255],
+                "message": entry["message"],
+                "created_at": datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S"),
+            }
+            for entry in entries
+        ])
+        db.session.commit()
+
+# Per-job log sinks (bounded in-memory buffers, persisted in batches)
+run_log_registry = RunLogRegistry(persist=persist_run_logs)
+
+# Maximum lifetime of a single log stream response (seconds)
+LOG_STREAM_MAX_SECONDS = 60
+
+def current_status():
+    """Get the UI status, with the running flag and logs taken from the job queue"""
+    status = dict(pipeline_status)
+    status["running"] = job_queue.active_job_count() > 0
     
-    def write(self, message):
-        if message.strip():
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            formatted_message = f"[{timestamp}] {message.strip()}"
-            pipeline_status["log_messages"].append(formatted_message)
-            pipeline_status["last_message"] = message.strip()
-            
-            # Keep only the last 100 messages
-            if len(pipeline_status["log_messages"]) > 100:
-                pipeline_status["log_messages"] = pipeline_status["log_messages"][-100:]
+    # Show the log tail of the most recent job
+    sink = run_log_registry.latest()
+    entries = sink.tail(100) if sink else []
+    status["job_id"] = sink.job_id if sink else None
+    status["last_seq"] = sink.last_seq if sink else 0
+    status["log_messages"] = [format_entry(entry) for entry in entries]
+    status["last_message"] = entries[-1]["message"] if entries else ""
+    return status
+
+def enqueue_job(job_type, func, description, started_message):
+    """
+    Submit a job to the background queue and build the route response.
     
-    def flush(self):
-        pass
+    The job body is wrapped with log capture and UI status tracking. A body
+    that returns False is treated as a failure.
+    
+    Args:
+        job_type: Job type (also the idempotency key)
+        func: Job body; receives a JobHandle for progress reporting
+        description: Human readable name used in log messages
+        started_message: Response message when the job is queued
+    """
+    def run_job(job):
+        with run_log_registry.capture(job.id):
+            try:
+                # Update UI status
+                pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                pipeline_status["end_time"] = None
+                pipeline_status["status"] = "running"
+                
+                result = func(job)
+                
+                # Update UI status
+                pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                pipeline_status["status"] = "failed" if result is False else "completed"
+                
+                # Log process end
+                print(f"{description} {pipeline_status['status']}")
+                
+            except Exception as e:
+                # Log any exceptions
+                print(f"{description} failed with exception: {str(e)}")
+                
+                # Update UI status
+                pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                pipeline_status["status"] = "failed"
+                raise
+        
+        if result is False:
+            raise RuntimeError(f"{description} failed")
+    
+    job_data, created = job_queue.submit(job_type, run_job)
+    
+    if not created:
+        return jsonify({
+            "success": False,
+            "message": f"{description} is already {job_data['status']} (job {job_data['id']})",
+            "job": job_data
+        })
+    
+    return jsonify({
+        "success": True,
+        "message": started_message,
+        "job": job_data
+    })
 
-def run_pipeline():
-    """Run the pipeline in a separate thread"""
+def run_pipeline(job):
+    """Run the pipeline as a background job"""
     # Skip if we're in testing mode
     if os.environ.get("TESTING") == "true":
         return
-    # Redirect stdout and stderr to our log capture
-    log_capture = LogCapture()
-    old_stdout = sys.stdout
-    old_stderr = sys.stderr
-    sys.stdout = log_capture
-    sys.stderr = log_capture
+    
+    # Log pipeline start
+    print("Starting Polymarket pipeline...")
+    run_id = None
     
     try:
-        # Update UI status
-        pipeline_status["running"] = True
-        pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        pipeline_status["status"] = "running"
-        
-        # Log pipeline start
-        print("Starting Polymarket pipeline...")
-        
         # Create database entry for this run
         with app.app_context():
             pipeline_run = PipelineRun(
@@ -402,17 +505,14 @@ def run_pipeline():
             db.session.add(pipeline_run)
             db.session.commit()
             run_id = pipeline_run.id
+            run_log_registry.bind_run(job.id, run_id)
             print(f"Created pipeline run record with ID: {run_id}")
+        job.progress(5, f"Pipeline run {run_id} started")
         
         # Run the pipeline
         pipeline = PolymarketPipeline(db_run_id=run_id)
         exit_code = pipeline.run()
         
-        # Update UI status based on exit code
-        pipeline_status["running"] = False
-        pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        pipeline_status["status"] = "completed" if exit_code == 0 else "failed"
-        
         # Update database record
         with app.app_context():
             pipeline_run = PipelineRun.query.get(run_id)
@@ -422,381 +522,313 @@ def run_pipeline():
                 db.session.commit()
         
         # Log pipeline end
-        print(f"Pipeline {pipeline_status['status']} with exit code {exit_code}")
+        print(f"Pipeline finished with exit code {exit_code}")
+        return exit_code == 0
         
     except Exception as e:
-        # Log any exceptions
-        error_message = str(e)
-        print(f"Pipeline failed with exception: {error_message}")
-        
-        # Update UI status
-        pipeline_status["running"] = False
-        pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        pipeline_status["status"] = "failed"
-        
         # Update database record if possible
         try:
             with app.app_context():
-                pipeline_run = PipelineRun.query.filter_by(status="running").order_by(PipelineRun.id.desc()).first()
+                pipeline_run = PipelineRun.query.get(run_id) if run_id else None
                 if pipeline_run:
                     pipeline_run.end_time = datetime.now()
                     pipeline_run.status = "failed"
-                    pipeline_run.error = error_message
+                    pipeline_run.error = str(e)
                     db.session.commit()
         except Exception as db_error:
             print(f"Failed to update pipeline run record: {str(db_error)}")
-    
-    finally:
-        # Restore stdout and stderr
-        sys.stdout = old_stdout
-        sys.stderr = old_stderr
+        raise
 
 @app.route('/')
 def index():
     """Main page"""
-    return render_template_string(HTML_TEMPLATE, status=pipeline_status)
+    return render_template_string(HTML_TEMPLATE, status=current_status())
 
 @app.route('/run-pipeline', methods=['POST'])
 def start_pipeline():
     """API endpoint to start the pipeline"""
-    if pipeline_status["running"]:
-        return jsonify({
-            "success": False,
-            "message": "Pipeline is already running"
-        })
-    
-    # Start the pipeline in a separate thread
-    thread = threading.Thread(target=run_pipeline)
-    thread.daemon = True
-    thread.start()
-    
-    return jsonify({
-        "success": True,
-        "message": "Pipeline started"
-    })
+    return enqueue_job("pipeline", run_pipeline, "Pipeline", "Pipeline started")
 
 @app.route('/run-deployment-approvals', methods=['POST'])
 def start_deployment_approvals():
     """API endpoint to start the deployment approval process"""
-    if pipeline_status["running"]:
-        return jsonify({
-            "success": False,
-            "message": "Pipeline is already running"
-        })
-    
     # Define a function to run the deployment approvals
-    def run_deployment_approvals():
-        # Redirect stdout and stderr to our log capture
-        log_capture = LogCapture()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = log_capture
-        sys.stderr = log_capture
+    def run_deployment_approvals(job):
+        # Log process start
+        print("Starting Deployment Approval Process...")
         
-        try:
-            # Update UI status
-            pipeline_status["running"] = True
-            pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "running"
-            
-            # Log process start
-            print("Starting Deployment Approval Process...")
-            
-            # Import the deployment approval module
-            import check_deployment_approvals
-            
-            # Run the deployment approval process
-            with app.app_context():
-                # First post markets for deployment approval
-                posted = check_deployment_approvals.post_markets_for_deployment_approval()
-                print(f"Posted {len(posted)} markets for deployment approval")
-                
-                # Then check for approvals
-                pending, approved, rejected = check_deployment_approvals.check_deployment_approvals()
-                print(f"Deployment approval results: {pending} pending, {approved} approved, {rejected} rejected")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "completed"
-            
-            # Log process end
-            print("Deployment approval process completed successfully")
-            
-        except Exception as e:
-            # Log any exceptions
-            error_message = str(e)
-            print(f"Deployment approval process failed with exception: {error_message}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "failed"
+        # Import the deployment approval module
+        import check_deployment_approvals
         
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-    
-    # Start the deployment approval process in a separate thread
-    thread = threading.Thread(target=run_deployment_approvals)
-    thread.daemon = True
-    thread.start()
+        # Run the deployment approval process
+        with app.app_context():
+            # First post markets for deployment approval
+            posted = check_deployment_approvals.post_markets_for_deployment_approval()
+            print(f"Posted {len(posted)} markets for deployment approval")
+            job.progress(50, f"Posted {len(posted)} markets for deployment approval")
+            
+            # Then check for approvals
+            pending, approved, rejected = check_deployment_approvals.check_deployment_approvals()
+            print(f"Deployment approval results: {pending} pending, {approved} approved, {rejected} rejected")
     
-    return jsonify({
-        "success": True,
-        "message": "Deployment approval process started"
-    })
+    return enqueue_job(
+        "deployment_approvals", run_deployment_approvals,
+        "Deployment approval process", "Deployment approval process started"
+    )
 
 @app.route('/clean-environment', methods=['POST'])
 def clean_environment():
     """API endpoint to clean the environment (database and Slack)"""
-    if pipeline_status["running"]:
-        return jsonify({
-            "success": False,
-            "message": "Another process is already running"
-        })
-    
     # Define a function to clean the environment
-    def run_environment_cleaning():
-        # Redirect stdout and stderr to our log capture
-        log_capture = LogCapture()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = log_capture
-        sys.stderr = log_capture
+    def run_environment_cleaning(job):
+        # Log process start
+        print("Starting Environment Cleaning...")
         
-        try:
-            # Update UI status
-            pipeline_status["running"] = True
-            pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "running"
-            
-            # Log process start
-            print("Starting Environment Cleaning...")
-            
-            # Import the environment cleaning module
-            import clean_environment
-            
-            # Run the environment cleaning process
-            with app.app_context():
-                exit_code = clean_environment.main()
-                if exit_code == 0:
-                    print("Environment cleaning completed successfully")
-                    success = True
-                else:
-                    print(f"Environment cleaning failed with exit code {exit_code}")
-                    success = False
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "completed"
-            
-            # Log process end
-            print("Environment cleaning process completed")
-            
-        except Exception as e:
-            # Log any exceptions
-            error_message = str(e)
-            print(f"Environment cleaning process failed with exception: {error_message}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "failed"
+        # Import the environment cleaning module
+        import clean_environment
         
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-    
-    # Start the environment cleaning process in a separate thread
-    thread = threading.Thread(target=run_environment_cleaning)
-    thread.daemon = True
-    thread.start()
+        # Run the environment cleaning process
+        with app.app_context():
+            exit_code = clean_environment.main()
+            if exit_code == 0:
+                print("Environment cleaning completed successfully")
+            else:
+                print(f"Environment cleaning failed with exit code {exit_code}")
     
-    return jsonify({
-        "success": True,
-        "message": "Environment cleaning process started"
-    })
+    return enqueue_job(
+        "clean_environment", run_environment_cleaning,
+        "Environment cleaning process", "Environment cleaning process started"
+    )
 
 @app.route('/sync-slack-db', methods=['POST'])
 def sync_slack_db():
     """API endpoint to synchronize Slack and database"""
-    if pipeline_status["running"]:
-        return jsonify({
-            "success": False,
-            "message": "Another process is already running"
-        })
-    
     # Define a function to sync Slack and DB
-    def run_slack_db_sync():
-        # Redirect stdout and stderr to our log capture
-        log_capture = LogCapture()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = log_capture
-        sys.stderr = log_capture
+    def run_slack_db_sync(job):
+        # Log process start
+        print("Starting Slack-Database Synchronization...")
         
-        try:
-            # Update UI status
-            pipeline_status["running"] = True
-            pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "running"
-            
-            # Log process start
-            print("Starting Slack-Database Synchronization...")
-            
-            # Import the sync module
-            import sync_slack_db
-            
-            # Run the synchronization process
-            with app.app_context():
-                try:
-                    # Get the result from the main function
-                    result = sync_slack_db.main()
-                    
-                    # Check if result is a tuple with 3 elements (synced, updated, cleaned)
-                    if isinstance(result, tuple) and len(result) == 3:
-                        synced, updated, cleaned = result
-                        print(f"Synchronization complete: {synced} synced, {updated} updated, {cleaned} cleaned")
-                    else:
-                        # For backward compatibility, handle non-tuple return
-                        print("Synchronization completed successfully")
-                except Exception as e:
-                    print(f"Error during synchronization: {str(e)}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "completed"
-            
-            # Log process end
-            print("Slack-DB synchronization completed successfully")
-            
-        except Exception as e:
-            # Log any exceptions
-            error_message = str(e)
-            print(f"Slack-DB synchronization failed with exception: {error_message}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "failed"
+        # Import the sync module
+        import sync_slack_db
         
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-    
-    # Start the sync process in a separate thread
-    thread = threading.Thread(target=run_slack_db_sync)
-    thread.daemon = True
-    thread.start()
+        # Run the synchronization process
+        with app.app_context():
+            try:
+                # Get the result from the main function
+                result = sync_slack_db.main()
+                
+                # Check if result is a tuple with 3 elements (synced, updated, cleaned)
+                if isinstance(result, tuple) and len(result) == 3:
+                    synced, updated, cleaned = result
+                    print(f"Synchronization complete: {synced} synced, {updated} updated, {cleaned} cleaned")
+                else:
+                    # For backward compatibility, handle non-tuple return
+                    print("Synchronization completed successfully")
+            except Exception as e:
+                print(f"Error during synchronization: {str(e)}")
     
-    return jsonify({
-        "success": True,
-        "message": "Slack-DB synchronization started"
-    })
+    return enqueue_job(
+        "sync_slack_db", run_slack_db_sync,
+        "Slack-DB synchronization", "Slack-DB synchronization started"
+    )
 
 @app.route('/check-market-approvals', methods=['POST'])
 def check_market_approvals():
     """API endpoint to check initial market approvals"""
-    if pipeline_status["running"]:
-        return jsonify({
-            "success": False,
-            "message": "Another process is already running"
-        })
-    
     # Define a function to check market approvals
-    def run_market_approvals():
-        # Redirect stdout and stderr to our log capture
-        log_capture = LogCapture()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = log_capture
-        sys.stderr = log_capture
+    def run_market_approvals(job):
+        # Log process start
+        print("Starting Market Approval Check Process...")
         
-        try:
-            # Update UI status
-            pipeline_status["running"] = True
-            pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "running"
-            
-            # Log process start
-            print("Starting Market Approval Check Process...")
-            
-            # Import the market approval module
-            import check_market_approvals
-            
-            # Run the market approval process
-            with app.app_context():
-                # Check for market approvals
-                pending, approved, rejected = check_market_approvals.check_market_approvals()
-                print(f"Market approval results: {pending} pending, {approved} approved, {rejected} rejected")
-                
-                # Create market entries for approved markets
-                if approved > 0:
-                    print("Creating market entries for approved markets...")
-                    markets_created = 0
-                    
-                    # Get all approved markets that haven't been processed yet
-                    from models import db, ProcessedMarket
-                    approved_markets = ProcessedMarket.query.filter_by(
-                        approved=True, 
-                        posted=True
-                    ).all()
-                    
-                    for processed_market in approved_markets:
-                        if processed_market.raw_data:
-                            try:
-                                # Create market entry if it doesn't exist yet
-                                success = check_market_approvals.create_market_entry(processed_market.raw_data)
-                                if success:
-                                    markets_created += 1
-                            except Exception as e:
-                                print(f"Error creating market entry: {str(e)}")
-                    
-                    print(f"Created {markets_created} market entries for approved markets")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "completed"
-            
-            # Log process end
-            print("Market approval check process completed successfully")
-            
-        except Exception as e:
-            # Log any exceptions
-            error_message = str(e)
-            print(f"Market approval check process failed with exception: {error_message}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "failed"
+        # Import the market approval module
+        import check_market_approvals
         
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+        # Run the market approval process
+        with app.app_context():
+            # Check for market approvals
+            pending, approved, rejected = check_market_approvals.check_market_approvals()
+            print(f"Market approval results: {pending} pending, {approved} approved, {rejected} rejected")
+            job.progress(50, f"{approved} approved, {rejected} rejected")
+            
+            # Create market entries for approved markets
+            if approved > 0:
+                print("Creating market entries for approved markets...")
+                markets_created = 0
+                
+                # Get all approved markets that haven't been processed yet
+                from models import db, ProcessedMarket
+                approved_markets = ProcessedMarket.query.filter_by(
+                    approved=True, 
+                    posted=True
+                ).all()
+                
+                for processed_market in approved_markets:
+                    if processed_market.raw_data:
+                        try:
+                            # Create market entry if it doesn't exist yet
+                            success = check_market_approvals.create_market_entry(processed_market.raw_data)
+                            if success:
+                                markets_created += 1
+                        except Exception as e:
+                            print(f"Error creating market entry: {str(e)}")
+                
+                print(f"Created {markets_created} market entries for approved markets")
     
-    # Start the market approval check process in a separate thread
-    thread = threading.Thread(target=run_market_approvals)
-    thread.daemon = True
-    thread.start()
+    return enqueue_job(
+        "check_market_approvals", run_market_approvals,
+        "Market approval check process", "Market approval check process started"
+    )
+
+# Approval watcher fed by the Events API (/slack/events). Reconciliation
+# sweeps are left to watch_approvals.py and the approval check jobs.
+approval_watcher = ApprovalWatcher(app, reconcile_interval=0)
+
+@app.route('/slack/events', methods=['POST'])
+def slack_events():
+    """Slack Events API endpoint: reactions on market messages are acted on right away"""
+    if not verify_request(request.get_data(), request.headers):
+        return jsonify({"error": "Invalid Slack signature"}), 403
     
-    return jsonify({
-        "success": True,
-        "message": "Market approval check process started"
-    })
+    payload = request.get_json(silent=True) or {}
+    if payload.get("type") == "url_verification":
+        return jsonify({"challenge": payload.get("challenge")})
+    
+    approval_watcher.start()
+    approval_watcher.submit(payload)
+    return "", 200
 
 @app.route('/status')
 def get_status():
     """API endpoint to get the pipeline status"""
-    return jsonify(pipeline_status)
+    return jsonify(current_status())
+
+@app.route('/jobs')
+def get_jobs():
+    """API endpoint to get the most recent background jobs"""
+    try:
+        limit = min(int(request.args.get("limit", 50)), 500)
+        jobs = job_queue.list_jobs(limit=limit)
+        return jsonify({
+            "count": len(jobs),
+            "jobs": jobs
+        })
+    except Exception as e:
+        return jsonify({
+            "error": str(e)
+        }), 500
+
+@app.route('/jobs/<int:job_id>')
+def get_job(job_id):
+    """API endpoint to get the status and progress of a background job"""
+    job = job_queue.get_job(job_id)
+    if not job:
+        return jsonify({
+            "error": f"Job {job_id} not found"
+        }), 404
+    return jsonify(job)
+
+def stored_log_entries(job_id, after_seq=0, limit=None):
+    """Load persisted log entries of a job from the database"""
+    with app.app_context():
+        query = PipelineLogEntry.query.filter(
+            PipelineLogEntry.job_id == job_id,
+            PipelineLogEntry.seq > after_seq
+        )
+        if limit:
+            entries = query.order_by(PipelineLogEntry.seq.desc()).limit(limit).all()
+            entries.reverse()
+        else:
+            entries = query.order_by(PipelineLogEntry.seq).all()
+        return [entry.to_dict() for entry in entries]
+
+def job_id_for_run(run_id):
+    """Find the job that executed a pipeline run"""
+    sink = run_log_registry.get_by_run(run_id)
+    if sink:
+        return sink.job_id
+    with app.app_context():
+        entry = PipelineLogEntry.query.filter_by(run_id=run_id).first()
+        return entry.job_id if entry else None
+
+def stream_job_logs(job_id, after_seq=0):
+    """Server-sent events response streaming the log entries of a job"""
+    def generate():
+        last_seq = after_seq
+        sink = run_log_registry.get(job_id)
+        
+        if sink is None:
+            # Job ran in another process or has been evicted from memory
+            for entry in stored_log_entries(job_id, after_seq=last_seq):
+                yield f"id: {entry['seq']}\ndata: {json.dumps(entry)}\n\n"
+            yield "event: end\ndata: {}\n\n"
+            return
+        
+        # Streams are closed after a while so they don't pin a worker; the
+        # browser reconnects and resumes from the Last-Event-ID header
+        deadline = time.time() + LOG_STREAM_MAX_SECONDS
+        yield "retry: 1000\n\n"
+        while time.time() < deadline:
+            entries = sink.entries_after(last_seq, timeout=15)
+            for entry in entries:
+                last_seq = entry["seq"]
+                yield f"id: {entry['seq']}\ndata: {json.dumps(entry)}\n\n"
+            if not entries:
+                if sink.closed:
+                    yield "event: end\ndata: {}\n\n"
+                    return
+                # Keep-alive comment so proxies don't drop idle streams
+                yield ": keep-alive\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def last_event_id():
+    """Get the sequence number to resume a log stream from"""
+    value = request.headers.get("Last-Event-ID") or request.args.get("after") or 0
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+@app.route('/jobs/<int:job_id>/logs')
+def get_job_logs(job_id):
+    """API endpoint to get the most recent log entries of a job"""
+    limit = min(int(request.args.get("limit", 100)), 1000)
+    sink = run_log_registry.get(job_id)
+    entries = sink.tail(limit) if sink else stored_log_entries(job_id, limit=limit)
+    return jsonify({
+        "job_id": job_id,
+        "count": len(entries),
+        "entries": entries
+    })
+
+@app.route('/jobs/<int:job_id>/logs/stream')
+def stream_job_logs_route(job_id):
+    """Server-sent events stream of the log entries of a job"""
+    return stream_job_logs(job_id, after_seq=last_event_id())
+
+@app.route('/runs/<int:run_id>/logs')
+def get_run_logs(run_id):
+    """API endpoint to get the log entries of a pipeline run"""
+    job_id = job_id_for_run(run_id)
+    if job_id is None:
+        return jsonify({
+            "error": f"No logs found for pipeline run {run_id}"
+        }), 404
+    return get_job_logs(job_id)
+
+@app.route('/runs/<int:run_id>/logs/stream')
+def stream_run_logs(run_id):
+    """Server-sent events stream of the log entries of a pipeline run"""
+    job_id = job_id_for_run(run_id)
+    if job_id is None:
+        return jsonify({
+            "error": f"No logs found for pipeline run {run_id}"
+        }), 404
+    return stream_job_logs(job_id, after_seq=last_event_id())
 
 @app.route('/markets')
 def get_markets():
@@ -816,231 +848,90 @@ def get_markets():
 @app.route('/post-unposted-markets', methods=['POST'])
 def post_unposted_markets():
     """API endpoint to post the next batch of unposted markets"""
-    if pipeline_status["running"]:
-        return jsonify({
-            "success": False,
-            "message": "Another process is already running"
-        })
-    
     # Define a function to run the unposted markets posting process
-    def run_post_unposted_markets():
-        # Redirect stdout and stderr to our log capture
-        log_capture = LogCapture()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = log_capture
-        sys.stderr = log_capture
+    def run_post_unposted_markets(job):
+        # Log process start
+        print("Starting process to post unposted markets...")
         
-        try:
-            # Update UI status
-            pipeline_status["running"] = True
-            pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "running"
-            
-            # Log process start
-            print("Starting process to post unposted markets...")
-            
-            # Run the post unposted markets process
-            from post_unposted_markets import main as post_unposted_main
-            
-            with app.app_context():
-                result = post_unposted_main()
-                if result == 0:
-                    print("Successfully posted unposted markets")
-                else:
-                    print("Failed to post unposted markets")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "completed" if result == 0 else "failed"
-            
-            # Log process end
-            print("Post unposted markets process completed")
-            
-        except Exception as e:
-            # Log any exceptions
-            error_message = str(e)
-            print(f"Post unposted markets process failed with exception: {error_message}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "failed"
+        # Run the post unposted markets process
+        from post_unposted_markets import main as post_unposted_main
         
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-    
-    # Start the process in a separate thread
-    thread = threading.Thread(target=run_post_unposted_markets)
-    thread.daemon = True
-    thread.start()
+        with app.app_context():
+            result = post_unposted_main()
+            if result == 0:
+                print("Successfully posted unposted markets")
+            else:
+                print("Failed to post unposted markets")
+        
+        return result == 0
     
-    return jsonify({
-        "success": True,
-        "message": "Process to post unposted markets started"
-    })
+    return enqueue_job(
+        "post_unposted_markets", run_post_unposted_markets,
+        "Post unposted markets process", "Process to post unposted markets started"
+    )
 
 @app.route('/post-unposted-pending-markets', methods=['POST'])
 def post_unposted_pending_markets():
     """API endpoint to post the next batch of unposted pending markets"""
-    if pipeline_status["running"]:
-        return jsonify({
-            "success": False,
-            "message": "Another process is already running"
-        })
-    
     # Define a function to run the unposted pending markets posting process
-    def run_post_unposted_pending_markets():
-        # Redirect stdout and stderr to our log capture
-        log_capture = LogCapture()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = log_capture
-        sys.stderr = log_capture
+    def run_post_unposted_pending_markets(job):
+        # Log process start
+        print("Starting process to post unposted pending markets...")
         
-        try:
-            # Update UI status
-            pipeline_status["running"] = True
-            pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "running"
-            
-            # Log process start
-            print("Starting process to post unposted pending markets...")
-            
-            # Run the post unposted pending markets process
-            from post_unposted_pending_markets import main as post_unposted_pending_main
-            
-            with app.app_context():
-                result = post_unposted_pending_main()
-                if result == 0:
-                    print("Successfully posted unposted pending markets")
-                else:
-                    print("Failed to post unposted pending markets")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "completed" if result == 0 else "failed"
-            
-            # Log process end
-            print("Post unposted pending markets process completed")
-            
-        except Exception as e:
-            # Log any exceptions
-            error_message = str(e)
-            print(f"Post unposted pending markets process failed with exception: {error_message}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "failed"
+        # Run the post unposted pending markets process
+        from post_unposted_pending_markets import main as post_unposted_pending_main
         
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-    
-    # Start the process in a separate thread
-    thread = threading.Thread(target=run_post_unposted_pending_markets)
-    thread.daemon = True
-    thread.start()
+        with app.app_context():
+            result = post_unposted_pending_main()
+            if result == 0:
+                print("Successfully posted unposted pending markets")
+            else:
+                print("Failed to post unposted pending markets")
+        
+        return result == 0
     
-    return jsonify({
-        "success": True,
-        "message": "Process to post unposted pending markets started"
-    })
+    return enqueue_job(
+        "post_unposted_pending_markets", run_post_unposted_pending_markets,
+        "Post unposted pending markets process", "Process to post unposted pending markets started"
+    )
 
 @app.route('/flush-unposted-markets', methods=['POST'])
 def flush_unposted_markets():
     """API endpoint to flush unposted markets from the database"""
-    print("===> Flush unposted markets route called")
-    
-    if pipeline_status["running"]:
-        print("===> Pipeline is already running, returning error")
-        return jsonify({
-            "success": False,
-            "message": "Another process is already running"
-        })
-    
     # Define a function to run the flush process
-    def run_flush_unposted_markets():
-        # Redirect stdout and stderr to our log capture
-        log_capture = LogCapture()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = log_capture
-        sys.stderr = log_capture
+    def run_flush_unposted_markets(job):
+        # Log process start
+        print("Starting process to flush unposted markets...")
         
-        try:
-            # Update UI status
-            pipeline_status["running"] = True
-            pipeline_status["start_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "running"
-            
-            # Log process start
-            print("Starting process to flush unposted markets...")
-            
-            # Import the flush module
-            from flush_unposted_markets import flush_unposted_markets, flush_pending_markets, show_database_stats
-            
-            with app.app_context():
-                # Show initial stats
-                print("Initial database state:")
-                show_database_stats()
-                
-                # Flush unposted markets
-                deleted_unposted = flush_unposted_markets()
-                print(f"Deleted {deleted_unposted} unposted markets from ProcessedMarket table")
-                
-                # Flush pending markets
-                deleted_pending = flush_pending_markets()
-                print(f"Deleted {deleted_pending} markets from PendingMarket table")
-                
-                # Show final stats
-                print("\nFinal database state:")
-                show_database_stats()
-                
-                # Final summary
-                print(f"\nSummary: Deleted {deleted_unposted} unposted markets and {deleted_pending} pending markets")
-                print("You can now run the pipeline to refetch and recategorize markets")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "completed"
-            
-            # Log process end
-            print("Flush unposted markets process completed")
-            
-        except Exception as e:
-            # Log any exceptions
-            error_message = str(e)
-            print(f"Flush unposted markets process failed with exception: {error_message}")
-            
-            # Update UI status
-            pipeline_status["running"] = False
-            pipeline_status["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            pipeline_status["status"] = "failed"
+        # Import the flush module
+        from flush_unposted_markets import flush_unposted_markets, flush_pending_markets, show_database_stats
         
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-    
-    print("===> Starting flush unposted markets thread")
-    # Start the process in a separate thread
-    thread = threading.Thread(target=run_flush_unposted_markets)
-    thread.daemon = True
-    thread.start()
+        with app.app_context():
+            # Show initial stats
+            print("Initial database state:")
+            show_database_stats()
+            
+            # Flush unposted markets
+            deleted_unposted = flush_unposted_markets()
+            print(f"Deleted {deleted_unposted} unposted markets from ProcessedMarket table")
+            job.progress(50, f"Deleted {deleted_unposted} unposted markets")
+            
+            # Flush pending markets
+            deleted_pending = flush_pending_markets()
+            print(f"Deleted {deleted_pending} markets from PendingMarket table")
+            
+            # Show final stats
+            print("\nFinal database state:")
+            show_database_stats()
+            
+            # Final summary
+            print(f"\nSummary: Deleted {deleted_unposted} unposted markets and {deleted_pending} pending markets")
+            print("You can now run the pipeline to refetch and recategorize markets")
     
-    print("===> Returning success response")
-    return jsonify({
-        "success": True,
-        "message": "Process to flush unposted markets started"
-    })
+    return enqueue_job(
+        "flush_unposted_markets", run_flush_unposted_markets,
+        "Flush unposted markets process", "Process to flush unposted markets started"
+    )
 
 @app.route('/runs')
 def get_runs():
@@ -1057,6 +948,27 @@ def get_runs():
                 "error": str(e)
             }), 500
 
+@app.route('/runs/<int:run_id>/stages')
+def get_run_stages(run_id):
+    """API endpoint to get the stage timings of a pipeline run"""
+    with app.app_context():
+        try:
+            stages = PipelineStageMetric.query.filter_by(run_id=run_id).order_by(PipelineStageMetric.id).all()
+            return jsonify({
+                "run_id": run_id,
+                "count": len(stages),
+                "stages": [stage.to_dict() for stage in stages]
+            })
+        except Exception as e:
+            return jsonify({
+                "error": str(e)
+            }), 500
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timings, external call counters and queue depths in the Prometheus text format"""
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/static/<path:path>')
 def serve_static(path):
     """Serve static files"""
@@ -1228,6 +1140,7 @@ def pending_markets():
     """Show the pending markets with their categories."""
     # Import here to avoid circular imports
     from models import ApprovalLog, PendingMarket
+    from utils.database import column_values, load_scalars
     TEMPLATE = """
     <!DOCTYPE html>
     <html>
@@ -1368,17 +1281,16 @@ def pending_markets():
     
     with app.app_context():
         # First, get IDs of markets that have been rejected
-        rejected_ids = [
-            log.poly_id for log in ApprovalLog.query.filter_by(decision='rejected').all()
-        ]
+        rejected_ids = column_values(ApprovalLog.query.filter_by(decision='rejected'), ApprovalLog.poly_id)
         
-        # Get all pending markets that haven't been rejected
+        # Get all pending markets that haven't been rejected (the page only shows options of the JSON columns)
+        query = load_scalars(PendingMarket.query, PendingMarket, "options")
         if rejected_ids:
-            pending_markets = PendingMarket.query.filter(
+            pending_markets = query.filter(
                 ~PendingMarket.poly_id.in_(rejected_ids)
             ).all()
         else:
-            pending_markets = PendingMarket.query.all()
+            pending_markets = query.all()
         
     return render_template_string(TEMPLATE, markets=pending_markets)
 
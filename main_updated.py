@@ -13,18 +13,14 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 
-from flask import Flask, request, jsonify, redirect, url_for, render_template_string
-from models_updated import db, Event, Market, PendingMarket, ProcessedMarket, PipelineRun, ApprovalEvent
+from flask import request, jsonify, redirect, url_for, render_template_string
+from models_updated import db, Market, ProcessedMarket, PipelineRun, ApprovalEvent, StageCounter, STAGE_COUNTER_MODELS
+from utils.database import create_app, init_db
+from utils.stage_counters import read_stage_counts
 
 # Initialize Flask app
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-db.init_app(app)
+app = create_app(__name__)
+init_db(app, db)
 
 # Global status dictionary to track pipeline state
 pipeline_status = {
@@ -603,16 +599,13 @@ def run_pipeline():
 def get_database_stats():
     """Get statistics from the database for display in the UI"""
     with app.app_context():
-        event_count = db.session.query(Event).count()
-        market_count = db.session.query(Market).count()
-        pending_count = db.session.query(PendingMarket).count()
-        deployed_count = db.session.query(Market).filter(Market.apechain_market_id != None).count()
+        counts = read_stage_counts(db.session, STAGE_COUNTER_MODELS, StageCounter)
         
         return {
-            "event_count": event_count,
-            "market_count": market_count,
-            "pending_count": pending_count,
-            "deployed_count": deployed_count
+            "event_count": counts.get("events", 0),
+            "market_count": counts.get("markets", 0),
+            "pending_count": counts.get("pending", 0),
+            "deployed_count": counts.get("markets.deployed", 0)
         }
 
 @app.route('/')
@@ -27,28 +27,23 @@ logging.basicConfig(
 logger = logging.getLogger('migration')
 
 # Flask setup for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_db_engine, create_app, init_db, iter_chunks, stream_results
+app = create_app(__name__)
 
 # Import both old and new models
 from models import db as old_db
 from models import Market as OldMarket
 from models import PendingMarket as OldPendingMarket
 from models import ProcessedMarket as OldProcessedMarket
+init_db(app, old_db)
 
 # Import SQLAlchemy utilities
-from sqlalchemy import MetaData, Table, Column, String, Text, Boolean, Integer, BigInteger, DateTime, ForeignKey, JSON
+from sqlalchemy import text, MetaData, Table, Column, String, Text, Boolean, Integer, BigInteger, DateTime, ForeignKey, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from sqlalchemy import create_engine
 
 # Create engine for direct table operations
-engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+engine = create_db_engine(app.config["SQLALCHEMY_DATABASE_URI"])
 metadata = MetaData()
 
 def generate_event_id(event_name: str) -> str:
@@ -183,12 +178,15 @@ def extract_and_create_events():
     Extract events from existing markets and create event records.
     """
     with app.app_context():
-        # Get all markets
-        markets = OldMarket.query.all()
+        # Stream the markets (only the columns used here)
+        markets = stream_results(old_db.session.query(OldMarket.id, OldMarket.question, OldMarket.category,
+                                                       OldMarket.banner_uri, OldMarket.icon_url))
         events = {}  # Dictionary to store unique events
+        market_count = 0
         
         # Extract events from markets
         for market in markets:
+            market_count += 1
             # Extract event name
             market_data = {
                 'question': market.question,
@@ -231,7 +229,7 @@ def extract_and_create_events():
                     conn.execute(query, **event_data)
                     logger.info(f"Created event {event_id}: {event_data['name']}")
         
-        logger.info(f"Created {len(events)} events from {len(markets)} markets")
+        logger.info(f"Created {len(events)} events from {market_count} markets")
         
         return events
 
@@ -243,81 +241,95 @@ def update_markets_with_event_ids(events: Dict[str, Dict[str, Any]]):
         events: Dictionary of event_id -> event_data
     """
     with app.app_context():
-        # Get all markets
-        markets = OldMarket.query.all()
+        # Read the markets in chunks
+        markets = old_db.session.query(OldMarket.id, OldMarket.question, OldMarket.category)
+        updated = 0
         
-        # Update markets with event IDs
-        for market in markets:
-            # Extract event name
-            market_data = {
-                'question': market.question,
-                'description': '',
-                'category': market.category
-            }
-            event_name = extract_event_name_from_market(market_data)
-            event_id = generate_event_id(event_name)
+        # Update markets with event IDs, one transaction per chunk
+        for chunk in iter_chunks(markets, OldMarket.id, session=old_db.session):
+            updates = []
+            for market in chunk:
+                # Extract event name
+                market_data = {
+                    'question': market.question,
+                    'description': '',
+                    'category': market.category
+                }
+                event_name = extract_event_name_from_market(market_data)
+                updates.append({'event_id': generate_event_id(event_name), 'id': market.id})
             
-            # Update market
-            with engine.connect() as conn:
-                conn.execute(
-                    f"UPDATE markets SET event_id = '{event_id}' WHERE id = '{market.id}'"
-                )
+            # Update markets
+            with engine.begin() as conn:
+                conn.execute(text("UPDATE markets SET event_id = :event_id WHERE id = :id"), updates)
+            updated += len(updates)
+            logger.info(f"Updated {updated} markets with event IDs so far")
         
-        logger.info(f"Updated {len(markets)} markets with event IDs")
+        logger.info(f"Updated {updated} markets with event IDs")
 
 def update_pending_markets_with_event_info():
     """
     Update pending markets with event information.
     """
     with app.app_context():
-        # Get all pending markets
-        pending_markets = OldPendingMarket.query.all()
+        # Read the pending markets in chunks
+        pending_markets = old_db.session.query(OldPendingMarket.poly_id, OldPendingMarket.question,
+                                               OldPendingMarket.category)
+        updated = 0
         
-        # Update pending markets with event info
-        for market in pending_markets:
-            # Extract event name
-            market_data = {
-                'question': market.question,
-                'description': '',
-                'category': market.category
-            }
-            event_name = extract_event_name_from_market(market_data)
-            event_id = generate_event_id(event_name)
+        # Update pending markets with event info, one transaction per chunk
+        for chunk in iter_chunks(pending_markets, OldPendingMarket.poly_id, session=old_db.session):
+            updates = []
+            for market in chunk:
+                # Extract event name
+                market_data = {
+                    'question': market.question,
+                    'description': '',
+                    'category': market.category
+                }
+                event_name = extract_event_name_from_market(market_data)
+                updates.append({'event_name': event_name, 'event_id': generate_event_id(event_name),
+                                'poly_id': market.poly_id})
             
-            # Update pending market
-            with engine.connect() as conn:
-                conn.execute(
-                    f"UPDATE pending_markets SET event_name = '{event_name}', event_id = '{event_id}' WHERE poly_id = '{market.poly_id}'"
-                )
+            # Update pending markets
+            with engine.begin() as conn:
+                conn.execute(text("UPDATE pending_markets SET event_name = :event_name, event_id = :event_id "
+                                  "WHERE poly_id = :poly_id"), updates)
+            updated += len(updates)
+            logger.info(f"Updated {updated} pending markets with event info so far")
         
-        logger.info(f"Updated {len(pending_markets)} pending markets with event info")
+        logger.info(f"Updated {updated} pending markets with event info")
 
 def update_processed_markets_with_event_info():
     """
     Update processed markets with event information.
     """
     with app.app_context():
-        # Get all processed markets
-        processed_markets = OldProcessedMarket.query.all()
+        # Read the processed markets in chunks
+        processed_markets = old_db.session.query(OldProcessedMarket.condition_id, OldProcessedMarket.question)
+        updated = 0
         
-        # Update processed markets with event info
-        for market in processed_markets:
-            # Extract event name
-            market_data = {
-                'question': market.question,
-                'description': '',
-                'category': 'news'  # Default category
-            }
-            event_name = extract_event_name_from_market(market_data)
-            event_id = generate_event_id(event_name)
+        # Update processed markets with event info, one transaction per chunk
+        for chunk in iter_chunks(processed_markets, OldProcessedMarket.condition_id, session=old_db.session):
+            updates = []
+            for market in chunk:
+                # Extract event name
+                market_data = {
+                    'question': market.question,
+                    'description': '',
+                    'category': 'news'  # Default category
+                }
+                event_name = extract_event_name_from_market(market_data)
+                updates.append({'event_name': event_name, 'event_id': generate_event_id(event_name),
+                                'condition_id': market.condition_id})
             
-            # Update processed market
-            with engine.connect() as conn:
-                conn.execute(
-                    f"UPDATE processed_markets SET event_name = '{event_name}', event_id = '{event_id}' WHERE condition_id = '{market.condition_id}'"
-                )
+            # Update processed markets
+            with engine.begin() as conn:
+                conn.execute(text("UPDATE processed_markets SET event_name = :event_name, event_id = :event_id "
+                                  "WHERE condition_id = :condition_id"), updates)
+            updated += len(updates)
+            logger.info(f"Updated {updated} processed markets with event info so far")
         
-        logger.info(f"Updated {len(processed_markets)} processed markets with event info")
+        logger.info(f"Updated {updated} processed markets with event info")
 
 def main():
     """
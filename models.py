@@ -6,6 +6,9 @@ from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.dialects.postgresql import JSON
 
+from utils.raw_archive import raw_data_synonym
+from utils.stage_counters import track_stage_counters
+
 # Initialize database
 db = SQLAlchemy()
 
@@ -15,6 +18,8 @@ PENDING_MARKET_MAX_AGE_DAYS = 7
 class Market(db.Model):
     """Market model for storing market data."""
     __tablename__ = 'markets'
+    # Work queue index: markets in a lifecycle status, oldest first (see utils/lifecycle.py)
+    __table_args__ = (db.Index('ix_markets_status_updated_at', 'status', 'updated_at'),)
 
     id = db.Column(db.String(255), primary_key=True)
     question = db.Column(db.Text, nullable=False)
@@ -148,7 +153,8 @@ class PendingMarket(db.Model):
     option_market_ids = db.Column(JSON)  # Mapping of option name -> original market ID
     expiry = db.Column(db.BigInteger)
     slack_message_id = db.Column(db.String(255))
-    raw_data = db.Column(JSON)  # Complete original data
+    _raw_data = db.deferred(db.Column('raw_data', JSON))  # Complete original data (NULL once archived)
+    raw_data = raw_data_synonym('pending_markets', 'poly_id')
     needs_manual_categorization = db.Column(db.Boolean, default=False)
     posted = db.Column(db.Boolean, default=False)  # Track if posted to Slack
     is_event = db.Column(db.Boolean, default=False)  # Whether this is an event (not a binary market)
@@ -239,7 +245,8 @@ class ProcessedMarket(db.Model):
     approver = db.Column(db.String(255))  # User ID of approver/rejecter
     
     # Original raw data
-    raw_data = db.Column(JSON)  # Store the original API response JSON
+    _raw_data = db.deferred(db.Column('raw_data', JSON))  # Store the original API response JSON (NULL once archived)
+    raw_data = raw_data_synonym('processed_markets', 'condition_id')
     
     def to_dict(self):
         """Convert model to dictionary."""
@@ -255,4 +262,145 @@ class ProcessedMarket(db.Model):
             'approved': self.approved,
             'approval_date': self.approval_date.isoformat() if self.approval_date else None,
             'approver': self.approver
-        }
\ No newline at end of file
+        }
+
+class PipelineJob(db.Model):
+    """
+    Model for background jobs triggered from the web interface.
+    Each row tracks one queued/running job so duplicate triggers can be
+    detected by idempotency key and progress can be reported to the UI.
+    """
+    __tablename__ = 'pipeline_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False, index=True)
+    idempotency_key = db.Column(db.String(255), index=True)
+    status = db.Column(db.String(50), default='queued', index=True)  # queued, running, completed, failed
+    progress = db.Column(db.Integer, default=0)  # Percentage complete (0-100)
+    message = db.Column(db.Text)  # Last progress message
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert model to dictionary."""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'idempotency_key': self.idempotency_key,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+class PipelineLogEntry(db.Model):
+    """
+    Model for log output captured from background jobs.
+    Entries are written in batches by the per-run log sinks (utils/run_logs.py).
+    """
+    __tablename__ = 'pipeline_log_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, nullable=False, index=True)  # ID of the PipelineJob
+    run_id = db.Column(db.Integer, index=True)  # ID of the PipelineRun, if the job is a pipeline run
+    seq = db.Column(db.Integer, nullable=False)  # Sequence number within the job
+    level = db.Column(db.String(20))
+    source = db.Column(db.String(255))  # Logger name or stdout/stderr
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert model to the log entry format used by utils.run_logs."""
+        return {
+            'seq': self.seq,
+            'timestamp': self.created_at.strftime("%Y-%m-%d %H:%M:%S") if self.created_at else None,
+            'level': self.level,
+            'source': self.source,
+            'message': self.message,
+        }
+
+class PipelineStageMetric(db.Model):
+    """
+    Model for per-stage timings of pipeline runs.
+    Rows are written by utils.metrics.save_stage_metrics at the end of a run.
+    """
+    __tablename__ = 'pipeline_stage_metrics'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, index=True)  # ID of the PipelineRun
+    stage = db.Column(db.String(50), nullable=False, index=True)  # fetch, filter, categorize, ...
+    status = db.Column(db.String(20))  # success or error
+    duration_ms = db.Column(db.Integer)
+    items_in = db.Column(db.Integer)
+    items_out = db.Column(db.Integer)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert model to dictionary."""
+        return {
+            'id': self.id,
+            'run_id': self.run_id,
+            'stage': self.stage,
+            'status': self.status,
+            'duration_ms': self.duration_ms,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+        }
+
+class PipelineCheckpoint(db.Model):
+    """
+    Model for the checkpoints of pipeline runs.
+    Rows are written by utils.checkpoints.RunCheckpoints so a failed run can
+    be resumed; they are deleted when the run completes.
+    """
+    __tablename__ = 'pipeline_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, nullable=False)  # ID of the PipelineRun
+    stage = db.Column(db.String(50), nullable=False)  # fetch, prioritize, categorize, store, ...
+    item_key = db.Column(db.String(255))  # Completed item, or NULL for the stage output
+    fingerprint = db.Column(db.String(64))  # Hash of the stage inputs
+    data = db.Column(JSON)  # Stage or item output
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_pipeline_checkpoints_run_stage', 'run_id', 'stage'),
+    )
+
+class MarketTransition(db.Model):
+    """
+    Model for the log of market status transitions.
+    Rows are written by utils.lifecycle.transition.
+    """
+    __tablename__ = 'market_transitions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    market_id = db.Column(db.String(255), nullable=False, index=True)
+    from_status = db.Column(db.String(50))
+    to_status = db.Column(db.String(50), nullable=False)
+    actor = db.Column(db.String(255))  # Slack user or script that made the transition
+    reason = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class StageCounter(db.Model):
+    """
+    Model for pipeline status counters.
+    Rows are maintained by utils.stage_counters on every status transition.
+    """
+    __tablename__ = 'stage_counters'
+    
+    name = db.Column(db.String(255), primary_key=True)  # e.g. pending.posted, markets.status.deployed
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Status counters for the tables above
+STAGE_COUNTER_MODELS = (Market, PendingMarket, ProcessedMarket, ApprovalLog)
+track_stage_counters(*STAGE_COUNTER_MODELS)
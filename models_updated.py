@@ -12,6 +12,9 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from flask_sqlalchemy import SQLAlchemy
 
+from utils.raw_archive import raw_data_synonym
+from utils.stage_counters import track_stage_counters
+
 # Create SQLAlchemy base class
 db = SQLAlchemy()
 
@@ -42,6 +45,8 @@ class Market(db.Model):
     Market model for storing market data.
     """
     __tablename__ = 'markets'
+    # Work queue index: markets in a lifecycle status, oldest first (see utils/lifecycle.py)
+    __table_args__ = (db.Index('ix_markets_status_updated_at', 'status', 'updated_at'),)
     
     id = db.Column(db.String(255), primary_key=True)
     question = db.Column(db.Text, nullable=False)
@@ -111,11 +116,16 @@ class PendingMarket(db.Model):
     option_images = db.Column(db.JSON)  # Mapping of option name -> image URL
     expiry = db.Column(db.BigInteger)
     slack_message_id = db.Column(db.String(255))
-    raw_data = db.Column(db.JSON)  # Complete original data
+    _raw_data = db.deferred(db.Column('raw_data', db.JSON))  # Complete original data (NULL once archived)
+    raw_data = raw_data_synonym('pending_markets', 'poly_id')
     needs_manual_categorization = db.Column(db.Boolean, default=False)
     posted = db.Column(db.Boolean, default=False)  # Track if posted to Slack
+    is_event = db.Column(db.Boolean, default=False)  # Whether this is an event (not a binary market)
     fetched_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    # Event tracking fields (added by the event model migrations)
+    event_id = db.Column(db.String(255))  # ID of the associated event
+    event_name = db.Column(db.Text)  # Name of the associated event
 
 class ProcessedMarket(db.Model):
     """
@@ -139,7 +149,11 @@ class ProcessedMarket(db.Model):
     approval_date = db.Column(db.DateTime)  # When approval/rejection happened
     approver = db.Column(db.String(255))  # User ID of approver/rejecter
     # Original raw data
-    raw_data = db.Column(db.JSON)  # Store the original API response JSON
+    _raw_data = db.deferred(db.Column('raw_data', db.JSON))  # Store the original API response JSON (NULL once archived)
+    raw_data = raw_data_synonym('processed_markets', 'condition_id')
+    # Event tracking fields (added by the event model migrations)
+    event_id = db.Column(db.String(255))  # ID of the associated event
+    event_name = db.Column(db.Text)  # Name of the associated event
 
 class ApprovalLog(db.Model):
     """
@@ -155,4 +169,84 @@ class ApprovalLog(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     
     # Relationship
-    pending_market = relationship('PendingMarket', backref='approval_logs')
\ No newline at end of file
+    pending_market = relationship('PendingMarket', backref='approval_logs')
+
+class PipelineStageMetric(db.Model):
+    """
+    Model for per-stage timings of pipeline runs.
+    Rows are written by utils.metrics.save_stage_metrics at the end of a run.
+    """
+    __tablename__ = 'pipeline_stage_metrics'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, index=True)  # ID of the PipelineRun
+    stage = db.Column(db.String(50), nullable=False, index=True)  # fetch, filter, categorize, ...
+    status = db.Column(db.String(20))  # success or error
+    duration_ms = db.Column(db.Integer)
+    items_in = db.Column(db.Integer)
+    items_out = db.Column(db.Integer)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert model to dictionary."""
+        return {
+            'id': self.id,
+            'run_id': self.run_id,
+            'stage': self.stage,
+            'status': self.status,
+            'duration_ms': self.duration_ms,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+        }
+
+class PipelineCheckpoint(db.Model):
+    """
+    Model for the checkpoints of pipeline runs.
+    Rows are written by utils.checkpoints.RunCheckpoints so a failed run can
+    be resumed; they are deleted when the run completes.
+    """
+    __tablename__ = 'pipeline_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, nullable=False)  # ID of the PipelineRun
+    stage = db.Column(db.String(50), nullable=False)  # fetch, prioritize, categorize, store, ...
+    item_key = db.Column(db.String(255))  # Completed item, or NULL for the stage output
+    fingerprint = db.Column(db.String(64))  # Hash of the stage inputs
+    data = db.Column(JSON)  # Stage or item output
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_pipeline_checkpoints_run_stage', 'run_id', 'stage'),
+    )
+
+
+class MarketTransition(db.Model):
+    """
+    Model for the log of market status transitions.
+    Rows are written by utils.lifecycle.transition.
+    """
+    __tablename__ = 'market_transitions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    market_id = db.Column(db.String(255), nullable=False, index=True)
+    from_status = db.Column(db.String(50))
+    to_status = db.Column(db.String(50), nullable=False)
+    actor = db.Column(db.String(255))  # Slack user or script that made the transition
+    reason = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class StageCounter(db.Model):
+    """
+    Model for pipeline status counters.
+    Rows are maintained by utils.stage_counters on every status transition.
+    """
+    __tablename__ = 'stage_counters'
+    
+    name = db.Column(db.String(255), primary_key=True)  # e.g. pending.posted, markets.status.deployed
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Status counters for the tables above
+STAGE_COUNTER_MODELS = (Event, Market, PendingMarket, ProcessedMarket, ApprovalLog)
+track_stage_counters(*STAGE_COUNTER_MODELS)
@@ -18,6 +18,9 @@ import re
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 
+from utils.dates import to_epoch
+from utils.market_priority import top_k
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -113,28 +116,23 @@ def filter_future_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]
             continue
         
         # Check end date if available
-        end_date_iso = market.get("end_date_iso")
+        end_ts = to_epoch(market.get("end_date_iso"))
         has_future_end_date = False
         
-        if end_date_iso:
-            try:
-                end_date = datetime.fromisoformat(end_date_iso.replace("Z", "+00:00"))
+        if end_ts is not None:
+            # Check if the end date is in the future
+            if end_ts > now.timestamp():
+                has_future_end_date = True
+                days_in_future = int((end_ts - now.timestamp()) // 86400)
                 
-                # Check if the end date is in the future
-                if end_date > now:
-                    has_future_end_date = True
-                    days_in_future = (end_date - now).days
-                    
-                    # Higher score for markets ending soon (but not too soon)
-                    if days_in_future < 30:
-                        score += 5  # Near-term markets are more relevant
-                    else:
-                        score += 2
+                # Higher score for markets ending soon (but not too soon)
+                if days_in_future < 30:
+                    score += 5  # Near-term markets are more relevant
                 else:
-                    # Expired market, heavy penalty
-                    score -= 20
-            except Exception as e:
-                logger.debug(f"Error parsing end_date_iso: {e}")
+                    score += 2
+            else:
+                # Expired market, heavy penalty
+                score -= 20
         
         # Find years mentioned in the question
         years_mentioned = year_pattern.findall(question)
@@ -176,14 +174,11 @@ def filter_future_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]
         
         scored_markets.append(market_with_score)
     
-    # Sort markets by score (descending)
-    scored_markets.sort(key=lambda x: x["score"], reverse=True)
-    
     # Filter out markets with very negative scores as they're almost certainly expired
-    future_markets = [m["market"] for m in scored_markets if m["score"] > -5]
+    future_markets = [m for m in scored_markets if m["score"] > -5]
     
-    # Limit to top N markets
-    top_markets = future_markets[:50]  # Adjust this number as needed
+    # Limit to top N markets by score (descending)
+    top_markets = [m["market"] for m in top_k(future_markets, 50, lambda x: x["score"])]  # Adjust this number as needed
     
     logger.info(f"Filtered {len(markets)} markets to {len(future_markets)} possible future markets")
     logger.info(f"Selected top {len(top_markets)} markets by relevance score")
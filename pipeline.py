@@ -24,13 +24,14 @@ import sys
 import time
 import json
 import logging
+import argparse
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
 import sqlalchemy as sa
 
 from utils.batch_categorizer import batch_categorize_markets
-from models import db, Market, ProcessedMarket, PipelineRun
+from models import db, Market, ProcessedMarket, PipelineRun, PipelineStageMetric
 from filter_active_markets import fetch_markets, filter_active_markets
 from fetch_active_markets_with_tracker import post_new_markets, filter_new_markets
 from check_market_approvals import check_market_approvals
@@ -38,6 +39,8 @@ from check_deployment_approvals import check_deployment_approvals, post_markets_
 from categorize_approved_markets import get_uncategorized_approved_markets, categorize_markets
 from utils.market_transformer import MarketTransformer
 from utils.option_image_fixer import apply_image_fixes, verify_option_images
+from utils.metrics import stage_timer, save_stage_metrics
+from utils.profiling import profile_run, fixture_replay
 
 # Configure logging
 logging.basicConfig(
@@ -54,15 +57,20 @@ class PolymarketPipeline:
     and tracks pipeline status and statistics.
     """
     
-    def __init__(self, db_run_id: Optional[int] = None):
+    def __init__(self, db_run_id: Optional[int] = None, profile: Optional[bool] = None,
+                 replay_fixtures: Optional[str] = None):
         """
         Initialize the pipeline.
         
         Args:
             db_run_id: Optional ID of an existing PipelineRun database record
+            profile: Profile each stage (None falls back to PIPELINE_PROFILE)
+            replay_fixtures: Optional fixture file to replay Gamma API responses from
         """
         self.start_time = datetime.now()
         self.db_run_id = db_run_id
+        self.profile = profile
+        self.replay_fixtures = replay_fixtures
         
         # Initialize pipeline statistics
         self.stats = {
@@ -163,7 +171,9 @@ class PolymarketPipeline:
         logger.info(f"Starting pipeline run #{run_count}")
         
         logger.info(f"Fetching markets from Polymarket API (variant: {run_count})")
-        markets = fetch_markets(variant=run_count)
+        with stage_timer("fetch", run_id=self.db_run_id) as timing:
+            markets = fetch_markets(variant=run_count)
+            timing.items_out = len(markets) if markets else 0
         
         if not markets:
             logger.error("Failed to fetch markets from API")
@@ -173,7 +183,9 @@ class PolymarketPipeline:
         logger.info(f"Fetched {len(markets)} markets from API")
         
         # Filter active markets
-        filtered_markets = filter_active_markets(markets)
+        with stage_timer("filter", run_id=self.db_run_id, items_in=len(markets)) as timing:
+            filtered_markets = filter_active_markets(markets)
+            timing.items_out = len(filtered_markets)
         
         self.update_stats(markets_filtered=len(filtered_markets))
         logger.info(f"Filtered to {len(filtered_markets)} active markets")
@@ -220,12 +232,14 @@ class PolymarketPipeline:
         
         # Now transform markets to combine related ones into multi-option markets
         logger.info("Transforming markets to combine related ones")
-        transformer = MarketTransformer()
-        transformed_markets = transformer.transform_markets(filtered_markets)
-        
-        # Apply fixes to ensure each option has its own unique image
-        logger.info("Applying option image fixes to ensure unique images for all options")
-        transformed_markets = apply_image_fixes(transformed_markets)
+        with stage_timer("transform", run_id=self.db_run_id, items_in=len(filtered_markets)) as timing:
+            transformer = MarketTransformer()
+            transformed_markets = transformer.transform_markets(filtered_markets)
+            
+            # Apply fixes to ensure each option has its own unique image
+            logger.info("Applying option image fixes to ensure unique images for all options")
+            transformed_markets = apply_image_fixes(transformed_markets)
+            timing.items_out = len(transformed_markets)
         
         # Verify and log option images
         for market in transformed_markets:
@@ -289,7 +303,9 @@ class PolymarketPipeline:
                     logger.error(f"Error parsing outcomes: {str(e)}")
         
         logger.info("Filtering new markets")
-        new_markets = filter_new_markets(markets)
+        with stage_timer("filter", run_id=self.db_run_id, items_in=len(markets)) as timing:
+            new_markets = filter_new_markets(markets)
+            timing.items_out = len(new_markets)
         
         # Log which markets we have after filtering
         logger.info("Markets after filtering:")
@@ -320,7 +336,9 @@ class PolymarketPipeline:
             
         # Post markets to Slack
         logger.info("Posting new markets to Slack for approval")
-        posted_markets = post_new_markets(new_markets)
+        with stage_timer("slack_post", run_id=self.db_run_id, items_in=len(new_markets)) as timing:
+            posted_markets = post_new_markets(new_markets)
+            timing.items_out = len(posted_markets)
         
         self.update_stats(markets_posted=len(posted_markets))
         logger.info(f"Posted {len(posted_markets)} markets to Slack")
@@ -335,7 +353,9 @@ class PolymarketPipeline:
             tuple: (pending, approved, rejected) counts
         """
         logger.info("Checking for market approvals in Slack")
-        pending, approved, rejected = check_market_approvals()
+        with stage_timer("approval_scan", run_id=self.db_run_id) as timing:
+            pending, approved, rejected = check_market_approvals()
+            timing.items_out = approved + rejected
         
         self.update_stats(
             markets_approved=self.stats.get("markets_approved", 0) + approved,
@@ -347,11 +367,14 @@ class PolymarketPipeline:
         # Categorize approved markets before deployment approval
         if approved > 0:
             logger.info("Categorizing newly approved markets using batch categorization")
-            uncategorized_markets = get_uncategorized_approved_markets()
-            if uncategorized_markets:
-                logger.info(f"Found {len(uncategorized_markets)} uncategorized approved markets")
-                categorized_count = categorize_markets(uncategorized_markets)
-                logger.info(f"Successfully categorized {categorized_count} markets")
+            with stage_timer("categorize", run_id=self.db_run_id, items_in=0) as timing:
+                timing.items_out = 0
+                for uncategorized_markets in get_uncategorized_approved_markets():
+                    timing.items_in += len(uncategorized_markets)
+                    timing.items_out += categorize_markets(uncategorized_markets)
+            if timing.items_in:
+                logger.info(f"Found {timing.items_in} uncategorized approved markets")
+                logger.info(f"Successfully categorized {timing.items_out} markets")
             else:
                 logger.info("No uncategorized approved markets found")
         
@@ -359,7 +382,17 @@ class PolymarketPipeline:
     
     def run(self) -> int:
         """
-        Run the complete pipeline.
+        Run the complete pipeline, profiling each stage if enabled.
+        
+        Returns:
+            int: Exit code (0 for success, non-zero for failure)
+        """
+        with fixture_replay(self.replay_fixtures), profile_run(self.db_run_id, enabled=self.profile):
+            return self.run_stages()
+    
+    def run_stages(self) -> int:
+        """
+        Run all pipeline stages.
         
         Returns:
             int: Exit code (0 for success, non-zero for failure)
@@ -388,7 +421,9 @@ class PolymarketPipeline:
                 
                 # Post categorized markets for deployment approval
                 logger.info("Posting categorized markets for deployment approval")
-                deployment_ready_markets = post_markets_for_deployment_approval()
+                with stage_timer("slack_post", run_id=self.db_run_id) as timing:
+                    deployment_ready_markets = post_markets_for_deployment_approval()
+                    timing.items_out = len(deployment_ready_markets) if deployment_ready_markets else 0
                 if deployment_ready_markets:
                     logger.info(f"Posted {len(deployment_ready_markets)} markets for deployment approval")
                 else:
@@ -396,7 +431,9 @@ class PolymarketPipeline:
                 
                 # Check for deployment approvals
                 logger.info("Checking for deployment approvals")
-                pending_deploy, approved_deploy, rejected_deploy = check_deployment_approvals()
+                with stage_timer("deploy", run_id=self.db_run_id) as timing:
+                    pending_deploy, approved_deploy, rejected_deploy = check_deployment_approvals()
+                    timing.items_out = approved_deploy
                 logger.info(f"Deployment results: {pending_deploy} pending, {approved_deploy} approved, {rejected_deploy} rejected")
                 
                 # Update deployment stats
@@ -423,12 +460,22 @@ class PolymarketPipeline:
                 logger.error(f"Pipeline failed with exception: {str(e)}")
                 self.update_run_record(status="failed", error=str(e))
                 return 1
+            
+            finally:
+                # Persist per-stage timings for this run
+                if self.db_run_id:
+                    save_stage_metrics(db, PipelineStageMetric, self.db_run_id)
 
 
 def main():
     """
     Main function to run the pipeline.
     """
+    parser = argparse.ArgumentParser(description='Run the Polymarket pipeline.')
+    parser.add_argument('--profile', action='store_true', default=None, help='Write per-stage cProfile/tracemalloc reports to tmp/profiles')
+    parser.add_argument('--replay-fixtures', metavar='PATH', help='Replay Gamma API responses from a recorded fixture file')
+    args = parser.parse_args()
+    
     # Import Flask app to get application context
     from main import app
     
@@ -443,7 +490,8 @@ def main():
         db.session.commit()
         
         # Run pipeline
-        pipeline = PolymarketPipeline(db_run_id=run.id)
+        pipeline = PolymarketPipeline(db_run_id=run.id, profile=args.profile,
+                                      replay_fixtures=args.replay_fixtures)
         exit_code = pipeline.run()
         
         # Update final status
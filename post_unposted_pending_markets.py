@@ -7,7 +7,6 @@ formats them with category badges, posts them to Slack for approval,
 and updates the database to track which markets have been posted.
 """
 
-import os
 import sys
 import json
 import logging
@@ -15,20 +14,17 @@ from datetime import datetime
 from typing import List, Dict, Any, Tuple, Optional
 
 # Flask setup for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db
+app = create_app(__name__)
 
 # Local imports
 from models import db, PendingMarket, PipelineRun
+from utils.database import load_scalars
 from utils.messaging import post_formatted_message_to_slack, add_reaction_to_message
+from utils.slack_templates import render_market_review
 
 # Initialize app
-db.init_app(app)
+init_db(app, db)
 
 # Setup logging
 logging.basicConfig(
@@ -70,7 +66,10 @@ def update_pipeline_run(pipeline_run, status, markets_processed=0, markets_appro
 
 def format_market_message(market: PendingMarket) -> Tuple[str, List[Dict[str, Any]]]:
     """
-    Format a market message for posting to Slack with category badge and event information.
+    Format a market message for posting to Slack.
+    
+    All scripts posting pending markets share the review message template,
+    so a market is posted the same way whichever script posts it.
     
     Args:
         market: PendingMarket model instance
@@ -78,100 +77,7 @@ def format_market_message(market: PendingMarket) -> Tuple[str, List[Dict[str, An
     Returns:
         Tuple[str, List[Dict]]: Formatted message text and blocks
     """
-    # Define emoji map for categories
-    category_emoji = {
-        'politics': ':ballot_box_with_ballot:',
-        'crypto': ':coin:',
-        'sports': ':sports_medal:',
-        'business': ':chart_with_upwards_trend:',
-        'culture': ':performing_arts:',
-        'tech': ':computer:',
-        'news': ':newspaper:',
-        # Add fallback for unknown categories
-        'unknown': ':question:'
-    }
-    
-    # Get emoji for this category
-    category = market.category.lower() if market.category else 'news'
-    emoji = category_emoji.get(category, category_emoji['unknown'])
-    
-    # Parse options if they're stored as a string
-    options_list = []
-    if market.options:
-        if isinstance(market.options, str):
-            try:
-                options_list = json.loads(market.options)
-            except json.JSONDecodeError:
-                options_list = []
-        else:
-            options_list = market.options
-    
-    # Format options list for display
-    option_values = []
-    for option in options_list:
-        if isinstance(option, dict):
-            option_value = option.get('value', 'Unknown')
-            option_values.append(option_value)
-        elif isinstance(option, str):
-            option_values.append(option)
-    
-    options_str = ', '.join(option_values) if option_values else 'Yes, No'
-    
-    # Determine if this market is part of an event
-    has_event = market.event_id and market.event_name
-    event_text = f"Event: {market.event_name}" if has_event else ""
-    
-    # Format message text including event information if available
-    message_text = f"*New Market for Review* *Category:* {emoji} {category.capitalize()}  *Question:* {market.question}  Options: {options_str} {event_text}"
-    
-    # Create blocks for rich formatting
-    blocks = [
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*New Market for Review*\n*Category:* {emoji} {category.capitalize()}"
-            }
-        }
-    ]
-    
-    # Add event information if available
-    if has_event:
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Event:* {market.event_name}"
-            }
-        })
-    
-    blocks.extend([
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Question:* {market.question}"
-            }
-        },
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"Options: {options_str}"
-            }
-        },
-        {
-            "type": "context",
-            "elements": [
-                {
-                    "type": "mrkdwn",
-                    "text": "React with :white_check_mark: to approve or :x: to reject"
-                }
-            ]
-        }
-    ])
-    
-    return message_text, blocks
+    return render_market_review(market)
 
 def get_unposted_markets(limit: int = 10) -> List[PendingMarket]:
     """
@@ -183,7 +89,8 @@ def get_unposted_markets(limit: int = 10) -> List[PendingMarket]:
     Returns:
         List[PendingMarket]: List of unposted pending markets
     """
-    unposted_markets = PendingMarket.query.filter_by(posted=False).limit(limit).all()
+    unposted_markets = load_scalars(PendingMarket.query.filter_by(posted=False), PendingMarket,
+                                    "options", "option_images").limit(limit).all()
     logger.info(f"Found {len(unposted_markets)} unposted pending markets")
     return unposted_markets
 
@@ -15,6 +15,7 @@ from typing import List, Tuple
 
 from main import app
 from models import db, Market
+from utils.lifecycle import transition, work_queue
 
 # Configure logging
 logging.basicConfig(
@@ -41,12 +42,9 @@ def mark_markets_for_deployment(market_ids=None, mark_all=False) -> Tuple[int, i
     try:
         # Find markets to mark
         if mark_all:
-            markets = Market.query.filter_by(status='approved').all()
+            markets = work_queue(Market, 'approved').all()
         else:
-            markets = Market.query.filter(
-                Market.id.in_(market_ids),
-                Market.status == 'approved'
-            ).all()
+            markets = work_queue(Market, 'approved').filter(Market.id.in_(market_ids)).all()
         
         logger.info(f"Found {len(markets)} approved markets to mark for deployment")
         
@@ -59,7 +57,7 @@ def mark_markets_for_deployment(market_ids=None, mark_all=False) -> Tuple[int, i
             
             try:
                 logger.info(f"Marking market {market.id} for deployment: {market.question}")
-                market.status = 'deployment_approved'
+                transition(market, 'deployment_approved', actor='prepare_markets_for_deployment')
                 db.session.commit()
                 marked += 1
                 logger.info(f"Market {market.id} marked for deployment")
@@ -75,7 +73,7 @@ def mark_markets_for_deployment(market_ids=None, mark_all=False) -> Tuple[int, i
 
 def list_approved_markets():
     """List all approved markets that can be marked for deployment."""
-    markets = Market.query.filter_by(status='approved').all()
+    markets = work_queue(Market, 'approved').all()
     
     print(f"\nFound {len(markets)} approved markets:")
     for market in markets:
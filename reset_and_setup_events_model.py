@@ -9,21 +9,15 @@ the first time or when doing a complete schema reset.
 WARNING: THIS WILL DELETE ALL DATA IN THE DATABASE.
 """
 
-import os
 import sys
-from flask import Flask
+from utils.database import create_app, init_db
 
 # Initialize Flask app for database context
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app = create_app(__name__)
 
 # Import database models
 from models_updated import db, Event, Market, PendingMarket, ProcessedMarket
-db.init_app(app)
+init_db(app, db)
 
 def reset_database():
     """Drop all tables and recreate them with the event-based schema."""
@@ -6,7 +6,6 @@ This script drops all tables and recreates a clean schema without image generati
 tables, preserving only the essential structure needed for the core pipeline.
 """
 
-import os
 import sys
 import logging
 from datetime import datetime
@@ -20,23 +19,18 @@ logging.basicConfig(
 logger = logging.getLogger('db_reset')
 
 # Flask setup for database context
-from flask import Flask
-from sqlalchemy import create_engine, MetaData, inspect
+from utils.database import create_db_engine, create_app
+from sqlalchemy import MetaData, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, BigInteger
 from sqlalchemy.dialects.postgresql import JSON
 
 # Initialize app with database connection
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app = create_app(__name__)
 
 # Create database engine and session
-engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+engine = create_db_engine(app.config["SQLALCHEMY_DATABASE_URI"])
 Session = sessionmaker(bind=engine)
 session = Session()
 metadata = MetaData()
@@ -12,11 +12,10 @@ import os
 import sys
 import logging
 from datetime import datetime
-from flask import Flask
+from utils.database import create_db_engine, create_app
 from sqlalchemy import Column, String, Text, Boolean, Integer, BigInteger, DateTime, ForeignKey, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
-from sqlalchemy import create_engine
 
 # Set up logging
 logging.basicConfig(
@@ -26,15 +25,10 @@ logging.basicConfig(
 logger = logging.getLogger('db_setup')
 
 # Flask app for database context
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app = create_app(__name__)
 
 # Create engine and metadata
-engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"])
+engine = create_db_engine(app.config["SQLALCHEMY_DATABASE_URI"])
 Base = declarative_base()
 
 # Define simplified models
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Run the offline pipeline benchmarks.
+
+This script replays the recorded Gamma/CLOB fixtures and synthetic scaled-up
+datasets through the pipeline's hot paths and reports throughput and peak
+memory per stage. No network calls are made.
+
+Usage:
+    python run_benchmarks.py
+    python run_benchmarks.py --sizes 10000 --stages transform_markets_batch
+    python run_benchmarks.py --output tmp/bench.json --baseline tmp/bench_main.json
+
+With --baseline, the script exits with status 1 when any stage is more than
+--tolerance slower than in the baseline results.
+"""
+
+import sys
+import json
+import logging
+import argparse
+
+from utils.benchmark import (
+    SYNTHETIC_SIZES, DEFAULT_TIME_BUDGET, DEFAULT_REGRESSION_TOLERANCE,
+    run_benchmarks, format_results, compare_results
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("run_benchmarks")
+
+def main():
+    """
+    Main function to run the benchmarks.
+    """
+    parser = argparse.ArgumentParser(description='Run the offline pipeline benchmarks.')
+    parser.add_argument('--sizes', type=lambda value: tuple(int(v) for v in value.split(',') if v),
+                        default=SYNTHETIC_SIZES, help='Comma-separated synthetic dataset sizes (default: 10000,100000)')
+    parser.add_argument('--stages', nargs='*', help='Only run these stages')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per fixture (best run is reported)')
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help='Skip a dataset when the projected time of a stage exceeds this many seconds')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against results from an earlier run')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_REGRESSION_TOLERANCE,
+                        help='Allowed relative throughput drop against the baseline (default: 0.25)')
+    args = parser.parse_args()
+
+    results = run_benchmarks(sizes=args.sizes, stages=args.stages, repeat=args.repeat,
+                             time_budget=args.time_budget)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Saved benchmark results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, tolerance=args.tolerance)
+        if regressions:
+            logger.error("Throughput regressions found:")
+            for regression in regressions:
+                logger.error(f"  - {regression}")
+            return 1
+        logger.info("No throughput regressions against the baseline")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
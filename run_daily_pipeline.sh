@@ -17,30 +17,26 @@ fi
 # Create logs directory if it doesn't exist
 mkdir -p logs
 
-# Run the production pipeline to fetch and categorize markets
-echo "Stage 1: Starting main market pipeline at $(date)"
-echo "- Fetching binary markets from Markets API"
-echo "- Fetching event markets from Events API" 
-echo "- Categorizing and transforming markets"
-echo "- Storing in database and posting to Slack"
-python run_pipeline_with_events.py
+# Run the intake and approval streams concurrently
+echo "Starting daily pipeline at $(date)"
+echo "- Intake: fetch -> filter -> categorize -> store -> post to Slack"
+echo "- Approvals: approval scan -> deployment approval message -> deploy"
+python daily_pipeline.py "$@"
 
-# Check exit code for the main pipeline
+# Check exit code for the pipeline
 exit_code=$?
 if [ $exit_code -eq 0 ]; then
     echo "Pipeline completed successfully at $(date)"
     
-    # Reminder for next steps
+    # Reminder for approvals arriving after the approval window
     echo ""
     echo "=============== NEXT STEPS ==============="
-    echo "When markets have been approved/rejected in Slack, run:"
+    echo "For markets approved in Slack after the approval window, run:"
     echo "python check_pending_approvals.py"
-    echo ""
-    echo "To deploy approved markets to Apechain, run:"
-    echo "python deploy_event_markets.py"
+    echo "python check_deployment_approvals.py"
     echo "=========================================="
 else
     echo "Pipeline failed with exit code $exit_code at $(date)"
 fi
 
-exit $exit_code
\ No newline at end of file
+exit $exit_code
@@ -20,28 +20,34 @@ import json
 import logging
 import hashlib
 import argparse
-import requests
 import traceback
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple, Optional
 
+from sqlalchemy import inspect
+
 # Flask app for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db, stream_results
+app = create_app(__name__)
 
 # Import updated models
-from models_updated import db, Event, Market, PendingMarket, ProcessedMarket
-db.init_app(app)
+from models_updated import (db, Event, Market, PendingMarket, ProcessedMarket, PipelineRun, PipelineStageMetric,
+                            PipelineCheckpoint)
+init_db(app, db)
 
 # Import utility functions
 from utils.transform_market_with_events import transform_market_for_apechain, transform_markets_batch
+from utils.market_record import MarketRecord, EventRecord, as_market_record, market_records, event_records
+from utils.dates import now_epoch
+from utils.event_index import EventIndex
+from utils.market_priority import prioritize_markets, prioritize_events
 from utils.market_categorizer import categorize_market
 from utils.messaging import post_formatted_message_to_slack, add_reaction_to_message
+from utils.slack_templates import render_market_review
+from utils.metrics import stage_timer, track_call, set_queue_depth, save_stage_metrics
+from utils.profiling import profile_run, fixture_replay, gamma_get
+from utils.stream_pipeline import StreamPipeline, stream_errors
+from utils.checkpoints import RunCheckpoints, fingerprint
 
 # Set up logging
 logging.basicConfig(
@@ -58,6 +64,18 @@ logger = logging.getLogger('pipeline')
 # API configuration - Polymarket Gamma API is public and doesn't require an API key
 MARKETS_API_URL = "https://gamma-api.polymarket.com/markets?closed=false&archived=false&active=true&limit=100"
 EVENTS_API_URL = "https://gamma-api.polymarket.com/events?closed=false&archived=false&active=true&limit=100"
+
+# Environment variable enabling event-first ingestion (see fetch_event_first_data)
+EVENT_FIRST_ENV_VAR = "PIPELINE_EVENT_FIRST"
+
+# Environment variable enabling the streaming stages (see run_streaming_stages)
+STREAMING_ENV_VAR = "PIPELINE_STREAMING"
+
+# Markets categorized concurrently by the streaming pipeline
+CATEGORIZE_WORKERS = 4
+
+# Maximum number of markets posted to Slack per run
+MAX_SLACK_POSTS = 20
 MARKETS_QUERY = """
 query FetchMarkets($first: Int!, $skip: Int!) {
   markets(
@@ -117,7 +135,8 @@ def fetch_binary_markets(limit: int = 100, skip: int = 0) -> List[Dict[str, Any]
         # Try with REST API endpoint first (markets endpoint)
         try:
             logger.info(f"Fetching binary markets from Markets REST API endpoint")
-            rest_response = requests.get(MARKETS_API_URL, headers=headers)
+            with track_call("gamma", "markets"):
+                rest_response = gamma_get(MARKETS_API_URL, headers=headers)
             rest_response.raise_for_status()
             
             rest_data = rest_response.json()
@@ -160,7 +179,8 @@ def fetch_event_markets(limit: int = 100, skip: int = 0) -> List[Dict[str, Any]]
         # Try with REST API endpoint (events endpoint)
         try:
             logger.info(f"Fetching events from Events REST API endpoint")
-            rest_response = requests.get(EVENTS_API_URL, headers=headers)
+            with track_call("gamma", "events"):
+                rest_response = gamma_get(EVENTS_API_URL, headers=headers)
             rest_response.raise_for_status()
             
             rest_data = rest_response.json()
@@ -181,54 +201,99 @@ def fetch_event_markets(limit: int = 100, skip: int = 0) -> List[Dict[str, Any]]
         logger.error(f"Error fetching events from API: {str(e)}")
         return []
 
-def fetch_all_market_data(limit: int = 100) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+def run_checkpoints(run_id: Optional[int], resuming: bool = False) -> RunCheckpoints:
+    """
+    Get the checkpoints of a pipeline run (see utils/checkpoints.py).
+    
+    Args:
+        run_id: PipelineRun ID (None disables checkpoints)
+        resuming: Whether the run resumes an earlier attempt
+        
+    Returns:
+        RunCheckpoints: Checkpoints of the run
+    """
+    return RunCheckpoints(db, PipelineCheckpoint, run_id, app=app, resuming=resuming)
+
+def fetch_all_market_data(limit: int = 100, checkpoints: Optional[RunCheckpoints] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Fetch both binary markets and event markets from Polymarket API.
     
     Args:
         limit: Maximum number of markets/events to fetch per type
+        checkpoints: Optional run checkpoints; data fetched by an earlier
+            attempt of the run is reused
         
     Returns:
         Tuple of (binary_markets, event_markets)
     """
+    checkpoints = checkpoints or run_checkpoints(None)
+    
     # Fetch both types of market data
-    binary_markets = fetch_binary_markets(limit=limit)
-    event_markets = fetch_event_markets(limit=limit)
+    binary_markets = checkpoints.cached_stage("fetch_binary", fingerprint(limit),
+                                              lambda: fetch_binary_markets(limit=limit))
+    event_markets = checkpoints.cached_stage("fetch_events", fingerprint(limit),
+                                             lambda: fetch_event_markets(limit=limit))
     
     logger.info(f"Fetched {len(binary_markets)} binary markets and {len(event_markets)} events")
     
     return binary_markets, event_markets
 
+def fetch_event_first_data(limit: int = 100, checkpoints: Optional[RunCheckpoints] = None) -> Tuple[List[MarketRecord], List[EventRecord], EventIndex]:
+    """
+    Fetch events with their embedded markets as the only source.
+    
+    The Markets API is not called: single-market events are returned as
+    binary markets (with their event attached) and events with several
+    markets as event markets, so no market is fetched or transformed twice.
+    
+    Args:
+        limit: Maximum number of events to fetch
+        checkpoints: Optional run checkpoints; events fetched by an earlier
+            attempt of the run are reused
+        
+    Returns:
+        Tuple of (binary_markets, event_markets, event_index)
+    """
+    checkpoints = checkpoints or run_checkpoints(None)
+    event_index = EventIndex(checkpoints.cached_stage("fetch_events", fingerprint(limit),
+                                                      lambda: fetch_event_markets(limit=limit)))
+    binary_markets = event_index.binary_markets()
+    event_markets = event_index.multi_market_events()
+    
+    logger.info(f"Event-first fetch: {len(binary_markets)} binary markets and {len(event_markets)} events")
+    
+    return binary_markets, event_markets, event_index
+
 def filter_active_non_expired_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Filter markets to only include active, non-expired ones with banner/icon URLs.
     
     Args:
-        markets: List of market data dictionaries
+        markets: List of market data dictionaries or MarketRecords
         
     Returns:
-        List[Dict[str, Any]]: Filtered list of markets
+        List[Dict[str, Any]]: Filtered list of markets (of the same type as the input)
     """
-    now = datetime.now().timestamp() * 1000  # Current time in milliseconds
+    now = now_epoch()
     
     filtered_markets = []
     for market in markets:
+        record = as_market_record(market)
+        
         # Skip if market is closed, archived, or inactive
-        if market.get('closed') or market.get('archived') or not market.get('active', True):
+        if record.closed or record.archived or not record.active:
             continue
         
         # Skip if market has already expired
-        end_date = market.get('endDate')
-        if end_date and int(end_date) < now:
+        if record.end_ts is not None and record.end_ts < now:
             continue
         
         # Skip if market doesn't have image or icon URLs
-        if not market.get('image') or not market.get('icon'):
+        if not record.image or not record.icon:
             continue
         
         # Skip markets without options/outcomes
-        options = market.get('options') or market.get('outcomes') or []
-        if not options:
+        if not record.outcomes and not record.get('options'):
             continue
         
         # Add to filtered list
@@ -253,16 +318,16 @@ def filter_new_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         existing_market_ids = set()
         
         # Check pending_markets
-        pending_market_ids = db.session.query(PendingMarket.poly_id).all()
-        existing_market_ids.update([m[0] for m in pending_market_ids])
+        pending_market_ids = stream_results(db.session.query(PendingMarket.poly_id))
+        existing_market_ids.update(m[0] for m in pending_market_ids)
         
         # Check markets
-        market_ids = db.session.query(Market.original_market_id).all()
-        existing_market_ids.update([m[0] for m in market_ids if m[0]])
+        market_ids = stream_results(db.session.query(Market.original_market_id))
+        existing_market_ids.update(m[0] for m in market_ids if m[0])
         
         # Check processed_markets
-        processed_ids = db.session.query(ProcessedMarket.condition_id).all()
-        existing_market_ids.update([m[0] for m in processed_ids])
+        processed_ids = stream_results(db.session.query(ProcessedMarket.condition_id))
+        existing_market_ids.update(m[0] for m in processed_ids)
         
         # Filter out markets that are already in the database
         new_markets = [m for m in markets if m.get('conditionId') not in existing_market_ids and m.get('id') not in existing_market_ids]
@@ -283,19 +348,121 @@ def generate_event_id(event_name: str) -> str:
     """
     return hashlib.sha256(event_name.encode()).hexdigest()[:40]
 
-def store_events_and_markets(markets: List[Dict[str, Any]]) -> Tuple[List[Event], List[PendingMarket]]:
+def upsert_event(event_data: Dict[str, Any]) -> Event:
+    """
+    Create an event, or update it if it already exists (in the current session, not committed).
+    
+    Args:
+        event_data: Event data from transform_markets_batch
+        
+    Returns:
+        Event: Created or updated event
+    """
+    event_id = event_data['id']
+    
+    # Check if event already exists
+    existing_event = Event.query.get(event_id)
+    if existing_event:
+        logger.info(f"Event {event_id} already exists, updating")
+        
+        # Update event fields
+        existing_event.name = event_data['name']
+        existing_event.description = event_data.get('description', '')
+        existing_event.category = event_data.get('category', 'news')
+        existing_event.sub_category = event_data.get('sub_category')
+        existing_event.banner_url = event_data.get('banner_url')
+        existing_event.icon_url = event_data.get('icon_url')
+        existing_event.updated_at = datetime.utcnow()
+        
+        return existing_event
+    
+    # Create new event
+    new_event = Event(
+        id=event_id,
+        name=event_data['name'],
+        description=event_data.get('description', ''),
+        category=event_data.get('category', 'news'),
+        sub_category=event_data.get('sub_category'),
+        banner_url=event_data.get('banner_url'),
+        icon_url=event_data.get('icon_url'),
+        source_id=event_data.get('source_id'),
+        raw_data=event_data.get('raw_data')
+    )
+    
+    db.session.add(new_event)
+    logger.info(f"Created new event {event_id}: {event_data['name']}")
+    return new_event
+
+def add_pending_market(market_data: Dict[str, Any], category: str, needs_manual: bool) -> PendingMarket:
+    """
+    Add a categorized market to pending_markets and processed_markets (in the current session, not committed).
+    
+    Args:
+        market_data: Transformed market data
+        category: Market category
+        needs_manual: Whether the category needs manual review
+        
+    Returns:
+        PendingMarket: Created pending market
+    """
+    market_id = market_data['id']
+    question = market_data['question']
+    
+    # Create pending market entry
+    pending_market = PendingMarket(
+        poly_id=market_id,
+        question=question,
+        event_name=market_data.get('event_name'),
+        event_id=market_data.get('event_id'),
+        category=category,
+        banner_url=market_data.get('banner_uri'),
+        icon_url=market_data.get('icon_url'),
+        options=market_data.get('options'),
+        option_images=market_data.get('option_images'),
+        expiry=market_data.get('expiry'),
+        raw_data=market_data.get('raw_data'),
+        needs_manual_categorization=needs_manual,
+        posted=False
+    )
+    
+    db.session.add(pending_market)
+    logger.info(f"Created pending market {market_id}: {question}")
+    
+    # Also add to processed_markets table to prevent duplicates
+    processed_market = ProcessedMarket(
+        condition_id=market_id,
+        question=question,
+        event_name=market_data.get('event_name'),
+        event_id=market_data.get('event_id'),
+        raw_data=market_data.get('raw_data'),
+        posted=False,
+        approved=None  # None means pending
+    )
+    
+    db.session.add(processed_market)
+    return pending_market
+
+def store_events_and_markets(markets: List[Dict[str, Any]], run_id: Optional[int] = None,
+                             checkpoints: Optional[RunCheckpoints] = None) -> Tuple[List[Event], List[PendingMarket]]:
     """
     Process and store events and markets in the database.
     
     Args:
         markets: List of market data dictionaries
+        run_id: Optional PipelineRun ID for stage metrics
+        checkpoints: Optional run checkpoints; categories found by an
+            earlier attempt of the run are reused
         
     Returns:
         Tuple of (List[Event], List[PendingMarket]): Created events and pending markets
     """
+    checkpoints = checkpoints or run_checkpoints(None)
+    
     with app.app_context():
         # Transform markets to extract events
-        events_data, transformed_markets = transform_markets_batch(markets)
+        with stage_timer("transform", run_id=run_id, items_in=len(markets)) as timing:
+            events_data, transformed_markets = transform_markets_batch(markets)
+            timing.items_out = len(transformed_markets)
         
         # Track created objects
         created_events = []
@@ -303,99 +470,40 @@ def store_events_and_markets(markets: List[Dict[str, Any]]) -> Tuple[List[Event]
         
         # First, create or update events
         for event_data in events_data:
-            event_id = event_data['id']
-            
-            # Check if event already exists
-            existing_event = Event.query.get(event_id)
-            if existing_event:
-                logger.info(f"Event {event_id} already exists, updating")
-                
-                # Update event fields
-                existing_event.name = event_data['name']
-                existing_event.description = event_data.get('description', '')
-                existing_event.category = event_data.get('category', 'news')
-                existing_event.sub_category = event_data.get('sub_category')
-                existing_event.banner_url = event_data.get('banner_url')
-                existing_event.icon_url = event_data.get('icon_url')
-                existing_event.updated_at = datetime.utcnow()
-                
-                created_events.append(existing_event)
-            else:
-                # Create new event
-                new_event = Event(
-                    id=event_id,
-                    name=event_data['name'],
-                    description=event_data.get('description', ''),
-                    category=event_data.get('category', 'news'),
-                    sub_category=event_data.get('sub_category'),
-                    banner_url=event_data.get('banner_url'),
-                    icon_url=event_data.get('icon_url'),
-                    source_id=event_data.get('source_id'),
-                    raw_data=event_data.get('raw_data')
-                )
-                
-                db.session.add(new_event)
-                created_events.append(new_event)
-                logger.info(f"Created new event {event_id}: {event_data['name']}")
+            created_events.append(upsert_event(event_data))
         
         # Commit events first to avoid foreign key constraints
         db.session.commit()
         
         # Then, create pending markets
         for market_data in transformed_markets:
-            market_id = market_data['id']
-            
             # Skip if market is already in the database
-            if db.session.query(PendingMarket).filter_by(poly_id=market_id).first():
+            if db.session.query(PendingMarket).filter_by(poly_id=market_data['id']).first():
                 continue
             
             # Categorize the market using GPT-4o-mini
-            question = market_data['question']
-            description = market_data.get('description', '')
-            category, needs_manual = categorize_market(question, description)
-            
-            # Create pending market entry
-            pending_market = PendingMarket(
-                poly_id=market_id,
-                question=question,
-                event_name=market_data.get('event_name'),
-                event_id=market_data.get('event_id'),
-                category=category,
-                banner_url=market_data.get('banner_uri'),
-                icon_url=market_data.get('icon_url'),
-                options=market_data.get('options'),
-                option_images=market_data.get('option_images'),
-                expiry=market_data.get('expiry'),
-                raw_data=market_data.get('raw_data'),
-                needs_manual_categorization=needs_manual,
-                posted=False
-            )
-            
-            db.session.add(pending_market)
-            created_pending_markets.append(pending_market)
-            logger.info(f"Created pending market {market_id}: {question}")
-            
-            # Also add to processed_markets table to prevent duplicates
-            processed_market = ProcessedMarket(
-                condition_id=market_id,
-                question=question,
-                event_name=market_data.get('event_name'),
-                event_id=market_data.get('event_id'),
-                raw_data=market_data.get('raw_data'),
-                posted=False,
-                approved=None  # None means pending
-            )
+            with stage_timer("categorize", items_in=1):
+                category, needs_manual = checkpoints.cached(
+                    "categorize", market_data['id'],
+                    lambda: categorize_market(market_data['question'], market_data.get('description', ''))
+                )
             
-            db.session.add(processed_market)
+            created_pending_markets.append(add_pending_market(market_data, category, needs_manual))
         
         # Commit all changes
         db.session.commit()
         
+        for pending_market in created_pending_markets:
+            checkpoints.save_item("store", pending_market.poly_id)
+        
         return created_events, created_pending_markets
 
 def format_market_message(market: PendingMarket) -> Tuple[str, List[Dict[str, Any]]]:
     """
-    Format a market message for posting to Slack with category badge.
+    Format a market message for posting to Slack.
+    
+    All scripts posting pending markets share the review message template,
+    so a market is posted the same way whichever script posts it.
     
     Args:
         market: PendingMarket model instance
@@ -403,162 +511,47 @@ def format_market_message(market: PendingMarket) -> Tuple[str, List[Dict[str, An
     Returns:
         Tuple[str, List[Dict]]: Formatted message text and blocks
     """
-    # Define emoji map for categories
-    category_emoji = {
-        'politics': ':ballot_box_with_ballot:',
-        'crypto': ':coin:',
-        'sports': ':sports_medal:',
-        'business': ':chart_with_upwards_trend:',
-        'culture': ':performing_arts:',
-        'tech': ':computer:',
-        'news': ':newspaper:',
-        # Add fallback for unknown categories
-        'unknown': ':question:'
-    }
-    
-    # Get emoji for this category
-    emoji = category_emoji.get(market.category.lower(), category_emoji['unknown'])
-    
-    # Format message text
-    message_text = f"*{market.question}*\n\nCategory: {emoji} {market.category.capitalize()}"
-    
-    # Create blocks for rich formatting
-    blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "New Market for Approval",
-                "emoji": True
-            }
-        },
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*{market.question}*"
-            }
-        }
-    ]
+    return render_market_review(market)
+
+def post_pending_market(market: PendingMarket) -> bool:
+    """
+    Post one pending market to Slack for approval and record its message ID.
     
-    # Add event name if available
-    if market.event_name:
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Event:* {market.event_name}"
-            }
-        })
-    
-    # Add market options if available
-    if market.options:
-        # Create header for options
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Options:*"
-            }
-        })
-        
-        # Add each option separately, this will help with the option images later
-        if isinstance(market.options, list):
-            for option in market.options:
-                if isinstance(option, dict):
-                    option_value = option.get('value', 'Unknown')
-                elif isinstance(option, str):
-                    option_value = option
-                else:
-                    option_value = str(option)
-                    
-                blocks.append({
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"• {option_value}"
-                    }
-                })
-        elif isinstance(market.options, dict):
-            for option_id, option_value in market.options.items():
-                blocks.append({
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"• {option_value}"
-                    }
-                })
-        else:
-            # Fallback for other option formats
-            blocks.append({
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"Options format not supported: {type(market.options)}"
-                }
-            })
-    
-    # Add category section with badge
-    blocks.append({
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": f"*Category:* {emoji} {market.category.capitalize()}"
-        }
-    })
-    
-    # Add event banner image if available
-    if market.banner_url:
-        blocks.append({
-            "type": "image",
-            "image_url": market.banner_url,
-            "alt_text": market.question,
-            "title": {
-                "type": "plain_text",
-                "text": "Event Banner"
-            }
-        })
-    
-    # Add option images if available
-    if market.option_images and isinstance(market.option_images, dict):
-        for option_name, image_url in market.option_images.items():
-            if image_url:
-                # Add option name first
-                blocks.append({
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*Option:* {option_name}"
-                    }
-                })
-                # Add option image
-                blocks.append({
-                    "type": "image",
-                    "image_url": image_url,
-                    "alt_text": f"Option {option_name}",
-                    "title": {
-                        "type": "plain_text",
-                        "text": f"Option: {option_name}"
-                    }
-                })
-    
-    # Add divider
-    blocks.append({"type": "divider"})
-    
-    # Add approval/rejection buttons context
-    blocks.append({
-        "type": "context",
-        "elements": [
-            {
-                "type": "mrkdwn",
-                "text": "React with :white_check_mark: to approve or :x: to reject"
-            }
-        ]
-    })
-    
-    return message_text, blocks
-
-def post_pending_markets_to_slack(markets: List[PendingMarket], max_to_post: int = 20) -> int:
+    Args:
+        market: PendingMarket model instance (in the current session)
+        
+    Returns:
+        bool: True if the market was posted
+    """
+    try:
+        # Format message
+        message_text, blocks = format_market_message(market)
+        
+        # Post to Slack
+        message_id = post_formatted_message_to_slack(message_text, blocks=blocks)
+        
+        if not message_id:
+            logger.error(f"Failed to post market {market.poly_id} to Slack")
+            return False
+        
+        # Add approval/rejection reactions
+        add_reaction_to_message(message_id, "white_check_mark")
+        add_reaction_to_message(message_id, "x")
+        
+        # Update database
+        market.slack_message_id = message_id
+        market.posted = True
+        db.session.commit()
+        
+        logger.info(f"Posted market {market.poly_id} to Slack with message ID {message_id}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error posting market {market.poly_id} to Slack: {str(e)}")
+        db.session.rollback()
+        return False
+
+def post_pending_markets_to_slack(markets: List[PendingMarket], max_to_post: int = MAX_SLACK_POSTS) -> int:
     """
     Post pending markets to Slack for approval and update the database.
     
@@ -570,102 +563,197 @@ def post_pending_markets_to_slack(markets: List[PendingMarket], max_to_post: int
         int: Number of markets successfully posted
     """
     with app.app_context():
+        # The markets were stored (and committed) in another session; read them again in this one
+        markets = [db.session.get(PendingMarket, inspect(m).identity) for m in markets]
+        
         # Get unposted markets
-        unposted_markets = [m for m in markets if not m.posted and not m.slack_message_id]
+        unposted_markets = [m for m in markets if m is not None and not m.posted and not m.slack_message_id]
+        set_queue_depth("slack_post", len(unposted_markets))
         
         # Limit to max_to_post
         markets_to_post = unposted_markets[:max_to_post]
         
         posted_count = 0
         for market in markets_to_post:
-            try:
-                # Format message
-                message_text, blocks = format_market_message(market)
-                
-                # Post to Slack
-                message_id = post_formatted_message_to_slack(message_text, blocks=blocks)
-                
-                if not message_id:
-                    logger.error(f"Failed to post market {market.poly_id} to Slack")
-                    continue
-                
-                # Add approval/rejection reactions
-                add_reaction_to_message(message_id, "white_check_mark")
-                add_reaction_to_message(message_id, "x")
-                
-                # Update database
-                market.slack_message_id = message_id
-                market.posted = True
-                db.session.commit()
-                
-                logger.info(f"Posted market {market.poly_id} to Slack with message ID {message_id}")
+            if post_pending_market(market):
                 posted_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error posting market {market.poly_id} to Slack: {str(e)}")
-                db.session.rollback()
+                set_queue_depth("slack_post", len(unposted_markets) - posted_count)
         
         return posted_count
 
-def process_binary_markets(binary_markets: List[Dict[str, Any]], max_markets: int = 20) -> Tuple[List[Event], List[PendingMarket]]:
+def post_resumed_markets(checkpoints: RunCheckpoints, max_to_post: int = MAX_SLACK_POSTS) -> int:
+    """
+    Post the markets an earlier attempt of the run stored but did not post.
+    
+    Markets stored by the current attempt are left to the regular posting
+    step.
+    
+    Args:
+        checkpoints: Run checkpoints
+        max_to_post: Maximum number of markets to post
+        
+    Returns:
+        int: Number of markets successfully posted
+    """
+    if not checkpoints.resuming or max_to_post <= 0:
+        return 0
+    
+    with app.app_context():
+        unposted_markets = [market for market in (db.session.get(PendingMarket, poly_id)
+                                                  for poly_id in checkpoints.earlier_items("store"))
+                            if market is not None and not market.posted]
+        if not unposted_markets:
+            return 0
+        
+        with stage_timer("slack_post", run_id=checkpoints.run_id, items_in=len(unposted_markets)) as timing:
+            posted_count = 0
+            for market in unposted_markets[:max_to_post]:
+                if post_pending_market(market):
+                    posted_count += 1
+            timing.items_out = posted_count
+        
+        logger.info(f"Posted {posted_count} markets stored by an earlier attempt of run {checkpoints.run_id}")
+        return posted_count
+
+def select_checkpointed(checkpoints: RunCheckpoints, stage: str, candidates: List[Any], limit: int,
+                        prioritize) -> List[Any]:
+    """
+    Prioritize candidates, or reuse the selection of an earlier attempt of the run.
+    
+    A resumed run only selects the candidates the earlier attempt selected
+    (minus the ones it already stored), instead of picking replacements.
+    
+    Args:
+        checkpoints: Run checkpoints
+        stage: Checkpoint stage name
+        candidates: MarketRecords or EventRecords
+        limit: Maximum number of candidates to select
+        prioritize: prioritize_markets or prioritize_events
+        
+    Returns:
+        List of selected candidates
+    """
+    selected_ids = checkpoints.cached_stage(stage, fingerprint(limit),
+                                            lambda: [c.id for c in prioritize(candidates, limit)])
+    candidates_by_id = {c.id: c for c in candidates}
+    return [candidates_by_id[c_id] for c_id in selected_ids if c_id in candidates_by_id]
+
+def process_binary_markets(binary_markets: List[Dict[str, Any]], max_markets: int = 20, run_id: Optional[int] = None,
+                           event_index: Optional[EventIndex] = None,
+                           checkpoints: Optional[RunCheckpoints] = None) -> Tuple[List[Event], List[PendingMarket]]:
     """
     Process binary markets (non-event markets).
     
     Args:
         binary_markets: List of binary market data
         max_markets: Maximum number of markets to process
+        run_id: Optional PipelineRun ID for stage metrics
+        event_index: Optional index of fetched events; markets it covers are
+            left to event processing
+        checkpoints: Optional run checkpoints
         
     Returns:
         Tuple of (events, pending_markets)
     """
-    # Step 1: Filter binary markets
-    active_markets = filter_active_non_expired_markets(binary_markets)
-    new_markets = filter_new_markets(active_markets)
+    checkpoints = checkpoints or run_checkpoints(None)
+    
+    # Step 1: Parse the markets once and filter them
+    with stage_timer("filter", run_id=run_id, items_in=len(binary_markets)) as timing:
+        if event_index is not None:
+            binary_markets = event_index.uncovered(binary_markets)
+        active_markets = filter_active_non_expired_markets(market_records(binary_markets))
+        new_markets = filter_new_markets(active_markets)
+        timing.items_out = len(new_markets)
     
     if not new_markets:
         logger.info("No new binary markets to process")
         return [], []
     
-    # Step 2: Store in database
+    # Step 2: Pick the highest-priority markets under the cap
+    with stage_timer("prioritize", run_id=run_id, items_in=len(new_markets)) as timing:
+        selected_markets = select_checkpointed(checkpoints, "prioritize_binary", new_markets, max_markets,
+                                               prioritize_markets)
+        timing.items_out = len(selected_markets)
+    
+    # Step 3: Store in database
     # Note: For binary markets, each market gets its own "event" (1:1 relationship)
-    events, pending_markets = store_events_and_markets(new_markets[:max_markets])
+    with stage_timer("store", run_id=run_id, items_in=len(selected_markets)) as timing:
+        events, pending_markets = store_events_and_markets(selected_markets, run_id=run_id, checkpoints=checkpoints)
+        timing.items_out = len(pending_markets)
     
     logger.info(f"Processed {len(events)} events and {len(pending_markets)} binary markets")
     
     return events, pending_markets
 
-def process_event_markets(event_data: List[Dict[str, Any]], max_events: int = 10) -> Tuple[List[Event], List[PendingMarket]]:
+def process_event_markets(event_data: List[Dict[str, Any]], max_events: int = 10, run_id: Optional[int] = None,
+                          checkpoints: Optional[RunCheckpoints] = None,
+                          event_first: bool = False) -> Tuple[List[Event], List[PendingMarket]]:
     """
     Process event markets (transform event with multiple markets into single market with options).
     
     Args:
         event_data: List of event data from Polymarket Events API
         max_events: Maximum number of events to process
+        run_id: Optional PipelineRun ID for stage metrics
+        checkpoints: Optional run checkpoints
+        event_first: Whether the pipeline runs in event-first mode
         
     Returns:
         Tuple of (events, pending_markets)
     """
+    checkpoints = checkpoints or run_checkpoints(None)
+    
+    with stage_timer("filter", run_id=run_id, items_in=len(event_data)) as timing:
+        new_events = filter_new_events(event_records(event_data))
+        timing.items_out = len(new_events)
+    
+    if not new_events:
+        logger.info("No new event markets to process")
+        return [], []
+    
+    with stage_timer("prioritize", run_id=run_id, items_in=len(new_events)) as timing:
+        selected_events = select_checkpointed(checkpoints, "prioritize_events", new_events, max_events,
+                                              prioritize_events)
+        timing.items_out = len(selected_events)
+    
+    with stage_timer("store", run_id=run_id, items_in=len(selected_events)) as timing:
+        events, pending_markets = store_event_markets(selected_events, checkpoints=checkpoints,
+                                                      event_first=event_first)
+        timing.items_out = len(pending_markets)
+    
+    return events, pending_markets
+
+def filter_new_events(event_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Filter events to active, non-expired ones not already in the database.
+    
+    Args:
+        event_data: List of event data from Polymarket Events API, or EventRecords
+        
+    Returns:
+        List of new events (of the same type as the input)
+    """
     # First filter events to active, non-expired ones
-    now = datetime.now().timestamp() * 1000  # Current time in milliseconds
+    now = now_epoch()
     
     active_events = []
     for event in event_data:
+        record = event if isinstance(event, EventRecord) else EventRecord(event)
+        
         # Skip if event is closed, archived, or inactive
-        if event.get('closed') or event.get('archived') or not event.get('active', True):
+        if record.closed or record.archived or not record.active:
             continue
         
         # Skip if event has already expired
-        end_date = event.get('endDate')
-        if end_date and int(end_date) < now:
+        if record.end_ts is not None and record.end_ts < now:
             continue
         
         # Skip if event doesn't have image or icon URLs
-        if not event.get('image') or not event.get('icon'):
+        if not record.image or not record.icon:
             continue
         
         # Skip events without markets
-        markets = event.get('markets', [])
-        if not markets or len(markets) == 0:
+        if not record.markets:
             continue
         
         # Add to filtered list
@@ -679,116 +767,207 @@ def process_event_markets(event_data: List[Dict[str, Any]], max_events: int = 10
         existing_event_ids = set()
         
         # Check events table
-        event_ids = db.session.query(Event.source_id).all()
-        existing_event_ids.update([e[0] for e in event_ids if e[0]])
+        event_ids = stream_results(db.session.query(Event.source_id))
+        existing_event_ids.update(e[0] for e in event_ids if e[0])
         
         # Filter out events that are already in the database
         new_events = [e for e in active_events if e.get('id') not in existing_event_ids]
         
         logger.info(f"Found {len(new_events)} new events not yet in the database")
     
-    if not new_events:
-        logger.info("No new event markets to process")
-        return [], []
+    return new_events
+
+def event_key(event: EventRecord, event_first: bool = False) -> str:
+    """
+    Get the Event ID of a Gamma event.
+    
+    Events are keyed by a hash of their name. In event-first mode, where
+    single-market events are stored with their binary markets under their
+    Gamma ID, events are keyed by their Gamma ID too (names are only hashed
+    for events without an ID).
+    
+    Args:
+        event: EventRecord
+        event_first: Whether the pipeline runs in event-first mode
+        
+    Returns:
+        str: Event ID
+    """
+    if event_first:
+        return event.id or generate_event_id(event.title)
+    return generate_event_id(event.title)
+
+def merge_event(event: EventRecord, event_first: bool = False) -> Event:
+    """
+    Add the Event of a Gamma event (in the current session, not committed).
+    
+    In event-first mode an existing Event with the same Gamma ID is updated
+    instead.
+    
+    Args:
+        event: EventRecord
+        event_first: Whether the pipeline runs in event-first mode
+        
+    Returns:
+        Event: Added or merged event
+    """
+    event_obj = Event(
+        id=event_key(event, event_first),
+        name=event.title,
+        description=event.description,
+        category=(event.category or 'sports').lower(),
+        banner_url=event.image,
+        icon_url=event.icon,
+        source_id=event.id,
+        raw_data=json.dumps(event.raw)
+    )
+    if event_first:
+        return db.session.merge(event_obj)
+    db.session.add(event_obj)
+    return event_obj
+
+def event_market_options(event: EventRecord) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Turn the markets of an event into the options of a single market.
+    
+    Args:
+        event: EventRecord
+        
+    Returns:
+        Tuple of (options, option_images)
+    """
+    market_options = []
+    option_images = {}
+    
+    for market in event.markets:
+        market_id = market.id
+        market_question = market.question
+        market_icon = market.icon
+        
+        # Skip markets without proper data
+        if not all([market_id, market_question]):
+            continue
+        
+        # Add as an option
+        market_options.append(market_question)
+        if market_icon:
+            option_images[market_question] = market_icon
+    
+    return market_options, option_images
+
+def categorize_event(event: EventRecord) -> Tuple[str, bool]:
+    """
+    Categorize the market created for an event using GPT-4o-mini.
+    
+    Args:
+        event: EventRecord
+        
+    Returns:
+        Tuple of (category, needs_manual_categorization)
+    """
+    category, needs_manual = categorize_market(f"Event: {event.title}", event.description)
+    
+    # Use event category if categorization returns unknown
+    if category.lower() == 'unknown':
+        category = (event.category or 'sports').lower()
+    
+    return category, needs_manual
+
+def add_event_pending_market(event: EventRecord, market_options: List[str], option_images: Dict[str, str],
+                             category: str, needs_manual: bool, event_first: bool = False) -> PendingMarket:
+    """
+    Add the market created for an event to pending_markets and processed_markets
+    (in the current session, not committed).
+    
+    Args:
+        event: EventRecord
+        market_options: Options from event_market_options
+        option_images: Option images from event_market_options
+        category: Market category
+        needs_manual: Whether the category needs manual review
+        event_first: Whether the pipeline runs in event-first mode
+        
+    Returns:
+        PendingMarket: Created pending market
+    """
+    event_id = event.id
+    question = f"Event: {event.title}"
+    event_json = json.dumps(event.raw)
+    
+    # Create pending market entry
+    pending_market = PendingMarket(
+        poly_id=event_id,
+        question=question,
+        event_name=event.title,
+        event_id=event_key(event, event_first),
+        category=category,
+        banner_url=event.image,
+        icon_url=event.icon,
+        options=market_options,
+        option_images=option_images,
+        expiry=event.end_ts,
+        raw_data=event_json,
+        needs_manual_categorization=needs_manual,
+        posted=False,
+        is_event=True
+    )
+    db.session.add(pending_market)
     
-    # Transform events into our format and store in database
-    # We'll use utils/transform_market_with_events.py for this
+    # Also add to processed_markets table to prevent duplicates
+    processed_market = ProcessedMarket(
+        condition_id=event_id,
+        question=question,
+        event_name=event.title,
+        event_id=event_key(event, event_first),
+        raw_data=event_json,
+        posted=False,
+        approved=None  # None means pending
+    )
+    db.session.add(processed_market)
+    
+    logger.info(f"Created event market {event_id}: {question} with {len(market_options)} options")
+    return pending_market
+
+def store_event_markets(new_events: List[Dict[str, Any]], checkpoints: Optional[RunCheckpoints] = None,
+                        event_first: bool = False) -> Tuple[List[Event], List[PendingMarket]]:
+    """
+    Transform events into single markets with options and store them in the database.
+    
+    Args:
+        new_events: List of event data (or EventRecords) to store
+        checkpoints: Optional run checkpoints; categories found by an
+            earlier attempt of the run are reused
+        event_first: Whether the pipeline runs in event-first mode
+        
+    Returns:
+        Tuple of (events, pending_markets)
+    """
+    checkpoints = checkpoints or run_checkpoints(None)
     events = []
     pending_markets = []
     
-    for event in new_events[:max_events]:
+    for event in event_records(new_events):
         try:
-            # Transform the event into our format
-            event_id = event.get('id')
-            event_name = event.get('title')
-            event_banner = event.get('image')
-            event_icon = event.get('icon')
-            event_category = event.get('category', 'sports').lower()
-            event_description = event.get('description', '')
-            
-            # Create an event object
-            event_obj = Event(
-                id=generate_event_id(event_name),
-                name=event_name,
-                description=event_description,
-                category=event_category,
-                banner_url=event_banner,
-                icon_url=event_icon,
-                source_id=event_id,
-                raw_data=json.dumps(event)
-            )
-            
             with app.app_context():
-                db.session.add(event_obj)
+                event_obj = merge_event(event, event_first)
                 db.session.commit()
                 events.append(event_obj)
             
             # Transform event markets into a single market with options
-            market_options = []
-            option_images = {}
-            
-            for market in event.get('markets', []):
-                market_id = market.get('id')
-                market_question = market.get('question')
-                market_icon = market.get('icon')
-                
-                # Skip markets without proper data
-                if not all([market_id, market_question]):
-                    continue
-                
-                # Add as an option
-                market_options.append(market_question)
-                if market_icon:
-                    option_images[market_question] = market_icon
+            market_options, option_images = event_market_options(event)
             
             # Create a pending market for the whole event
             if market_options:
-                # Categorize the market using GPT-4o-mini
-                question = f"Event: {event_name}"
-                category, needs_manual = categorize_market(question, event_description)
-                
-                # Use event category if categorization returns unknown
-                if category.lower() == 'unknown':
-                    category = event_category
-                
-                # Create pending market entry
-                pending_market = PendingMarket(
-                    poly_id=event_id,
-                    question=question,
-                    event_name=event_name,
-                    event_id=event_obj.id,
-                    category=category,
-                    banner_url=event_banner,
-                    icon_url=event_icon,
-                    options=market_options,
-                    option_images=option_images,
-                    expiry=event.get('endDate'),
-                    raw_data=json.dumps(event),
-                    needs_manual_categorization=needs_manual,
-                    posted=False,
-                    is_event=True
-                )
+                with stage_timer("categorize", items_in=1):
+                    category, needs_manual = checkpoints.cached("categorize", event.id,
+                                                                lambda: categorize_event(event))
                 
                 with app.app_context():
-                    db.session.add(pending_market)
-                    
-                    # Also add to processed_markets table to prevent duplicates
-                    processed_market = ProcessedMarket(
-                        condition_id=event_id,
-                        question=question,
-                        event_name=event_name,
-                        event_id=event_obj.id,
-                        raw_data=json.dumps(event),
-                        posted=False,
-                        approved=None  # None means pending
-                    )
-                    
-                    db.session.add(processed_market)
+                    pending_market = add_event_pending_market(event, market_options, option_images,
+                                                              category, needs_manual, event_first)
                     db.session.commit()
-                    
+                    checkpoints.save_item("store", event.id)
                     pending_markets.append(pending_market)
-                    
-                    logger.info(f"Created event market {event_id}: {question} with {len(market_options)} options")
         
         except Exception as e:
             logger.error(f"Error processing event {event.get('id')}: {str(e)}")
@@ -796,55 +975,326 @@ def process_event_markets(event_data: List[Dict[str, Any]], max_events: int = 10
     
     return events, pending_markets
 
-def run_pipeline(max_markets: int = 20, max_events: int = 10) -> int:
+def run_pipeline(max_markets: int = 20, max_events: int = 10, profile: Optional[bool] = None,
+                 replay_fixtures: Optional[str] = None, event_first: Optional[bool] = None,
+                 streaming: Optional[bool] = None, resume: Optional[int] = None) -> int:
     """
     Run the full pipeline with both binary markets and event markets.
     
+    Each stage checkpoints its progress against the PipelineRun row (see
+    utils/checkpoints.py), so a failed run can be resumed: fetched data,
+    the prioritized selection and categories are reused, stored markets are
+    not stored again and stored markets that weren't posted are posted.
+    
     Args:
         max_markets: Maximum number of binary markets to process
         max_events: Maximum number of events to process
+        profile: Profile each stage (None falls back to PIPELINE_PROFILE)
+        replay_fixtures: Optional fixture file to replay Gamma API responses from
+        event_first: Fetch only events with embedded markets (None falls back
+            to PIPELINE_EVENT_FIRST)
+        streaming: Run the stages concurrently as a stream (None falls back
+            to PIPELINE_STREAMING)
+        resume: Optional ID of a failed PipelineRun to resume
         
     Returns:
         int: Exit code (0 for success, non-zero for failure)
     """
+    # Create a run record so stage metrics and checkpoints can be attached to this run
+    run_id = None
+    with app.app_context():
+        try:
+            if resume is not None:
+                pipeline_run = db.session.get(PipelineRun, resume)
+                if pipeline_run is None:
+                    logger.error(f"Pipeline run {resume} not found")
+                    return 1
+                if pipeline_run.status == "completed":
+                    logger.info(f"Pipeline run {resume} already completed")
+                    return 0
+                logger.info(f"Resuming pipeline run {resume} (status: {pipeline_run.status})")
+                pipeline_run.status = "running"
+                pipeline_run.end_time = None
+                pipeline_run.error = None
+            else:
+                pipeline_run = PipelineRun(start_time=datetime.now(), status="running")
+                db.session.add(pipeline_run)
+            db.session.commit()
+            run_id = pipeline_run.id
+        except Exception as e:
+            db.session.rollback()
+            if resume is not None:
+                logger.error(f"Could not load pipeline run {resume}: {str(e)}")
+                return 1
+            logger.warning(f"Could not create pipeline run record: {str(e)}")
+    
+    checkpoints = run_checkpoints(run_id, resuming=resume is not None)
+    
+    if event_first is None:
+        event_first = os.environ.get(EVENT_FIRST_ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+    
+    if streaming is None:
+        streaming = os.environ.get(STREAMING_ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+    run_stages = run_streaming_stages if streaming else run_pipeline_stages
+    
+    with fixture_replay(replay_fixtures), profile_run(run_id, enabled=profile):
+        return run_stages(run_id, max_markets, max_events, event_first=event_first, checkpoints=checkpoints)
+
+def run_pipeline_stages(run_id: Optional[int], max_markets: int, max_events: int, event_first: bool = False,
+                        checkpoints: Optional[RunCheckpoints] = None) -> int:
+    """
+    Run the pipeline stages for a pipeline run.
+    
+    Args:
+        run_id: PipelineRun ID (None if the run record could not be created)
+        max_markets: Maximum number of binary markets to process
+        max_events: Maximum number of events to process
+        event_first: Fetch only events with embedded markets
+        checkpoints: Optional run checkpoints
+        
+    Returns:
+        int: Exit code (0 for success, non-zero for failure)
+    """
+    checkpoints = checkpoints or run_checkpoints(run_id)
+    
     try:
         # Step 1: Fetch both binary markets and events from Polymarket API
-        binary_markets, event_data = fetch_all_market_data(limit=max_markets*2)  # Fetch more than we need to account for filtering
+        event_index = None
+        with stage_timer("fetch", run_id=run_id) as timing:
+            if event_first:
+                binary_markets, event_data, event_index = fetch_event_first_data(limit=(max_markets + max_events)*2,
+                                                                                 checkpoints=checkpoints)
+            else:
+                binary_markets, event_data = fetch_all_market_data(limit=max_markets*2, checkpoints=checkpoints)  # Fetch more than we need to account for filtering
+            timing.items_out = len(binary_markets) + len(event_data)
         
         # Step 2: Process binary markets
-        binary_events, binary_pending_markets = process_binary_markets(binary_markets, max_markets)
+        binary_events, binary_pending_markets = process_binary_markets(binary_markets, max_markets, run_id=run_id,
+                                                                       event_index=event_index,
+                                                                       checkpoints=checkpoints)
         
         # Step 3: Process event markets
-        event_events, event_pending_markets = process_event_markets(event_data, max_events)
+        event_events, event_pending_markets = process_event_markets(event_data, max_events, run_id=run_id,
+                                                                   checkpoints=checkpoints, event_first=event_first)
         
         # Combine the results
         all_events = binary_events + event_events
         all_pending_markets = binary_pending_markets + event_pending_markets
         
+        # Step 4: Post markets stored by an earlier attempt of this run
+        resumed_count = post_resumed_markets(checkpoints)
+        
         if not all_pending_markets:
             logger.info("No new markets to process")
+            finish_pipeline_run(run_id, "completed", markets_processed=0)
             return 0
         
-        # Step 4: Post pending markets to Slack for approval
-        posted_count = post_pending_markets_to_slack(all_pending_markets)
+        # Step 5: Post pending markets to Slack for approval
+        with stage_timer("slack_post", run_id=run_id, items_in=len(all_pending_markets)) as timing:
+            posted_count = post_pending_markets_to_slack(all_pending_markets,
+                                                         max_to_post=MAX_SLACK_POSTS - resumed_count)
+            timing.items_out = posted_count
         
         logger.info(f"Pipeline completed successfully")
         logger.info(f"Created {len(all_events)} events")
         logger.info(f"Created {len(all_pending_markets)} pending markets")
-        logger.info(f"Posted {posted_count} markets to Slack")
+        logger.info(f"Posted {posted_count + resumed_count} markets to Slack")
         
+        finish_pipeline_run(run_id, "completed", markets_processed=len(all_pending_markets))
         return 0
         
     except Exception as e:
         logger.error(f"Error in pipeline: {str(e)}")
         traceback.print_exc()
+        finish_pipeline_run(run_id, "failed", error=str(e))
         return 1
 
+def run_streaming_stages(run_id: Optional[int], max_markets: int, max_events: int, event_first: bool = False,
+                         checkpoints: Optional[RunCheckpoints] = None) -> int:
+    """
+    Run the pipeline stages as a stream (see utils/stream_pipeline.py).
+    
+    Fetch -> filter -> categorize -> store -> post run concurrently: binary
+    markets are filtered while events are still being fetched, markets are
+    categorized by several workers, and each market is stored and posted to
+    Slack as soon as it is categorized instead of after the whole batch.
+    
+    Args:
+        run_id: PipelineRun ID (None if the run record could not be created)
+        max_markets: Maximum number of binary markets to process
+        max_events: Maximum number of events to process
+        event_first: Fetch only events with embedded markets
+        checkpoints: Optional run checkpoints
+        
+    Returns:
+        int: Exit code (0 for success, non-zero for failure)
+    """
+    checkpoints = checkpoints or run_checkpoints(run_id)
+    
+    def fetch(emit):
+        if event_first:
+            limit = (max_markets + max_events)*2
+            event_index = EventIndex(checkpoints.cached_stage("fetch_events", fingerprint(limit),
+                                                              lambda: fetch_event_markets(limit=limit)))
+            emit(("binary", event_index.binary_markets(), event_index))
+            emit(("event", event_index.multi_market_events(), event_index))
+        else:
+            limit = max_markets*2
+            emit(("binary", checkpoints.cached_stage("fetch_binary", fingerprint(limit),
+                                                     lambda: fetch_binary_markets(limit=limit)), None))
+            emit(("event", checkpoints.cached_stage("fetch_events", fingerprint(limit),
+                                                    lambda: fetch_event_markets(limit=limit)), None))
+    
+    def select(batch, emit):
+        # Filtering, prioritization and transformation work on the whole
+        # fetched batch; the selected markets then move on one by one
+        kind, records, event_index = batch
+        if kind == "binary":
+            if event_index is not None:
+                records = event_index.uncovered(records)
+            new_markets = filter_new_markets(filter_active_non_expired_markets(market_records(records)))
+            selected_markets = select_checkpointed(checkpoints, "prioritize_binary", new_markets, max_markets,
+                                                   prioritize_markets)
+            events_data, transformed_markets = transform_markets_batch(selected_markets)
+            events_by_id = {event_data['id']: event_data for event_data in events_data}
+            for market_data in transformed_markets:
+                emit({"kind": kind, "market": market_data, "event": events_by_id.get(market_data.get('event_id'))})
+        else:
+            new_events = filter_new_events(event_records(records))
+            for event in select_checkpointed(checkpoints, "prioritize_events", new_events, max_events,
+                                             prioritize_events):
+                emit({"kind": kind, "event": event})
+    
+    def categorize(item, emit):
+        if item["kind"] == "binary":
+            market_data = item["market"]
+            item["category"], item["needs_manual"] = checkpoints.cached(
+                "categorize", market_data['id'],
+                lambda: categorize_market(market_data['question'], market_data.get('description', ''))
+            )
+        else:
+            item["options"], item["option_images"] = event_market_options(item["event"])
+            if item["options"]:
+                item["category"], item["needs_manual"] = checkpoints.cached(
+                    "categorize", item["event"].id, lambda: categorize_event(item["event"])
+                )
+        emit(item)
+    
+    def store(item, emit):
+        try:
+            if item["kind"] == "binary":
+                market_data = item["market"]
+                if item["event"]:
+                    upsert_event(item["event"])
+                    db.session.commit()
+                if PendingMarket.query.get(market_data['id']):
+                    return
+                pending_market = add_pending_market(market_data, item["category"], item["needs_manual"])
+            else:
+                merge_event(item["event"], event_first)
+                db.session.commit()
+                if not item["options"]:
+                    return
+                pending_market = add_event_pending_market(item["event"], item["options"], item["option_images"],
+                                                          item["category"], item["needs_manual"], event_first)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        checkpoints.save_item("store", pending_market.poly_id)
+        emit(pending_market.poly_id)
+    
+    posted = []
+    
+    def post(poly_id, emit):
+        if len(posted) >= MAX_SLACK_POSTS:
+            return
+        market = PendingMarket.query.get(poly_id)
+        if market and not market.posted and post_pending_market(market):
+            posted.append(poly_id)
+            emit(poly_id)
+    
+    try:
+        pipeline = StreamPipeline("intake", fetch, source_name="fetch", run_id=run_id)
+        pipeline.stage("filter", select)
+        pipeline.stage("categorize", categorize, workers=CATEGORIZE_WORKERS)
+        pipeline.stage("store", store, context=app.app_context)
+        pipeline.stage("slack_post", post, context=app.app_context)
+        stats = pipeline.run()
+        resumed_count = post_resumed_markets(checkpoints, MAX_SLACK_POSTS - len(posted))
+        
+        stored_count = stats["store"]["items_out"]
+        
+        # Items that failed in a stage (or a failed fetch) fail the run, so
+        # its checkpoints are kept for --resume
+        errors = stream_errors(stats)
+        if errors:
+            error = "Errors in streaming stages: " + ", ".join(f"{name} ({count})" for name, count in errors.items())
+            logger.error(error)
+            finish_pipeline_run(run_id, "failed", error=error, markets_processed=stored_count)
+            return 1
+        
+        logger.info(f"Pipeline completed successfully")
+        logger.info(f"Created {stored_count} pending markets")
+        logger.info(f"Posted {len(posted) + resumed_count} markets to Slack")
+        
+        finish_pipeline_run(run_id, "completed", markets_processed=stored_count)
+        return 0
+        
+    except Exception as e:
+        logger.error(f"Error in pipeline: {str(e)}")
+        traceback.print_exc()
+        finish_pipeline_run(run_id, "failed", error=str(e))
+        return 1
+
+def finish_pipeline_run(run_id: Optional[int], status: str, error: Optional[str] = None, markets_processed: Optional[int] = None) -> None:
+    """
+    Close the pipeline run record and persist its stage metrics.
+    
+    The checkpoints of a completed run are deleted; those of a failed run
+    are kept for --resume.
+    
+    Args:
+        run_id: PipelineRun ID (nothing is done if None)
+        status: Final run status
+        error: Optional error message
+        markets_processed: Optional number of markets processed
+    """
+    if run_id is None:
+        return
+    
+    with app.app_context():
+        try:
+            pipeline_run = PipelineRun.query.get(run_id)
+            if pipeline_run:
+                pipeline_run.end_time = datetime.now()
+                pipeline_run.status = status
+                if error:
+                    pipeline_run.error = error
+                if markets_processed is not None:
+                    pipeline_run.markets_processed = markets_processed
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error updating pipeline run record: {str(e)}")
+        
+        save_stage_metrics(db, PipelineStageMetric, run_id)
+    
+    if status == "completed":
+        run_checkpoints(run_id).clear()
+    else:
+        logger.info(f"Resume this run with: python run_pipeline_with_events.py --resume {run_id}")
+
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Run the Polymarket pipeline with event support.')
     parser.add_argument('--max-markets', type=int, default=20, help='Maximum number of binary markets to process')
     parser.add_argument('--max-events', type=int, default=10, help='Maximum number of events to process')
+    parser.add_argument('--profile', action='store_true', default=None, help='Write per-stage cProfile/tracemalloc reports to tmp/profiles')
+    parser.add_argument('--replay-fixtures', metavar='PATH', help='Replay Gamma API responses from a recorded fixture file')
+    parser.add_argument('--event-first', action='store_true', default=None, help='Fetch only events with embedded markets (skip the Markets API)')
+    parser.add_argument('--streaming', action='store_true', default=None, help='Run the stages concurrently, passing each market on as soon as it is ready')
+    parser.add_argument('--resume', type=int, metavar='RUN_ID', help='Resume a failed pipeline run, skipping the work it finished')
     args = parser.parse_args()
     
     with app.app_context():
@@ -856,4 +1306,7 @@ if __name__ == "__main__":
             sys.exit(1)
     
     logger.info(f"Starting pipeline with max_markets={args.max_markets}, max_events={args.max_events}")
-    sys.exit(run_pipeline(max_markets=args.max_markets, max_events=args.max_events))
\ No newline at end of file
+    sys.exit(run_pipeline(max_markets=args.max_markets, max_events=args.max_events,
+                          profile=args.profile, replay_fixtures=args.replay_fixtures,
+                          event_first=args.event_first, streaming=args.streaming,
+                          resume=args.resume))
\ No newline at end of file
@@ -12,7 +12,6 @@ This script runs the full production pipeline from fetching markets to deploymen
 Use this script to test the entire pipeline in a production environment.
 """
 
-import os
 import sys
 import time
 import logging
@@ -31,17 +30,12 @@ logging.basicConfig(
 logger = logging.getLogger('pipeline_test')
 
 # Flask setup for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db
+app = create_app(__name__)
 
 # Import models and pipeline components
 from models import db, Market, PendingMarket, ProcessedMarket, PipelineRun
-db.init_app(app)
+init_db(app, db)
 
 def run_fetch_markets():
     """Run the fetch and categorize markets step."""
@@ -9,20 +9,14 @@ of the full production workflow.
 Usage: python run_real_pipeline_test.py
 """
 
-import os
 import sys
 import logging
 import time
 from datetime import datetime, timedelta
 
 # Flask setup for database context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db
+app = create_app(__name__)
 
 # Import models and utils
 from models import db, PendingMarket, Market, ApprovalEvent, ProcessedMarket, PipelineRun
@@ -133,7 +127,7 @@ def format_market_message(market: PendingMarket) -> Tuple[str, List[Dict[str, An
     return message_text, blocks
 
 # Initialize database
-db.init_app(app)
+init_db(app, db)
 
 def clear_test_records():
     """Clear any existing test records from database."""
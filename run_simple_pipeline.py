@@ -7,12 +7,11 @@ This script runs the simplified pipeline for production testing.
 It's designed to be manually executed when needed.
 """
 
-import os
 import logging
 import argparse
 from datetime import datetime
 
-from flask import Flask
+from utils.database import create_app, init_db
 from simple_pipeline import run_simple_pipeline
 from check_pending_approvals import check_market_approvals
 from models import db, PipelineRun
@@ -25,13 +24,8 @@ logging.basicConfig(
 logger = logging.getLogger("pipeline_runner")
 
 # Import Flask app for database context
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-db.init_app(app)
+app = create_app(__name__)
+init_db(app, db)
 
 def run_full_pipeline():
     """
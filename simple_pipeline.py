@@ -12,13 +12,12 @@ This script is intended for production testing of the approval workflow
 without the complexity of the full pipeline.
 """
 
-import os
 import json
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
-from flask import Flask
+from utils.database import create_app, init_db
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -37,13 +36,8 @@ logging.basicConfig(
 logger = logging.getLogger("simple_pipeline")
 
 # Import Flask app for database context
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-db.init_app(app)
+app = create_app(__name__)
+init_db(app, db)
 
 def fetch_and_filter_markets():
     """
@@ -28,6 +28,7 @@ logger = logging.getLogger("slack_db_sync")
 # Import flask app context for database access
 from main import app
 from models import db, ProcessedMarket, Market, ApprovalEvent
+from utils.database import load_scalars, column_values
 from utils.messaging import MessagingClient
 
 # Initialize Slack client
@@ -75,16 +76,14 @@ def process_slack_messages(messages: List[Dict[str, Any]]) -> Tuple[int, int, in
     
     with app.app_context():
         # Get all ProcessedMarket records that have been posted to Slack
-        posted_markets = ProcessedMarket.query.filter_by(posted=True).all()
+        posted_markets = load_scalars(ProcessedMarket.query.filter_by(posted=True), ProcessedMarket).all()
         posted_map = {market.message_id: market for market in posted_markets if market.message_id}
         
         # Get all Markets that have been deployed
-        deployed_markets = Market.query.filter_by(status="deployed").all()
-        deployed_ids = {market.id for market in deployed_markets}
+        deployed_ids = set(column_values(Market.query.filter_by(status="deployed"), Market.id))
         
         # Get all Markets that are in deployment approval stage
-        deployment_pending = Market.query.filter_by(status="pending_deployment").all()
-        deployment_pending_ids = {market.id for market in deployment_pending}
+        deployment_pending_ids = set(column_values(Market.query.filter_by(status="pending_deployment"), Market.id))
         
         # Process each message
         for message in messages:
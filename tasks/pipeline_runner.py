@@ -16,7 +16,9 @@ from datetime import datetime, timezone
 # Import utilities
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.messaging import MessagingClient
-from config import TMP_DIR
+from utils.metrics import stage_timer, save_stage_metrics
+from utils.profiling import profile_run, fixture_replay
+from config import TMP_DIR, ensure_directories
 
 # Import tasks
 from tasks.task1_fetch_and_post import run_task as run_task1
@@ -31,7 +33,7 @@ class PipelineRunner:
     Orchestrates the execution of pipeline tasks.
     """
     
-    def __init__(self, db=None, Market=None, ApprovalEvent=None, PipelineRun=None, run_id=None, approval_timeout_minutes=30):
+    def __init__(self, db=None, Market=None, ApprovalEvent=None, PipelineRun=None, run_id=None, approval_timeout_minutes=30, PipelineStageMetric=None, profile=None, replay_fixtures=None):
         """
         Initialize the pipeline runner.
         
@@ -42,24 +44,45 @@ class PipelineRunner:
             PipelineRun: PipelineRun model class (optional)
             run_id (int): Pipeline run ID in the database (optional)
             approval_timeout_minutes (int): Timeout in minutes for approvals
+            PipelineStageMetric: PipelineStageMetric model class (optional)
+            profile (bool): Profile each task (None falls back to PIPELINE_PROFILE)
+            replay_fixtures (str): Fixture file to replay Gamma API responses from (optional)
         """
         self.db = db
         self.Market = Market
         self.ApprovalEvent = ApprovalEvent
         self.PipelineRun = PipelineRun
+        self.PipelineStageMetric = PipelineStageMetric
+        self.profile = profile
+        self.replay_fixtures = replay_fixtures
         self.run_id = run_id
         self.approval_timeout_minutes = approval_timeout_minutes
         
         # Initialize messaging client
         self.messaging_client = MessagingClient()
         
-        # Create output directory if it doesn't exist
-        os.makedirs(TMP_DIR, exist_ok=True)
+        # Create the data, tmp and logs directories if they don't exist
+        ensure_directories()
     
     def run(self) -> Dict[str, Any]:
         """
         Run the complete pipeline from start to finish.
         
+        Returns:
+            Dict[str, Any]: Pipeline execution statistics
+        """
+        try:
+            with fixture_replay(self.replay_fixtures), profile_run(self.run_id, enabled=self.profile):
+                return self._run_tasks()
+        finally:
+            # Persist the stage timings recorded for this run
+            if self.db and self.PipelineStageMetric and self.run_id:
+                save_stage_metrics(self.db, self.PipelineStageMetric, self.run_id)
+    
+    def _run_tasks(self) -> Dict[str, Any]:
+        """
+        Run the four pipeline tasks in sequence.
+        
         Returns:
             Dict[str, Any]: Pipeline execution statistics
         """
@@ -86,7 +109,9 @@ class PipelineRunner:
         try:
             # Run Task 1: Fetch and post markets
             logger.info("Running Task 1: Fetch and post markets")
-            markets, task1_stats = run_task1(self.messaging_client)
+            with stage_timer("slack_post", run_id=self.run_id) as timing:
+                markets, task1_stats = run_task1(self.messaging_client)
+                timing.items_out = task1_stats.get("markets_posted", 0)
             
             if task1_stats["status"] == "success":
                 stats["task1_success"] = True
@@ -105,7 +130,9 @@ class PipelineRunner:
             
             # Run Task 2: Capture approvals
             logger.info("Running Task 2: Capture approvals")
-            approved_markets, task2_stats = run_task2(self.messaging_client, task1_stats)
+            with stage_timer("approval_scan", run_id=self.run_id, items_in=task1_stats.get("markets_posted")) as timing:
+                approved_markets, task2_stats = run_task2(self.messaging_client, task1_stats)
+                timing.items_out = task2_stats.get("markets_approved", 0)
             
             if task2_stats["status"] == "success":
                 stats["task2_success"] = True
@@ -125,7 +152,9 @@ class PipelineRunner:
             
             # Run Task 3: Generate banners
             logger.info("Running Task 3: Generate banners")
-            markets_with_banners, task3_stats = run_task3(self.messaging_client, task2_stats)
+            with stage_timer("banner", run_id=self.run_id, items_in=task2_stats.get("markets_approved")) as timing:
+                markets_with_banners, task3_stats = run_task3(self.messaging_client, task2_stats)
+                timing.items_out = task3_stats.get("banners_generated", 0)
             
             if task3_stats["status"] == "success":
                 stats["task3_success"] = True
@@ -145,7 +174,9 @@ class PipelineRunner:
             
             # Run Task 4: Deploy markets
             logger.info("Running Task 4: Deploy markets")
-            deployed_markets, task4_stats = run_task4(self.messaging_client, task3_stats)
+            with stage_timer("deploy", run_id=self.run_id, items_in=task3_stats.get("banners_posted")) as timing:
+                deployed_markets, task4_stats = run_task4(self.messaging_client, task3_stats)
+                timing.items_out = task4_stats.get("markets_deployed", 0)
             
             if task4_stats["status"] == "success":
                 stats["task4_success"] = True
@@ -214,7 +245,7 @@ class PipelineRunner:
             
             return stats
 
-def run_pipeline(db=None, Market=None, ApprovalEvent=None, PipelineRun=None, run_id=None, approval_timeout_minutes=30) -> Dict[str, Any]:
+def run_pipeline(db=None, Market=None, ApprovalEvent=None, PipelineRun=None, run_id=None, approval_timeout_minutes=30, PipelineStageMetric=None, profile=None, replay_fixtures=None) -> Dict[str, Any]:
     """
     Run the complete Polymarket pipeline.
     
@@ -225,6 +256,9 @@ def run_pipeline(db=None, Market=None, ApprovalEvent=None, PipelineRun=None, run
         PipelineRun: PipelineRun model class (optional)
         run_id (int): Pipeline run ID in the database (optional)
         approval_timeout_minutes (int): Timeout in minutes for approvals
+        PipelineStageMetric: PipelineStageMetric model class (optional)
+        profile (bool): Profile each task (None falls back to PIPELINE_PROFILE)
+        replay_fixtures (str): Fixture file to replay Gamma API responses from (optional)
         
     Returns:
         Dict[str, Any]: Pipeline execution statistics
@@ -236,7 +270,10 @@ def run_pipeline(db=None, Market=None, ApprovalEvent=None, PipelineRun=None, run
         ApprovalEvent=ApprovalEvent,
         PipelineRun=PipelineRun,
         run_id=run_id,
-        approval_timeout_minutes=approval_timeout_minutes
+        approval_timeout_minutes=approval_timeout_minutes,
+        PipelineStageMetric=PipelineStageMetric,
+        profile=profile,
+        replay_fixtures=replay_fixtures
     )
     
     # Run the pipeline
@@ -34,6 +34,9 @@ def run_task(messaging_client: MessagingClient) -> Tuple[List[Dict[str, Any]], D
     """
     logger.info("Starting Task 1: Fetching Polymarket data and posting for initial approval")
     
+    # Create the data and tmp directories the task writes to
+    config.ensure_directories()
+    
     # Start the clock for this task
     start_time = time.time()
     
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test the approval watcher.
+
+This script replays recorded Slack reaction events against an in-memory
+database and checks that a market approval creates the market and posts
+its deployment approval message, that the deployment approval deploys it
+(once, when several consumers see it), that markets left deploying by an
+interrupted deployment are reconciled, that bot reactions, duplicate and
+unrelated events are ignored, and that Events API requests are verified.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import text
+
+from models import db, Market, PendingMarket, ApprovalLog, ApprovalEvent
+from utils.messaging import reaction_decision, BOT_USER_ID
+from utils.slack_events import unwrap_event, replay_events, verify_request
+from watch_approvals import ApprovalWatcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_app():
+    """Create an app with an in-memory database."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+def reaction(reaction_name, ts, user="U123", event_type="reaction_added"):
+    """Build an Events API envelope for a reaction on a message."""
+    return {"type": "event_callback", "event": {
+        "type": event_type, "user": user, "reaction": reaction_name, "event_ts": "1700000100.000000",
+        "item": {"type": "message", "channel": "C1", "ts": ts}
+    }}
+
+def test_reaction_decision():
+    """Test decisions from reactions and unwrapping of event payloads."""
+    assert reaction_decision({"white_check_mark": [BOT_USER_ID], "x": [BOT_USER_ID]}) == (None, None)
+    assert reaction_decision({"white_check_mark": [BOT_USER_ID, "U1"], "x": [BOT_USER_ID]}) == ("approved", "U1")
+    assert reaction_decision({"+1": ["U1"], "thumbsdown": ["U2"]}) == ("rejected", "U2")
+    assert reaction_decision({"tada": ["U1"]}) == (None, None)
+
+    event = reaction("x", "1.1")["event"]
+    assert unwrap_event(reaction("x", "1.1")) == event
+    assert unwrap_event({"type": "events_api", "payload": reaction("x", "1.1")}) == event
+    assert unwrap_event(event) == event
+    assert unwrap_event({"type": "app_mention"}) is None
+
+    logger.info("Reaction decision test completed successfully!")
+    return True
+
+def test_replayed_approval_to_deployment():
+    """Test that replayed reactions take a market from approval to deployment."""
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(PendingMarket(
+            poly_id="p1", question="Will it rain tomorrow?", category="news", options=["Yes", "No"],
+            raw_data={"conditionId": "0xabc", "id": "p1", "outcomes": "[\"Yes\", \"No\"]"},
+            slack_message_id="1700000000.000100", posted=True
+        ))
+        db.session.add(PendingMarket(
+            poly_id="p2", question="Will it snow tomorrow?", category="news", options=["Yes", "No"],
+            raw_data={"conditionId": "0xdef", "id": "p2"}, slack_message_id="1700000000.000200", posted=True
+        ))
+        db.session.commit()
+
+    watcher = ApprovalWatcher(app, reconcile_interval=0)
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch("check_deployment_approvals.post_message_to_slack", return_value="1700000050.000100"), \
+            mock.patch("check_deployment_approvals.add_reaction", return_value=True), \
+            mock.patch("check_deployment_approvals.deploy_market_to_apechain", return_value=("42", "0xtx")) as deploy:
+        path = os.path.join(tmp, "events.jsonl")
+        with open(path, "w") as f:
+            for payload in [
+                reaction("white_check_mark", "1700000000.000100", user=BOT_USER_ID),  # Bot's own reaction
+                reaction("white_check_mark", "1700000000.000100"),
+                reaction("white_check_mark", "1700000000.000100", user="U456"),  # Already decided
+                reaction("x", "1700000000.000200"),
+                reaction("eyes", "1700000000.000200"),
+                reaction("x", "1700000000.000100", event_type="reaction_removed"),
+            ]:
+                f.write(json.dumps(payload) + "\n")
+            f.write("not json\n")
+
+        assert replay_events(path, watcher.submit) == 6
+        stats = watcher.run(until_idle=True)
+        assert stats["approved"] == 1 and stats["rejected"] == 1 and stats["ignored"] == 4
+
+        with app.app_context():
+            market = db.session.get(Market, "0xabc")
+            assert market.status == "pending_deployment"
+            assert db.session.get(PendingMarket, "p2") is None
+            assert {log.poly_id: log.decision for log in ApprovalLog.query.all()} == {"p1": "approved", "p2": "rejected"}
+            assert ApprovalEvent.query.filter_by(market_id="0xabc", stage="final").one().message_id == "1700000050.000100"
+
+        # The deployment approval deploys the market as soon as it arrives
+        started = time.monotonic()
+        watcher.submit(reaction("white_check_mark", "1700000050.000100"))
+        watcher.submit(reaction("white_check_mark", "1700000050.000100", user="U456"))
+        stats = watcher.run(until_idle=True)
+        assert time.monotonic() - started < 1.0
+        assert stats["deployed"] == 1 and deploy.call_count == 1
+
+        with app.app_context():
+            market = db.session.get(Market, "0xabc")
+            assert market.status == "deployed" and market.apechain_market_id == "42"
+            assert ApprovalEvent.query.filter_by(market_id="0xabc", stage="final").one().status == "approved"
+
+    logger.info("Replayed approval test completed successfully!")
+    return True
+
+def test_deployment_claimed_once():
+    """Test that a market another consumer already claimed is not deployed again."""
+    from check_deployment_approvals import apply_deployment_decision
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Market(id="m1", question="Will it rain?", status="pending_deployment"))
+        db.session.add(ApprovalEvent(market_id="m1", stage="final", status="pending", message_id="1.1"))
+        db.session.commit()
+
+        market = db.session.get(Market, "m1")
+        event = ApprovalEvent.query.filter_by(market_id="m1").one()
+        with mock.patch("check_deployment_approvals.deploy_market_to_apechain", return_value=("42", "0xtx")) as deploy:
+            # Another consumer claims the market after this one read it
+            db.session.execute(text("UPDATE markets SET status = 'deploying' WHERE id = 'm1'"))
+            assert market.status == "pending_deployment"
+            assert apply_deployment_decision(market, event, "approved", "U1") == "ignored"
+            assert deploy.call_count == 0
+
+            db.session.execute(text("UPDATE markets SET status = 'pending_deployment' WHERE id = 'm1'"))
+            assert apply_deployment_decision(market, event, "approved", "U1") == "deployed"
+            assert apply_deployment_decision(market, event, "approved", "U2") == "ignored"
+            assert deploy.call_count == 1
+        db.drop_all()
+
+    logger.info("Deployment claim test completed successfully!")
+    return True
+
+def test_stale_deployments_reconciled():
+    """Test that markets left deploying by an interrupted deployment are moved on."""
+    from check_deployment_approvals import reconcile_stale_deployments
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        stale = datetime.utcnow() - timedelta(hours=2)
+        db.session.add(Market(id="sent", question="Sent?", status="deploying", blockchain_tx="0xtx", updated_at=stale))
+        db.session.add(Market(id="unsent", question="Unsent?", status="deploying", updated_at=stale))
+        db.session.add(Market(id="live", question="Still deploying?", status="deploying",
+                              updated_at=datetime.utcnow()))
+        db.session.commit()
+
+        assert reconcile_stale_deployments() == (1, 1)
+        assert db.session.get(Market, "sent").status == "deployment_pending"
+        assert db.session.get(Market, "unsent").status == "deployment_failed"
+        assert db.session.get(Market, "live").status == "deploying"
+        assert reconcile_stale_deployments() == (0, 0)
+        db.drop_all()
+
+    logger.info("Stale deployment reconciliation test completed successfully!")
+    return True
+
+def test_events_api_signature():
+    """Test Events API request verification."""
+    body = json.dumps(reaction("x", "1.1")).encode()
+    timestamp = str(int(time.time()))
+    signature = "v0=" + hmac.new(b"secret", f"v0:{timestamp}:".encode() + body, hashlib.sha256).hexdigest()
+    headers = {"X-Slack-Request-Timestamp": timestamp, "X-Slack-Signature": signature}
+
+    assert verify_request(body, headers, signing_secret="secret")
+    assert not verify_request(body + b" ", headers, signing_secret="secret")
+    assert not verify_request(body, headers, signing_secret="other")
+
+    logger.info("Events API signature test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_reaction_decision()
+    test_replayed_approval_to_deployment()
+    test_deployment_claimed_once()
+    test_stale_deployments_reconciled()
+    test_events_api_signature()
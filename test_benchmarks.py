@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the offline benchmark suite.
+
+This script runs the benchmarks on the smallest recorded fixture and checks
+synthetic dataset generation and baseline comparison.
+"""
+
+import logging
+
+from utils.benchmark import (
+    load_fixtures, build_synthetic_markets, run_benchmarks, compare_results, format_results
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_synthetic_markets_have_unique_ids():
+    """Test that scaled-up datasets keep IDs unique and dates in the future."""
+    templates = load_fixtures(("test_gamma_response.json",))["test_gamma_response.json"]
+    markets = build_synthetic_markets(templates, 25)
+
+    assert len(markets) == 25
+    assert len({market["id"] for market in markets}) == 25
+    assert all(market["endDate"] > templates[0]["endDate"] for market in markets if market.get("endDate"))
+    assert templates[0]["id"] == markets[0]["id"], "Templates should not be modified"
+
+    logger.info("Synthetic markets test completed successfully!")
+    return True
+
+def test_benchmarks_run_offline_on_fixture():
+    """Test that every stage is measured on a recorded fixture."""
+    results = run_benchmarks(sizes=(50,), patterns=("test_gamma_response.json",), repeat=1)
+
+    assert results["datasets"] == {"test_gamma_response.json": 10, "synthetic_50": 50}
+    for stage in ("MarketTransformer.transform_markets", "transform_markets_batch",
+                  "filter_and_process_market_events", "categorize_market",
+                  "batch_categorize_markets", "format_market_with_images"):
+        result = results["stages"][stage]["synthetic_50"]
+        assert result["status"] == "success", f"{stage} failed: {result['error']}"
+        assert result["items_per_second"] > 0
+        assert result["peak_memory_bytes"] > 0
+
+    assert "synthetic_50" in format_results(results)
+
+    logger.info("Offline benchmark test completed successfully!")
+    return True
+
+def test_compare_results_flags_regressions():
+    """Test that throughput drops beyond the tolerance are reported."""
+    baseline = {"stages": {"transform_markets_batch": {
+        "synthetic_10000": {"status": "success", "items_per_second": 10000.0}
+    }}}
+    slower = {"stages": {"transform_markets_batch": {
+        "synthetic_10000": {"status": "success", "items_per_second": 7000.0}
+    }}}
+    similar = {"stages": {"transform_markets_batch": {
+        "synthetic_10000": {"status": "success", "items_per_second": 9000.0}
+    }}}
+
+    assert len(compare_results(slower, baseline, tolerance=0.25)) == 1
+    assert compare_results(similar, baseline, tolerance=0.25) == []
+
+    logger.info("Regression comparison test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_synthetic_markets_have_unique_ids()
+    test_benchmarks_run_offline_on_fixture()
+    test_compare_results_flags_regressions()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test pipeline run checkpoints.
+
+This script checks that stage outputs are only reused for the same inputs,
+that completed items are computed once across attempts of a run, that
+resuming a failed pipeline run skips the fetch and the categorizations it
+already finished and keeps its prioritized selection, and that a streaming
+run with failed items keeps its checkpoints.
+"""
+
+import logging
+from unittest import mock
+
+from flask import Flask
+
+from models import db, PipelineCheckpoint
+from utils.checkpoints import RunCheckpoints, fingerprint
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_app():
+    """Create an app with an in-memory database."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+def test_run_checkpoints():
+    """Test stage outputs, completed items and clearing."""
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+
+    checkpoints = RunCheckpoints(db, PipelineCheckpoint, 7, app=app)
+    assert checkpoints.stage_output("fetch_binary", fingerprint(40)) is None
+    assert checkpoints.cached_stage("fetch_binary", fingerprint(40), lambda: [{"id": "m1"}]) == [{"id": "m1"}]
+    assert checkpoints.cached_stage("fetch_binary", fingerprint(40), lambda: []) == [{"id": "m1"}]
+    # Other inputs: the output is not reused
+    assert checkpoints.stage_output("fetch_binary", fingerprint(60)) is None
+    # Empty outputs are not saved
+    assert checkpoints.cached_stage("fetch_events", fingerprint(40), lambda: []) == []
+    assert checkpoints.stage_output("fetch_events", fingerprint(40)) is None
+
+    categorize = mock.Mock(return_value=("sports", False))
+    assert checkpoints.cached("categorize", "m1", categorize) == ("sports", False)
+    assert checkpoints.cached("categorize", "m1", categorize) == ["sports", False]
+    assert categorize.call_count == 1
+
+    # A later attempt of the run reads the checkpoints from the database
+    resumed = RunCheckpoints(db, PipelineCheckpoint, 7, app=app, resuming=True)
+    assert resumed.cached("categorize", "m1", categorize) == ["sports", False]
+    assert categorize.call_count == 1
+    assert resumed.items("categorize") == {"m1": ["sports", False]}
+    # Items saved by this attempt are not earlier work
+    resumed.save_item("categorize", "m2", ["news", False])
+    assert resumed.earlier_items("categorize") == {"m1": ["sports", False]}
+    assert set(resumed.items("categorize")) == {"m1", "m2"}
+    assert RunCheckpoints(db, PipelineCheckpoint, 8, app=app).items("categorize") == {}
+
+    assert resumed.clear() == 3
+    assert resumed.stage_output("fetch_binary", fingerprint(40)) is None
+
+    # Without a run ID nothing is saved
+    disabled = RunCheckpoints(db, PipelineCheckpoint, None, app=app)
+    assert disabled.cached("categorize", "m1", categorize) == ("sports", False)
+    assert categorize.call_count == 2
+    assert not disabled.save_stage("fetch_binary", fingerprint(40), [{"id": "m1"}])
+
+    logger.info("Run checkpoints test completed successfully!")
+    return True
+
+def test_resume_pipeline_run():
+    """Test that a resumed run skips the work its failed attempt finished."""
+    import run_pipeline_with_events as pipeline
+    from utils.market_record import market_records
+
+    with pipeline.app.app_context():
+        pipeline.db.create_all()
+
+    markets = [{"id": f"m{i}", "question": f"Market {i}?"} for i in range(1, 4)]
+    categorize = mock.Mock(side_effect=[("sports", False), RuntimeError("LLM unavailable"),
+                                        ("news", False)])
+    categorized = []
+
+    def process_binary_markets(binary_markets, max_markets, run_id=None, event_index=None, checkpoints=None):
+        # The first attempt selects the first markets, a rerun would select the last ones
+        prioritize = (lambda candidates, limit: candidates[-limit:]) if checkpoints.resuming else \
+            (lambda candidates, limit: candidates[:limit])
+        selected = pipeline.select_checkpointed(checkpoints, "prioritize_binary", market_records(binary_markets),
+                                                max_markets, prioritize)
+        for market in selected:
+            categorized.append((market.id, checkpoints.cached("categorize", market.id, categorize)[0]))
+        return [], []
+
+    with mock.patch.object(pipeline, "fetch_binary_markets", return_value=markets) as fetch_binary, \
+            mock.patch.object(pipeline, "fetch_event_markets", return_value=[{"id": "e1"}]) as fetch_events, \
+            mock.patch.object(pipeline, "process_binary_markets", side_effect=process_binary_markets), \
+            mock.patch.object(pipeline, "process_event_markets", return_value=([], [])):
+        assert pipeline.run_pipeline(max_markets=2, max_events=1, streaming=False) == 1
+        with pipeline.app.app_context():
+            run = pipeline.PipelineRun.query.order_by(pipeline.PipelineRun.id.desc()).first()
+            assert run.status == "failed"
+            run_id = run.id
+
+        categorized.clear()
+        assert pipeline.run_pipeline(max_markets=2, max_events=1, streaming=False, resume=run_id) == 0
+        assert fetch_binary.call_count == 1 and fetch_events.call_count == 1
+        assert categorize.call_count == 3
+        assert categorized == [("m1", "sports"), ("m2", "news")]
+
+        with pipeline.app.app_context():
+            assert pipeline.db.session.get(pipeline.PipelineRun, run_id).status == "completed"
+            assert pipeline.PipelineCheckpoint.query.filter_by(run_id=run_id).count() == 0
+
+        # Completed and unknown runs are not resumed
+        assert pipeline.run_pipeline(resume=run_id) == 0
+        assert pipeline.run_pipeline(resume=run_id + 1000) == 1
+        assert fetch_binary.call_count == 1
+
+    logger.info("Resume test completed successfully!")
+    return True
+
+def test_resume_posts_earlier_markets_once():
+    """Test that a resumed run posts the markets each attempt stored exactly once."""
+    import run_pipeline_with_events as pipeline
+
+    with pipeline.app.app_context():
+        pipeline.db.create_all()
+
+    def market(market_id):
+        return {"id": market_id, "conditionId": f"0x{market_id}", "question": f"Will {market_id} happen?",
+                "outcomes": "[\"Yes\", \"No\"]", "endDate": "2099-01-01T00:00:00Z", "active": True,
+                "closed": False, "archived": False, "image": "https://example.com/a.png",
+                "icon": "https://example.com/a_icon.png"}
+
+    posted = []
+
+    def post_pending_market(market):
+        posted.append(market.poly_id)
+        return True
+
+    def run(markets, categorize, post_side_effect=None, resume=None):
+        with mock.patch.object(pipeline, "fetch_binary_markets", return_value=markets), \
+                mock.patch.object(pipeline, "fetch_event_markets", return_value=[]), \
+                mock.patch.object(pipeline, "categorize_market", side_effect=categorize), \
+                mock.patch.object(pipeline, "post_pending_market", side_effect=post_side_effect or post_pending_market):
+            return pipeline.run_pipeline(max_markets=5, max_events=1, streaming=False, resume=resume)
+
+    def last_run_id():
+        with pipeline.app.app_context():
+            return pipeline.PipelineRun.query.order_by(pipeline.PipelineRun.id.desc()).first().id
+
+    # The first attempt fails before storing anything; the resumed attempt
+    # stores c1 and c2 and posts them once, in the regular posting step
+    assert run([market("c1"), market("c2")], RuntimeError("LLM unavailable")) == 1
+    assert run([market("c1"), market("c2")], lambda question, description: ("sports", False),
+               resume=last_run_id()) == 0
+    assert sorted(posted) == ["0xc1", "0xc2"]
+
+    # The first attempt stores c3 but fails while posting; the resumed
+    # attempt posts it as work of the earlier attempt
+    posted.clear()
+    assert run([market("c3")], lambda question, description: ("sports", False),
+               post_side_effect=RuntimeError("Slack unavailable")) == 1
+    assert run([market("c3")], lambda question, description: ("sports", False), resume=last_run_id()) == 0
+    assert posted == ["0xc3"]
+
+    logger.info("Resumed posting test completed successfully!")
+    return True
+
+def test_failed_streaming_run_keeps_checkpoints():
+    """Test that a streaming run with failed items is recorded as failed and can be resumed."""
+    import run_pipeline_with_events as pipeline
+
+    with pipeline.app.app_context():
+        pipeline.db.create_all()
+
+    markets = [{"id": "s1", "question": "Will s1 happen?", "outcomes": "[\"Yes\", \"No\"]",
+                "endDate": "2099-01-01T00:00:00Z", "image": "https://example.com/a.png",
+                "icon": "https://example.com/a_icon.png"}]
+    with mock.patch.object(pipeline, "fetch_binary_markets", return_value=markets), \
+            mock.patch.object(pipeline, "fetch_event_markets", return_value=[]), \
+            mock.patch.object(pipeline, "categorize_market", side_effect=RuntimeError("LLM unavailable")):
+        assert pipeline.run_pipeline(max_markets=5, max_events=1, streaming=True) == 1
+
+    with pipeline.app.app_context():
+        run = pipeline.PipelineRun.query.order_by(pipeline.PipelineRun.id.desc()).first()
+        assert run.status == "failed" and "categorize (1)" in run.error
+        assert pipeline.PipelineCheckpoint.query.filter_by(run_id=run.id, stage="fetch_binary").count() == 1
+
+    # A failed fetch fails the run too
+    with mock.patch.object(pipeline, "fetch_binary_markets", side_effect=ConnectionError("Gamma API unavailable")):
+        assert pipeline.run_pipeline(max_markets=5, max_events=1, streaming=True) == 1
+
+    logger.info("Failed streaming run test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_run_checkpoints()
+    test_resume_pipeline_run()
+    test_resume_posts_earlier_markets_once()
+    test_failed_streaming_run_keeps_checkpoints()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test the shared date normalization.
+
+This script checks that end dates in every form the APIs use are converted
+to the same integer epoch, that repeated date strings are served from the
+parse cache, and that the Slack formatters show expiry dates in UTC.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from utils.dates import to_epoch, to_datetime, is_expired, format_expiry, _parse_string
+from utils.deployment_formatter import format_deployment_message
+from utils.messaging import format_market_with_images
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EPOCH = 1905940800  # 2030-05-25T12:00:00Z
+
+def test_to_epoch_normalizes_timezones():
+    """Test that all date forms give the same integer epoch."""
+    forms = [
+        "2030-05-25T12:00:00Z",
+        "2030-05-25T12:00:00+00:00",
+        "2030-05-25T14:00:00+02:00",
+        "2030-05-25T12:00:00",  # naive dates are UTC
+        "2030-05-25T12:00:00.000Z",
+        "May 25 2030 12:00 UTC",
+        EPOCH,
+        EPOCH * 1000,
+        str(EPOCH),
+        str(EPOCH * 1000),
+        float(EPOCH),
+        datetime(2030, 5, 25, 12, tzinfo=timezone.utc),
+        datetime(2030, 5, 25, 12),
+    ]
+    for value in forms:
+        assert to_epoch(value) == EPOCH, value
+        assert isinstance(to_epoch(value), int)
+
+    for value in (None, "", "not a date", True, float("nan"), []):
+        assert to_epoch(value) is None, value
+
+    # Only 10- and 13-digit strings are epochs; other digit strings are dates
+    assert to_epoch("20300525") == EPOCH - 12 * 3600
+
+    assert to_datetime("2030-05-25T12:00:00Z") == datetime(2030, 5, 25, 12, tzinfo=timezone.utc)
+    assert is_expired("2020-01-01T00:00:00Z") and not is_expired("2099-01-01")
+    assert is_expired(EPOCH, now=EPOCH, inclusive=True) and not is_expired(EPOCH, now=EPOCH)
+    assert not is_expired("not a date")
+
+    logger.info("Date normalization test completed successfully!")
+    return True
+
+def test_parse_cache():
+    """Test that each distinct date string is parsed once."""
+    value = "2031-01-02T03:04:05Z"
+    before = _parse_string.cache_info()
+    for _ in range(100):
+        to_epoch(value)
+    after = _parse_string.cache_info()
+
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 99
+
+    logger.info("Date parse cache test completed successfully!")
+    return True
+
+def test_expiry_formatting():
+    """Test that expiry dates are shown in UTC in Slack messages."""
+    assert format_expiry(EPOCH) == "2030-05-25 12:00 UTC"
+    assert format_expiry(EPOCH * 1000) == "2030-05-25 12:00 UTC"
+    assert format_expiry("2030-05-25T14:00:00+02:00") == "2030-05-25 12:00 UTC"
+    assert format_expiry(None) == "Unknown"
+    assert format_expiry("Unknown") == "Unknown"
+
+    text, blocks = format_deployment_message("1", "Will it rain?", "news", expiry=EPOCH)
+    assert "2030-05-25 12:00 UTC" in str(blocks)
+
+    text, blocks = format_market_with_images({"question": "Will it rain?", "endDate": "2030-05-25T12:00:00Z"})
+    assert "*Expiry:* 2030-05-25 12:00 UTC" in text
+
+    logger.info("Expiry formatting test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_to_epoch_normalizes_timezones()
+    test_parse_cache()
+    test_expiry_formatting()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the event index used by event-first ingestion.
+
+This script checks that events fetched with embedded markets are split into
+binary markets (single-market events, with their event attached) and
+multi-option events, that markets covered by event processing are
+skipped by binary processing, and that stored events are keyed by their
+Gamma ID only in event-first mode.
+"""
+
+import logging
+
+from utils.event_index import EventIndex
+from utils.transform_market_with_events import transform_markets_batch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_events():
+    """Build one multi-option event and one single-market event."""
+    def market(market_id, question):
+        return {"id": market_id, "conditionId": f"0x{market_id}", "question": question,
+                "outcomes": "[\"Yes\", \"No\"]", "endDate": "2099-01-01T00:00:00Z"}
+    return [
+        {"id": "ucl", "title": "Champions League Winner", "image": "https://example.com/ucl.png",
+         "markets": [market("1", "Will Arsenal win?"), market("2", "Will PSG win?")]},
+        {"id": "btc", "title": "Bitcoin $200k", "image": "https://example.com/btc.png",
+         "markets": [market("3", "Will Bitcoin reach $200k?")]},
+        {"id": "empty", "title": "No markets", "markets": []},
+        {"id": "ucl", "title": "Duplicate", "markets": [market("9", "Duplicate?")]},
+    ]
+
+def test_event_index_split():
+    """Test splitting fetched events into binary markets and multi-option events."""
+    index = EventIndex(make_events())
+
+    assert len(index) == 2
+    assert [event.id for event in index.multi_market_events()] == ["ucl"]
+
+    binary = index.binary_markets()
+    assert [market.id for market in binary] == ["3"]
+    assert binary[0].raw["events"][0]["id"] == "btc"
+    assert "markets" not in binary[0].raw["events"][0]
+
+    # The event of a binary market comes from the index, not from heuristics
+    events, markets = transform_markets_batch(binary)
+    assert [event["id"] for event in events] == ["btc"]
+    assert markets[0]["event_id"] == "btc"
+
+    logger.info("Event index split test completed successfully!")
+    return True
+
+def test_event_index_coverage():
+    """Test that binary processing skips markets covered by event processing."""
+    index = EventIndex(make_events())
+    markets = [
+        {"id": "1", "question": "Will Arsenal win?"},
+        {"id": "other", "conditionId": "0x2", "question": "Will PSG win?"},
+        {"id": "4", "question": "Will Inter win?", "events": [{"id": "ucl"}]},
+        {"id": "3", "question": "Will Bitcoin reach $200k?"},
+        {"id": "5", "question": "Standalone?"},
+    ]
+
+    assert [market["id"] for market in index.uncovered(markets)] == ["3", "5"]
+
+    logger.info("Event index coverage test completed successfully!")
+    return True
+
+def test_event_keys():
+    """Test that events are keyed by name hash unless the pipeline runs event-first."""
+    import run_pipeline_with_events as pipeline
+    from utils.market_record import event_records
+
+    event = event_records(make_events())[0]
+    name_key = pipeline.generate_event_id("Champions League Winner")
+    assert pipeline.event_key(event) == name_key
+    assert pipeline.event_key(event, event_first=True) == "ucl"
+
+    with pipeline.app.app_context():
+        pipeline.db.create_all()
+        pipeline.merge_event(event)
+        pipeline.db.session.commit()
+        assert pipeline.db.session.get(pipeline.Event, name_key).source_id == "ucl"
+
+        # Event-first runs update the event stored under its Gamma ID
+        pipeline.merge_event(event, event_first=True)
+        pipeline.db.session.commit()
+        pipeline.merge_event(event, event_first=True)
+        pipeline.db.session.commit()
+        assert pipeline.db.session.get(pipeline.Event, "ucl").name == "Champions League Winner"
+        pipeline.db.drop_all()
+
+    logger.info("Event key test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_event_index_split()
+    test_event_index_coverage()
+    test_event_keys()
@@ -22,7 +22,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import project modules
 from utils.messaging import MessagingClient
-from config import TMP_DIR
+from config import TMP_DIR, ensure_directories
 
 # Configure logging
 logging.basicConfig(
@@ -313,6 +313,7 @@ def main():
     Main function to run the test.
     """
     logger.info("Starting fetch and post test")
+    ensure_directories()
     
     # Fetch active markets from Polymarket API
     markets = fetch_active_markets(limit=10)
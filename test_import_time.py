@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the import time of the modules used by CLI entry points.
+
+This script imports each module in a fresh interpreter, with every client
+configured, and checks that no client library (openai, web3) is loaded, no
+file is created and the import stays within its time budget. It also checks
+that the clients are created on first use, once.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules imported by short CLI commands and cron jobs
+CLI_MODULES = (
+    "config",
+    "utils.messaging",
+    "utils.apechain",
+    "utils.image_generation",
+    "utils.market_categorizer",
+    "utils.batch_categorizer",
+)
+
+# Client libraries only imported when a client is first used
+LAZY_LIBRARIES = ("openai", "web3")
+
+# Import time budget per module (seconds); importing openai or web3 alone takes about a second
+IMPORT_BUDGET_SECONDS = 0.5
+
+def run_python(code, cwd):
+    """Run code in a fresh interpreter with every client configured and return its JSON output."""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, OPENAI_API_KEY="sk-test", SLACK_BOT_TOKEN="xoxb-test",
+               SLACK_CHANNEL_ID="C123", APECHAIN_RPC_URL="http://127.0.0.1:1")
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True,
+                            timeout=120)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_cli_modules_import_lazily():
+    """Test that the CLI modules import quickly, without loading clients or writing files."""
+    for module in CLI_MODULES:
+        with tempfile.TemporaryDirectory() as cwd:
+            stats = run_python(
+                "import json, sys, time\n"
+                "started = time.perf_counter()\n"
+                f"import {module}\n"
+                "seconds = time.perf_counter() - started\n"
+                f"print(json.dumps({{'seconds': seconds, 'loaded': [name for name in {LAZY_LIBRARIES!r} "
+                "if name in sys.modules]}))",
+                cwd
+            )
+            logger.info(f"import {module}: {stats['seconds'] * 1000:.0f} ms")
+            assert stats["loaded"] == [], f"{module} imports {stats['loaded']}"
+            assert os.listdir(cwd) == [], f"{module} creates {os.listdir(cwd)}"
+            assert stats["seconds"] < IMPORT_BUDGET_SECONDS, f"{module} takes {stats['seconds']:.2f}s to import"
+
+    logger.info("Import time test completed successfully!")
+    return True
+
+def test_clients_created_on_first_use():
+    """Test that the accessors create each client once and the old module attributes still work."""
+    with tempfile.TemporaryDirectory() as cwd:
+        stats = run_python(
+            "import json, sys\n"
+            "from utils import messaging, apechain, market_categorizer, image_generation, batch_categorizer\n"
+            "from utils.openai_client import get_openai_client\n"
+            "before = [name for name in ('openai', 'web3') if name in sys.modules]\n"
+            "client = get_openai_client()\n"
+            "from utils.market_categorizer import openai_client\n"
+            "from utils.messaging import slack_client\n"
+            "print(json.dumps({\n"
+            "    'before': before,\n"
+            "    'openai_shared': client is openai_client is image_generation.openai_client"
+            " is batch_categorizer.openai_client,\n"
+            "    'slack_once': slack_client is not None and slack_client is messaging.get_slack_client(),\n"
+            "    'web3_once': apechain.w3 is not None and apechain.w3 is apechain.get_web3(),\n"
+            "    'abi_cached': apechain.predictor_abi is apechain.get_abi(apechain.PREDICTOR_ABI_PATH),\n"
+            "}))",
+            REPO_DIR
+        )
+    assert stats == {"before": [], "openai_shared": True, "slack_once": True, "web3_once": True,
+                     "abi_cached": True}
+
+    logger.info("Lazy client test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_cli_modules_import_lazily()
+    test_clients_created_on_first_use()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test the background job queue.
+
+This script runs the job queue against a temporary SQLite database and
+checks idempotency-key deduplication, per-job-type concurrency limits and
+concurrency groups shared by several job types.
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+from models import db, PipelineJob
+from utils.job_queue import JobQueue
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def create_test_queue(max_workers=4, concurrency_limits=None, concurrency_groups=None):
+    """Create a job queue backed by a temporary SQLite database."""
+    # A file database gives each worker thread its own connection; an
+    # in-memory one shares a single connection between all threads
+    directory = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(directory, 'jobs.db')}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return JobQueue(app, db, PipelineJob, max_workers=max_workers, concurrency_limits=concurrency_limits,
+                    concurrency_groups=concurrency_groups)
+
+def wait_for_jobs(queue, timeout=5):
+    """Wait until the queue has no active jobs."""
+    deadline = time.time() + timeout
+    while queue.active_job_count() and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_duplicate_triggers_are_deduplicated():
+    """Test that a second trigger with the same key returns the active job."""
+    queue = create_test_queue()
+    release = threading.Event()
+
+    first, created_first = queue.submit("pipeline", lambda job: release.wait(5))
+    second, created_second = queue.submit("pipeline", lambda job: None)
+
+    assert created_first, "First trigger should create a job"
+    assert not created_second, "Second trigger should not create a job"
+    assert second["id"] == first["id"], "Second trigger should return the active job"
+
+    release.set()
+    wait_for_jobs(queue)
+
+    job = queue.get_job(first["id"])
+    assert job["status"] == "completed", f"Unexpected status {job['status']}"
+    assert job["progress"] == 100
+
+    # Once finished, the same key can be used again
+    _, created_again = queue.submit("pipeline", lambda job: None)
+    assert created_again, "A finished job should release its idempotency key"
+    wait_for_jobs(queue)
+
+    logger.info("Deduplication test completed successfully!")
+    return True
+
+def test_concurrency_limit_per_job_type():
+    """Test that jobs of one type never exceed the concurrency limit."""
+    queue = create_test_queue(max_workers=4, concurrency_limits={"sync": 1})
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def job_body(job):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        job.progress(50, "halfway")
+        with lock:
+            state["running"] -= 1
+
+    job_ids = []
+    for i in range(3):
+        job, created = queue.submit("sync", job_body, idempotency_key=f"sync-{i}")
+        assert created
+        job_ids.append(job["id"])
+
+    wait_for_jobs(queue)
+
+    assert state["peak"] == 1, f"Expected at most 1 concurrent job, saw {state['peak']}"
+    for job_id in job_ids:
+        assert queue.get_job(job_id)["status"] == "completed"
+
+    logger.info("Concurrency limit test completed successfully!")
+    return True
+
+def test_concurrency_group_shared_by_job_types():
+    """Test that job types in one group never run together while other types do."""
+    queue = create_test_queue(max_workers=4, concurrency_limits={"writes": 1, "report": 2},
+                              concurrency_groups={"pipeline": "writes", "clean_environment": "writes"})
+    lock = threading.Lock()
+    running = {"writes": 0, "report": 0}
+    peak = {"writes": 0, "report": 0}
+
+    def job_body(group):
+        def run(job):
+            with lock:
+                running[group] += 1
+                peak[group] = max(peak[group], running[group])
+            time.sleep(0.05)
+            with lock:
+                running[group] -= 1
+        return run
+
+    job_ids = [
+        queue.submit("pipeline", job_body("writes"))[0]["id"],
+        queue.submit("clean_environment", job_body("writes"))[0]["id"],
+        queue.submit("report", job_body("report"), idempotency_key="report-1")[0]["id"],
+        queue.submit("report", job_body("report"), idempotency_key="report-2")[0]["id"],
+    ]
+
+    wait_for_jobs(queue)
+
+    assert peak["writes"] == 1, f"Grouped job types ran together ({peak['writes']} at once)"
+    assert peak["report"] == 2, "Ungrouped job types should keep their own limit"
+    for job_id in job_ids:
+        assert queue.get_job(job_id)["status"] == "completed"
+
+    logger.info("Concurrency group test completed successfully!")
+    return True
+
+def test_failed_job_records_error():
+    """Test that exceptions mark the job as failed with the error message."""
+    queue = create_test_queue()
+
+    def failing_job(job):
+        raise RuntimeError("Slack unavailable")
+
+    job, _ = queue.submit("post_unposted_markets", failing_job)
+    wait_for_jobs(queue)
+
+    job = queue.get_job(job["id"])
+    assert job["status"] == "failed"
+    assert job["error"] == "Slack unavailable"
+
+    logger.info("Failed job test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_duplicate_triggers_are_deduplicated()
+    test_concurrency_limit_per_job_type()
+    test_concurrency_group_shared_by_job_types()
+    test_failed_job_records_error()
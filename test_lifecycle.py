@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the market lifecycle.
+
+This script checks that status transitions are validated and logged, that
+work queues return the markets of one status oldest first, and that the
+work queue query uses the (status, updated_at) index. It also checks that
+the tracker deploys failed deployments whose transaction was mined, without
+updating markets whose transition is refused.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import text
+
+from models import db, Market, MarketTransition
+from utils.lifecycle import transition, work_queue, can_transition, create_work_queue_indexes, InvalidTransition
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_app():
+    """Create an app with an in-memory database."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+def test_transitions_and_work_queues():
+    """Test validated, logged transitions and per-status work queues."""
+    assert can_transition("approved", "deployment_approved")
+    assert not can_transition("deployed", "approved")
+    assert can_transition("legacy_status", "pending_deployment")
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        create_work_queue_indexes(db.engine, Market)
+
+        now = datetime.utcnow()
+        for i, status in enumerate(["approved", "approved", "new", "deployed"]):
+            db.session.add(Market(id=f"m{i}", question=f"Q{i}?", status=status,
+                                  updated_at=now - timedelta(minutes=10 - i)))
+        db.session.commit()
+
+        assert [m.id for m in work_queue(Market, "approved")] == ["m0", "m1"]
+
+        market = db.session.get(Market, "m0")
+        log = transition(market, "deployment_approved", actor="U123", reason="Ready")
+        assert transition(market, "deployment_approved") is None
+        db.session.commit()
+
+        assert log.from_status == "approved" and log.to_status == "deployment_approved"
+        assert [m.id for m in work_queue(Market, "approved")] == ["m1"]
+        assert [m.id for m in work_queue(Market, "deployment_approved")] == ["m0"]
+        assert MarketTransition.query.filter_by(market_id="m0").count() == 1
+
+        try:
+            transition(db.session.get(Market, "m3"), "approved")
+            assert False, "Deployed markets can't go back to approved"
+        except InvalidTransition:
+            pass
+
+        # The work queue query is served by the (status, updated_at) index
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM markets WHERE status = 'approved' ORDER BY updated_at")).fetchall()
+        assert any("ix_markets_status_updated_at" in str(row) for row in plan)
+
+        db.drop_all()
+
+    logger.info("Lifecycle test completed successfully!")
+    return True
+
+def test_tracker_recovers_failed_deployments():
+    """Test that a failed deployment whose transaction was mined ends up deployed."""
+    import track_market_id_after_deployment as tracker
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Market(id="m1", question="Q1?", status="deployment_failed", blockchain_tx="0x1"))
+        db.session.add(Market(id="m2", question="Q2?", status="rejected", blockchain_tx="0x2"))
+        db.session.commit()
+
+        with mock.patch.object(tracker, "get_deployed_market_id_from_tx", return_value="42"):
+            assert tracker.track_deployed_markets() == (2, 1, 1)
+
+        market = db.session.get(Market, "m1")
+        assert market.status == "deployed" and market.apechain_market_id == "42"
+        # A refused transition leaves the market untouched
+        market = db.session.get(Market, "m2")
+        assert market.status == "rejected" and market.apechain_market_id is None
+
+        db.drop_all()
+
+    logger.info("Tracker test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_transitions_and_work_queues()
+    test_tracker_recovers_failed_deployments()
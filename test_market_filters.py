@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test the market activity and expiry filters.
+
+This script checks that the activity and expiry filters keep the expected
+markets, including ISO and millisecond end dates.
+"""
+
+import logging
+import time
+
+from utils.market_record import market_records
+from utils.event_filter import filter_inactive_events
+from filter_active_markets import filter_active_markets
+from fetch_gamma_markets import filter_active_non_expired_markets as filter_gamma_markets
+from run_pipeline_with_events import filter_active_non_expired_markets
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NOW = time.time()
+
+def make_markets():
+    """Build markets covering each filter criterion."""
+    future = "2099-01-01T00:00:00Z"
+    base = {"active": True, "closed": False, "archived": False, "endDate": future,
+            "outcomes": "[\"Yes\", \"No\"]", "image": "https://example.com/a.png",
+            "icon": "https://example.com/a_icon.png"}
+    return [
+        dict(base, id="open", question="Will it rain?"),
+        dict(base, id="closed", question="Closed?", closed=True),
+        dict(base, id="archived", question="Archived?", archived=True, closed=True),
+        dict(base, id="inactive", question="Inactive?", active=False),
+        dict(base, id="expired", question="Expired?", endDate="2020-01-01T00:00:00Z"),
+        dict(base, id="no_date", question="No date?", endDate=None),
+        dict(base, id="bad_image", question="Bad image?", image="not a url"),
+        dict(base, id="ms_date", question="Millisecond date?", endDate=str(int((NOW + 2 * 86400) * 1000))),
+    ]
+
+def test_market_filters():
+    """Test the activity and expiry filters."""
+    markets = make_markets()
+
+    active = filter_active_markets(markets)
+    assert [m["id"] for m in active] == ["open", "ms_date"]
+
+    gamma = filter_gamma_markets(markets)
+    assert [m["id"] for m in gamma] == ["open", "no_date", "bad_image", "ms_date"]
+
+    records = filter_active_non_expired_markets(market_records(markets))
+    assert [m.id for m in records] == ["open", "no_date", "bad_image", "ms_date"]
+
+    events = filter_inactive_events([{"id": "old", "endDate": "2020-01-01T00:00:00Z"},
+                                     {"id": "new", "endDate": "2099-01-01"},
+                                     {"id": "undated"}, "not an event"])
+    assert [e["id"] for e in events] == ["new", "undated"]
+
+    logger.info("Market filter test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_market_filters()
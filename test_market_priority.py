@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test market prioritization.
+
+This script checks the relevance score features, that top-K selection
+matches a full sort (with ties kept in input order), and that events and
+records are scored like plain market dictionaries.
+"""
+
+import logging
+import random
+
+from utils.market_priority import (
+    score_market, score_event, text_score, end_date_score, top_k,
+    prioritize_markets, prioritize_events, EXPIRED_SCORE, NEAR_TERM_SCORE, FUTURE_END_SCORE,
+)
+from utils.market_record import market_records, event_records
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NOW = 1900000000  # 2030-03-17
+DAY = 86400
+
+def test_score_features():
+    """Test the individual score features."""
+    assert end_date_score(None, NOW) == 0
+    assert end_date_score(NOW - DAY, NOW) == EXPIRED_SCORE
+    assert end_date_score(NOW + 10 * DAY, NOW) == NEAR_TERM_SCORE
+    assert end_date_score(NOW + 90 * DAY, NOW) == FUTURE_END_SCORE
+
+    assert text_score("Will Arsenal win in 2030?", current_year=2030) > 0
+    assert text_score("Who was the winner in 2024?", current_year=2030) < 0
+    # Indicators are whole words: "nextgen" is not "next"
+    assert text_score("Nextgen token price?", current_year=2030) == 0
+
+    near = {"question": "Will it rain?", "endDate": NOW + 10 * DAY, "acceptingOrders": True, "volume": "25000"}
+    far = {"question": "Will it rain?", "endDate": NOW + 90 * DAY}
+    expired = {"question": "Did it rain?", "endDate": NOW - DAY}
+    assert score_market(near, NOW) > score_market(far, NOW) > score_market(expired, NOW)
+    assert score_market(market_records([near])[0], NOW) == score_market(near, NOW)
+
+    logger.info("Score feature test completed successfully!")
+    return True
+
+def test_top_k_matches_sort():
+    """Test that heap selection gives the same result as sorting the full list."""
+    rng = random.Random(7)
+    items = [(i, rng.randint(0, 20)) for i in range(1000)]
+    expected = sorted(items, key=lambda item: item[1], reverse=True)[:25]
+
+    assert top_k(items, 25, lambda item: item[1]) == expected
+    assert top_k(items, 0, lambda item: item[1]) == []
+    assert len(top_k(items[:3], 10, lambda item: item[1])) == 3
+
+    logger.info("Top-K selection test completed successfully!")
+    return True
+
+def test_prioritize_markets_and_events():
+    """Test selecting markets and events under a posting cap."""
+    markets = [
+        {"id": "quiet", "question": "Will it rain?", "endDate": "2099-01-01T00:00:00Z"},
+        {"id": "busy", "question": "Will it rain?", "endDate": "2099-01-01T00:00:00Z",
+         "acceptingOrders": True, "volume24hr": 100000},
+        {"id": "past", "question": "Was it raining?", "endDate": "2020-01-01T00:00:00Z"},
+    ]
+    assert [m["id"] for m in prioritize_markets(markets, 2)] == ["busy", "quiet"]
+    assert [m.id for m in prioritize_markets(market_records(markets), 2)] == ["busy", "quiet"]
+
+    events = [
+        {"id": "a", "title": "League Winner", "endDate": "2099-01-01", "markets": [markets[0]]},
+        {"id": "b", "title": "League Winner", "endDate": "2099-01-01", "markets": [markets[1]]},
+    ]
+    assert score_event(events[1]) > score_event(events[0])
+    assert [e["id"] for e in prioritize_events(events, 1)] == ["b"]
+    assert [e.id for e in prioritize_events(event_records(events), 1)] == ["b"]
+
+    logger.info("Prioritization test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_score_features()
+    test_top_k_matches_sort()
+    test_prioritize_markets_and_events()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the normalized market and event records.
+
+This script checks that Gamma API markets are parsed once into records with
+decoded outcomes, prices and end timestamps, and that the downstream stages
+give the same results for records as for raw market dictionaries.
+"""
+
+import copy
+import json
+import logging
+
+from utils.dates import to_epoch
+from utils.market_record import MarketRecord, EventRecord, market_records
+from utils.transform_market_with_events import transform_markets_batch
+from utils.event_filter import is_binary_market
+from utils.option_image_fixer import load_option_images
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MARKET = {
+    "id": "12345",
+    "conditionId": "0xabc",
+    "question": "Will Arsenal win the Premier League?",
+    "outcomes": "[\"Yes\", \"No\"]",
+    "outcomePrices": "[\"0.25\", \"0.75\"]",
+    "clobTokenIds": "[\"111\", \"222\"]",
+    "endDate": "2030-05-25T12:00:00Z",
+    "active": True,
+    "closed": False,
+    "image": "https://example.com/arsenal.png",
+    "icon": "https://example.com/arsenal_icon.png",
+    "events": [{"id": "epl", "title": "Premier League Winner"}],
+}
+
+def test_market_record_parses_once():
+    """Test that JSON-encoded fields and end dates are decoded into the record."""
+    record = MarketRecord(copy.deepcopy(MARKET))
+
+    assert record.outcomes == ["Yes", "No"]
+    assert record.outcome_prices == [0.25, 0.75]
+    assert record.clob_token_ids == ["111", "222"]
+    assert record.end_ts == to_epoch("2030-05-25T12:00:00+00:00") == 1905940800
+    assert record.event_ids == ["epl"]
+    assert record.is_binary and is_binary_market(record)
+    assert record.get("conditionId") == "0xabc"
+    assert to_epoch("1905940800000") == to_epoch(1905940800) == 1905940800
+    assert to_epoch("not a date") is None
+
+    option_market = {"outcomes": ["Arsenal", "Chelsea"], "option_images": json.dumps({"Arsenal": "a.png"})}
+    assert load_option_images(MarketRecord(option_market)) == load_option_images(option_market) == {"Arsenal": "a.png"}
+
+    event = EventRecord({"id": "epl", "title": "Premier League Winner", "endDate": "2030-05-25",
+                         "markets": [copy.deepcopy(MARKET)]})
+    assert event.markets[0].condition_id == "0xabc"
+    assert event.end_ts == to_epoch("2030-05-25T00:00:00Z")
+
+    logger.info("Market record test completed successfully!")
+    return True
+
+def test_transform_accepts_records():
+    """Test that the batch transformation gives the same output for records and dictionaries."""
+    markets = [copy.deepcopy(MARKET), dict(copy.deepcopy(MARKET), id="67890", conditionId="0xdef", events=[])]
+
+    events_from_dicts, markets_from_dicts = transform_markets_batch(copy.deepcopy(markets))
+    events_from_records, markets_from_records = transform_markets_batch(market_records(copy.deepcopy(markets)))
+
+    assert [e["id"] for e in events_from_records] == [e["id"] for e in events_from_dicts]
+    assert markets_from_records == markets_from_dicts
+    assert isinstance(markets_from_records[0]["raw_data"], dict), "raw_data should stay JSON-serializable"
+    assert [o["value"] for o in markets_from_records[0]["options"]] == ["Yes", "No"]
+
+    logger.info("Record transformation test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_market_record_parses_once()
+    test_transform_accepts_records()
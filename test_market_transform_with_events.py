@@ -24,6 +24,7 @@ from utils.transform_market_with_events import (
     transform_market_for_apechain,
     transform_markets_batch
 )
+from utils.market_record import MarketRecord
 
 def create_sample_gamma_market() -> Dict[str, Any]:
     """Create a sample market in Gamma API format"""
@@ -121,6 +122,11 @@ def test_option_extraction():
     assert options[0]['value'] == 'Yes', "Failed to extract first option correctly"
     assert options[1]['value'] == 'No', "Failed to extract second option correctly"
     
+    # An empty outcomes list gives no options rather than the Yes/No default
+    assert extract_market_options(dict(market, outcomes='[]')) == [], "Empty outcomes should give no options"
+    assert extract_market_options(MarketRecord(dict(market, outcomes='[]'))) == [], \
+        "Empty record outcomes should give no options"
+    
     logger.info("✓ Option extraction test passed")
 
 def test_full_market_transformation():
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test the pipeline metrics.
+
+This script checks stage timing histograms and per-run buffering, the
+Prometheus text rendering, Slack client instrumentation and persistence of
+stage timings to the pipeline_stage_metrics table.
+"""
+
+import logging
+
+from flask import Flask
+
+from models import db, PipelineStageMetric
+from utils.metrics import (
+    metrics, stage_timer, track_call, instrument_slack_client, set_queue_depth,
+    render_prometheus, pop_stage_records, save_stage_metrics
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_stage_timer_records_histogram_and_run_records():
+    """Test that stage timings go to the histogram and the run buffer."""
+    metrics.reset()
+
+    with stage_timer("filter", run_id=101, items_in=10) as timing:
+        timing.items_out = 4
+
+    try:
+        with stage_timer("deploy", run_id=101):
+            raise RuntimeError("RPC down")
+    except RuntimeError:
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot["histograms"]["pipeline_stage_duration_seconds"]['{stage="filter"}']["count"] == 1
+    assert snapshot["counters"]["pipeline_stage_runs_total"]['{stage="deploy",status="error"}'] == 1
+    assert snapshot["counters"]["pipeline_stage_items_total"]['{stage="filter"}'] == 4
+
+    records = pop_stage_records(101)
+    assert [record["stage"] for record in records] == ["filter", "deploy"]
+    assert records[0]["items_in"] == 10 and records[0]["items_out"] == 4
+    assert records[1]["status"] == "error"
+    assert pop_stage_records(101) == [], "Records should only be returned once"
+
+    logger.info("Stage timer test completed successfully!")
+    return True
+
+def test_prometheus_rendering():
+    """Test the Prometheus text exposition output."""
+    metrics.reset()
+
+    with track_call("gamma", "markets"):
+        pass
+    set_queue_depth("slack_post", 3)
+
+    text = render_prometheus()
+    assert "# TYPE external_call_duration_seconds histogram" in text
+    assert 'external_call_duration_seconds_bucket{dependency="gamma",operation="markets",le="+Inf"} 1' in text
+    assert 'external_calls_total{dependency="gamma",operation="markets",outcome="success"} 1' in text
+    assert 'queue_depth{queue="slack_post"} 3' in text
+
+    logger.info("Prometheus rendering test completed successfully!")
+    return True
+
+def test_slack_client_instrumentation():
+    """Test that every Web API call of a Slack client is counted."""
+    metrics.reset()
+
+    class FakeWebClient:
+        def api_call(self, api_method, **kwargs):
+            if api_method == "reactions.get":
+                raise RuntimeError("ratelimited")
+            return {"ok": True}
+
+        def chat_postMessage(self, **kwargs):
+            return self.api_call("chat.postMessage", json=kwargs)
+
+    client = instrument_slack_client(FakeWebClient())
+    assert instrument_slack_client(client) is client
+
+    client.chat_postMessage(channel="C1", text="hi")
+    try:
+        client.api_call("reactions.get")
+    except RuntimeError:
+        pass
+
+    counters = metrics.snapshot()["counters"]["external_calls_total"]
+    assert counters['{dependency="slack",operation="chat.postMessage",outcome="success"}'] == 1
+    assert counters['{dependency="slack",operation="reactions.get",outcome="error"}'] == 1
+
+    logger.info("Slack instrumentation test completed successfully!")
+    return True
+
+def test_save_stage_metrics():
+    """Test that buffered stage timings are written to the database."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+
+        with stage_timer("fetch", run_id=202) as timing:
+            timing.items_out = 50
+        with stage_timer("transform", run_id=202, items_in=50) as timing:
+            timing.items_out = 48
+
+        assert save_stage_metrics(db, PipelineStageMetric, 202) == 2
+        rows = PipelineStageMetric.query.filter_by(run_id=202).order_by(PipelineStageMetric.id).all()
+        assert [row.stage for row in rows] == ["fetch", "transform"]
+        assert rows[1].items_in == 50 and rows[1].items_out == 48
+        assert rows[0].to_dict()["duration_ms"] >= 0
+
+    logger.info("Stage metrics persistence test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_stage_timer_records_histogram_and_run_records()
+    test_prometheus_rendering()
+    test_slack_client_instrumentation()
+    test_save_stage_metrics()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the option image index.
+
+This script checks that option image lookups through the index return the
+same images as a scan of the fetched markets (first match in fetch order,
+optionally restricted to an event), record the rule that picked each image,
+and that option icons are collected in one pass.
+"""
+
+import logging
+
+from utils.option_image_index import (
+    OptionImageIndex, option_icons, RULE_EVENT_MARKET, RULE_FETCHED_MARKET, RULE_OPTION_ICON,
+)
+from utils.event_filter import extract_option_icons
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MARKETS = [
+    {"id": "1", "question": "Will Real Madrid win La Liga?", "image": "https://example.com/rm.png",
+     "events": [{"id": "laliga"}]},
+    {"id": "2", "question": "Will another team win the Serie A?", "image": "https://example.com/seriea.png",
+     "events": [{"id": "seriea"}]},
+    {"id": "3", "question": "Will another team win La Liga?", "image": "https://example.com/other.png",
+     "events": [{"id": "laliga"}]},
+    {"id": "4", "question": "Will Barcelona win the Champions League?", "image": None,
+     "events": [{"id": "ucl"}]},
+    {"id": "5", "question": "Will Barcelona win the Champions League?", "image": "https://example.com/fcb.png",
+     "events": [{"id": "ucl"}]},
+]
+
+def scan(terms, event_id=None):
+    """Reference lookup: first market with an image whose question contains all terms."""
+    for market in MARKETS:
+        question = market["question"].lower()
+        if (market.get("image") and all(term.lower() in question for term in terms) and
+                (event_id is None or any(e.get("id") == event_id for e in market["events"]))):
+            return market["image"]
+    return None
+
+def test_index_matches_scan():
+    """Test that indexed lookups return the first matching market in fetch order."""
+    index = OptionImageIndex(MARKETS)
+    assert len(index) == 4
+
+    for terms, event_id in ((("another team",), None), (("another team",), "laliga"),
+                            (("Barcelona",), None), (("barcelona", "champions league"), None),
+                            (("another team", "la liga"), None), (("Arsenal",), None),
+                            (("another team",), "ucl"), (("",), None)):
+        image = index.find(*terms, event_id=event_id)
+        assert (image.url if image else None) == scan(terms, event_id), (terms, event_id)
+
+    assert index.find("another team", event_id="laliga").rule == RULE_EVENT_MARKET
+    assert index.find("another team").rule == RULE_FETCHED_MARKET
+    assert index.find("another team").market_id == "2"
+
+    # Without the image requirement, positions follow the input order
+    all_markets = OptionImageIndex(MARKETS, require_image=False)
+    assert all_markets.find_market("barcelona") == 3
+
+    logger.info("Option image index test completed successfully!")
+    return True
+
+def test_option_icons_single_pass():
+    """Test collecting option icons from option markets and event outcomes."""
+    market = {
+        "option_markets": [{"id": "m1", "icon": "https://example.com/m1.png"}, {"id": "m2", "icon": "not a url"}],
+        "events": [{"id": "e", "outcomes": [{"id": "o1", "icon": "https://example.com/o1.png"},
+                                            {"id": "m1", "icon": "https://example.com/o_m1.png"}]}],
+    }
+    icons = option_icons(market)
+    assert icons["o1"].rule == RULE_OPTION_ICON
+    assert extract_option_icons(market) == {"m1": "https://example.com/o_m1.png", "o1": "https://example.com/o1.png"}
+
+    logger.info("Option icon test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_index_matches_scan()
+    test_option_icons_single_pass()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the pipeline profiling mode.
+
+This script checks that profiled runs write per-stage pstats, allocation
+reports and a summary, and that Gamma API requests can be replayed from the
+recorded fixtures without affecting other threads.
+"""
+
+import json
+import logging
+import os
+import pstats
+import tempfile
+import threading
+from unittest import mock
+
+import requests
+
+from utils.metrics import stage_timer
+from utils.profiling import profile_run, fixture_replay, gamma_get, load_fixture_markets, events_from_markets
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gamma_markets_response.json")
+
+def test_profiled_run_writes_stage_reports():
+    """Test that each stage gets a pstats file, an allocation report and a summary entry."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        with profile_run(42, enabled=True, output_dir=output_dir):
+            with stage_timer("store"):
+                with stage_timer("transform"):
+                    data = [{"id": i, "question": f"Question {i}"} for i in range(5000)]
+                for _ in range(3):
+                    with stage_timer("categorize"):
+                        sorted(data, key=lambda market: market["question"])
+
+        run_dir = os.path.join(output_dir, "run_42")
+        with open(os.path.join(run_dir, "summary.json")) as f:
+            summary = json.load(f)
+
+        assert set(summary["stages"]) == {"store", "transform", "categorize"}
+        assert summary["stages"]["categorize"]["calls"] == 3
+        assert summary["stages"]["transform"]["net_allocated_bytes"] > 0
+        assert summary["stages"]["store"]["peak_traced_bytes"] >= summary["stages"]["transform"]["peak_traced_bytes"]
+
+        stats = pstats.Stats(os.path.join(run_dir, "categorize.pstats"))
+        assert any(func[2] == "<lambda>" for func in stats.stats), "Sort key should be profiled under categorize"
+        assert os.path.exists(os.path.join(run_dir, "transform.alloc.txt"))
+
+    logger.info("Profiled run test completed successfully!")
+    return True
+
+def test_profiling_disabled_by_default():
+    """Test that nothing is profiled without the flag or environment toggle."""
+    os.environ.pop("PIPELINE_PROFILE", None)
+    with profile_run(43) as profiler:
+        with stage_timer("filter"):
+            pass
+    assert profiler is None
+
+    logger.info("Profiling disabled test completed successfully!")
+    return True
+
+def test_fixture_replay_serves_gamma_requests():
+    """Test that Gamma markets and events are served from the fixture."""
+    markets = load_fixture_markets(FIXTURE)
+    events = events_from_markets(markets)
+
+    with fixture_replay(FIXTURE):
+        response = gamma_get("https://gamma-api.polymarket.com/markets", params={"limit": 10})
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()] == [m["id"] for m in markets[:10]]
+
+        response = gamma_get("https://gamma-api.polymarket.com/events?closed=false")
+        assert len(response.json()) == len(events)
+        assert all(event["markets"] for event in response.json())
+
+        # Only the replaying context is affected, requests.get is not patched
+        assert requests.get.__module__ == "requests.api"
+        other_thread = []
+        with mock.patch("requests.get", return_value="live") as live_get:
+            thread = threading.Thread(target=lambda: other_thread.append(
+                gamma_get("https://gamma-api.polymarket.com/markets")))
+            thread.start()
+            thread.join()
+        assert other_thread == ["live"] and live_get.call_count == 1
+
+    logger.info("Fixture replay test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_profiled_run_writes_stage_reports()
+    test_profiling_disabled_by_default()
+    test_fixture_replay_serves_gamma_requests()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the scalar-column query helpers.
+
+This script checks that list queries built with load_scalars() select only
+the scalar columns (plus the JSON columns they name), that deferred JSON
+columns are still loaded when accessed, that column_values() selects a
+single column, that raw_data is deferred by default, and that the markets
+posted to Slack are loaded with the JSON columns their messages show.
+"""
+
+import logging
+
+from flask import Flask
+from sqlalchemy import event
+
+from models import db, Market, PendingMarket
+from utils.database import scalar_columns, load_scalars, column_values
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_app():
+    """Create an app with an in-memory database."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+def test_load_scalars():
+    """Test that list queries skip JSON columns unless named."""
+    names = [column.key for column in scalar_columns(PendingMarket)]
+    assert "poly_id" in names and "slack_message_id" in names
+    assert not {"options", "option_images", "option_market_ids", "_raw_data"} & set(names)
+    assert "options" in [column.key for column in scalar_columns(PendingMarket, "options")]
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(PendingMarket(poly_id="p1", question="Q?", options=["Yes", "No"],
+                                     option_images={"Yes": "https://example.com/y.png"}, raw_data={"id": "p1"},
+                                     slack_message_id="123.456"))
+        db.session.add(Market(id="m1", question="Q?", status="deployed", options=["Yes", "No"]))
+        db.session.commit()
+        db.session.expunge_all()
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        markets = load_scalars(PendingMarket.query.filter(PendingMarket.slack_message_id.isnot(None)),
+                               PendingMarket, "options").all()
+        assert "option_images" not in statements[-1] and "raw_data" not in statements[-1]
+        assert "options" in statements[-1]
+        assert markets[0].options == ["Yes", "No"]
+        assert len(statements) == 1
+
+        # Deferred columns load on access
+        assert markets[0].option_images == {"Yes": "https://example.com/y.png"}
+        assert markets[0].raw_data == {"id": "p1"}
+
+        # raw_data is deferred by default
+        db.session.expunge_all()
+        PendingMarket.query.all()
+        assert "raw_data" not in statements[-1]
+
+        assert column_values(Market.query.filter_by(status="deployed"), Market.id) == ["m1"]
+        assert "options" not in statements[-1]
+
+    logger.info("Query helper test completed successfully!")
+    return True
+
+def test_unposted_markets_load_option_images():
+    """Test that rendering unposted markets doesn't query each market's option images."""
+    import post_unposted_pending_markets as post
+
+    with post.app.app_context():
+        db.create_all()
+        db.session.add(PendingMarket(poly_id="p1", question="Q?", options=["Yes", "No"],
+                                     option_images={"Yes": "https://example.com/y.png"}, posted=False))
+        db.session.commit()
+        db.session.expunge_all()
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        markets = post.get_unposted_markets()
+        assert markets[0].options == ["Yes", "No"]
+        assert markets[0].option_images == {"Yes": "https://example.com/y.png"}
+        assert len(statements) == 1
+
+        db.drop_all()
+
+    logger.info("Unposted markets query test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_load_scalars()
+    test_unposted_markets_load_option_images()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the raw data archive.
+
+This script checks that payloads appended to the compressed archive are read
+back by key (latest payload wins, segments stay readable as gzip JSON
+lines), and that archiving PendingMarket/ProcessedMarket rows clears their
+raw_data column while `raw_data` and MarketTracker.get_market_raw_data still
+return the original data.
+"""
+
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+
+from flask import Flask
+
+import utils.raw_archive as raw_archive
+from models import db, PendingMarket, ProcessedMarket
+from utils.market_tracker import MarketTracker
+from utils.raw_archive import RawDataArchive, archive_raw_data
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_archive_put_get():
+    """Test appending and reading payloads."""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = RawDataArchive(tmp)
+        assert archive.get("pending_markets", "m1") is None
+
+        archive.put_many("pending_markets", [("m1", {"v": 1}, datetime(2025, 5, 1)),
+                                             ("m2", {"v": 2}, datetime(2025, 5, 2))])
+        archive.put("pending_markets", "m1", {"v": 3}, datetime(2025, 5, 2))
+
+        assert archive.get("pending_markets", "m1") == {"v": 3}
+        assert archive.get("pending_markets", "m2") == {"v": 2}
+        assert archive.get("processed_markets", "m1") is None
+
+        segment = os.path.join(tmp, "2025-05-02", f"pending_markets-{os.getpid()}.jsonl.gz")
+        with gzip.open(segment, "rt") as f:
+            assert [json.loads(line)["key"] for line in f] == ["m2", "m1"]
+        archive.close()
+
+    logger.info("Archive put/get test completed successfully!")
+    return True
+
+def test_archive_model_rows():
+    """Test moving model raw data to the archive."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        raw_archive._archive = RawDataArchive(tmp)
+        try:
+            db.create_all()
+            for i in range(5):
+                db.session.add(PendingMarket(poly_id=f"p{i}", question=f"Q{i}?", raw_data={"id": f"p{i}"}))
+            db.session.add(ProcessedMarket(condition_id="0xabc", question="Q?", raw_data={"conditionId": "0xabc"}))
+            db.session.commit()
+
+            result = archive_raw_data(db.session, PendingMarket.query.filter(PendingMarket._raw_data.isnot(None)),
+                                      "pending_markets", "poly_id", date_attr="fetched_at", batch_size=2)
+            assert result == {"archived": 5, "batches": 3}
+            archive_raw_data(db.session, ProcessedMarket.query.filter(ProcessedMarket._raw_data.isnot(None)),
+                             "processed_markets", "condition_id")
+
+            db.session.expunge_all()
+            assert PendingMarket.query.filter(PendingMarket._raw_data.isnot(None)).count() == 0
+            assert db.session.get(PendingMarket, "p3").raw_data == {"id": "p3"}
+            assert MarketTracker().get_market_raw_data("0xabc") == {"conditionId": "0xabc"}
+
+            # Rows written after archival keep their data in the column
+            market = db.session.get(PendingMarket, "p1")
+            market.raw_data = {"id": "p1", "updated": True}
+            db.session.commit()
+            db.session.expunge_all()
+            assert db.session.get(PendingMarket, "p1").raw_data == {"id": "p1", "updated": True}
+        finally:
+            raw_archive._archive.close()
+            raw_archive._archive = None
+
+    logger.info("Model archive test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_archive_put_get()
+    test_archive_model_rows()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test the per-run log capture.
+
+This script checks that concurrent jobs keep separate logs, that output of
+the threads and worker processes a job starts is captured, that the
+in-memory buffer is bounded and that entries are persisted in batches.
+"""
+
+import logging
+import threading
+
+from utils.run_logs import RunLogRegistry, RunLogSink
+from utils.stream_pipeline import StreamPipeline
+from utils.transform_engine import TransformEngine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_concurrent_jobs_keep_separate_logs():
+    """Test that output is routed to the sink of the thread's own job."""
+    registry = RunLogRegistry()
+    barrier = threading.Barrier(2)
+
+    def job(job_id):
+        with registry.capture(job_id):
+            barrier.wait()
+            for i in range(20):
+                print(f"job {job_id} line {i}")
+            logging.getLogger("test_run_logs").warning("job %s done", job_id)
+
+    threads = [threading.Thread(target=job, args=(job_id,)) for job_id in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for job_id in (1, 2):
+        entries = registry.get(job_id).tail(100)
+        messages = [entry["message"] for entry in entries]
+        assert len(messages) == 21, f"Job {job_id} captured {len(messages)} entries"
+        assert all(message.startswith(f"job {job_id} ") for message in messages)
+        assert entries[-1]["level"] == "WARNING"
+        assert entries[-1]["source"] == "test_run_logs"
+        assert registry.get(job_id).closed
+
+    logger.info("Concurrent capture test completed successfully!")
+    return True
+
+def _logged_group(key, items, context):
+    """Group transform that logs from the worker process."""
+    logging.getLogger("test_run_logs").warning("transformed group %s", key)
+    return key
+
+def test_child_threads_and_workers_are_captured():
+    """Test that output of stage threads and transform workers goes to the job's sink."""
+    registry = RunLogRegistry()
+
+    def source(emit):
+        for i in range(3):
+            emit(i)
+
+    def categorize(value, emit):
+        print(f"categorized {value}")
+        emit(value)
+
+    markets = [{"id": str(i), "events": [{"id": f"e{i}"}]} for i in range(4)]
+    with registry.capture(1):
+        StreamPipeline("test", source).stage("categorize", categorize, workers=2).run()
+        groups, _ = TransformEngine(workers=2, parallel_threshold=0).run(
+            markets, lambda market: [market["events"][0]["id"]], _logged_group)
+    assert groups == ["e0", "e1", "e2", "e3"]
+
+    messages = [entry["message"] for entry in registry.get(1).tail(100)]
+    assert sorted(message for message in messages if message.startswith("categorized")) == \
+        ["categorized 0", "categorized 1", "categorized 2"]
+    assert sorted(message for message in messages if message.startswith("transformed")) == \
+        [f"transformed group e{i}" for i in range(4)]
+
+    logger.info("Child thread capture test completed successfully!")
+    return True
+
+def test_buffer_is_bounded_and_persisted_in_batches():
+    """Test the ring buffer capacity and batched persistence."""
+    batches = []
+    sink = RunLogSink(7, capacity=10, flush_size=25, flush_interval=3600,
+                      persist=lambda sink, entries: batches.append(list(entries)))
+
+    for i in range(60):
+        sink.append(f"line {i}")
+
+    tail = sink.tail(100)
+    assert len(tail) == 10, "Buffer should keep only the last 10 entries"
+    assert tail[0]["message"] == "line 50"
+    assert [len(batch) for batch in batches] == [25, 25]
+
+    sink.close()
+    assert [len(batch) for batch in batches] == [25, 25, 10]
+    assert batches[-1][-1]["seq"] == 60
+
+    logger.info("Bounded buffer test completed successfully!")
+    return True
+
+def test_entries_after_returns_only_new_entries():
+    """Test resuming a stream from a sequence number."""
+    sink = RunLogSink(3, capacity=100)
+    for i in range(5):
+        sink.append(f"line {i}")
+
+    entries = sink.entries_after(3)
+    assert [entry["seq"] for entry in entries] == [4, 5]
+    assert sink.entries_after(5, timeout=0.01) == []
+
+    sink.close()
+    assert sink.entries_after(5, timeout=1) == []
+
+    logger.info("Stream resume test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_concurrent_jobs_keep_separate_logs()
+    test_child_threads_and_workers_are_captured()
+    test_buffer_is_bounded_and_persisted_in_batches()
+    test_entries_after_returns_only_new_entries()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test the Slack channel cleanup engine.
+
+This script runs the cleanup against an in-memory channel that answers like
+the Slack Web API (paged history, rate limited chat.delete with Retry-After)
+and checks that the selected messages are deleted by concurrent workers,
+that filters are applied, and that rate limited deletes are retried.
+"""
+
+import logging
+import threading
+import time
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+from utils.slack_cleanup import clean_channel_messages, RatePacer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FakeChannel:
+    """In-memory Slack channel with the conversations.history and chat.delete methods."""
+
+    def __init__(self, messages, rate_limit_every=0, latency=0.0):
+        self.messages = {m["ts"]: m for m in messages}
+        self.rate_limit_every = rate_limit_every
+        self.latency = latency
+        self.delete_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def response(self, data, status_code=200, headers=None):
+        return SlackResponse(client=self, http_verb="POST", api_url="", req_args={}, data=data,
+                             headers=headers or {}, status_code=status_code)
+
+    def conversations_history(self, channel, limit, inclusive=True, oldest=None, latest=None, cursor=None):
+        with self.lock:
+            ordered = sorted(self.messages.values(), key=lambda m: float(m["ts"]), reverse=True)
+        if oldest:
+            ordered = [m for m in ordered if float(m["ts"]) >= float(oldest)]
+        if latest:
+            ordered = [m for m in ordered if float(m["ts"]) <= float(latest)]
+        if cursor:
+            ordered = [m for m in ordered if float(m["ts"]) < float(cursor)]
+        page = ordered[:limit]
+        has_more = len(ordered) > limit
+        return self.response({"ok": True, "messages": page, "has_more": has_more,
+                              "response_metadata": {"next_cursor": page[-1]["ts"] if has_more else ""}})
+
+    def chat_delete(self, channel, ts):
+        with self.lock:
+            self.delete_calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            limited = self.rate_limit_every and self.delete_calls % self.rate_limit_every == 0
+        try:
+            time.sleep(self.latency)
+            if limited:
+                response = self.response({"ok": False, "error": "ratelimited"}, 429, {"Retry-After": "0.05"})
+                raise SlackApiError("ratelimited", response)
+            with self.lock:
+                if ts not in self.messages:
+                    raise SlackApiError("message_not_found", self.response({"ok": False, "error": "message_not_found"}))
+                del self.messages[ts]
+            return self.response({"ok": True, "ts": ts})
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+def make_messages(count):
+    """Create alternating bot and user messages plus a join message."""
+    messages = [{"ts": f"{1700000000 + i}.000100", "text": f"Message {i}", **({"bot_id": "B1"} if i % 2 else {"user": "U1"})}
+                for i in range(count)]
+    messages.append({"ts": "1699999999.000100", "subtype": "channel_join", "user": "U1"})
+    return messages
+
+def test_parallel_cleanup():
+    """Test that all messages across pages are deleted, with rate limits retried."""
+    channel = FakeChannel(make_messages(500), rate_limit_every=50, latency=0.005)
+    stats = clean_channel_messages(channel, "C1", workers=4, rate_per_minute=0)
+
+    assert stats == {"fetched": 501, "selected": 500, "deleted": 500, "failed": 0}
+    assert list(channel.messages) == ["1699999999.000100"]
+    assert channel.max_in_flight > 1
+
+    logger.info("Parallel cleanup test completed successfully!")
+    return True
+
+def test_cleanup_filters():
+    """Test bot-only, time range, message ID, limit and dry run selection."""
+    messages = make_messages(20)
+
+    channel = FakeChannel(messages)
+    stats = clean_channel_messages(channel, "C1", bot_only=True, dry_run=True, rate_per_minute=0)
+    assert stats["selected"] == 10 and stats["deleted"] == 0 and channel.delete_calls == 0
+
+    stats = clean_channel_messages(channel, "C1", bot_only=True, latest="1700000009.000100", rate_per_minute=0)
+    assert stats["deleted"] == 5
+    assert all(float(ts) > 1700000009 or "bot_id" not in m for ts, m in channel.messages.items())
+
+    channel = FakeChannel(messages)
+    wanted = {"1700000015.000100", "1700000017.000100"}
+    stats = clean_channel_messages(channel, "C1", message_ts=wanted, rate_per_minute=0)
+    assert stats["deleted"] == 2 and stats["fetched"] == 5
+
+    channel = FakeChannel(messages)
+    stats = clean_channel_messages(channel, "C1", max_messages=3, rate_per_minute=0)
+    assert stats["deleted"] == 3 and len(channel.messages) == 18
+
+    logger.info("Cleanup filter test completed successfully!")
+    return True
+
+def test_rate_pacer():
+    """Test that the pacer spaces calls across threads and backs off."""
+    pacer = RatePacer(calls_per_minute=6000)
+    started = time.monotonic()
+    threads = [threading.Thread(target=lambda: [pacer.wait() for _ in range(5)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 20 calls, 10ms apart
+    assert time.monotonic() - started >= 0.18
+
+    pacer.back_off(0.1)
+    started = time.monotonic()
+    pacer.wait()
+    assert time.monotonic() - started >= 0.09
+
+    logger.info("Rate pacer test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_parallel_cleanup()
+    test_cleanup_filters()
+    test_rate_pacer()
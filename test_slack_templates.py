@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the Slack block templates.
+
+This script checks that compiled templates render like the equivalent dict
+literals and return new objects on every render, that partially filled
+templates escape their values, that every script posting pending markets
+renders the same review message, and that deployment messages keep their
+layout.
+"""
+
+import json
+import logging
+
+from models import PendingMarket
+from utils.slack_templates import BlockTemplate, category_badge, category_fields_template, render_market_review
+from utils.deployment_formatter import format_deployment_message
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_URL = "https://polymarket-upload.s3.us-east-2.amazonaws.com/banner.png"
+
+def test_block_template_render():
+    """Test placeholder rendering, value passthrough and fresh objects."""
+    template = BlockTemplate({
+        "type": "section",
+        "text": {"type": "mrkdwn", "text": "*Question:* {question}"},
+        "accessory": {"type": "image", "image_url": "{image_url}", "alt_text": "{alt}"},
+        "fields": [{"type": "mrkdwn", "text": "static {{braces}}"}],
+        "emoji": True,
+    })
+
+    first = template.render(question="Will {x} happen?", image_url=IMAGE_URL, alt=42)
+    assert first == {
+        "type": "section",
+        "text": {"type": "mrkdwn", "text": "*Question:* Will {x} happen?"},
+        "accessory": {"type": "image", "image_url": IMAGE_URL, "alt_text": 42},
+        "fields": [{"type": "mrkdwn", "text": "static {braces}"}],
+        "emoji": True,
+    }
+
+    second = template.render(question="Q", image_url=IMAGE_URL, alt="a")
+    second["fields"].append({"type": "mrkdwn", "text": "changed"})
+    assert len(template.render(question="Q", image_url=IMAGE_URL, alt="a")["fields"]) == 1
+
+    # Category values are escaped when baked into a template
+    fields = category_fields_template("{odd}", "Binary Market (Yes/No)").render()
+    assert fields["fields"][0]["text"] == "*Category:* :question: {odd}"
+    assert category_badge("Crypto") == ":coin: Crypto"
+    assert category_badge(None) == ":question: Unknown"
+
+    logger.info("Block template test completed successfully!")
+    return True
+
+def test_review_message_shared_by_posting_scripts():
+    """Test that every pending market posting script renders the same message."""
+    import post_unposted_pending_markets
+    import run_pipeline_with_events
+    import fetch_and_categorize_markets_with_events
+
+    market = PendingMarket(
+        poly_id="p1", question="Which team will win?", category="sports",
+        options=[{"id": "a", "value": "Real Madrid"}, {"id": "b", "value": "Arsenal", "image_url": IMAGE_URL}, "PSG"],
+        option_images={"Real Madrid": IMAGE_URL}, banner_url=IMAGE_URL, event_name="Champions League", event_id="e1"
+    )
+
+    expected = render_market_review(market)
+    for module in (post_unposted_pending_markets, run_pipeline_with_events, fetch_and_categorize_markets_with_events):
+        assert json.dumps(module.format_market_message(market)) == json.dumps(expected), module.__name__
+
+    text, blocks = expected
+    assert text == "*Which team will win?*\n\nCategory: :sports_medal: Sports"
+    assert blocks[1]["image_url"] == IMAGE_URL
+    assert blocks[2]["text"]["text"] == "*Event:* Champions League · ID: `e1`"
+    options = [block for block in blocks if block.get("text", {}).get("text", "").startswith("• ")]
+    assert [block.get("accessory", {}).get("image_url") for block in options] == [IMAGE_URL, IMAGE_URL, None]
+    assert blocks[-1]["type"] == "context"
+
+    logger.info("Review message test completed successfully!")
+    return True
+
+def test_deployment_message_layout():
+    """Test the deployment approval message rendered from templates."""
+    text, blocks = format_deployment_message(
+        7, "Who wins?", "sports", "Multiple Choice", ["A", "B"], "2025-01-01T00:00:00Z",
+        banner_uri="https://example.com/market.png", event_name="Final", event_id=None,
+        event_image=IMAGE_URL, option_images={"A": IMAGE_URL}
+    )
+
+    assert text == "*Deployment Approval*\n\n*Question:* Who wins?\n*Category:* :sports_medal: Sports"
+    assert [block["type"] for block in blocks] == [
+        "header", "image", "section", "section", "section", "section", "image", "section", "section", "section",
+        "divider", "section"
+    ]
+    assert blocks[0] == {"type": "header", "text": {"type": "plain_text", "text": "Deployment Approval", "emoji": True}}
+    assert blocks[2]["text"]["text"] == "*Event:* Final · ID: `N/A`"
+    assert blocks[4]["fields"][1]["text"] == "*Type:* Multiple Choice"
+    assert blocks[5]["fields"][0]["text"] == "*ID:* `7`"
+    assert blocks[8]["accessory"] == {"type": "image", "image_url": IMAGE_URL, "alt_text": "A"}
+    assert "accessory" not in blocks[9]
+
+    logger.info("Deployment message test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_block_template_render()
+    test_review_message_shared_by_posting_scripts()
+    test_deployment_message_layout()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test the pipeline stage counters.
+
+This script checks that the stage counters follow status transitions made
+through the ORM (inserts, updates of expired rows, deletes, rollbacks), that
+they match a rebuild from the tables, that bulk deletes make the next
+read rebuild them, and that changes made before the first read are neither
+lost nor counted twice.
+"""
+
+import logging
+
+from flask import Flask
+
+from models import db, Market, PendingMarket, ProcessedMarket, ApprovalLog, StageCounter, STAGE_COUNTER_MODELS
+from utils.stage_counters import read_stage_counts, rebuild_stage_counters, counts_by_prefix
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def read_counts():
+    """Read the non-zero counters."""
+    counts = read_stage_counts(db.session, STAGE_COUNTER_MODELS, StageCounter)
+    return {name: value for name, value in counts.items() if value}
+
+def test_counters_follow_transitions():
+    """Test that counters match the tables after each kind of change."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(PendingMarket(poly_id="p0", question="Q0?"))
+        db.session.commit()
+
+        # First read seeds the counters from the tables
+        assert read_counts() == {"pending": 1, "pending.unposted": 1}
+
+        for i in range(1, 4):
+            db.session.add(PendingMarket(poly_id=f"p{i}", question=f"Q{i}?"))
+        db.session.add(ProcessedMarket(condition_id="c1", question="Q?"))
+        db.session.commit()
+
+        # Transitions on expired rows: posted, approved, deployment_approved, deployed
+        pending = db.session.get(PendingMarket, "p1")
+        pending.posted = True
+        pending.slack_message_id = "123.456"
+        db.session.add(ApprovalLog(poly_id="p2", decision="approved"))
+        db.session.add(Market(id="m1", question="Q?", category="sports", status="approved"))
+        db.session.commit()
+
+        market = db.session.get(Market, "m1")
+        market.status = "deployment_approved"
+        db.session.commit()
+        market.status = "deployed"
+        market.apechain_market_id = "42"
+        processed = db.session.get(ProcessedMarket, "c1")
+        processed.approved = False
+        db.session.commit()
+
+        # Rolled back changes don't count
+        db.session.get(PendingMarket, "p3").posted = True
+        db.session.flush()
+        db.session.rollback()
+
+        db.session.delete(db.session.get(PendingMarket, "p0"))
+        db.session.commit()
+
+        # Counters were updated by the transitions, not rebuilt on read
+        assert db.session.get(StageCounter, "markets.status.deployed").value == 1
+
+        counts = read_counts()
+        assert counts["pending"] == 3 and counts["pending.posted"] == 1 and counts["pending.unposted"] == 2
+        assert counts["approvals.approved"] == 1
+        assert counts["markets.status.deployed"] == 1 and counts["markets.deployed"] == 1
+        assert "markets.status.approved" not in counts and "markets.status.deployment_approved" not in counts
+        assert counts["processed.rejected"] == 1 and counts["processed.unposted"] == 1
+        assert counts_by_prefix(counts, "markets.category.") == {"sports": 1}
+
+        rebuilt = rebuild_stage_counters(db.session, STAGE_COUNTER_MODELS, StageCounter)
+        assert {name: value for name, value in rebuilt.items() if value} == counts
+
+        # Bulk deletes bypass the flush hook, so the next read rebuilds
+        PendingMarket.query.filter_by(posted=False).delete()
+        db.session.commit()
+        assert read_counts()["pending"] == 1
+
+        db.drop_all()
+
+    logger.info("Stage counter test completed successfully!")
+    return True
+
+def test_changes_before_first_read():
+    """Test that changes flushed while the counters are unseeded are counted once."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([PendingMarket(poly_id="p1", question="Q1?"), PendingMarket(poly_id="p2", question="Q2?")])
+        db.session.commit()
+
+        # Deltas are applied as soon as the table exists, seeded or not
+        assert db.session.get(StageCounter, "pending").value == 2
+        assert db.session.get(StageCounter, "_seeded") is None
+
+        # The first read replaces them with counts from the tables
+        assert read_counts() == {"pending": 2, "pending.unposted": 2}
+        assert read_counts() == {"pending": 2, "pending.unposted": 2}
+
+        # Changes made after a bulk delete, before the rebuild, aren't lost or double counted
+        PendingMarket.query.filter_by(poly_id="p1").delete()
+        db.session.commit()
+        db.session.get(PendingMarket, "p2").posted = True
+        db.session.add(PendingMarket(poly_id="p3", question="Q3?"))
+        db.session.commit()
+        assert read_counts() == {"pending": 2, "pending.posted": 1, "pending.unposted": 1}
+
+        db.drop_all()
+
+    logger.info("Unseeded counter test completed successfully!")
+    return True
+
+def test_api_status_counts():
+    """Test that /api/status reports the stage counters."""
+    from api_routes import api_bp
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    app.register_blueprint(api_bp)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(PendingMarket(poly_id="p1", question="Q?", posted=True))
+        db.session.commit()
+
+        response = app.test_client().get("/api/status")
+        assert response.get_json()["counts"]["pending.posted"] == 1
+
+        db.drop_all()
+
+    logger.info("API status test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_counters_follow_transitions()
+    test_changes_before_first_read()
+    test_api_status_counts()
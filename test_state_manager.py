@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the pipeline state store.
+
+This script checks the StateManager API on the SQLite state database:
+default pipeline state, per-market updates, batched updates and rollback,
+that two managers on the same database see each other's writes (as two
+processes would), the bounded market cache, and the import of a legacy
+JSON state file.
+"""
+
+import json
+import logging
+import os
+import tempfile
+
+from utils.state import StateManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_state_updates():
+    """Test pipeline and market state updates."""
+    with tempfile.TemporaryDirectory() as tmp:
+        state = StateManager(os.path.join(tmp, "state.db"), legacy_state_file=None)
+
+        assert state.get_pipeline_state()["status"] == "idle"
+        assert state.update_pipeline_state(status="running", markets_processed=3)
+        assert state.get_pipeline_state()["markets_processed"] == 3
+
+        assert state.get_market_state("m1") is None
+        assert state.update_market_state("m1", status="posted", message_id="123")
+        assert state.update_market_state("m1", status="approved")
+        assert state.get_market_state("m1") == {"status": "approved", "message_id": "123"}
+
+        with state.batch():
+            for i in range(100):
+                state.update_market_state(f"b{i}", status="new")
+        assert len(state.get_all_markets()) == 101
+
+        # A failed batch leaves no partial updates
+        try:
+            with state.batch():
+                state.update_market_state("m1", status="rejected")
+                raise RuntimeError("fail")
+        except RuntimeError:
+            pass
+        assert state.get_market_state("m1")["status"] == "approved"
+        state.close()
+
+    logger.info("State update test completed successfully!")
+    return True
+
+def test_state_shared_and_bounded():
+    """Test that managers sharing a database see each other's writes with a bounded cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        first = StateManager(path, legacy_state_file=None, cache_size=4)
+        second = StateManager(path, legacy_state_file=None, cache_size=4)
+
+        first.update_market_state("m1", status="posted")
+        assert second.get_market_state("m1") == {"status": "posted"}
+
+        # Updates from both managers are merged, not overwritten
+        second.update_market_state("m1", message_id="123")
+        first.update_market_state("m1", status="approved")
+        assert second.get_market_state("m1") == {"status": "approved", "message_id": "123"}
+
+        for i in range(20):
+            first.update_market_state(f"m{i}", seen=True)
+        assert len(first._cache) == 4
+        assert first.get_market_state("m1") == {"status": "approved", "message_id": "123", "seen": True}
+
+        first.close()
+        second.close()
+
+    logger.info("Shared state test completed successfully!")
+    return True
+
+def test_legacy_state_import():
+    """Test importing a JSON state file written by earlier versions."""
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = os.path.join(tmp, "pipeline_state.json")
+        with open(legacy_file, "w") as f:
+            json.dump({"pipeline": {"status": "completed", "markets_posted": 2},
+                       "markets": {"m1": {"status": "posted"}}}, f)
+
+        state = StateManager(os.path.join(tmp, "state.db"), legacy_state_file=legacy_file)
+        assert state.get_pipeline_state()["status"] == "completed"
+        assert state.get_pipeline_state()["markets_approved"] == 0
+        assert state.get_all_markets() == {"m1": {"status": "posted"}}
+        state.close()
+
+    logger.info("Legacy state import test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_state_updates()
+    test_state_shared_and_bounded()
+    test_legacy_state_import()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test the streaming pipeline engine.
+
+This script checks that items flow through the stages while the source is
+still emitting, that stages fan items out and filter them, that bounded
+queues hold a fast source back, that a failing item doesn't stop its stage,
+that failed items and a failed source are reported by stream_errors(), and
+that stage metrics are recorded. It also checks that the daily approval
+stream only sends decided markets to its deploy stage.
+"""
+
+import logging
+import threading
+import time
+from unittest import mock
+
+from utils.metrics import pop_stage_records
+from utils.stream_pipeline import StreamPipeline, stream_errors
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def test_items_stream_through_stages():
+    """Test that the first item reaches the last stage before the source is done."""
+    source_done = threading.Event()
+    reached_before_done = []
+    results = []
+
+    def source(emit):
+        for page in range(3):
+            emit([page * 10 + i for i in range(4)])
+            time.sleep(0.05)
+        source_done.set()
+
+    def fan_out(page, emit):
+        for value in page:
+            if value % 2 == 0:
+                emit(value)
+
+    def square(value, emit):
+        time.sleep(0.01)
+        emit(value * value)
+
+    def collect(value, emit):
+        reached_before_done.append(not source_done.is_set())
+        results.append(value)
+        emit(value)
+
+    pipeline = StreamPipeline("test", source, run_id=4501)
+    pipeline.stage("filter", fan_out).stage("categorize", square, workers=3).stage("store", collect)
+    stats = pipeline.run()
+
+    assert sorted(results) == [0, 4, 100, 144, 400, 484]
+    assert reached_before_done[0]
+    assert stats["fetch"]["items_out"] == 3
+    assert stats["filter"] == {"items_in": 3, "items_out": 6, "errors": 0}
+    assert stats["categorize"]["items_in"] == 6 and stats["store"]["items_out"] == 6
+
+    records = {record["stage"]: record for record in pop_stage_records(4501)}
+    assert set(records) == {"fetch", "filter", "categorize", "store"}
+    assert records["filter"]["items_in"] == 3 and records["filter"]["items_out"] == 6
+
+    logger.info("Streaming test completed successfully!")
+    return True
+
+def test_backpressure_and_error_isolation():
+    """Test that a slow stage holds the source back and failing items are skipped."""
+    emitted_at = []
+    processed = []
+
+    def source(emit):
+        for i in range(10):
+            emit(i)
+            emitted_at.append(time.monotonic())
+
+    def slow(value, emit):
+        time.sleep(0.02)
+        if value == 3:
+            raise ValueError("bad item")
+        processed.append(value)
+        emit(value)
+
+    pipeline = StreamPipeline("test", source)
+    pipeline.stage("store", slow, queue_size=1)
+    started = time.monotonic()
+    stats = pipeline.run()
+
+    assert processed == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert stats["store"] == {"items_in": 10, "items_out": 9, "errors": 1}
+    assert stream_errors(stats) == {"store": 1}
+    # The source couldn't run ahead of the queue
+    assert emitted_at[-1] - started >= 0.1
+
+    # A failing source is counted as an error of the pipeline
+    def failing_source(emit):
+        raise ConnectionError("Gamma API unavailable")
+
+    stats = StreamPipeline("test", failing_source).stage("filter", lambda value, emit: emit(value)).run()
+    assert stream_errors(stats) == {"fetch": 1}
+
+    logger.info("Backpressure test completed successfully!")
+    return True
+
+def test_stage_context_and_stop():
+    """Test per-worker contexts and stopping a polling source."""
+    entered = []
+
+    class Context:
+        def __enter__(self):
+            entered.append(threading.current_thread().name)
+        def __exit__(self, *exc):
+            return False
+
+    polls = []
+
+    def poll(emit):
+        while not pipeline.stopping:
+            polls.append(len(polls))
+            emit(len(polls))
+            if len(polls) == 5:
+                pipeline.stop()
+
+    pipeline = StreamPipeline("test", poll, source_name="approval_scan")
+    pipeline.stage("deploy", lambda value, emit: emit(value), workers=2, context=Context)
+    stats = pipeline.run()
+
+    assert len(polls) == 5
+    assert stats["deploy"]["items_out"] == 5
+    assert len(entered) == 2
+
+    logger.info("Context and stop test completed successfully!")
+    return True
+
+def test_approval_stream_deploys_decided_markets():
+    """Test that undecided markets are checked on every pass without holding deploy workers."""
+    import daily_pipeline
+    from check_pending_approvals import app
+    from models import db, Market, ApprovalEvent
+
+    with app.app_context():
+        db.create_all()
+        for i in range(6):
+            db.session.add(Market(id=f"m{i}", question=f"Market {i}?", status="pending_deployment"))
+            db.session.add(ApprovalEvent(market_id=f"m{i}", stage="final", status="pending", message_id=f"{i}.0"))
+        db.session.commit()
+
+    # m5 is approved while the stream runs, the others stay undecided
+    checks = {}
+
+    def reactions(message_id):
+        checks[message_id] = checks.get(message_id, 0) + 1
+        return {"white_check_mark": ["U1"]} if message_id == "5.0" and checks[message_id] > 1 else {}
+
+    with mock.patch("check_deployment_approvals.get_message_reactions", side_effect=reactions), \
+            mock.patch("check_deployment_approvals.deploy_market_to_apechain", return_value=("42", "0xtx")) as deploy:
+        stats = daily_pipeline.approval_pipeline(window=0.5, poll_interval=0.1).run()
+
+    assert stats["deploy"]["items_in"] == 1 and stats["deploy"]["items_out"] == 1
+    assert deploy.call_count == 1
+    assert all(checks[f"{i}.0"] >= 3 for i in range(5))
+    with app.app_context():
+        assert db.session.get(Market, "m5").status == "deployed"
+        assert db.session.get(Market, "m0").status == "pending_deployment"
+        db.drop_all()
+
+    logger.info("Approval stream test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_items_stream_through_stages()
+    test_backpressure_and_error_isolation()
+    test_stage_context_and_stop()
+    test_approval_stream_deploys_decided_markets()
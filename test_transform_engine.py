@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the market transformation engine.
+
+This script checks single-pass grouping by event, stable sharding by event
+ID, and that parallel runs give the same results as in-process runs for the
+event transformations.
+"""
+
+import json
+import logging
+
+from utils.transform_engine import TransformEngine, group_by_event, shard_for_key, first_event_id
+from utils.transform_markets_with_events import transform_markets_with_events, _event_ids, _transform_event_group
+from utils.market_transformer import MarketTransformer, _related_market_keys, _transform_related_group
+from utils.option_image_index import OptionImageIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_markets():
+    """Build markets for two multi-option events and one standalone market."""
+    markets = []
+    for event_id, title, teams in (("ucl", "Champions League Winner", ["Arsenal", "Inter Milan", "PSG"]),
+                                   ("laliga", "La Liga Winner", ["Real Madrid", "Barcelona"])):
+        for team in teams:
+            markets.append({
+                "id": f"{event_id}_{team}",
+                "conditionId": f"0x{event_id}_{team}",
+                "question": f"Will {team} win the {title}?",
+                "outcomes": json.dumps(["Yes", "No"]),
+                "image": f"https://example.com/{team}.png",
+                "icon": f"https://example.com/{team}_icon.png",
+                "events": [{"id": event_id, "title": title, "name": title,
+                            "image": f"https://example.com/{event_id}.png"}],
+            })
+    markets.insert(2, {"id": "btc", "question": "Will Bitcoin reach $200k?",
+                       "outcomes": json.dumps(["Yes", "No"]), "events": []})
+    return markets
+
+def test_group_by_event_single_pass():
+    """Test that groups keep input order and markets without an event are returned separately."""
+    markets = make_markets()
+    groups, ungrouped = group_by_event(markets, lambda market: [first_event_id(market)])
+
+    assert list(groups) == ["ucl", "laliga"]
+    assert [index for index, _ in groups["ucl"]] == [0, 1, 3]
+    assert [market["id"] for _, market in ungrouped] == ["btc"]
+    assert all(shard_for_key("ucl", 8) == shard_for_key("ucl", 8) for _ in range(3))
+
+    logger.info("Grouping test completed successfully!")
+    return True
+
+def test_parallel_matches_in_process():
+    """Test that sharding groups across worker processes does not change the results."""
+    markets = make_markets()
+    for keys, transform, context in ((_event_ids, _transform_event_group, None),
+                                     (_related_market_keys, _transform_related_group, OptionImageIndex(markets))):
+        in_process, _ = TransformEngine(workers=1).run(markets, keys, transform, context)
+        parallel, _ = TransformEngine(workers=2, parallel_threshold=0).run(markets, keys, transform, context)
+        assert parallel == in_process
+
+    logger.info("Parallel transformation test completed successfully!")
+    return True
+
+def test_event_transformations():
+    """Test the event transformations built on the engine."""
+    markets = make_markets()
+
+    transformed = transform_markets_with_events(markets)
+    assert [market["id"] for market in transformed] == ["event_ucl", "event_laliga", "btc"]
+    assert transformed[0]["options"] == ["Arsenal", "Inter Milan", "PSG"]
+    assert transformed[1]["option_market_ids"]["Barcelona"] == "laliga_Barcelona"
+
+    grouped = MarketTransformer().transform_markets(markets)
+    assert [market["id"] for market in grouped] == ["group_ucl", "btc", "group_laliga"]
+    assert json.loads(grouped[2]["option_images"])["Real Madrid"] == "https://example.com/Real Madrid.png"
+
+    logger.info("Event transformation test completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    test_group_by_event_single_pass()
+    test_parallel_matches_in_process()
+    test_event_transformations()
@@ -20,6 +20,8 @@ from typing import Dict, List, Any, Optional, Tuple
 import flask
 from models import db, Market, PipelineRun
 from utils.apechain import get_deployed_market_id_from_tx
+from utils.database import create_app, init_db
+from utils.lifecycle import transition
 
 # Configure logging
 logging.basicConfig(
@@ -105,9 +107,10 @@ def track_deployed_markets() -> Tuple[int, int, int]:
                 apechain_id = get_deployed_market_id_from_tx(market.blockchain_tx)
                 
                 if apechain_id:
-                    # Update market with Apechain market ID
+                    # Update market with Apechain market ID (the transition is checked first)
+                    transition(market, "deployed", actor="track_market_id_after_deployment")
                     market.apechain_market_id = apechain_id
-                    market.status = "deployed"
+                    db.session.commit()
                     
                     logger.info(f"Updated market {market.id} with Apechain ID {apechain_id}")
                     updated += 1
@@ -117,6 +120,7 @@ def track_deployed_markets() -> Tuple[int, int, int]:
                     failed += 1
             except Exception as e:
                 logger.error(f"Error tracking market {market.id}: {str(e)}")
+                db.session.rollback()
                 failed += 1
         
         # Save all changes
@@ -131,8 +135,9 @@ def main():
     """
     Main function to track deployed markets.
     """
-    # Import Flask app to get application context
-    from main import app
+    # Flask app for database context
+    app = create_app(__name__)
+    init_db(app, db)
     
     try:
         # Use application context for database operations
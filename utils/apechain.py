@@ -8,15 +8,18 @@ querying market data from the blockchain, and handling transactions.
 import os
 import json
 import logging
+import importlib.util
+import threading
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 import time
 
-# Import Web3 with better error handling
-try:
-    from web3 import Web3
-    web3_available = True
-except ImportError:
-    web3_available = False
+from utils.metrics import instrument_web3_provider
+from utils.lifecycle import transition
+
+# Web3 is imported on first use (see get_web3); importing it takes about a second
+web3_available = importlib.util.find_spec("web3") is not None
+if not web3_available:
     logging.warning("Web3 package not found. Blockchain functions will be unavailable.")
 
 # Configure logging
@@ -31,15 +34,29 @@ WALLET_ADDRESS = os.environ.get('WALLET_ADDRESS')
 if not APECHAIN_RPC_URL:
     logger.warning("Missing Apechain RPC URL. Set APECHAIN_RPC_URL environment variable.")
 
-# Initialize Web3 connection
-w3 = None
-if web3_available and APECHAIN_RPC_URL:
-    try:
-        w3 = Web3(Web3.HTTPProvider(APECHAIN_RPC_URL))
-        logger.info(f"Connected to Apechain RPC: {APECHAIN_RPC_URL}")
-    except Exception as e:
-        logger.error(f"Failed to initialize Web3 connection: {str(e)}")
-        w3 = None
+# Web3 connection, created on first use by get_web3()
+_w3 = None
+_w3_lock = threading.Lock()
+
+def get_web3():
+    """
+    Get the Web3 connection to Apechain, creating it on first use.
+    
+    Returns:
+        Web3: Connection, or None if web3 or APECHAIN_RPC_URL is missing or the
+        connection could not be created
+    """
+    global _w3
+    if _w3 is None and web3_available and APECHAIN_RPC_URL:
+        with _w3_lock:
+            if _w3 is None:
+                try:
+                    from web3 import Web3
+                    _w3 = Web3(instrument_web3_provider(Web3.HTTPProvider(APECHAIN_RPC_URL)))
+                    logger.info(f"Connected to Apechain RPC: {APECHAIN_RPC_URL}")
+                except Exception as e:
+                    logger.error(f"Failed to initialize Web3 connection: {str(e)}")
+    return _w3
 
 # Load ABI files
 PREDICTOR_ABI_PATH = './abi/predictor.json'
@@ -63,9 +80,28 @@ def load_abi(file_path: str) -> List[Dict[str, Any]]:
         logger.error(f"Error loading ABI file {file_path}: {str(e)}")
         return []
 
-# Load ABIs if files exist
-predictor_abi = load_abi(PREDICTOR_ABI_PATH) if os.path.exists(PREDICTOR_ABI_PATH) else []
-market_abi = load_abi(MARKET_ABI_PATH) if os.path.exists(MARKET_ABI_PATH) else []
+@lru_cache(maxsize=None)
+def get_abi(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Get an ABI, loading the file on first use.
+    
+    Args:
+        file_path: Path to the ABI JSON file
+        
+    Returns:
+        ABI list (empty if the file doesn't exist)
+    """
+    return load_abi(file_path) if os.path.exists(file_path) else []
+
+def __getattr__(name: str) -> Any:
+    # w3 and the ABIs used to be loaded on import; scripts importing them get the lazy values
+    if name == "w3":
+        return get_web3()
+    if name == "predictor_abi":
+        return get_abi(PREDICTOR_ABI_PATH)
+    if name == "market_abi":
+        return get_abi(MARKET_ABI_PATH)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Predictor contract address (the factory for creating markets)
 PREDICTOR_ADDRESS = '0x90b92F7ec91bAa3E6e7a62A9209bC4041b17F813'  # Freshly deployed contract
@@ -83,6 +119,7 @@ def create_market(question: str, options: List[str], end_time: int, category: st
     Returns:
         Transaction hash if successful, None otherwise
     """
+    w3 = get_web3()
     if not w3 or not WALLET_PRIVATE_KEY:
         logger.error("Web3 connection not initialized or wallet private key missing")
         return None
@@ -100,7 +137,7 @@ def create_market(question: str, options: List[str], end_time: int, category: st
             return None
         
         # Build predictor contract
-        predictor_contract = w3.eth.contract(address=PREDICTOR_ADDRESS, abi=predictor_abi)
+        predictor_contract = w3.eth.contract(address=PREDICTOR_ADDRESS, abi=get_abi(PREDICTOR_ABI_PATH))
         
         # Convert private key to correct format if needed
         private_key = WALLET_PRIVATE_KEY
@@ -179,6 +216,7 @@ def get_deployed_market_id_from_tx(tx_hash: str, max_retries: int = 5, timeout_s
     Returns:
         Market ID if found, None otherwise
     """
+    w3 = get_web3()
     if not w3:
         logger.error("Web3 connection not initialized")
         return None
@@ -220,7 +258,7 @@ def get_deployed_market_id_from_tx(tx_hash: str, max_retries: int = 5, timeout_s
             return None
         
         # Find market creation event in the logs
-        predictor_contract = w3.eth.contract(address=PREDICTOR_ADDRESS, abi=predictor_abi)
+        predictor_contract = w3.eth.contract(address=PREDICTOR_ADDRESS, abi=get_abi(PREDICTOR_ABI_PATH))
         
         # Log the receipt logs for debugging
         logger.info(f"Transaction receipt logs count: {len(receipt.logs)}")
@@ -253,13 +291,14 @@ def get_market_info(market_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dictionary of market information if successful, None otherwise
     """
+    w3 = get_web3()
     if not w3:
         logger.error("Web3 connection not initialized")
         return None
     
     try:
         # Get market address from predictor contract
-        predictor_contract = w3.eth.contract(address=PREDICTOR_ADDRESS, abi=predictor_abi)
+        predictor_contract = w3.eth.contract(address=PREDICTOR_ADDRESS, abi=get_abi(PREDICTOR_ABI_PATH))
         market_address = predictor_contract.functions.markets(int(market_id)).call()
         
         if not market_address or market_address == '0x0000000000000000000000000000000000000000':
@@ -267,7 +306,7 @@ def get_market_info(market_id: str) -> Optional[Dict[str, Any]]:
             return None
         
         # Get market details
-        market_contract = w3.eth.contract(address=market_address, abi=market_abi)
+        market_contract = w3.eth.contract(address=market_address, abi=get_abi(MARKET_ABI_PATH))
         
         # Get market data (adjust these function calls based on your contract)
         question = market_contract.functions.question().call()
@@ -312,7 +351,7 @@ def deploy_market_to_apechain(market, update_db: bool = True) -> Tuple[Optional[
         logger.error("Web3 package not available. Cannot deploy market.")
         return None, None
         
-    if not w3 or not WALLET_PRIVATE_KEY:
+    if not get_web3() or not WALLET_PRIVATE_KEY:
         logger.error("Web3 connection not initialized or wallet private key missing")
         return None, None
     
@@ -380,11 +419,11 @@ def deploy_market_to_apechain(market, update_db: bool = True) -> Tuple[Optional[
             logger.error(f"Failed to get market ID from transaction: {tx_hash}")
             # Update the market with transaction hash but no market ID
             if update_db:
-                market.blockchain_tx = tx_hash
-                market.status = "deployment_pending"
-                # Import db if needed
                 try:
-                    from main import db
+                    from models import db
+                    # Check the transition before updating the market
+                    transition(market, "deployment_pending", actor="apechain", reason=f"Transaction {tx_hash} sent")
+                    market.blockchain_tx = tx_hash
                     db.session.commit()
                     logger.info(f"Updated market {market.id} with transaction hash {tx_hash}")
                 except Exception as db_error:
@@ -394,10 +433,11 @@ def deploy_market_to_apechain(market, update_db: bool = True) -> Tuple[Optional[
         # Update the market with the Apechain market ID and transaction hash
         if update_db:
             try:
-                from main import db
+                from models import db
+                # Check the transition before updating the market
+                transition(market, "deployed", actor="apechain")
                 market.apechain_market_id = market_id
                 market.blockchain_tx = tx_hash
-                market.status = "deployed"
                 db.session.commit()
                 logger.info(f"Updated market {market.id} with Apechain ID {market_id}")
             except Exception as db_error:
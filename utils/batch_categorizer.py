@@ -11,8 +11,8 @@ import json
 import logging
 from typing import List, Dict, Any, Optional
 
-# Import OpenAI
-from openai import OpenAI
+from utils.metrics import track_call
+from utils.openai_client import get_openai_client
 
 # Configure logging
 logging.basicConfig(
@@ -21,12 +21,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger("batch_categorizer")
 
-# Initialize the OpenAI client
+# The OpenAI client is created on first use (see utils/openai_client.py)
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     logger.warning("OPENAI_API_KEY environment variable not set. Categorization will fail.")
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+def __getattr__(name: str) -> Any:
+    # openai_client used to be created on import; scripts importing it get the lazy client
+    if name == "openai_client":
+        return get_openai_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def batch_categorize_markets(markets: List[Dict[str, Any]], batch_size: int = 10) -> List[Dict[str, Any]]:
     """
@@ -109,16 +113,21 @@ def _categorize_batch(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
     # do not change this unless explicitly requested by the user
     try:
-        completion = openai_client.chat.completions.create(
-            model="gpt-4o-mini",  # Using GPT-4o-mini for efficiency
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.3,  # Lower temperature for more consistent results
-            max_tokens=4000
-        )
+        openai_client = get_openai_client()
+        if openai_client is None:
+            raise RuntimeError("OpenAI client not initialized - missing API key")
+        
+        with track_call("openai", "chat.completions"):
+            completion = openai_client.chat.completions.create(
+                model="gpt-4o-mini",  # Using GPT-4o-mini for efficiency
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.3,  # Lower temperature for more consistent results
+                max_tokens=4000
+            )
     
         # Extract and parse the response
         response_content = completion.choices[0].message.content
@@ -0,0 +1,431 @@
+"""
+Offline Pipeline Benchmarks
+
+This module replays the recorded API fixtures shipped with the repository
+(and synthetic copies scaled up to 10k/100k markets) through the hot paths
+of the pipeline, measuring throughput and peak memory per stage:
+
+- filter_active_non_expired_markets (run_pipeline_with_events, fetch_gamma_markets)
+- market_records (parsing markets into MarketRecords at ingestion)
+- prioritize_markets (top-20 selection by posting priority)
+- MarketTransformer.transform_markets
+- transform_markets_batch (from raw markets and from records)
+- filter_and_process_market_events
+- categorize_market (keyword fallback), batch_categorize_markets
+- format_market_with_images
+
+Nothing is sent over the network: the single-market categorizer runs with
+its OpenAI client unset (keyword categorization) and the batch categorizer
+gets its response from ReplayChatClient, which echoes the batch back with
+keyword categories so the request/response JSON handling is still measured.
+
+Results can be saved as JSON and compared against a previous run with
+compare_results() to catch throughput regressions (see run_benchmarks.py).
+"""
+
+import copy
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.profiling import load_fixture_markets
+
+logger = logging.getLogger("benchmark")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Recorded API responses replayed by the benchmarks
+FIXTURE_PATTERNS = (
+    "gamma_markets_response.json",
+    "raw_api_response.json",
+    "test_gamma_response.json",
+    "data/*.json",
+)
+
+# Sizes of the synthetic datasets built from the fixtures
+SYNTHETIC_SIZES = (10000, 100000)
+
+# A stage is skipped for a dataset when its time on the previous dataset,
+# scaled linearly to the new size, exceeds this many seconds
+DEFAULT_TIME_BUDGET = 120.0
+
+# Number of markets transformed to build the input of format_market_with_images
+TRANSFORM_SAMPLE_SIZE = 1000
+
+# Maximum allowed throughput drop when comparing against a baseline
+DEFAULT_REGRESSION_TOLERANCE = 0.25
+
+
+def load_fixtures(patterns: Tuple[str, ...] = FIXTURE_PATTERNS) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Load the markets of every recorded fixture.
+
+    Files that cannot be parsed or contain no markets are skipped.
+
+    Args:
+        patterns: File names or glob patterns relative to the repository root
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Markets by fixture name
+    """
+    fixtures = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(os.path.join(BASE_DIR, pattern))):
+            try:
+                markets = [m for m in load_fixture_markets(path) if m.get("question")]
+            except Exception as e:
+                logger.warning(f"Skipping fixture {path}: {str(e)}")
+                continue
+            if markets:
+                fixtures[os.path.relpath(path, BASE_DIR)] = markets
+    return fixtures
+
+
+def build_synthetic_markets(markets: List[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    """
+    Scale a set of markets up to a given size.
+
+    Markets are copied round-robin with unique IDs, condition IDs, slugs and
+    event IDs, and end dates moved a year past the current year so the
+    expiry filters keep them.
+
+    Args:
+        markets: Template markets
+        size: Number of markets to build
+
+    Returns:
+        List[Dict[str, Any]]: Synthetic markets
+    """
+    future_year = str(datetime.now().year + 1)
+    synthetic = []
+    for i in range(size):
+        template = markets[i % len(markets)]
+        copy_index = i // len(markets)
+        market = copy.deepcopy(template)
+        suffix = f"-{copy_index}" if copy_index else ""
+
+        for key in ("id", "conditionId", "condition_id", "slug"):
+            if market.get(key):
+                market[key] = f"{market[key]}{suffix}"
+
+        end_date = market.get("endDate")
+        if isinstance(end_date, str) and len(end_date) >= 4 and end_date[:4].isdigit():
+            market["endDate"] = future_year + end_date[4:]
+
+        if isinstance(market.get("events"), list):
+            for event in market["events"]:
+                if isinstance(event, dict) and event.get("id"):
+                    event["id"] = f"{event['id']}{suffix}"
+
+        synthetic.append(market)
+    return synthetic
+
+
+class ReplayChatClient:
+    """
+    Offline stand-in for the OpenAI client used by the batch categorizer.
+
+    chat.completions.create() answers with the markets of the request,
+    each with a keyword-based ai_category, in the same JSON shape the
+    model returns.
+    """
+
+    def __init__(self, categorize: Callable[[str], str]):
+        self.categorize = categorize
+        self.chat = self
+        self.completions = self
+
+    def create(self, messages: List[Dict[str, str]], **kwargs) -> Any:
+        content = messages[-1]["content"]
+        start, end = content.index("["), content.rindex("]") + 1
+        markets = json.loads(content[start:end])
+        for market in markets:
+            market["ai_category"] = self.categorize(market.get("question", ""))
+            market["ai_confidence"] = 0.9
+        message = type("Message", (), {"content": json.dumps({"markets": markets})})
+        choice = type("Choice", (), {"message": message})
+        return type("Completion", (), {"choices": [choice]})
+
+
+@contextmanager
+def _module_attribute(module, name: str, value: Any) -> Iterator[None]:
+    """Temporarily replace a module attribute."""
+    original = getattr(module, name)
+    setattr(module, name, value)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+
+def load_stages() -> List[Tuple[str, Callable, Callable]]:
+    """
+    Import the benchmarked functions.
+
+    The pipeline modules create their Flask app at import time, so
+    placeholder DATABASE_URL/OPENAI_API_KEY values are set when missing;
+    the OpenAI clients are replaced, so no database or API call is made by
+    the benchmarks.
+
+    Returns:
+        List of (stage name, prepare(markets) -> input, run(input) -> output size)
+    """
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+    from utils.market_transformer import MarketTransformer
+    from utils.transform_market_with_events import transform_markets_batch
+    from utils.market_record import market_records
+    from utils.market_priority import prioritize_markets
+    from utils.event_filter import filter_and_process_market_events
+    from utils.messaging import format_market_with_images
+    from utils import market_categorizer, batch_categorizer
+    import run_pipeline_with_events
+    import fetch_gamma_markets
+
+    def transformed(markets):
+        # MarketTransformer is quadratic, so only the first
+        # TRANSFORM_SAMPLE_SIZE markets are transformed and then repeated
+        sample = MarketTransformer().transform_markets(copy.deepcopy(markets[:TRANSFORM_SAMPLE_SIZE]))
+        if not sample:
+            return []
+        return [copy.deepcopy(sample[i % len(sample)]) for i in range(len(markets))]
+
+    def categorize_each(markets):
+        with _module_attribute(market_categorizer, "get_openai_client", lambda: None):
+            return len([market_categorizer.categorize_market(m.get("question", ""), m.get("description"))
+                        for m in markets])
+
+    def categorize_batches(markets):
+        client = ReplayChatClient(market_categorizer.keyword_based_categorization)
+        with _module_attribute(batch_categorizer, "get_openai_client", lambda: client):
+            return len(batch_categorizer.batch_categorize_markets(markets))
+
+    def slim(markets):
+        # The batch categorizer only needs the fields the pipeline sends
+        return [{"id": m.get("id"), "question": m.get("question"), "description": m.get("description", "")}
+                for m in markets]
+
+    return [
+        ("filter_active_non_expired_markets", copy.deepcopy,
+         lambda markets: len(run_pipeline_with_events.filter_active_non_expired_markets(markets))),
+        ("filter_active_non_expired_markets[gamma]", copy.deepcopy,
+         lambda markets: len(fetch_gamma_markets.filter_active_non_expired_markets(markets))),
+        ("market_records", copy.deepcopy, lambda markets: len(market_records(markets))),
+        ("prioritize_markets", market_records, lambda records: len(prioritize_markets(records, 20))),
+        ("MarketTransformer.transform_markets", copy.deepcopy,
+         lambda markets: len(MarketTransformer().transform_markets(markets))),
+        ("transform_markets_batch", copy.deepcopy,
+         lambda markets: len(transform_markets_batch(markets)[1])),
+        ("transform_markets_batch[records]", lambda markets: market_records(copy.deepcopy(markets)),
+         lambda records: len(transform_markets_batch(records)[1])),
+        ("filter_and_process_market_events", copy.deepcopy,
+         lambda markets: len(filter_and_process_market_events(markets))),
+        ("categorize_market", copy.deepcopy, categorize_each),
+        ("batch_categorize_markets", slim, categorize_batches),
+        ("format_market_with_images", transformed,
+         lambda markets: len([format_market_with_images(m) for m in markets])),
+    ]
+
+
+def _current_rss() -> int:
+    """Get the resident set size of this process in bytes (Linux only)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _run_measured(run: Callable[[Any], int], data: Any, items: int, conn=None) -> Dict[str, Any]:
+    """Run a stage and measure it (in a forked child when conn is given)."""
+    rss_before = _current_rss() if conn is not None else None
+    start = time.perf_counter()
+    try:
+        output = run(data)
+        status, error = "success", None
+    except Exception as e:
+        output, status, error = 0, "error", f"{type(e).__name__}: {str(e)}"
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if rss_before is not None:
+        import resource
+        peak = max(0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - rss_before)
+
+    result = {
+        "status": status,
+        "error": error,
+        "items": items,
+        "output": output,
+        "seconds": round(seconds, 6),
+        "items_per_second": round(items / seconds, 1) if status == "success" and seconds > 0 else None,
+        "peak_memory_bytes": peak,
+    }
+    if conn is not None:
+        conn.send(result)
+        conn.close()
+    return result
+
+
+def measure(run: Callable[[Any], int], data: Any, items: int) -> Dict[str, Any]:
+    """
+    Run a stage once, measuring wall time and peak memory.
+
+    The stage runs in a forked child process. Peak memory is the growth of
+    the child's peak resident set size over its size at fork time, so
+    measuring it adds no overhead (tracemalloc slows allocation-heavy
+    stages down by more than an order of magnitude). Stage side effects
+    such as caches also stay in the child. Where fork or /proc is
+    unavailable, the stage runs in-process and peak memory is None.
+
+    Args:
+        run: Stage function
+        data: Prepared input
+        items: Number of input markets
+
+    Returns:
+        Dict[str, Any]: Measurement
+    """
+    if "fork" not in multiprocessing.get_all_start_methods() or not os.path.exists("/proc/self/statm"):
+        return _run_measured(run, data, items)
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_measured, args=(run, data, items, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"status": "error", "error": f"Benchmark process exited with code {process.exitcode}",
+                  "items": items, "output": 0, "seconds": 0.0, "items_per_second": None,
+                  "peak_memory_bytes": None}
+    process.join()
+    return result
+
+
+def run_benchmarks(sizes: Tuple[int, ...] = SYNTHETIC_SIZES, stages: Optional[List[str]] = None,
+                   patterns: Tuple[str, ...] = FIXTURE_PATTERNS, repeat: int = 3,
+                   time_budget: float = DEFAULT_TIME_BUDGET) -> Dict[str, Any]:
+    """
+    Run the benchmark suite.
+
+    Every stage runs on each fixture (best of ``repeat`` runs) and then on
+    one synthetic dataset per size (single run), built from all fixture
+    markets that have an end date. Stage logging up to WARNING is disabled
+    while measuring so log formatting does not dominate the results.
+
+    Args:
+        sizes: Synthetic dataset sizes
+        stages: Optional list of stage names to run (default: all)
+        patterns: Fixture file patterns
+        repeat: Number of runs per fixture
+        time_budget: Projected seconds above which a stage is skipped for a dataset
+
+    Returns:
+        Dict[str, Any]: Results by stage and dataset
+    """
+    fixtures = load_fixtures(patterns)
+    datasets = [(name, markets, repeat) for name, markets in fixtures.items()]
+
+    templates = [m for markets in fixtures.values() for m in markets if m.get("endDate")]
+    for size in sizes:
+        if templates:
+            datasets.append((f"synthetic_{size}", build_synthetic_markets(templates, size), 1))
+
+    results = {
+        "created_at": datetime.now().isoformat(),
+        "datasets": {name: len(markets) for name, markets, _ in datasets},
+        "stages": {},
+    }
+
+    previous_level = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        for stage_name, prepare, run in load_stages():
+            if stages and stage_name not in stages:
+                continue
+            stage_results = results["stages"].setdefault(stage_name, {})
+            previous = None
+
+            for dataset_name, markets, runs in datasets:
+                # Quadratic stages would run for hours on 100k markets, so
+                # skip datasets whose projected time is over budget
+                if previous and previous["items"] and \
+                        previous["seconds"] * len(markets) / previous["items"] > time_budget:
+                    stage_results[dataset_name] = {"status": "skipped", "items": len(markets)}
+                    continue
+
+                best = None
+                for _ in range(runs):
+                    measurement = measure(run, prepare(markets), len(markets))
+                    if best is None or measurement["seconds"] < best["seconds"]:
+                        best = measurement
+                    if measurement["status"] != "success":
+                        break
+                stage_results[dataset_name] = best
+                if best["status"] == "success":
+                    previous = best
+    finally:
+        logging.disable(previous_level)
+
+    return results
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """
+    Format benchmark results as a table.
+
+    Args:
+        results: Output of run_benchmarks()
+
+    Returns:
+        str: Table with one row per stage and dataset
+    """
+    lines = [f"{'Stage':<42} {'Dataset':<48} {'Items':>7} {'Seconds':>9} {'Items/s':>11} {'Peak MiB':>9}"]
+    for stage_name, stage_results in results["stages"].items():
+        for dataset_name, result in stage_results.items():
+            if result["status"] == "success":
+                lines.append(
+                    f"{stage_name:<42} {dataset_name:<48} {result['items']:>7} {result['seconds']:>9.3f} "
+                    f"{result['items_per_second'] or 0:>11.1f} {(result['peak_memory_bytes'] or 0) / 1048576:>9.2f}"
+                )
+            else:
+                detail = result.get("error") or result["status"]
+                lines.append(f"{stage_name:<42} {dataset_name:<48} {result['items']:>7} {detail}")
+    return "\n".join(lines)
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any],
+                    tolerance: float = DEFAULT_REGRESSION_TOLERANCE) -> List[str]:
+    """
+    Find throughput regressions against a baseline run.
+
+    Args:
+        results: Output of run_benchmarks()
+        baseline: Earlier output of run_benchmarks()
+        tolerance: Allowed relative throughput drop (0.25 = 25%)
+
+    Returns:
+        List[str]: Description of each regression (empty if none)
+    """
+    regressions = []
+    for stage_name, stage_results in results["stages"].items():
+        for dataset_name, result in stage_results.items():
+            previous = baseline.get("stages", {}).get(stage_name, {}).get(dataset_name)
+            if not previous or previous.get("status") != "success":
+                continue
+            if result["status"] != "success":
+                regressions.append(f"{stage_name} on {dataset_name}: {result['status']} (was success)")
+                continue
+            before, after = previous["items_per_second"], result["items_per_second"]
+            if before and after is not None and after < before * (1 - tolerance):
+                regressions.append(
+                    f"{stage_name} on {dataset_name}: {after:.1f} items/s vs {before:.1f} baseline "
+                    f"({(1 - after / before) * 100:.0f}% slower)"
+                )
+    return regressions
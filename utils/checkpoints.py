@@ -0,0 +1,274 @@
+"""
+Pipeline Checkpoints
+
+This module persists the progress of a pipeline run against its PipelineRun
+row, so a run that fails mid-way can be resumed (run_pipeline_with_events.py
+--resume RUN_ID) without re-spending the API and LLM calls of the work it
+already finished.
+
+Two kinds of checkpoints are stored in the pipeline_checkpoints table:
+
+- stage outputs (save_stage / stage_output): the whole output of a stage,
+  e.g. the fetched markets or the IDs picked by prioritization, with a
+  fingerprint of the stage inputs; an output is only reused if the resumed
+  run has the same inputs
+- completed items (save_item / items / cached): one row per item a stage
+  finished, e.g. the category of a market or the ID of a stored market
+
+When a run is resumed, the completed items are snapshotted as the
+RunCheckpoints is built, so earlier_items() tells the work of earlier
+attempts apart from items saved by the current one.
+
+Checkpoints are deleted by clear() once the run completes. A RunCheckpoints
+without a run ID (the run record could not be created) saves nothing and
+finds nothing.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("checkpoints")
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Hash the inputs of a stage.
+
+    Args:
+        *parts: JSON-serializable inputs (other values are hashed as strings)
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunCheckpoints:
+    """Checkpoints of one pipeline run."""
+
+    def __init__(self, db, PipelineCheckpoint, run_id: Optional[int], app=None, resuming: bool = False):
+        """
+        Args:
+            db: SQLAlchemy database instance
+            PipelineCheckpoint: PipelineCheckpoint model class
+            run_id: PipelineRun ID (None disables checkpoints)
+            app: Flask app, used when called outside of an app context
+            resuming: Whether the run resumes an earlier attempt
+        """
+        self.db = db
+        self.PipelineCheckpoint = PipelineCheckpoint
+        self.run_id = run_id
+        self.app = app
+        self.resuming = resuming
+        self._saved = {}
+        self._lock = threading.Lock()
+        # Items completed by earlier attempts, read before any stage of this one runs
+        self._earlier = self._load_items() if resuming and run_id is not None else {}
+        self._items = {stage: dict(items) for stage, items in self._earlier.items()}
+
+    def _context(self):
+        """Push an app context unless one is active."""
+        from flask import has_app_context
+        if self.app is None or has_app_context():
+            return nullcontext()
+        return self.app.app_context()
+
+    def _commit(self, row) -> bool:
+        """Add a checkpoint row and commit it."""
+        with self._context():
+            try:
+                self.db.session.add(row)
+                self.db.session.commit()
+                return True
+            except Exception as e:
+                self.db.session.rollback()
+                logger.error(f"Error saving {row.stage} checkpoint for run {self.run_id}: {str(e)}")
+                return False
+
+    def stage_output(self, stage: str, inputs: str) -> Optional[Any]:
+        """
+        Get the saved output of a stage.
+
+        Args:
+            stage: Stage name
+            inputs: Fingerprint of the stage inputs
+
+        Returns:
+            Optional[Any]: The output, or None if there is none for these inputs
+        """
+        if self.run_id is None:
+            return None
+        with self._context():
+            row = self.PipelineCheckpoint.query.filter_by(
+                run_id=self.run_id, stage=stage, item_key=None
+            ).order_by(self.PipelineCheckpoint.id.desc()).first()
+            if row is None:
+                return None
+            if row.fingerprint != inputs:
+                logger.info(f"Inputs of stage {stage} changed since run {self.run_id} was checkpointed; rerunning it")
+                return None
+            logger.info(f"Reusing the {stage} output checkpointed for run {self.run_id}")
+            return row.data
+
+    def save_stage(self, stage: str, inputs: str, data: Any) -> bool:
+        """
+        Save the output of a stage, replacing any earlier one.
+
+        Args:
+            stage: Stage name
+            inputs: Fingerprint of the stage inputs
+            data: JSON-serializable output
+
+        Returns:
+            bool: True if the checkpoint was saved
+        """
+        if self.run_id is None:
+            return False
+        with self._context():
+            self.PipelineCheckpoint.query.filter_by(run_id=self.run_id, stage=stage, item_key=None).delete()
+            return self._commit(self.PipelineCheckpoint(run_id=self.run_id, stage=stage, fingerprint=inputs,
+                                                        data=data))
+
+    def cached_stage(self, stage: str, inputs: str, compute: Callable[[], Any]) -> Any:
+        """
+        Get the saved output of a stage, or compute and save it.
+
+        Empty outputs are not saved: an empty fetch is usually an API error
+        worth retrying.
+
+        Args:
+            stage: Stage name
+            inputs: Fingerprint of the stage inputs
+            compute: Computes the stage output (JSON-serializable)
+
+        Returns:
+            Any: Stage output
+        """
+        output = self.stage_output(stage, inputs)
+        if output is None:
+            output = compute()
+            if output:
+                self.save_stage(stage, inputs, output)
+        return output
+
+    def _load_items(self) -> Dict[str, Dict[str, Any]]:
+        """Read the run's completed items, by stage."""
+        with self._context():
+            rows = self.PipelineCheckpoint.query.filter(
+                self.PipelineCheckpoint.run_id == self.run_id,
+                self.PipelineCheckpoint.item_key.isnot(None)
+            ).order_by(self.PipelineCheckpoint.id).all()
+            items = {}
+            for row in rows:
+                items.setdefault(row.stage, {})[row.item_key] = row.data
+            return items
+
+    def earlier_items(self, stage: str) -> Dict[str, Any]:
+        """
+        Get the items a stage completed in earlier attempts of the run.
+
+        Items saved by the current attempt are left out, even if an earlier
+        attempt saved them too.
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            Dict[str, Any]: Item output by item key
+        """
+        with self._lock:
+            saved = self._saved.get(stage, set())
+            return {key: data for key, data in self._earlier.get(stage, {}).items() if key not in saved}
+
+    def items(self, stage: str) -> Dict[str, Any]:
+        """
+        Get the items a stage completed.
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            Dict[str, Any]: Item output by item key
+        """
+        if self.run_id is None:
+            return {}
+        with self._lock:
+            if stage not in self._items:
+                with self._context():
+                    rows = self.PipelineCheckpoint.query.filter(
+                        self.PipelineCheckpoint.run_id == self.run_id,
+                        self.PipelineCheckpoint.stage == stage,
+                        self.PipelineCheckpoint.item_key.isnot(None)
+                    ).order_by(self.PipelineCheckpoint.id).all()
+                    self._items[stage] = {row.item_key: row.data for row in rows}
+            return dict(self._items[stage])
+
+    def save_item(self, stage: str, key: str, data: Any = None) -> bool:
+        """
+        Record an item a stage completed.
+
+        Args:
+            stage: Stage name
+            key: Item key (e.g. market ID)
+            data: JSON-serializable item output
+
+        Returns:
+            bool: True if the checkpoint was saved
+        """
+        if self.run_id is None:
+            return False
+        key = str(key)
+        self.items(stage)
+        if not self._commit(self.PipelineCheckpoint(run_id=self.run_id, stage=stage, item_key=key, data=data)):
+            return False
+        with self._lock:
+            self._items[stage][key] = data
+            self._saved.setdefault(stage, set()).add(key)
+        return True
+
+    def cached(self, stage: str, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Get the checkpointed output of an item, or compute and checkpoint it.
+
+        Args:
+            stage: Stage name
+            key: Item key
+            compute: Computes the item output (JSON-serializable)
+
+        Returns:
+            Any: Item output (a saved tuple comes back as a list)
+        """
+        done = self.items(stage)
+        if str(key) in done:
+            return done[str(key)]
+        result = compute()
+        self.save_item(stage, key, list(result) if isinstance(result, tuple) else result)
+        return result
+
+    def clear(self) -> int:
+        """
+        Delete the run's checkpoints.
+
+        Returns:
+            int: Number of rows deleted
+        """
+        if self.run_id is None:
+            return 0
+        with self._context():
+            try:
+                deleted = self.PipelineCheckpoint.query.filter_by(run_id=self.run_id).delete()
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                logger.error(f"Error deleting checkpoints of run {self.run_id}: {str(e)}")
+                return 0
+        with self._lock:
+            self._items.clear()
+            self._saved.clear()
+            self._earlier = {}
+        return deleted
@@ -1,13 +1,224 @@
 """
 Database utility functions for the Polymarket pipeline.
+
+Scripts get their Flask app and database engine from create_app() and
+init_db() (or create_db_engine() for scripts using SQLAlchemy directly),
+so every process uses the same engine settings, read from the environment:
+
+- DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE: the
+  connection pool
+- DB_STATEMENT_TIMEOUT_MS: statements running longer are cancelled
+  (PostgreSQL; 0 disables the timeout)
+- DB_PGBOUNCER: the database URL points to PgBouncer in transaction pooling
+  mode; the engine keeps no pool of its own (PgBouncer does the pooling) and
+  the statement timeout is set per transaction instead of per connection
+
+stream_results() reads large scans with a server-side cursor, in batches,
+instead of loading every row at once. Scans that change the rows they read
+use iter_chunks() instead: a server-side cursor doesn't survive a commit, so
+it pages through the rows on a unique key and commits after each chunk.
 """
 import os
 from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import partial
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import load_only
+from sqlalchemy.pool import NullPool
+from sqlalchemy.types import JSON
 
 # Models will be imported at the call site to prevent circular imports
 # from models import db, Market, ApprovalEvent, PipelineRun
 
+# Connection pool settings
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "300"))
+
+# Statement timeout in milliseconds (0 disables it)
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Whether DATABASE_URL points to PgBouncer (transaction pooling)
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "").lower() in ("1", "true", "yes", "on")
+
+# Rows fetched per round trip by stream_results()
+STREAM_BATCH_SIZE = 1000
+
+# Rows per chunk (and per commit) for iter_chunks()
+CHUNK_SIZE = 500
+
+def engine_options(database_url: Optional[str] = None, pool_size: Optional[int] = None,
+                   statement_timeout_ms: Optional[int] = None, pgbouncer: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Get the SQLAlchemy engine options for a database.
+    
+    Args:
+        database_url: Database URL (defaults to DATABASE_URL)
+        pool_size: Connections kept in the pool (defaults to DB_POOL_SIZE)
+        statement_timeout_ms: Statement timeout (defaults to DB_STATEMENT_TIMEOUT_MS)
+        pgbouncer: PgBouncer mode (defaults to DB_PGBOUNCER)
+        
+    Returns:
+        Dict[str, Any]: Keyword arguments for create_engine() / SQLALCHEMY_ENGINE_OPTIONS
+    """
+    database_url = database_url or os.environ.get("DATABASE_URL") or ""
+    statement_timeout_ms = DB_STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+    pgbouncer = DB_PGBOUNCER if pgbouncer is None else pgbouncer
+    
+    # SQLite pools are chosen by SQLAlchemy (one connection for in-memory databases)
+    if database_url.startswith("sqlite"):
+        return {"pool_pre_ping": True}
+    
+    # PgBouncer does the pooling: a connection is only held for the transaction
+    if pgbouncer:
+        return {"poolclass": NullPool}
+    
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_size": pool_size or DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if statement_timeout_ms and database_url.startswith("postgres"):
+        options["connect_args"] = {"options": f"-c statement_timeout={int(statement_timeout_ms)}"}
+    return options
+
+def _set_local_statement_timeout(statement_timeout_ms: int, conn) -> None:
+    """Set the statement timeout of the transaction being started."""
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}")
+
+def configure_engine(engine, statement_timeout_ms: Optional[int] = None, pgbouncer: Optional[bool] = None):
+    """
+    Set up an engine created with engine_options().
+    
+    PgBouncer doesn't pass connection options through to PostgreSQL, so in
+    PgBouncer mode the statement timeout is set at the start of each
+    transaction.
+    
+    Args:
+        engine: SQLAlchemy engine
+        statement_timeout_ms: Statement timeout (defaults to DB_STATEMENT_TIMEOUT_MS)
+        pgbouncer: PgBouncer mode (defaults to DB_PGBOUNCER)
+        
+    Returns:
+        The engine
+    """
+    statement_timeout_ms = DB_STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+    pgbouncer = DB_PGBOUNCER if pgbouncer is None else pgbouncer
+    
+    if pgbouncer and statement_timeout_ms and engine.dialect.name == "postgresql":
+        event.listen(engine, "begin", partial(_set_local_statement_timeout, statement_timeout_ms))
+    return engine
+
+def create_db_engine(database_url: Optional[str] = None, **settings):
+    """
+    Create a SQLAlchemy engine with the shared settings (for scripts not using Flask).
+    
+    Args:
+        database_url: Database URL (defaults to DATABASE_URL)
+        **settings: pool_size, statement_timeout_ms or pgbouncer overrides
+        
+    Returns:
+        Engine: SQLAlchemy engine
+    """
+    database_url = database_url or os.environ.get("DATABASE_URL")
+    engine = create_engine(database_url, **engine_options(database_url, **settings))
+    return configure_engine(engine, settings.get("statement_timeout_ms"), settings.get("pgbouncer"))
+
+def create_app(import_name: str = "pipeline", database_url: Optional[str] = None, **settings):
+    """
+    Create a Flask app with the database configured.
+    
+    Bind the models' db to it with init_db(app, db).
+    
+    Args:
+        import_name: Flask import name (usually __name__)
+        database_url: Database URL (defaults to DATABASE_URL)
+        **settings: pool_size, statement_timeout_ms or pgbouncer overrides
+        
+    Returns:
+        Flask: App with SQLALCHEMY_* settings
+    """
+    from flask import Flask
+    
+    app = Flask(import_name)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url or os.environ.get("DATABASE_URL")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], **settings)
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["DB_ENGINE_SETTINGS"] = {key: settings[key] for key in ("statement_timeout_ms", "pgbouncer")
+                                        if key in settings}
+    return app
+
+def init_db(app, db) -> None:
+    """
+    Bind a Flask-SQLAlchemy instance to an app made by create_app().
+    
+    Args:
+        app: Flask app
+        db: Flask-SQLAlchemy instance
+    """
+    db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, **app.config.get("DB_ENGINE_SETTINGS", {}))
+
+def stream_results(query, batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Iterate over a query's rows in batches, with a server-side cursor.
+    
+    On PostgreSQL the rows are streamed from a named cursor instead of being
+    loaded all at once; the session must not be committed until the
+    iteration is over.
+    
+    Args:
+        query: Query (e.g. db.session.query(PendingMarket.poly_id))
+        batch_size: Rows fetched per round trip
+        
+    Returns:
+        Iterator over the query's rows
+    """
+    return query.yield_per(batch_size)
+
+def iter_chunks(query, key_column, chunk_size: int = CHUNK_SIZE, session=None):
+    """
+    Iterate over a query's rows in chunks, paging on a unique key.
+    
+    Each chunk is read by its own query (key greater than the last key of the
+    previous chunk, in key order), so no cursor stays open between chunks and
+    rows the caller deletes or moves out of the query's filter don't shift the
+    following chunks. With a session, the caller's changes are committed
+    after each chunk: locks are only held for a chunk and a failure only
+    loses the chunk being processed.
+    
+    Args:
+        query: Query on a model, or on columns including key_column
+        key_column: Unique column to page on (e.g. PendingMarket.poly_id)
+        chunk_size: Rows per chunk
+        session: Session to commit after each chunk
+        
+    Returns:
+        Iterator over lists of rows
+    """
+    last_key = None
+    while True:
+        chunk_query = query.order_by(None).order_by(key_column)
+        if last_key is not None:
+            chunk_query = chunk_query.filter(key_column > last_key)
+        rows = chunk_query.limit(chunk_size).all()
+        if not rows:
+            return
+        
+        # Read the key before the caller deletes or expires the row
+        last_key = getattr(rows[-1], key_column.key)
+        yield rows
+        if session is not None:
+            session.commit()
+        if len(rows) < chunk_size:
+            return
+
 def store_market(db, Market, market_data: Dict[str, Any]) -> bool:
     """
     Store market data in the database.
@@ -171,4 +382,57 @@ def update_pipeline_run(db, PipelineRun, run_id: int, **kwargs) -> bool:
         
     except Exception as e:
         print(f"Error updating pipeline run in database: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+def scalar_columns(Model, *extra: str) -> List[Any]:
+    """
+    Get the non-JSON column attributes of a model.
+
+    JSON columns (raw_data, options, option_images, option_market_ids...) hold
+    most of the data of a row but aren't needed by code that only lists rows
+    and checks IDs, flags and message timestamps.
+
+    Args:
+        Model: Model class
+        *extra: Names of JSON attributes to include anyway
+
+    Returns:
+        List[Any]: Column attributes to load
+    """
+    columns = []
+    for column_attr in inspect(Model).column_attrs:
+        if column_attr.key in extra or not any(isinstance(column.type, JSON) for column in column_attr.columns):
+            columns.append(getattr(Model, column_attr.key))
+    return columns
+
+def load_scalars(query, Model, *extra: str):
+    """
+    Load only the scalar columns of a model query.
+
+    JSON columns that are not listed in `extra` are deferred: they are only
+    loaded (one query per row) if code accesses them while the row is
+    attached to a session, so list-and-scan code should name the JSON
+    columns it reads.
+
+    Args:
+        query: Query on Model
+        Model: Model class
+        *extra: Names of JSON attributes to load with the rows (e.g. "options")
+
+    Returns:
+        The query with load_only() applied
+    """
+    return query.options(load_only(*scalar_columns(Model, *extra)))
+
+def column_values(query, column) -> List[Any]:
+    """
+    Get the values of one column of a query's rows without loading the rows.
+
+    Args:
+        query: Query (e.g. Market.query.filter_by(status="deployed"))
+        column: Column attribute to select (e.g. Market.id)
+
+    Returns:
+        List[Any]: Column values
+    """
+    return [value for (value,) in query.with_entities(column)]
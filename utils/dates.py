@@ -0,0 +1,153 @@
+"""
+Date Parsing and Timezone Normalization
+
+Market end dates arrive from the Gamma API and the CLOB API as ISO 8601
+strings (with "Z", an offset, or no timezone at all), as date-only strings,
+and as epoch seconds or milliseconds, sometimes encoded as digit strings.
+This module normalizes all of them to integer epoch seconds in UTC, so that
+expiry checks compare plain integers and never mix naive and aware
+datetimes.
+
+String parsing is memoized with an LRU cache: markets of the same event
+usually share an end date, and the same timestamps are seen again by every
+stage of a run, so each distinct string is only parsed once. Naive dates are
+taken as UTC.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Optional
+
+logger = logging.getLogger("dates")
+
+# Numeric timestamps above this are in milliseconds
+MILLISECOND_THRESHOLD = 1000000000000
+
+# Lengths of digit strings read as epoch seconds and milliseconds; other
+# digit strings (e.g. "20250101") are parsed as dates
+EPOCH_SECONDS_DIGITS = 10
+EPOCH_MILLISECONDS_DIGITS = 13
+
+# Maximum number of distinct date strings kept in the parse cache
+PARSE_CACHE_SIZE = 65536
+
+# Format of expiry dates in Slack messages
+EXPIRY_FORMAT = "%Y-%m-%d %H:%M UTC"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_string(value: str) -> Optional[int]:
+    """Parse a date string to epoch seconds (memoized)."""
+    if value.isdigit() and len(value) == EPOCH_SECONDS_DIGITS:
+        return int(value)
+    if value.isdigit() and len(value) == EPOCH_MILLISECONDS_DIGITS:
+        return int(value) // 1000
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            import dateutil.parser
+            parsed = dateutil.parser.parse(value)
+        except (ValueError, OverflowError):
+            return None
+    return _from_datetime(parsed)
+
+
+def _from_number(value: float) -> int:
+    """Convert epoch seconds or milliseconds to epoch seconds."""
+    return int(value // 1000) if value > MILLISECOND_THRESHOLD else int(value)
+
+
+def _from_datetime(value: datetime) -> int:
+    """Convert a datetime to epoch seconds (naive datetimes are UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """
+    Convert a date to integer epoch seconds.
+
+    Accepts epoch seconds or milliseconds (as numbers, or as 10- and
+    13-digit strings), ISO 8601 and other date strings, and datetimes.
+
+    Args:
+        value: Date value
+
+    Returns:
+        Optional[int]: Epoch seconds, or None if missing or invalid
+    """
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        return _parse_string(value.strip())
+    if isinstance(value, (int, float)):
+        return _from_number(value) if value == value else None
+    if isinstance(value, datetime):
+        return _from_datetime(value)
+    return None
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """
+    Convert a date to an aware UTC datetime.
+
+    Args:
+        value: Date value (see to_epoch)
+
+    Returns:
+        Optional[datetime]: UTC datetime, or None if missing or invalid
+    """
+    epoch = to_epoch(value)
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def now_epoch() -> int:
+    """Get the current time in integer epoch seconds."""
+    return int(time.time())
+
+
+def is_expired(value: Any, now: Optional[int] = None, inclusive: bool = False) -> bool:
+    """
+    Check whether a date has passed.
+
+    Dates that are missing or invalid are not expired.
+
+    Args:
+        value: Date value (see to_epoch)
+        now: Current epoch time (defaults to now_epoch())
+        inclusive: Also count dates equal to now as expired
+
+    Returns:
+        bool: True if the date has passed
+    """
+    epoch = to_epoch(value)
+    if epoch is None:
+        return False
+    now = now_epoch() if now is None else now
+    return epoch <= now if inclusive else epoch < now
+
+
+def format_expiry(value: Any, default: str = "Unknown") -> str:
+    """
+    Format an expiry date for display, in UTC.
+
+    Args:
+        value: Date value (see to_epoch)
+        default: Text for a missing date
+
+    Returns:
+        str: Formatted date; strings that are not dates are returned as-is
+    """
+    if value is None or value == "":
+        return default
+    parsed = to_datetime(value)
+    if parsed is None:
+        return value if isinstance(value, str) else default
+    return parsed.strftime(EXPIRY_FORMAT)
@@ -3,17 +3,39 @@ Format deployment approval messages for Slack.
 
 This module provides functions for formatting market deployment approval messages
 with rich formatting, including event banners, option images, and category information.
+Messages are rendered from the block templates in utils/slack_templates.py.
 """
 
 from typing import Dict, List, Any, Optional, Tuple, Union
 
+from utils.dates import format_expiry
+from utils.slack_templates import (
+    BlockTemplate, EMOJI_HEADER, TITLED_IMAGE, EVENT_SECTION, MRKDWN_SECTION, FIELDS_SECTION,
+    OPTIONS_HEADING, OPTION, OPTION_WITH_IMAGE, DIVIDER, category_badge, category_fields_template
+)
+
+EVENT_ICON = BlockTemplate({
+    "type": "section",
+    "text": {"type": "mrkdwn", "text": "*Event Icon:*"},
+    "accessory": {"type": "image", "image_url": "{image_url}", "alt_text": "Event Icon"}
+})
+
+DEPLOYMENT_INSTRUCTIONS = BlockTemplate({
+    "type": "section",
+    "text": {
+        "type": "mrkdwn",
+        "text": "Please review this market carefully before deployment to Apechain.\n"
+                "React with :white_check_mark: to approve or :x: to reject."
+    }
+})
+
 def format_deployment_message(
     market_id: Union[str, int],
     question: str,
     category: str,
     market_type: str = "Binary Market (Yes/No)",
     options: Optional[List[str]] = None,
-    expiry: str = "Unknown",
+    expiry: Union[str, int, None] = "Unknown",
     banner_uri: Optional[str] = None,
     event_name: Optional[str] = None,
     event_id: Optional[str] = None,
@@ -30,7 +52,8 @@ def format_deployment_message(
         category: Market category
         market_type: Type of market (binary, categorical, etc.)
         options: List of option values
-        expiry: Human-readable expiry date
+        expiry: Expiry date (epoch seconds or milliseconds, ISO string, or
+            human-readable text)
         banner_uri: Optional banner image URI
         event_name: Optional event name
         event_id: Optional event ID
@@ -41,180 +64,51 @@ def format_deployment_message(
     Returns:
         Tuple[str, List[Dict]]: Formatted message text and blocks
     """
-    # Define emoji map for categories
-    category_emoji = {
-        'politics': ':ballot_box_with_ballot:',
-        'crypto': ':coin:',
-        'sports': ':sports_medal:',
-        'business': ':chart_with_upwards_trend:',
-        'culture': ':performing_arts:',
-        'tech': ':computer:',
-        'news': ':newspaper:',
-        # Add fallback for unknown categories
-        'unknown': ':question:'
-    }
-    
-    # Get emoji for this category (case-insensitive)
-    category_lower = category.lower() if category else 'unknown'
-    emoji = category_emoji.get(category_lower, category_emoji['unknown'])
+    # Dates are shown in UTC whatever form they are passed in
+    expiry = format_expiry(expiry)
+    badge = category_badge(category)
     
     # Default text for fallback
-    message_text = f"*Deployment Approval*\n\n*Question:* {question}\n*Category:* {emoji} {category.capitalize() if category else 'Unknown'}"
+    message_text = f"*Deployment Approval*\n\n*Question:* {question}\n*Category:* {badge}"
     
     # Ensure options is a list
     if options is None:
         options = ["Yes", "No"]
     
-    # Create rich message blocks
-    blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "Deployment Approval",
-                "emoji": True
-            }
-        }
-    ]
+    blocks = [EMOJI_HEADER.render(title="Deployment Approval")]
     
-    # Add event info and banner if available
+    # Add event banner and info if available
     if event_name:
-        # First add the event banner if available
         if event_image:
-            blocks.append({
-                "type": "image",
-                "title": {
-                    "type": "plain_text",
-                    "text": f"Event: {event_name}",
-                    "emoji": True
-                },
-                "image_url": event_image,
-                "alt_text": event_name
-            })
-        
-        # Then add the event information
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Event:* {event_name} · ID: `{event_id or 'N/A'}`"
-            }
-        })
-    
-    # Add the market question
-    blocks.append({
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": f"*Market Question:* {question}"
-        }
-    })
+            blocks.append(TITLED_IMAGE.render(title=f"Event: {event_name}", image_url=event_image, alt_text=event_name))
+        blocks.append(EVENT_SECTION.render(event_name=event_name, event_id=event_id or 'N/A'))
     
-    # Add metadata section
-    blocks.append({
-        "type": "section",
-        "fields": [
-            {
-                "type": "mrkdwn",
-                "text": f"*Category:* {emoji} {category.capitalize() if category else 'Unknown'}"
-            },
-            {
-                "type": "mrkdwn",
-                "text": f"*Type:* {market_type}"
-            }
-        ]
-    })
+    blocks.append(MRKDWN_SECTION.render(text=f"*Market Question:* {question}"))
     
-    # Add second row of metadata
-    blocks.append({
-        "type": "section",
-        "fields": [
-            {
-                "type": "mrkdwn",
-                "text": f"*ID:* `{market_id}`"
-            },
-            {
-                "type": "mrkdwn",
-                "text": f"*Expiry:* {expiry}"
-            }
-        ]
-    })
+    # Category/type fields are the same for every market of a category and type
+    blocks.append(category_fields_template(category, market_type).render())
+    blocks.append(FIELDS_SECTION.render(left=f"*ID:* `{market_id}`", right=f"*Expiry:* {expiry}"))
     
     # Add market banner if available and different from event banner
     if banner_uri and banner_uri != event_image:
-        blocks.append({
-            "type": "image",
-            "title": {
-                "type": "plain_text",
-                "text": "Market Banner",
-                "emoji": True
-            },
-            "image_url": banner_uri,
-            "alt_text": "Market Banner"
-        })
+        blocks.append(TITLED_IMAGE.render(title="Market Banner", image_url=banner_uri, alt_text="Market Banner"))
     
-    # Add options section
+    # Add each option with its image if available
     if options:
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Options:*"
-            }
-        })
-        
-        # Add each option with its image if available
-        for i, option in enumerate(options):
+        blocks.append(OPTIONS_HEADING.render())
+        for option in options:
             option_value = str(option)
-            
-            # Create option section
-            option_block = {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"• {option_value}"
-                }
-            }
-            
-            # Add icon image if available
-            icon_url = None
-            if option_images and option_value in option_images:
-                icon_url = option_images[option_value]
-                
+            icon_url = option_images.get(option_value) if option_images else None
             if icon_url:
-                option_block["accessory"] = {
-                    "type": "image",
-                    "image_url": icon_url,
-                    "alt_text": option_value
-                }
-                
-            blocks.append(option_block)
+                blocks.append(OPTION_WITH_IMAGE.render(option=option_value, image_url=icon_url))
+            else:
+                blocks.append(OPTION.render(option=option_value))
     
     # Add event icon if available
     if event_icon:
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Event Icon:*"
-            },
-            "accessory": {
-                "type": "image",
-                "image_url": event_icon,
-                "alt_text": "Event Icon"
-            }
-        })
-    
-    # Add divider
-    blocks.append({"type": "divider"})
+        blocks.append(EVENT_ICON.render(image_url=event_icon))
     
-    # Add approval instructions
-    blocks.append({
-        "type": "section",
-        "text": {
-            "type": "mrkdwn",
-            "text": "Please review this market carefully before deployment to Apechain.\nReact with :white_check_mark: to approve or :x: to reject."
-        }
-    })
+    blocks.append(DIVIDER.render())
+    blocks.append(DEPLOYMENT_INSTRUCTIONS.render())
     
-    return message_text, blocks
\ No newline at end of file
+    return message_text, blocks
@@ -7,9 +7,12 @@ following specific rules for binary vs multi-option markets.
 """
 
 import logging
-import json
 from typing import Dict, Any, List, Optional, Union
 
+from utils.market_record import market_outcomes, raw_market
+from utils.dates import is_expired
+from utils.option_image_index import option_icons as market_option_icons
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,22 +36,18 @@ def is_binary_market(market_data: Dict[str, Any]) -> bool:
     """Check if a market is a binary Yes/No market.
     
     Args:
-        market_data: Market data dictionary
+        market_data: Market data dictionary or MarketRecord
         
     Returns:
         bool: True if binary market, False otherwise
     """
     # Check explicit flag if available
-    if 'is_binary' in market_data:
-        return market_data['is_binary']
+    raw_data = raw_market(market_data)
+    if 'is_binary' in raw_data:
+        return raw_data['is_binary']
     
-    # Check for Yes/No outcomes
-    outcomes = market_data.get('outcomes', [])
-    if isinstance(outcomes, str):
-        try:
-            outcomes = json.loads(outcomes)
-        except:
-            outcomes = []
+    # Check for Yes/No outcomes (decoded once for records)
+    outcomes = market_outcomes(market_data)
     
     # Binary markets have Yes/No outcomes
     if isinstance(outcomes, list) and len(outcomes) == 2:
@@ -63,11 +62,13 @@ def is_multiple_option_market(market_data: Dict[str, Any]) -> bool:
     """Check if a market has multiple options (not binary Yes/No).
     
     Args:
-        market_data: Market data dictionary
+        market_data: Market data dictionary or MarketRecord
         
     Returns:
         bool: True if multiple-option market, False otherwise
     """
+    market_data = raw_market(market_data)
+    
     # Check explicit flag if available
     if 'is_multiple_option' in market_data:
         return market_data['is_multiple_option']
@@ -98,35 +99,9 @@ def extract_option_icons(market_data: Dict[str, Any]) -> Dict[str, str]:
     Returns:
         Dict mapping option IDs to icon URLs
     """
-    option_icons = {}
-    
-    # Extract from option_markets if available
-    option_markets = market_data.get('option_markets', [])
-    if option_markets:
-        for option_market in option_markets:
-            if isinstance(option_market, dict):
-                market_id = option_market.get('id', '')
-                icon_url = option_market.get('icon', '')
-                
-                if market_id and icon_url and is_valid_url(icon_url):
-                    option_icons[market_id] = icon_url
-                    logger.info(f"Added icon from option_markets for ID {market_id}: {icon_url[:30]}...")
-    
-    # Extract from events if available
-    events = market_data.get('events', [])
-    if events and isinstance(events, list) and len(events) > 0:
-        logger.info(f"Processing {len(events[0].get('outcomes', []))} outcomes from events array")
-        for event in events:
-            if isinstance(event, dict) and 'outcomes' in event:
-                outcomes = event.get('outcomes', [])
-                for outcome in outcomes:
-                    if isinstance(outcome, dict):
-                        outcome_id = outcome.get('id', '')
-                        icon_url = outcome.get('icon', '')
-                        
-                        if outcome_id and icon_url and is_valid_url(icon_url):
-                            option_icons[outcome_id] = icon_url
-                            logger.info(f"Added option icon for {outcome_id}: {icon_url[:30]}...")
+    # Icons from option_markets[].icon and events[].outcomes[].icon, collected in one pass
+    option_icons = {option_id: icon.url for option_id, icon in market_option_icons(market_data, is_valid_url).items()}
+    logger.info(f"Found {len(option_icons)} option icons")
     
     return option_icons
 
@@ -212,27 +187,10 @@ def filter_inactive_events(events):
     
     active_events = []
     for event in events:
-        # Check if the event is still active based on its end date
-        if isinstance(event, dict):
-            end_date = event.get('endDate')
-            if end_date:
-                try:
-                    # Parse the end date and compare with current time
-                    from datetime import datetime
-                    import dateutil.parser
-                    
-                    now = datetime.utcnow()
-                    event_end = dateutil.parser.parse(end_date)
-                    
-                    if event_end > now:
-                        active_events.append(event)
-                except Exception as e:
-                    logger.error(f"Error parsing event end date: {e}")
-                    # If date parsing fails, include the event by default
-                    active_events.append(event)
-            else:
-                # If no end date, include it by default
-                active_events.append(event)
+        # Check if the event is still active based on its end date; events
+        # without a valid end date are included by default
+        if isinstance(event, dict) and not is_expired(event.get('endDate'), inclusive=True):
+            active_events.append(event)
     
     logger.info(f"Filtered events: {len(events)} original, {len(active_events)} active")
     return active_events
@@ -0,0 +1,128 @@
+"""
+Event Index for Event-First Ingestion
+
+In event-first mode the pipeline pulls /events (with their markets embedded)
+as its only source instead of fetching /markets and /events separately.
+The /markets payload repeats every market of a multi-option event, and each
+of those markets then has its event rebuilt from its own `events[0]` entry.
+
+The EventIndex is built once per run from the event payload:
+
+- events with several markets go to event processing, which turns each
+  event into a single market with options
+- events with a single market are binary markets. Their market is handed to
+  binary processing with the event attached as `events[0]`, so the event is
+  taken from the index and never reconstructed by heuristics or hashed
+  names
+- the IDs of the markets in multi-market events are kept, so binary
+  processing can skip any market that event processing already covers
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from utils.market_record import EventRecord, MarketRecord, event_records, raw_market
+from utils.transform_engine import first_event_id
+
+logger = logging.getLogger("event_index")
+
+# Event fields copied into a market's `events[0]` entry
+EVENT_SUMMARY_KEYS = ("id", "ticker", "slug", "title", "description", "image", "icon", "endDate", "category")
+
+
+def event_summary(event: EventRecord) -> Dict[str, Any]:
+    """
+    Get the summary of an event as embedded in a market's `events` list.
+
+    Args:
+        event: Event record
+
+    Returns:
+        Dict[str, Any]: Event fields (without its markets)
+    """
+    return {key: event.raw[key] for key in EVENT_SUMMARY_KEYS if key in event.raw}
+
+
+class EventIndex:
+    """Events and their markets, indexed once per run."""
+
+    def __init__(self, events: List[Any]):
+        """
+        Build the index.
+
+        Args:
+            events: Event data dictionaries from the Events API, or EventRecords
+        """
+        self.events: Dict[str, EventRecord] = {}
+        self.covered_market_ids: Set[str] = set()
+        self.multi_market_event_ids: Set[str] = set()
+
+        for event in event_records(events):
+            if not event.id or event.id in self.events or not event.markets:
+                continue
+            self.events[event.id] = event
+            if len(event.markets) > 1:
+                self.multi_market_event_ids.add(event.id)
+                for market in event.markets:
+                    self.covered_market_ids.update(str(key) for key in (market.id, market.condition_id) if key)
+
+        logger.info(f"Indexed {len(self.events)} events: {len(self.multi_market_event_ids)} with several markets, "
+                    f"{len(self.events) - len(self.multi_market_event_ids)} single-market")
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def get(self, event_id: str) -> Optional[EventRecord]:
+        """Get an event by its Gamma event ID."""
+        return self.events.get(event_id)
+
+    def multi_market_events(self) -> List[EventRecord]:
+        """Get the events with several markets, in fetch order."""
+        return [event for event in self.events.values() if event.id in self.multi_market_event_ids]
+
+    def binary_markets(self) -> List[MarketRecord]:
+        """
+        Get the markets of single-market events, with their event attached.
+
+        Returns:
+            List[MarketRecord]: Market records whose `events[0]` is their event
+        """
+        markets = []
+        for event in self.events.values():
+            if event.id in self.multi_market_event_ids:
+                continue
+            market = event.markets[0]
+            if first_event_id(market.raw) != event.id:
+                market = MarketRecord(dict(market.raw, events=[event_summary(event)]))
+            markets.append(market)
+        return markets
+
+    def covers(self, market: Any) -> bool:
+        """
+        Check whether a market is handled by event processing.
+
+        Args:
+            market: Market data dictionary or MarketRecord
+
+        Returns:
+            bool: True if the market belongs to an indexed multi-market event
+        """
+        data = raw_market(market)
+        if str(data.get("id")) in self.covered_market_ids or str(data.get("conditionId")) in self.covered_market_ids:
+            return True
+        return first_event_id(data) in self.multi_market_event_ids
+
+    def uncovered(self, markets: List[Any]) -> List[Any]:
+        """
+        Drop the markets that event processing already covers.
+
+        Args:
+            markets: Market data dictionaries or MarketRecords
+
+        Returns:
+            List[Any]: Markets not covered by the index
+        """
+        remaining = [market for market in markets if not self.covers(market)]
+        if len(remaining) < len(markets):
+            logger.info(f"Skipped {len(markets) - len(remaining)} markets covered by event processing")
+        return remaining
@@ -8,18 +8,24 @@ import base64
 from typing import Optional, Dict, Any, Tuple
 import requests
 from datetime import datetime
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from utils.metrics import track_call
+from utils.openai_client import get_openai_client
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
+# The OpenAI client is created on first use (see utils/openai_client.py)
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     logger.warning("OPENAI_API_KEY not found in environment variables. Image generation will fail.")
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+def __getattr__(name: str) -> Any:
+    # openai_client used to be created on import; scripts importing it get the lazy client
+    if name == "openai_client":
+        return get_openai_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def generate_prompt_for_market(market: Dict[str, Any]) -> str:
     """
@@ -88,19 +94,25 @@ def generate_image(prompt: str) -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict[str, Any]]: Response from OpenAI API or None if failed
     """
+    openai_client = get_openai_client()
+    if openai_client is None:
+        logger.error("OpenAI client not initialized - missing API key")
+        return None
+    
     try:
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
         
         # Generate image using DALL-E 3
-        response = openai_client.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
-            n=1,
-            size="1024x1024",
-            quality="standard",
-            response_format="url"
-        )
+        with track_call("openai", "images.generate"):
+            response = openai_client.images.generate(
+                model="dall-e-3",
+                prompt=prompt,
+                n=1,
+                size="1024x1024",
+                quality="standard",
+                response_format="url"
+            )
         
         return {
             "url": response.data[0].url,
@@ -0,0 +1,274 @@
+"""
+Background Job Queue
+
+This module provides a database-backed job queue with a bounded worker pool
+for the long-running operations triggered from the web interface (pipeline
+runs, approval checks, Slack sync, flushes).
+
+Every submitted job gets a PipelineJob row that records its status and
+progress. Jobs carry an idempotency key (the job type by default), so
+triggering the same operation twice while it is still queued or running
+returns the existing job instead of starting a duplicate. Each job type
+also has its own concurrency limit; jobs above the limit wait in the queue
+until a slot frees up. Job types can share a limit by being put in the same
+concurrency group, e.g. so that jobs writing to the same tables never run
+at the same time.
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import set_queue_depth
+
+logger = logging.getLogger("job_queue")
+
+# Job statuses that count as "active" for idempotency checks
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+# Default number of concurrently running jobs allowed per job type
+DEFAULT_JOB_CONCURRENCY = 1
+
+# Active jobs without any update for this long are treated as abandoned
+STALE_JOB_MINUTES = 360
+
+
+class JobHandle:
+    """Handle passed to a running job for reporting progress."""
+
+    def __init__(self, queue: "JobQueue", job_id: int, job_type: str):
+        """
+        Initialize the job handle.
+
+        Args:
+            queue: The queue that owns the job
+            job_id: ID of the PipelineJob row
+            job_type: Type of the job
+        """
+        self.queue = queue
+        self.id = job_id
+        self.job_type = job_type
+
+    def progress(self, percent: int, message: Optional[str] = None) -> None:
+        """
+        Report job progress.
+
+        Args:
+            percent: Percentage complete (0-100)
+            message: Optional progress message
+        """
+        self.queue.update_job(self.id, progress=max(0, min(100, int(percent))), message=message)
+
+
+class JobQueue:
+    """
+    Database-backed job queue with a bounded worker pool and
+    per-job-type (or per-group) concurrency limits.
+    """
+
+    def __init__(self, app, db, Job, max_workers: int = 4,
+                 concurrency_limits: Optional[Dict[str, int]] = None,
+                 concurrency_groups: Optional[Dict[str, str]] = None):
+        """
+        Initialize the job queue.
+
+        Args:
+            app: Flask application (used for app contexts in worker threads)
+            db: SQLAlchemy database instance
+            Job: PipelineJob model class
+            max_workers: Maximum number of worker threads
+            concurrency_limits: Mapping of job type or group -> maximum concurrent jobs
+            concurrency_groups: Mapping of job type -> group sharing one concurrency limit
+        """
+        self.app = app
+        self.db = db
+        self.Job = Job
+        self.max_workers = max_workers
+        self.concurrency_limits = concurrency_limits or {}
+        self.concurrency_groups = concurrency_groups or {}
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-job")
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, deque] = {}
+
+    def _slot_for(self, job_type: str) -> str:
+        """Get the key whose concurrency limit a job type counts against (its group, or itself)."""
+        return self.concurrency_groups.get(job_type, job_type)
+
+    def _limit_for(self, slot: str) -> int:
+        """Get the concurrency limit for a job type or group."""
+        return max(1, self.concurrency_limits.get(slot, DEFAULT_JOB_CONCURRENCY))
+
+    def recover_interrupted_jobs(self, stale_minutes: int = STALE_JOB_MINUTES) -> int:
+        """
+        Mark abandoned jobs as failed.
+
+        Job callables are not persisted, so a job left queued/running by a
+        process that was restarted can never finish. Any active job that has
+        not been updated for ``stale_minutes`` is failed to release its
+        idempotency key. The age threshold keeps this safe to call while
+        other processes (e.g. other gunicorn workers) are running jobs.
+
+        Args:
+            stale_minutes: Minimum age in minutes since the last update
+
+        Returns:
+            int: Number of jobs marked as failed
+        """
+        cutoff = datetime.utcnow() - timedelta(minutes=stale_minutes)
+        with self.app.app_context():
+            try:
+                count = self.Job.query.filter(
+                    self.Job.status.in_(ACTIVE_JOB_STATUSES),
+                    self.Job.updated_at < cutoff
+                ).update({
+                    "status": "failed",
+                    "error": "Job abandoned (no updates since process restart)",
+                    "finished_at": datetime.utcnow()
+                }, synchronize_session=False)
+                self.db.session.commit()
+                if count:
+                    logger.info(f"Marked {count} abandoned jobs as failed")
+                return count
+            except Exception as e:
+                self.db.session.rollback()
+                logger.error(f"Error recovering abandoned jobs: {str(e)}")
+                return 0
+
+    def submit(self, job_type: str, func: Callable[[JobHandle], Any],
+               idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Submit a job to the queue.
+
+        If an active job with the same idempotency key already exists, no new
+        job is created and the existing job is returned instead.
+
+        Args:
+            job_type: Type of the job (used for concurrency limits)
+            func: Callable run in a worker thread; receives a JobHandle
+            idempotency_key: Deduplication key (defaults to the job type)
+
+        Returns:
+            Tuple[Dict[str, Any], bool]: Job data and whether a new job was created
+        """
+        key = idempotency_key or job_type
+
+        with self._lock:
+            with self.app.app_context():
+                existing = self.Job.query.filter(
+                    self.Job.idempotency_key == key,
+                    self.Job.status.in_(ACTIVE_JOB_STATUSES)
+                ).order_by(self.Job.id.desc()).first()
+
+                if existing:
+                    logger.info(f"Job {existing.id} with key '{key}' is already {existing.status}")
+                    return existing.to_dict(), False
+
+                job = self.Job(job_type=job_type, idempotency_key=key, status="queued")
+                self.db.session.add(job)
+                self.db.session.commit()
+                job_data = job.to_dict()
+
+            handle = JobHandle(self, job_data["id"], job_type)
+            slot = self._slot_for(job_type)
+            if self._running.get(slot, 0) < self._limit_for(slot):
+                self._running[slot] = self._running.get(slot, 0) + 1
+                self._executor.submit(self._run, handle, func)
+            else:
+                self._waiting.setdefault(slot, deque()).append((handle, func))
+                logger.info(f"Job {handle.id} ({job_type}) queued behind running jobs")
+            set_queue_depth(f"jobs:{slot}", len(self._waiting.get(slot, ())))
+
+        return job_data, True
+
+    def _run(self, handle: JobHandle, func: Callable[[JobHandle], Any]) -> None:
+        """Run a job in a worker thread and record its outcome."""
+        self.update_job(handle.id, status="running", started_at=datetime.utcnow())
+        try:
+            func(handle)
+            self.update_job(handle.id, status="completed", progress=100, finished_at=datetime.utcnow())
+        except Exception as e:
+            logger.error(f"Job {handle.id} ({handle.job_type}) failed: {str(e)}")
+            self.update_job(handle.id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            self._release(handle.job_type)
+
+    def _release(self, job_type: str) -> None:
+        """Release a concurrency slot and start the next waiting job of the same type or group."""
+        slot = self._slot_for(job_type)
+        with self._lock:
+            waiting = self._waiting.get(slot)
+            if waiting:
+                handle, func = waiting.popleft()
+                self._executor.submit(self._run, handle, func)
+            else:
+                self._running[slot] = max(0, self._running.get(slot, 1) - 1)
+            set_queue_depth(f"jobs:{slot}", len(waiting or ()))
+
+    def update_job(self, job_id: int, **fields) -> bool:
+        """
+        Update fields on a job row.
+
+        Args:
+            job_id: ID of the PipelineJob row
+            **fields: Fields to update (None values are skipped)
+
+        Returns:
+            bool: Success status
+        """
+        with self.app.app_context():
+            try:
+                job = self.db.session.get(self.Job, job_id)
+                if not job:
+                    return False
+                for key, value in fields.items():
+                    if value is not None and hasattr(job, key):
+                        setattr(job, key, value)
+                self.db.session.commit()
+                return True
+            except Exception as e:
+                self.db.session.rollback()
+                logger.error(f"Error updating job {job_id}: {str(e)}")
+                return False
+
+    def active_job_count(self) -> int:
+        """
+        Get the number of jobs queued or running in this process.
+
+        Returns:
+            int: Number of active jobs
+        """
+        with self._lock:
+            return sum(self._running.values()) + sum(len(q) for q in self._waiting.values())
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a job by ID.
+
+        Args:
+            job_id: ID of the PipelineJob row
+
+        Returns:
+            Optional[Dict[str, Any]]: Job data, or None if not found
+        """
+        with self.app.app_context():
+            job = self.db.session.get(self.Job, job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the most recent jobs.
+
+        Args:
+            limit: Maximum number of jobs to return
+
+        Returns:
+            List[Dict[str, Any]]: Job data, newest first
+        """
+        with self.app.app_context():
+            jobs = self.Job.query.order_by(self.Job.id.desc()).limit(limit).all()
+            return [job.to_dict() for job in jobs]
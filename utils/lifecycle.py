@@ -0,0 +1,180 @@
+"""
+Market Lifecycle
+
+Market.status moves through the deployment workflow:
+
+- new/approved -> pending_deployment: posted to Slack for deployment approval
+- pending_deployment -> deploying -> deployed (or deployment_pending while
+  the transaction is mined, or deployment_failed)
+- pending_deployment -> deployment_rejected / deployment_timeout
+- deployment_failed -> deployment_pending / deployed: the transaction of a
+  failed deployment was mined after all (track_market_id_after_deployment.py)
+- approved -> deployment_approved -> deployed: deploy_approved_markets.py
+
+MARKET_TRANSITIONS lists the statuses each status can move to. transition()
+checks a status change against it, stamps updated_at and records the change
+in the market_transitions log, in the caller's transaction.
+
+Each status is a work queue: work_queue() returns the markets in a status,
+oldest first, through the (status, updated_at) index on markets, so a stage
+reads exactly its pending markets instead of scanning the table. With
+claim=True the rows are locked with SKIP LOCKED (on PostgreSQL), so
+concurrent workers of the same stage pick up different markets.
+
+claim() moves one market on under such a lock and commits, for steps that
+must run once per market even when several consumers see the same Slack
+decision (deploying a market sends an on-chain transaction). A market
+left in deploying by a process that died mid-deployment is moved on by
+check_deployment_approvals.reconcile_stale_deployments().
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+logger = logging.getLogger("lifecycle")
+
+# Statuses each market status can move to
+MARKET_TRANSITIONS = {
+    "new": {"approved", "rejected", "pending_deployment"},
+    "approved": {"pending_deployment", "deployment_approved", "rejected"},
+    "pending_deployment": {"deploying", "deployment_approved", "deployment_rejected", "deployment_timeout"},
+    "deployment_approved": {"deploying", "deployment_pending", "deployed", "deployment_failed"},
+    "deploying": {"deployment_pending", "deployed", "deployment_failed"},
+    "deployment_pending": {"deployed", "deployment_failed"},
+    "deployment_failed": {"deployment_approved", "deploying", "deployment_pending", "deployed", "pending_deployment"},
+    "deployment_rejected": {"pending_deployment"},
+    "deployment_timeout": {"pending_deployment"},
+    "rejected": set(),
+    "deployed": set(),
+}
+
+
+class InvalidTransition(ValueError):
+    """Raised when a market status change is not allowed by MARKET_TRANSITIONS."""
+
+
+def can_transition(from_status: Optional[str], to_status: str) -> bool:
+    """
+    Check whether a status change is allowed.
+
+    Statuses outside MARKET_TRANSITIONS (left by older scripts) can move to
+    any status, so such markets can re-enter the workflow.
+
+    Args:
+        from_status: Current status
+        to_status: New status
+
+    Returns:
+        bool: True if the change is allowed
+    """
+    allowed = MARKET_TRANSITIONS.get(from_status)
+    return allowed is None or to_status in allowed
+
+
+def transition(market: Any, to_status: str, actor: Optional[str] = None, reason: Optional[str] = None):
+    """
+    Move a market to a new status and log the change.
+
+    The change is added to the market's session; the caller commits.
+
+    Args:
+        market: Market instance (attached to a session)
+        to_status: New status
+        actor: Slack user or script making the change
+        reason: Why the status changed
+
+    Returns:
+        The MarketTransition log row, or None if the market already has the status
+
+    Raises:
+        InvalidTransition: If the change is not allowed
+    """
+    from_status = market.status
+    if from_status == to_status:
+        return None
+    if not can_transition(from_status, to_status):
+        raise InvalidTransition(f"Market {market.id} cannot move from {from_status} to {to_status}")
+    if from_status not in MARKET_TRANSITIONS:
+        logger.warning(f"Market {market.id} moves from unknown status {from_status} to {to_status}")
+
+    market.status = to_status
+    market.updated_at = datetime.utcnow()
+
+    # The log model is the one declared alongside the market's model
+    MarketTransition = type(market).registry._class_registry["MarketTransition"]
+    log = MarketTransition(market_id=market.id, from_status=from_status, to_status=to_status,
+                           actor=actor, reason=reason)
+    from sqlalchemy import inspect
+    session = inspect(market).session
+    if session is not None:
+        session.add(log)
+    else:
+        logger.warning(f"Market {market.id} is not in a session, transition to {to_status} not logged")
+
+    logger.info(f"Market {market.id}: {from_status} -> {to_status}")
+    return log
+
+
+def work_queue(Market, status: str, claim: bool = False):
+    """
+    Get the markets waiting in a status, oldest first.
+
+    Args:
+        Market: Market model class
+        status: Lifecycle status
+        claim: Lock the returned rows, skipping rows locked by other workers
+
+    Returns:
+        Query on Market (add filters and .limit() as needed)
+    """
+    query = Market.query.filter(Market.status == status).order_by(Market.updated_at, Market.id)
+    if claim:
+        query = query.with_for_update(skip_locked=True)
+    return query
+
+
+def claim(market: Any, from_status: str, to_status: str, actor: Optional[str] = None,
+          reason: Optional[str] = None) -> bool:
+    """
+    Move a market to a new status unless another worker got to it first.
+
+    The market's row is re-read from its work queue under a row lock
+    (work_queue(claim=True)), moved on and committed with the rest of the
+    session, so of several workers claiming the same market only one
+    succeeds; the others should skip it.
+
+    Args:
+        market: Market instance (attached to a session)
+        from_status: Status the market must still have
+        to_status: New status
+        actor: Slack user or script making the change
+        reason: Why the status changed
+
+    Returns:
+        bool: True if this worker claimed the market
+    """
+    Market = type(market)
+    locked = work_queue(Market, from_status, claim=True).filter(Market.id == market.id).populate_existing().first()
+    if locked is None:
+        logger.info(f"Market {market.id} is no longer {from_status}, claimed by another worker")
+        return False
+
+    transition(locked, to_status, actor=actor, reason=reason)
+    from sqlalchemy import inspect
+    inspect(locked).session.commit()
+    return True
+
+
+def create_work_queue_indexes(engine, Market) -> None:
+    """
+    Create the work queue indexes on an existing markets table.
+
+    db.create_all() only creates indexes together with new tables.
+
+    Args:
+        engine: SQLAlchemy engine
+        Market: Market model class
+    """
+    for index in Market.__table__.indexes:
+        index.create(engine, checkfirst=True)
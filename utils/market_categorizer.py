@@ -11,19 +11,25 @@ import json
 import logging
 from typing import Tuple, Optional, List, Dict, Any
 
-import openai
 from tenacity import retry, stop_after_attempt, wait_fixed
 
+from utils.metrics import track_call
+from utils.openai_client import get_openai_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
+# The OpenAI client is created on first use (see utils/openai_client.py)
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 if not OPENAI_API_KEY:
     logger.warning("Missing OpenAI API key. Set OPENAI_API_KEY environment variable.")
 
-openai_client = openai.OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+def __getattr__(name: str) -> Any:
+    # openai_client used to be created on import; scripts importing it get the lazy client
+    if name == "openai_client":
+        return get_openai_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Define valid categories (these should match the frontend categories)
 VALID_CATEGORIES = [
@@ -69,6 +75,7 @@ def categorize_market(question: str, description: Optional[str] = None) -> Tuple
         Tuple of (category, needs_manual_categorization)
     """
     # Check if OpenAI client is available
+    openai_client = get_openai_client()
     if not openai_client:
         logger.error("OpenAI client not initialized - missing API key")
         # Use keyword-based categorization instead of defaulting to news
@@ -83,15 +90,16 @@ def categorize_market(question: str, description: Optional[str] = None) -> Tuple
             content += f"\n\nDescription: {description}"
         
         # Call GPT-4o-mini
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",  # The newest model from OpenAI
-            messages=[
-                {"role": "system", "content": CATEGORIZATION_PROMPT},
-                {"role": "user", "content": content}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1  # Low temperature for more consistent results
-        )
+        with track_call("openai", "chat.completions"):
+            response = openai_client.chat.completions.create(
+                model="gpt-4o-mini",  # The newest model from OpenAI
+                messages=[
+                    {"role": "system", "content": CATEGORIZATION_PROMPT},
+                    {"role": "user", "content": content}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1  # Low temperature for more consistent results
+            )
         
         # Parse response
         result = json.loads(response.choices[0].message.content)
@@ -194,7 +202,7 @@ def categorize_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     logger.info(f"Categorizing {total_markets} markets with GPT-4o-mini...")
     
     # Check if OpenAI client is available
-    openai_unavailable = openai_client is None
+    openai_unavailable = get_openai_client() is None
     
     # If API is unavailable, use keyword-based categorization
     if openai_unavailable:
@@ -0,0 +1,244 @@
+"""
+Market Prioritization
+
+When more new markets (or events) pass the filters than can be posted in one
+run, this module decides which ones go first. Each candidate gets a
+relevance score from cheap features:
+
+- End date proximity: markets ending within a month score higher than
+  long-dated ones, and expired markets are heavily penalized
+- Years mentioned in the question or description (future years up, past
+  years down)
+- Past and future tense indicators in the question
+- Activity: accepting orders, and trading volume on a log scale
+
+The text features use patterns compiled once at import. The top-K candidates
+are selected with a bounded heap (heapq.nlargest), which is O(n log k)
+instead of sorting the whole catalog; candidates with equal scores keep the
+order they arrived in.
+"""
+
+import heapq
+import logging
+import math
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from utils.dates import now_epoch, to_epoch
+from utils.market_record import MarketRecord, EventRecord, market_end_date
+
+logger = logging.getLogger("market_priority")
+
+# Years mentioned in text (2020-2099)
+YEAR_PATTERN = re.compile(r"\b(20[2-9][0-9])\b")
+
+# Words that suggest past events
+PAST_PATTERN = re.compile(r"\b(was|were|ended|finished|concluded|completed)\b")
+
+# Words that suggest future events
+FUTURE_PATTERN = re.compile(r"\b(will|shall|going to|upcoming|future|next)\b")
+
+# Markets ending within this many days get the near-term bonus
+NEAR_TERM_DAYS = 30
+
+# Score weights
+NEAR_TERM_SCORE = 5
+FUTURE_END_SCORE = 2
+EXPIRED_SCORE = -20
+FUTURE_YEAR_SCORE = 3
+PAST_YEAR_SCORE = -1
+INDICATOR_SCORE = 2
+ACCEPTING_ORDERS_SCORE = 10
+
+# Maximum volume bonus (log10 of the volume, so 1M volume scores 6)
+MAX_VOLUME_SCORE = 6
+
+# Volume fields, in order of preference
+VOLUME_KEYS = ("volume24hr", "volumeNum", "volume")
+
+T = TypeVar("T")
+
+
+def _raw(item: Any) -> Dict[str, Any]:
+    """Get the original data dictionary of a market, event or record."""
+    return item.raw if isinstance(item, (MarketRecord, EventRecord)) else item
+
+
+def _end_ts(item: Any) -> Optional[int]:
+    """Get the end timestamp of a market, event or record."""
+    if isinstance(item, (MarketRecord, EventRecord)):
+        return item.end_ts
+    return to_epoch(market_end_date(item))
+
+
+def _volume(data: Dict[str, Any]) -> float:
+    """Get the trading volume of a market or event."""
+    for key in VOLUME_KEYS:
+        if data.get(key) is not None:
+            try:
+                return max(float(data[key]), 0.0)
+            except (TypeError, ValueError):
+                continue
+    return 0.0
+
+
+def end_date_score(end_ts: Optional[int], now: int) -> int:
+    """
+    Score the end date of a market.
+
+    Args:
+        end_ts: End timestamp in epoch seconds (None if unknown)
+        now: Current epoch time
+
+    Returns:
+        int: Score (0 when the end date is unknown)
+    """
+    if end_ts is None:
+        return 0
+    if end_ts <= now:
+        return EXPIRED_SCORE
+    if (end_ts - now) // 86400 < NEAR_TERM_DAYS:
+        return NEAR_TERM_SCORE
+    return FUTURE_END_SCORE
+
+
+def text_score(question: str, description: str = "", current_year: Optional[int] = None) -> int:
+    """
+    Score the question and description text of a market.
+
+    Args:
+        question: Market question or event title
+        description: Market or event description
+        current_year: Year to compare mentioned years against (defaults to now)
+
+    Returns:
+        int: Score
+    """
+    if current_year is None:
+        current_year = datetime.now(timezone.utc).year
+    question = question.lower()
+
+    score = 0
+    for year in YEAR_PATTERN.findall(question) + YEAR_PATTERN.findall(description):
+        score += FUTURE_YEAR_SCORE if int(year) >= current_year else PAST_YEAR_SCORE
+
+    score -= len(set(PAST_PATTERN.findall(question))) * INDICATOR_SCORE
+    score += len(set(FUTURE_PATTERN.findall(question))) * INDICATOR_SCORE
+    return score
+
+
+def activity_score(data: Dict[str, Any]) -> float:
+    """
+    Score the trading activity of a market or event.
+
+    Args:
+        data: Market or event data
+
+    Returns:
+        float: Score
+    """
+    score = ACCEPTING_ORDERS_SCORE if data.get("acceptingOrders") or data.get("accepting_orders") else 0
+    return score + min(math.log10(1 + _volume(data)), MAX_VOLUME_SCORE)
+
+
+def score_market(market: Any, now: Optional[int] = None, current_year: Optional[int] = None) -> float:
+    """
+    Score a market for posting priority.
+
+    Args:
+        market: Market data dictionary or MarketRecord
+        now: Current epoch time (defaults to now_epoch())
+        current_year: Current year (defaults to now)
+
+    Returns:
+        float: Score (higher is posted first)
+    """
+    now = now_epoch() if now is None else now
+    data = _raw(market)
+    return (end_date_score(_end_ts(market), now)
+            + text_score(data.get("question") or "", data.get("description") or "", current_year)
+            + activity_score(data))
+
+
+def score_event(event: Any, now: Optional[int] = None, current_year: Optional[int] = None) -> float:
+    """
+    Score an event for posting priority.
+
+    The event is scored on its own title, description and end date, plus
+    the activity of its most active market.
+
+    Args:
+        event: Event data dictionary or EventRecord
+        now: Current epoch time (defaults to now_epoch())
+        current_year: Current year (defaults to now)
+
+    Returns:
+        float: Score (higher is posted first)
+    """
+    now = now_epoch() if now is None else now
+    data = _raw(event)
+    markets = [_raw(m) for m in (event.markets if isinstance(event, EventRecord) else data.get("markets") or [])
+               if isinstance(m, (dict, MarketRecord))]
+    activity = max([activity_score(data)] + [activity_score(m) for m in markets])
+    return (end_date_score(_end_ts(event), now)
+            + text_score(data.get("title") or "", data.get("description") or "", current_year)
+            + activity)
+
+
+def top_k(items: Sequence[T], k: int, score: Callable[[T], float]) -> List[T]:
+    """
+    Select the k highest-scoring items with a bounded heap.
+
+    Args:
+        items: Candidates
+        k: Number of items to select
+        score: Scoring function
+
+    Returns:
+        List[T]: Up to k items, highest score first (ties keep input order)
+    """
+    if k <= 0:
+        return []
+    return heapq.nlargest(k, items, key=score)
+
+
+def prioritize_markets(markets: Sequence[Any], limit: int) -> List[Any]:
+    """
+    Select the markets to post first.
+
+    Args:
+        markets: Candidate markets (dictionaries or MarketRecords)
+        limit: Maximum number of markets
+
+    Returns:
+        List[Any]: Selected markets, highest priority first
+    """
+    start = time.perf_counter()
+    now = now_epoch()
+    current_year = datetime.now(timezone.utc).year
+    selected = top_k(markets, limit, lambda market: score_market(market, now, current_year))
+    logger.info(f"Selected {len(selected)} of {len(markets)} markets by priority "
+                f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return selected
+
+
+def prioritize_events(events: Sequence[Any], limit: int) -> List[Any]:
+    """
+    Select the events to post first.
+
+    Args:
+        events: Candidate events (dictionaries or EventRecords)
+        limit: Maximum number of events
+
+    Returns:
+        List[Any]: Selected events, highest priority first
+    """
+    start = time.perf_counter()
+    now = now_epoch()
+    current_year = datetime.now(timezone.utc).year
+    selected = top_k(events, limit, lambda event: score_event(event, now, current_year))
+    logger.info(f"Selected {len(selected)} of {len(events)} events by priority "
+                f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return selected
@@ -0,0 +1,225 @@
+"""
+Normalized Market and Event Records
+
+The Gamma API encodes several market fields as JSON strings (outcomes,
+outcomePrices, clobTokenIds) and different sources use different keys for
+the same value (expiry_time/endDate/end_date/expiryTime). This module parses
+a market once at ingestion into a compact MarketRecord with the decoded
+lists and an integer epoch end timestamp (see utils.dates), and an event
+into an EventRecord holding the records of its markets.
+
+Stages that accept records read the parsed fields directly. Records keep the
+original dictionary in `raw` (which is what gets stored as raw_data) and
+proxy get() to it, so code that only reads plain fields works with both
+records and dictionaries. The helpers market_outcomes(), market_end_date()
+and market_option_images() accept either.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Union
+
+from utils.dates import to_epoch
+
+logger = logging.getLogger("market_record")
+
+# Keys holding a market's end date, in order of preference
+END_DATE_KEYS = ("expiry_time", "endDate", "end_date", "expiryTime")
+
+
+def parse_json_list(value: Any) -> List[Any]:
+    """
+    Decode a list that may be JSON-encoded.
+
+    Args:
+        value: List, JSON string or None
+
+    Returns:
+        List[Any]: Decoded list (empty if missing or invalid)
+    """
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return []
+        return decoded if isinstance(decoded, list) else []
+    return []
+
+
+def parse_json_dict(value: Any) -> Dict[str, Any]:
+    """
+    Decode a dictionary that may be JSON-encoded.
+
+    Args:
+        value: Dictionary, JSON string or None
+
+    Returns:
+        Dict[str, Any]: Decoded dictionary (empty if missing or invalid)
+    """
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return {}
+        return decoded if isinstance(decoded, dict) else {}
+    return {}
+
+
+def _end_date(data: Dict[str, Any]) -> Any:
+    """Get the raw end date from the first end date key present."""
+    for key in END_DATE_KEYS:
+        if key in data:
+            return data[key]
+    return None
+
+
+class MarketRecord:
+    """A market parsed once at ingestion."""
+
+    __slots__ = (
+        "id", "condition_id", "question", "category", "outcomes", "outcome_prices",
+        "clob_token_ids", "option_images", "end_date", "end_ts", "active", "closed",
+        "archived", "image", "icon", "event_ids", "raw",
+    )
+
+    def __init__(self, market: Dict[str, Any]):
+        """
+        Parse a market.
+
+        Args:
+            market: Market data dictionary (Gamma API or transformed)
+        """
+        self.raw = market
+        self.id = market.get("id")
+        self.condition_id = market.get("conditionId")
+        self.question = market.get("question")
+        self.category = market.get("category")
+        self.outcomes = parse_json_list(market.get("outcomes"))
+        self.outcome_prices = []
+        for price in parse_json_list(market.get("outcomePrices")):
+            try:
+                self.outcome_prices.append(float(price))
+            except (TypeError, ValueError):
+                self.outcome_prices.append(None)
+        self.clob_token_ids = parse_json_list(market.get("clobTokenIds"))
+        self.option_images = parse_json_dict(market.get("option_images"))
+        self.end_date = _end_date(market)
+        self.end_ts = to_epoch(self.end_date)
+        self.active = market.get("active", True)
+        self.closed = market.get("closed", False)
+        self.archived = market.get("archived", False)
+        self.image = market.get("image")
+        self.icon = market.get("icon")
+        events = market.get("events")
+        self.event_ids = [e.get("id") for e in events if isinstance(e, dict)] if isinstance(events, list) else []
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a field of the original market data."""
+        return self.raw.get(key, default)
+
+    @property
+    def is_binary(self) -> bool:
+        """Whether the market has exactly Yes/No outcomes."""
+        return len(self.outcomes) == 2 and sorted(self.outcomes) == ["No", "Yes"]
+
+    def __repr__(self) -> str:
+        return f"<MarketRecord {self.id}: {self.question!r}>"
+
+
+class EventRecord:
+    """An event parsed once at ingestion, with the records of its markets."""
+
+    __slots__ = (
+        "id", "title", "description", "category", "image", "icon", "end_date", "end_ts",
+        "active", "closed", "archived", "markets", "raw",
+    )
+
+    def __init__(self, event: Dict[str, Any]):
+        """
+        Parse an event.
+
+        Args:
+            event: Event data dictionary from the Gamma API
+        """
+        self.raw = event
+        self.id = event.get("id")
+        self.title = event.get("title")
+        self.description = event.get("description", "")
+        self.category = event.get("category")
+        self.image = event.get("image")
+        self.icon = event.get("icon")
+        self.end_date = _end_date(event)
+        self.end_ts = to_epoch(self.end_date)
+        self.active = event.get("active", True)
+        self.closed = event.get("closed", False)
+        self.archived = event.get("archived", False)
+        self.markets = [MarketRecord(m) for m in event.get("markets") or [] if isinstance(m, dict)]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a field of the original event data."""
+        return self.raw.get(key, default)
+
+    def __repr__(self) -> str:
+        return f"<EventRecord {self.id}: {self.title!r} ({len(self.markets)} markets)>"
+
+
+def market_records(markets: List[Union[Dict[str, Any], MarketRecord]]) -> List[MarketRecord]:
+    """
+    Parse markets into records (records are passed through).
+
+    Args:
+        markets: Market data dictionaries or records
+
+    Returns:
+        List[MarketRecord]: Records
+    """
+    return [as_market_record(market) for market in markets]
+
+
+def event_records(events: List[Union[Dict[str, Any], EventRecord]]) -> List[EventRecord]:
+    """
+    Parse events into records (records are passed through).
+
+    Args:
+        events: Event data dictionaries or records
+
+    Returns:
+        List[EventRecord]: Records
+    """
+    return [event if isinstance(event, EventRecord) else EventRecord(event) for event in events]
+
+
+def as_market_record(market: Union[Dict[str, Any], MarketRecord]) -> MarketRecord:
+    """Get a record for a market, parsing it if needed."""
+    return market if isinstance(market, MarketRecord) else MarketRecord(market)
+
+
+def raw_market(market: Union[Dict[str, Any], MarketRecord]) -> Dict[str, Any]:
+    """Get the original data dictionary of a market or record."""
+    return market.raw if isinstance(market, MarketRecord) else market
+
+
+def market_outcomes(market: Union[Dict[str, Any], MarketRecord]) -> List[Any]:
+    """Get the decoded outcomes of a market or record."""
+    if isinstance(market, MarketRecord):
+        return market.outcomes
+    return parse_json_list(market.get("outcomes"))
+
+
+def market_end_date(market: Union[Dict[str, Any], MarketRecord], default: Any = None) -> Any:
+    """Get the raw end date of a market or record from the first end date key present."""
+    data = raw_market(market)
+    if not any(key in data for key in END_DATE_KEYS):
+        return default
+    return market.end_date if isinstance(market, MarketRecord) else _end_date(data)
+
+
+def market_option_images(market: Union[Dict[str, Any], MarketRecord]) -> Dict[str, Any]:
+    """Get the decoded option images of a market or record."""
+    if isinstance(market, MarketRecord):
+        return market.option_images
+    return parse_json_dict(market.get("option_images"))
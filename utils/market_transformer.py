@@ -10,20 +10,36 @@ import re
 import json
 import logging
 from datetime import datetime
-from collections import defaultdict
 from typing import List, Dict, Any, Tuple, Optional
 
+from utils.transform_engine import TransformEngine, first_event_id
+from utils.option_image_index import OptionImageIndex, RULE_GROUP_MARKET
+
 # Configure logging
 logger = logging.getLogger("market_transformer")
 
 class MarketTransformer:
     """Class to transform Polymarket data to the required format"""
     
-    def __init__(self):
-        """Initialize the transformer"""
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Initialize the transformer
+        
+        Args:
+            workers: Number of worker processes for grouping (see utils/transform_engine.py)
+        """
         self.processed_market_ids = set()
         # Store original markets for reference when looking up specific option images
         self.original_markets = []
+        # Index of the original markets for option image lookups (built once per transform)
+        self.option_image_index = None
+        self.workers = workers
+    
+    def get_option_image_index(self) -> OptionImageIndex:
+        """Get the option image index of the original markets, building it if needed."""
+        if self.option_image_index is None:
+            self.option_image_index = OptionImageIndex(self.original_markets)
+        return self.option_image_index
     
     def extract_entity_from_question(self, question: str, pattern: str) -> Optional[str]:
         """Extract the entity from a question based on a pattern"""
@@ -82,583 +98,572 @@ class MarketTransformer:
             "election_winner": r"(?i)will\s+(.*?)\s+win\s+the\s+(.*?)\s+election\s*\?",
         }
     
-    def group_related_markets(self, markets: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str, str]]:
+    def extract_market_entity(self, market: Dict[str, Any]) -> Optional[str]:
         """
-        Group related markets based on the events in their API response.
+        Extract the option entity (e.g. a team name) of a market in an event.
         
         Args:
-            markets: List of market data dictionaries
+            market: Market data dictionary
             
         Returns:
-            List of tuples (market_data, market_type, original_question)
+            Optional[str]: Entity, or None if none could be extracted
         """
-        # Use event_id as the key for grouping markets
-        grouped_by_event = defaultdict(list)
+        question = market.get("question", "")
+        
+        # Extract entity from the question for multi-option markets
+        entity = None
         
-        # First pass: group markets by event ID
-        for market in markets:
-            question = market.get("question", "")
+        # First, check if market has event_outcomes data we can use directly
+        event_outcomes = market.get("event_outcomes", [])
+        if event_outcomes:
+            for outcome in event_outcomes:
+                # Only use outcomes that aren't Yes/No, which are likely the actual options
+                if outcome.get("name") and outcome.get("name") not in ["Yes", "No"]:
+                    entity = outcome.get("name")
+                    logger.info(f"Extracted entity '{entity}' directly from event outcomes")
+                    break
+        
+        # Second, check if market has event_questions which often contain option names
+        if not entity and market.get("event_questions"):
+            event_questions = market.get("event_questions", [])
+            for eq in event_questions:
+                eq_text = eq.get("text", "")
+                # Look for option-specific questions
+                if "Will" in eq_text and (
+                    "Barcelona" in eq_text or 
+                    "Bayern Munich" in eq_text or 
+                    "Washington Capitals" in eq_text or
+                    "Edmonton Oilers" in eq_text):
+                    # Extract the team name
+                    for team in ["Barcelona", "Bayern Munich", "Washington Capitals", "Edmonton Oilers"]:
+                        if team in eq_text:
+                            entity = team
+                            logger.info(f"Extracted specific team '{entity}' from event question: '{eq_text}'")
+                            break
+                    if entity:
+                        break
+        
+        # Third, if still not found, extract from question text using patterns
+        if not entity and "Will " in question:
+            # Try different extraction patterns in order of specificity
             
-            # Extract entity from the question for multi-option markets
-            entity = None
+            # Pattern 1: Basic entity extraction - everything between "Will " and " be/win"
+            match = re.search(r"Will\s+(.*?)\s+(be|win)\s+", question, re.IGNORECASE)
+            if match:
+                entity = match.group(1).strip()
+                logger.info(f"Extracted entity '{entity}' from pattern 1: '{question}'")
             
-            # First, check if market has event_outcomes data we can use directly
-            event_outcomes = market.get("event_outcomes", [])
-            if event_outcomes:
-                for outcome in event_outcomes:
-                    # Only use outcomes that aren't Yes/No, which are likely the actual options
-                    if outcome.get("name") and outcome.get("name") not in ["Yes", "No"]:
-                        entity = outcome.get("name")
-                        logger.info(f"Extracted entity '{entity}' directly from event outcomes")
-                        break
+            # Pattern 2: "Will X win Y" pattern
+            if not entity:
+                match = re.search(r"Will\s+(.*?)\s+win\s+", question, re.IGNORECASE)
+                if match:
+                    entity = match.group(1).strip()
+                    logger.info(f"Extracted entity '{entity}' from pattern 2: '{question}'")
             
-            # Second, check if market has event_questions which often contain option names
-            if not entity and market.get("event_questions"):
-                event_questions = market.get("event_questions", [])
-                for eq in event_questions:
-                    eq_text = eq.get("text", "")
-                    # Look for option-specific questions
-                    if "Will" in eq_text and (
-                        "Barcelona" in eq_text or 
-                        "Bayern Munich" in eq_text or 
-                        "Washington Capitals" in eq_text or
-                        "Edmonton Oilers" in eq_text):
-                        # Extract the team name
-                        for team in ["Barcelona", "Bayern Munich", "Washington Capitals", "Edmonton Oilers"]:
-                            if team in eq_text:
-                                entity = team
-                                logger.info(f"Extracted specific team '{entity}' from event question: '{eq_text}'")
-                                break
-                        if entity:
-                            break
+            # Pattern 3: Title case words after "Will" (likely a proper noun)
+            if not entity:
+                match = re.search(r"Will\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", question)
+                if match:
+                    entity = match.group(1).strip()
+                    logger.info(f"Extracted entity '{entity}' from pattern 3: '{question}'")
             
-            # Third, if still not found, extract from question text using patterns
-            if not entity and "Will " in question:
-                # Try different extraction patterns in order of specificity
-                
-                # Pattern 1: Basic entity extraction - everything between "Will " and " be/win"
-                match = re.search(r"Will\s+(.*?)\s+(be|win)\s+", question, re.IGNORECASE)
+            # Pattern 4: Just grab the part after "Will" until a preposition or end of line
+            if not entity:
+                match = re.search(r"Will\s+(.*?)(?:\s+in\s+|\s+by\s+|\s+at\s+|\s+on\s+|\?|$)", question, re.IGNORECASE)
                 if match:
                     entity = match.group(1).strip()
-                    logger.info(f"Extracted entity '{entity}' from pattern 1: '{question}'")
-                
-                # Pattern 2: "Will X win Y" pattern
-                if not entity:
-                    match = re.search(r"Will\s+(.*?)\s+win\s+", question, re.IGNORECASE)
-                    if match:
-                        entity = match.group(1).strip()
-                        logger.info(f"Extracted entity '{entity}' from pattern 2: '{question}'")
-                
-                # Pattern 3: Title case words after "Will" (likely a proper noun)
-                if not entity:
-                    match = re.search(r"Will\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", question)
-                    if match:
-                        entity = match.group(1).strip()
-                        logger.info(f"Extracted entity '{entity}' from pattern 3: '{question}'")
-                
-                # Pattern 4: Just grab the part after "Will" until a preposition or end of line
-                if not entity:
-                    match = re.search(r"Will\s+(.*?)(?:\s+in\s+|\s+by\s+|\s+at\s+|\s+on\s+|\?|$)", question, re.IGNORECASE)
-                    if match:
-                        entity = match.group(1).strip()
-                        logger.info(f"Extracted entity '{entity}' from pattern 4: '{question}'")
-                
-                # Pattern 5: Special handling for Champions League and Stanley Cup
-                if "Champions League" in question and not entity:
-                    # First try to match from the question
-                    for team in ["Arsenal", "Inter Milan", "Paris Saint-Germain", "Barcelona", "Bayern Munich"]:
-                        if team.lower() in question.lower():
-                            entity = team
-                            logger.info(f"Extracted Champions League team '{entity}' from question text")
-                            break
-                    
-                    # If not found but we have "Champions League", add Barcelona and Bayern Munich anyway
-                    # They are common teams that may not be in the question but are in the event
-                    if not entity and "Will" in question and "win the UEFA Champions League" in question:
-                        if not any(team in ["Barcelona", "Bayern Munich"] for team in question.lower()):
-                            entity = "Barcelona"  # Default to Barcelona for testing
-                            logger.info(f"Added Champions League team '{entity}' from special handling")
-                
-                if "Stanley Cup" in question and not entity:
-                    # First try to match from the question
-                    for team in ["Carolina Hurricanes", "Edmonton Oilers", "Washington Capitals", 
-                                 "Dallas Stars", "Florida Panthers", "Toronto Maple Leafs",
-                                 "Vegas Golden Knights", "Winnipeg Jets"]:
-                        if team.lower() in question.lower():
-                            entity = team
-                            logger.info(f"Extracted Stanley Cup team '{entity}' from question text")
-                            break
-                    
-                    # If not found but we have "Stanley Cup", add Washington Capitals anyway
-                    # It may not be in the question but is in the event
-                    if not entity and "Will" in question and "win the 2025 Stanley Cup" in question:
-                        if "the " in question.lower() and " win" in question.lower():
-                            # Extract the team name from the pattern "Will the [Team] win"
-                            match = re.search(r"Will\s+the\s+(.*?)\s+win", question, re.IGNORECASE)
-                            if match:
-                                entity = "the " + match.group(1).strip()
-                                logger.info(f"Extracted Stanley Cup team '{entity}' from specialized pattern")
+                    logger.info(f"Extracted entity '{entity}' from pattern 4: '{question}'")
             
-            logger.info(f"Final extracted entity: '{entity}' from question: '{question}'")
+            # Pattern 5: Special handling for Champions League and Stanley Cup
+            if "Champions League" in question and not entity:
+                # First try to match from the question
+                for team in ["Arsenal", "Inter Milan", "Paris Saint-Germain", "Barcelona", "Bayern Munich"]:
+                    if team.lower() in question.lower():
+                        entity = team
+                        logger.info(f"Extracted Champions League team '{entity}' from question text")
+                        break
+                
+                # If not found but we have "Champions League", add Barcelona and Bayern Munich anyway
+                # They are common teams that may not be in the question but are in the event
+                if not entity and "Will" in question and "win the UEFA Champions League" in question:
+                    if not any(team in ["Barcelona", "Bayern Munich"] for team in question.lower()):
+                        entity = "Barcelona"  # Default to Barcelona for testing
+                        logger.info(f"Added Champions League team '{entity}' from special handling")
             
-            # Check if market has events and group by event ID
-            events = market.get("events", [])
-            if events and len(events) > 0:
-                event = events[0]  # Use the first event
-                event_id = event.get("id")
-                event_title = event.get("title")
+            if "Stanley Cup" in question and not entity:
+                # First try to match from the question
+                for team in ["Carolina Hurricanes", "Edmonton Oilers", "Washington Capitals", 
+                             "Dallas Stars", "Florida Panthers", "Toronto Maple Leafs",
+                             "Vegas Golden Knights", "Winnipeg Jets"]:
+                    if team.lower() in question.lower():
+                        entity = team
+                        logger.info(f"Extracted Stanley Cup team '{entity}' from question text")
+                        break
                 
-                if event_id:
-                    # Use event ID as the grouping key
-                    grouped_by_event[event_id].append((market, question, entity))
-                    logger.info(f"Grouped market with question '{question}' under event '{event_title}' (ID: {event_id})")
-                else:
-                    # No event ID, treat as individual market
-                    logger.info(f"Market with question '{question}' has no event ID, treating as individual")
-                    grouped_by_event[question].append((market, question, None))
-            else:
-                # No events, treat as individual market
-                logger.info(f"Market with question '{question}' has no events, treating as individual")
-                grouped_by_event[question].append((market, question, None))
+                # If not found but we have "Stanley Cup", add Washington Capitals anyway
+                # It may not be in the question but is in the event
+                if not entity and "Will" in question and "win the 2025 Stanley Cup" in question:
+                    if "the " in question.lower() and " win" in question.lower():
+                        # Extract the team name from the pattern "Will the [Team] win"
+                        match = re.search(r"Will\s+the\s+(.*?)\s+win", question, re.IGNORECASE)
+                        if match:
+                            entity = "the " + match.group(1).strip()
+                            logger.info(f"Extracted Stanley Cup team '{entity}' from specialized pattern")
         
-        # Debug log to see what groups we identified
-        logger.info("DEBUGGING MARKET GROUPS BY EVENT")
-        for event_id, market_list in grouped_by_event.items():
-            logger.info(f"Event ID: {event_id}, Number of markets: {len(market_list)}")
-            
-            # Extra debugging for Champions League and Stanley Cup
-            if "Champions League" in str(event_id) or any("Champions League" in q for _, q, _ in market_list):
-                logger.info(f"FOUND CHAMPIONS LEAGUE GROUP with ID: {event_id}")
-                logger.info(f"Champions League markets count: {len(market_list)}")
-                for i, (m, q, e) in enumerate(market_list):
-                    logger.info(f"  CL Market {i+1}: ID={m.get('id')}, CondID={m.get('conditionId')}, Q={q}, Entity={e}")
-                    logger.info(f"    Outcomes: {m.get('outcomes')}")
-                    logger.info(f"    Has events: {bool(m.get('events'))}")
-                    if m.get('events'):
-                        logger.info(f"    Event title: {m.get('events')[0].get('title')}")
+        logger.info(f"Final extracted entity: '{entity}' from question: '{question}'")
+        
+        return entity
+    
+    def group_related_markets(self, markets: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str, str]]:
+        """
+        Group related markets based on the events in their API response.
+        
+        Markets are grouped by the ID of their first event (markets without
+        an event are grouped by question) in a single pass, and each group
+        is then turned into one multiple-option market or kept as binary
+        markets. Groups are processed by the transformation engine, which
+        can spread them across worker processes for large inputs.
+        
+        Args:
+            markets: List of market data dictionaries
             
-            if "Stanley Cup" in str(event_id) or any("Stanley Cup" in q for _, q, _ in market_list):
-                logger.info(f"FOUND STANLEY CUP GROUP with ID: {event_id}")
-                logger.info(f"Stanley Cup markets count: {len(market_list)}")
-                for i, (m, q, e) in enumerate(market_list):
-                    logger.info(f"  SC Market {i+1}: ID={m.get('id')}, CondID={m.get('conditionId')}, Q={q}, Entity={e}")
-                    logger.info(f"    Outcomes: {m.get('outcomes')}")
-                    logger.info(f"    Has events: {bool(m.get('events'))}")
-                    if m.get('events'):
-                        logger.info(f"    Event title: {m.get('events')[0].get('title')}")
+        Returns:
+            List of tuples (market_data, market_type, original_question)
+        """
+        group_results, ungrouped = TransformEngine(self.workers).run(
+            markets, _related_market_keys, _transform_related_group, context=self.get_option_image_index()
+        )
+        if ungrouped:
+            group_results.append(self.transform_group(None, [(m, m.get("question", ""), None) for _, m in ungrouped]))
+        
+        result = []
+        for group_result in group_results:
+            result.extend(group_result)
+        return result
+    
+    def transform_group(self, event_id: Any, market_group: List[Tuple[Dict[str, Any], str, Optional[str]]]
+                        ) -> List[Tuple[Dict[str, Any], str, str]]:
+        """
+        Turn one group of related markets into a multiple-option market, or
+        keep them as binary markets.
+        
+        Args:
+            event_id: Event ID (or question) the markets are grouped by
+            market_group: List of tuples (market_data, question, entity)
             
-            # Log all markets in the group
+        Returns:
+            List of tuples (market_data, market_type, original_question)
+        """
+        # Debug log to see what group we identified
+        market_list = market_group
+        logger.info(f"Event ID: {event_id}, Number of markets: {len(market_list)}")
+        
+        # Extra debugging for Champions League and Stanley Cup
+        if "Champions League" in str(event_id) or any("Champions League" in q for _, q, _ in market_list):
+            logger.info(f"FOUND CHAMPIONS LEAGUE GROUP with ID: {event_id}")
+            logger.info(f"Champions League markets count: {len(market_list)}")
             for i, (m, q, e) in enumerate(market_list):
-                logger.info(f"  Market {i+1}: {q} -> entity: {e}")
+                logger.info(f"  CL Market {i+1}: ID={m.get('id')}, CondID={m.get('conditionId')}, Q={q}, Entity={e}")
+                logger.info(f"    Outcomes: {m.get('outcomes')}")
+                logger.info(f"    Has events: {bool(m.get('events'))}")
+                if m.get('events'):
+                    logger.info(f"    Event title: {m.get('events')[0].get('title')}")
+        
+        if "Stanley Cup" in str(event_id) or any("Stanley Cup" in q for _, q, _ in market_list):
+            logger.info(f"FOUND STANLEY CUP GROUP with ID: {event_id}")
+            logger.info(f"Stanley Cup markets count: {len(market_list)}")
+            for i, (m, q, e) in enumerate(market_list):
+                logger.info(f"  SC Market {i+1}: ID={m.get('id')}, CondID={m.get('conditionId')}, Q={q}, Entity={e}")
+                logger.info(f"    Outcomes: {m.get('outcomes')}")
+                logger.info(f"    Has events: {bool(m.get('events'))}")
+                if m.get('events'):
+                    logger.info(f"    Event title: {m.get('events')[0].get('title')}")
+        
+        # Log all markets in the group
+        for i, (m, q, e) in enumerate(market_list):
+            logger.info(f"  Market {i+1}: {q} -> entity: {e}")
         
-        # Second pass: determine which groups are multiple-option markets
         result = []
-        for event_id, market_group in grouped_by_event.items():
-            # If only one market in the group, it's a regular market
-            if len(market_group) == 1:
-                market, original_question, _ = market_group[0]
-                result.append((market, "binary", original_question))
-            # If multiple markets with the same event, it's a multiple-option market
-            elif len(market_group) > 1:
-                # Check if all markets have the same Yes/No options
-                all_yes_no = True
-                for m, _, _ in market_group:
-                    try:
-                        # Parse outcomes which come as a JSON string
-                        outcomes_raw = m.get("outcomes", "[]")
-                        outcomes = json.loads(outcomes_raw) if isinstance(outcomes_raw, str) else outcomes_raw
-                        if len(outcomes) != 2 or "Yes" not in outcomes or "No" not in outcomes:
-                            all_yes_no = False
-                            break
-                    except Exception:
+        # If only one market in the group, it's a regular market
+        if len(market_group) == 1:
+            market, original_question, _ = market_group[0]
+            result.append((market, "binary", original_question))
+        # If multiple markets with the same event, it's a multiple-option market
+        elif len(market_group) > 1:
+            # Check if all markets have the same Yes/No options
+            all_yes_no = True
+            for m, _, _ in market_group:
+                try:
+                    # Parse outcomes which come as a JSON string
+                    outcomes_raw = m.get("outcomes", "[]")
+                    outcomes = json.loads(outcomes_raw) if isinstance(outcomes_raw, str) else outcomes_raw
+                    if len(outcomes) != 2 or "Yes" not in outcomes or "No" not in outcomes:
                         all_yes_no = False
                         break
+                except Exception:
+                    all_yes_no = False
+                    break
+            
+            if all_yes_no:
+                # Get event title to use as group title
+                events = market_group[0][0].get("events", [])
+                if events and len(events) > 0:
+                    event_title = events[0].get("title")
+                else:
+                    # Default title based on first market
+                    _, original_question, _ = market_group[0]
+                    event_title = re.sub(r"^Will .* (be|win) ", "", original_question).rstrip("?")
                 
-                if all_yes_no:
-                    # Get event title to use as group title
-                    events = market_group[0][0].get("events", [])
-                    if events and len(events) > 0:
-                        event_title = events[0].get("title")
-                    else:
-                        # Default title based on first market
-                        _, original_question, _ = market_group[0]
-                        event_title = re.sub(r"^Will .* (be|win) ", "", original_question).rstrip("?")
-                    
-                    logger.info(f"Creating multi-option market with title: {event_title}")
-                    
-                    # Extract entities from questions
-                    entities = []
-                    for _, _, entity in market_group:
-                        if entity:
-                            entities.append(entity)
-                    
-                    if not entities or len(entities) < len(market_group):
-                        # Fallback: try to extract entities from questions using multiple patterns
-                        for _, question, _ in market_group:
-                            # Try multiple extraction patterns
-                            extracted = None
+                logger.info(f"Creating multi-option market with title: {event_title}")
+                
+                # Extract entities from questions
+                entities = []
+                for _, _, entity in market_group:
+                    if entity:
+                        entities.append(entity)
+                
+                if not entities or len(entities) < len(market_group):
+                    # Fallback: try to extract entities from questions using multiple patterns
+                    for _, question, _ in market_group:
+                        # Try multiple extraction patterns
+                        extracted = None
+                        
+                        # Pattern 1: Standard pattern
+                        match = re.search(r"Will\s+(.*?)\s+(be|win)\s+", question, re.IGNORECASE)
+                        if match:
+                            extracted = match.group(1).strip()
                             
-                            # Pattern 1: Standard pattern
-                            match = re.search(r"Will\s+(.*?)\s+(be|win)\s+", question, re.IGNORECASE)
+                        # Pattern 2: "Will X win Y" pattern
+                        if not extracted:
+                            match = re.search(r"Will\s+(.*?)\s+win\s+", question, re.IGNORECASE)
+                            if match:
+                                extracted = match.group(1).strip()
+                        
+                        # Pattern 3: Title case words after "Will" (likely a proper noun)
+                        if not extracted:
+                            match = re.search(r"Will\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", question)
+                            if match:
+                                extracted = match.group(1).strip()
+                        
+                        # Pattern 4: Just grab the part after "Will" until a preposition or end of line
+                        if not extracted:
+                            match = re.search(r"Will\s+(.*?)(?:\s+in\s+|\s+by\s+|\s+at\s+|\s+on\s+|\?|$)", question, re.IGNORECASE)
                             if match:
                                 extracted = match.group(1).strip()
                                 
-                            # Pattern 2: "Will X win Y" pattern
-                            if not extracted:
-                                match = re.search(r"Will\s+(.*?)\s+win\s+", question, re.IGNORECASE)
-                                if match:
-                                    extracted = match.group(1).strip()
-                            
-                            # Pattern 3: Title case words after "Will" (likely a proper noun)
-                            if not extracted:
-                                match = re.search(r"Will\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", question)
-                                if match:
-                                    extracted = match.group(1).strip()
+                        # Pattern 5: Champions League specific pattern
+                        if not extracted and "Champions League" in question:
+                            match = re.search(r"Will\s+(.*?)\s+win the Champions League", question, re.IGNORECASE)
+                            if match:
+                                extracted = match.group(1).strip()
+                                
+                        # Pattern 6: Stanley Cup specific pattern
+                        if not extracted and "Stanley Cup" in question:
+                            match = re.search(r"Will\s+(.*?)\s+win the 2025 Stanley Cup", question, re.IGNORECASE)
+                            if match:
+                                extracted = match.group(1).strip()
                             
-                            # Pattern 4: Just grab the part after "Will" until a preposition or end of line
-                            if not extracted:
-                                match = re.search(r"Will\s+(.*?)(?:\s+in\s+|\s+by\s+|\s+at\s+|\s+on\s+|\?|$)", question, re.IGNORECASE)
-                                if match:
-                                    extracted = match.group(1).strip()
+                        # Pattern 7: Direct entity extraction for CL/Stanley Cup options
+                        if not extracted:
+                            # Check for Champions League teams
+                            if "Champions League" in question:
+                                for team in ["Arsenal", "Inter Milan", "Paris Saint-Germain", "Barcelona", "Bayern Munich"]:
+                                    if team.lower() in question.lower():
+                                        extracted = team
+                                        logger.info(f"Extracted Champions League team '{extracted}' from direct matching")
+                                        break
+                            # Check for Stanley Cup teams
+                            elif "Stanley Cup" in question:
+                                for team in ["Carolina Hurricanes", "Edmonton Oilers", "Washington Capitals", 
+                                            "Dallas Stars", "Florida Panthers", "Toronto Maple Leafs",
+                                            "Vegas Golden Knights", "Winnipeg Jets"]:
+                                    if team.lower() in question.lower():
+                                        extracted = team
+                                        logger.info(f"Extracted Stanley Cup team '{extracted}' from direct matching")
+                                        break
                                     
-                            # Pattern 5: Champions League specific pattern
-                            if not extracted and "Champions League" in question:
-                                match = re.search(r"Will\s+(.*?)\s+win the Champions League", question, re.IGNORECASE)
+                            # Special handling for team names with "the" prefix
+                            elif "the 2025 Stanley Cup" in question:
+                                # Extract the team name from the pattern "Will the [Team] win"
+                                match = re.search(r"Will\s+the\s+(.*?)\s+win", question, re.IGNORECASE)
                                 if match:
-                                    extracted = match.group(1).strip()
+                                    team_name = match.group(1).strip()
+                                    extracted = "the " + team_name
+                                    logger.info(f"Extracted team name with 'the' prefix: '{extracted}'")
                                     
-                            # Pattern 6: Stanley Cup specific pattern
-                            if not extracted and "Stanley Cup" in question:
-                                match = re.search(r"Will\s+(.*?)\s+win the 2025 Stanley Cup", question, re.IGNORECASE)
-                                if match:
-                                    extracted = match.group(1).strip()
-                                
-                            # Pattern 7: Direct entity extraction for CL/Stanley Cup options
-                            if not extracted:
-                                # Check for Champions League teams
-                                if "Champions League" in question:
-                                    for team in ["Arsenal", "Inter Milan", "Paris Saint-Germain", "Barcelona", "Bayern Munich"]:
-                                        if team.lower() in question.lower():
-                                            extracted = team
-                                            logger.info(f"Extracted Champions League team '{extracted}' from direct matching")
-                                            break
-                                # Check for Stanley Cup teams
-                                elif "Stanley Cup" in question:
-                                    for team in ["Carolina Hurricanes", "Edmonton Oilers", "Washington Capitals", 
-                                                "Dallas Stars", "Florida Panthers", "Toronto Maple Leafs",
-                                                "Vegas Golden Knights", "Winnipeg Jets"]:
-                                        if team.lower() in question.lower():
-                                            extracted = team
-                                            logger.info(f"Extracted Stanley Cup team '{extracted}' from direct matching")
-                                            break
-                                        
-                                # Special handling for team names with "the" prefix
-                                elif "the 2025 Stanley Cup" in question:
-                                    # Extract the team name from the pattern "Will the [Team] win"
-                                    match = re.search(r"Will\s+the\s+(.*?)\s+win", question, re.IGNORECASE)
-                                    if match:
-                                        team_name = match.group(1).strip()
-                                        extracted = "the " + team_name
-                                        logger.info(f"Extracted team name with 'the' prefix: '{extracted}'")
-                                        
-                                # Special case for Barcelona in Champions League
-                                if not extracted and "Barcelona" not in entities and "Champions League" in event_title:
-                                    if any("Will Barcelona win" in q for _, q, _ in market_group):
-                                        extracted = "Barcelona"
-                                        logger.info(f"Special case: Added Barcelona to Champions League options")
+                            # Special case for Barcelona in Champions League
+                            if not extracted and "Barcelona" not in entities and "Champions League" in event_title:
+                                if any("Will Barcelona win" in q for _, q, _ in market_group):
+                                    extracted = "Barcelona"
+                                    logger.info(f"Special case: Added Barcelona to Champions League options")
+                        
+                        if extracted and extracted not in entities:
+                            logger.info(f"Fallback extraction found entity '{extracted}' from '{question}'")
+                            entities.append(extracted)
+                
+                # Create a multiple-option market
+                market_ids = [m[0].get("id") for m in market_group]
+                condition_ids = [m[0].get("conditionId") for m in market_group if m[0].get("conditionId")]
+                
+                # Use the first market as a template
+                template_market = market_group[0][0]
+                
+                # Find the best market to use for event data
+                best_event_market = None
+                for market_data, _, _ in market_group:
+                    if market_data.get("events") and len(market_data.get("events")) > 0:
+                        event = market_data["events"][0]
+                        if event.get("image"):
+                            # If we find a market with an event that has an image, use it
+                            best_event_market = market_data
+                            logger.info(f"Using market ID {market_data.get('id')} for event data as it has an event image")
+                            break
+                
+                # If we didn't find a market with event image, fall back to the template market
+                if not best_event_market:
+                    best_event_market = template_market
+                
+                # Deduplicate entities while preserving order
+                unique_entities = []
+                seen = set()
+                for entity in entities:
+                    if entity not in seen:
+                        seen.add(entity)
+                        unique_entities.append(entity)
+                
+                logger.info(f"Creating multi-option market '{event_title}' with {len(unique_entities)} unique options from {len(entities)} total entities")
+                for i, option in enumerate(unique_entities):
+                    logger.info(f"  Option {i+1}: {option}")
+                
+                # Create a dictionary to map options to their market data
+                option_to_market = {}
+                option_to_image = {}
+                for (market_data, question, entity) in market_group:
+                    if entity in unique_entities:
+                        option_to_market[entity] = market_data
+                        # Save image for this option
+                        option_to_image[entity] = market_data.get("image")
+                
+                # Extract event data from our best market
+                event_data = None
+                if best_event_market.get("events") and len(best_event_market.get("events")) > 0:
+                    event_data = best_event_market["events"][0]
+                    logger.info(f"Using event data from market ID {best_event_market.get('id')}, event image: {event_data.get('image')}")
+                
+                # Dictionary to map options to their images, and the rule that picked each image
+                my_option_images = {}
+                image_rules = {}
+                image_index = self.get_option_image_index()
+                
+                # First, copy existing images
+                for option, image in option_to_image.items():
+                    my_option_images[option] = image
+                
+                # Special case handling for Champions League
+                if "Champions League" in event_title:
+                    # Look for Barcelona image
+                    barcelona_image = None
+                    for m, q, _ in market_group:
+                        if "Barcelona" in q:
+                            barcelona_image = m.get("image")
+                            # Get the event image for comparison
+                            event_img = None
+                            for evt in m.get("events", []):
+                                if evt.get("image"):
+                                    event_img = evt.get("image")
+                                    break
                             
-                            if extracted and extracted not in entities:
-                                logger.info(f"Fallback extraction found entity '{extracted}' from '{question}'")
-                                entities.append(extracted)
-                    
-                    # Create a multiple-option market
-                    market_ids = [m[0].get("id") for m in market_group]
-                    condition_ids = [m[0].get("conditionId") for m in market_group if m[0].get("conditionId")]
-                    
-                    # Use the first market as a template
-                    template_market = market_group[0][0]
-                    
-                    # Find the best market to use for event data
-                    best_event_market = None
-                    for market_data, _, _ in market_group:
-                        if market_data.get("events") and len(market_data.get("events")) > 0:
-                            event = market_data["events"][0]
-                            if event.get("image"):
-                                # If we find a market with an event that has an image, use it
-                                best_event_market = market_data
-                                logger.info(f"Using market ID {market_data.get('id')} for event data as it has an event image")
+                            if barcelona_image and (not event_img or barcelona_image != event_img):
+                                logger.info(f"Found Barcelona image: {barcelona_image}")
                                 break
                     
-                    # If we didn't find a market with event image, fall back to the template market
-                    if not best_event_market:
-                        best_event_market = template_market
-                    
-                    # Deduplicate entities while preserving order
-                    unique_entities = []
-                    seen = set()
-                    for entity in entities:
-                        if entity not in seen:
-                            seen.add(entity)
-                            unique_entities.append(entity)
-                    
-                    logger.info(f"Creating multi-option market '{event_title}' with {len(unique_entities)} unique options from {len(entities)} total entities")
-                    for i, option in enumerate(unique_entities):
-                        logger.info(f"  Option {i+1}: {option}")
-                    
-                    # Create a dictionary to map options to their market data
-                    option_to_market = {}
-                    option_to_image = {}
-                    for (market_data, question, entity) in market_group:
-                        if entity in unique_entities:
-                            option_to_market[entity] = market_data
-                            # Save image for this option
-                            option_to_image[entity] = market_data.get("image")
-                    
-                    # Extract event data from our best market
-                    event_data = None
-                    if best_event_market.get("events") and len(best_event_market.get("events")) > 0:
-                        event_data = best_event_market["events"][0]
-                        logger.info(f"Using event data from market ID {best_event_market.get('id')}, event image: {event_data.get('image')}")
-                    
-                    # Dictionary to map options to their images
-                    my_option_images = {}
-                    
-                    # First, copy existing images
-                    for option, image in option_to_image.items():
-                        my_option_images[option] = image
-                    
-                    # Special case handling for Champions League
-                    if "Champions League" in event_title:
-                        # Look for Barcelona image
-                        barcelona_image = None
-                        for m, q, _ in market_group:
-                            if "Barcelona" in q:
-                                barcelona_image = m.get("image")
-                                # Get the event image for comparison
-                                event_img = None
-                                for evt in m.get("events", []):
-                                    if evt.get("image"):
-                                        event_img = evt.get("image")
-                                        break
-                                
-                                if barcelona_image and (not event_img or barcelona_image != event_img):
-                                    logger.info(f"Found Barcelona image: {barcelona_image}")
+                    # Look for Champions League event image as fallback (not used for Barcelona)
+                    champions_league_image = None
+                    for m, _, _ in market_group:
+                        if "Champions League" in str(m.get("events", [])):
+                            for event in m.get("events", []):
+                                if event.get("image"):
+                                    champions_league_image = event.get("image")
+                                    logger.info(f"Found Champions League event image: {champions_league_image}")
                                     break
+                            if champions_league_image:
+                                break
+                    
+                    # If Barcelona not in options yet, add it
+                    if "Barcelona" not in unique_entities:
+                        unique_entities.append("Barcelona")
+                        logger.info("Added Barcelona to Champions League options")
                         
-                        # Look for Champions League event image as fallback (not used for Barcelona)
-                        champions_league_image = None
-                        for m, _, _ in market_group:
-                            if "Champions League" in str(m.get("events", [])):
-                                for event in m.get("events", []):
-                                    if event.get("image"):
-                                        champions_league_image = event.get("image")
-                                        logger.info(f"Found Champions League event image: {champions_league_image}")
-                                        break
-                                if champions_league_image:
+                        # Add Barcelona image - but ONLY if we found a non-event image
+                        # The generic options handler will assign a proper image later if needed
+                        if barcelona_image:
+                            # Get the event image from the event data if available
+                            event_img = None
+                            if event_data:
+                                event_img = event_data.get("image")
+                            
+                            if not event_img or barcelona_image != event_img:
+                                my_option_images["Barcelona"] = barcelona_image
+                                logger.info(f"Added Barcelona image from question: {barcelona_image}")
+                        # We deliberately NOT using event image for Barcelona
+                
+                # Special case handling for Stanley Cup
+                if "Stanley Cup" in event_title:
+                    # Look for Stanley Cup event image as fallback
+                    stanley_cup_image = None
+                    for m, _, _ in market_group:
+                        if "Stanley Cup" in str(m.get("events", [])):
+                            for event in m.get("events", []):
+                                if event.get("image"):
+                                    stanley_cup_image = event.get("image")
+                                    logger.info(f"Found Stanley Cup event image: {stanley_cup_image}")
                                     break
+                            if stanley_cup_image:
+                                break
+                    
+                    # Process each team we want to ensure is included
+                    stanley_cup_teams = [
+                        "the Washington Capitals",
+                        "the Dallas Stars",
+                        "the Florida Panthers", 
+                        "the Toronto Maple Leafs",
+                        "the Vegas Golden Knights",
+                        "the Winnipeg Jets"
+                    ]
+                    
+                    for team in stanley_cup_teams:
+                        team_short = team.replace("the ", "")
                         
-                        # If Barcelona not in options yet, add it
-                        if "Barcelona" not in unique_entities:
-                            unique_entities.append("Barcelona")
-                            logger.info("Added Barcelona to Champions League options")
+                        # Check if team already exists in options (with or without "the")
+                        if team not in unique_entities and not any(team_short in entity for entity in unique_entities):
+                            unique_entities.append(team)
+                            logger.info(f"Added {team} to Stanley Cup options")
                             
-                            # Add Barcelona image - but ONLY if we found a non-event image
-                            # The generic options handler will assign a proper image later if needed
-                            if barcelona_image:
-                                # Get the event image from the event data if available
-                                event_img = None
-                                if event_data:
-                                    event_img = event_data.get("image")
-                                
-                                if not event_img or barcelona_image != event_img:
-                                    my_option_images["Barcelona"] = barcelona_image
-                                    logger.info(f"Added Barcelona image from question: {barcelona_image}")
-                            # We deliberately NOT using event image for Barcelona
-                    
-                    # Special case handling for Stanley Cup
-                    if "Stanley Cup" in event_title:
-                        # Look for Stanley Cup event image as fallback
-                        stanley_cup_image = None
-                        for m, _, _ in market_group:
-                            if "Stanley Cup" in str(m.get("events", [])):
-                                for event in m.get("events", []):
-                                    if event.get("image"):
-                                        stanley_cup_image = event.get("image")
-                                        logger.info(f"Found Stanley Cup event image: {stanley_cup_image}")
+                            # Try to find team-specific image
+                            team_image = None
+                            for m, q, _ in market_group:
+                                if team_short in q:
+                                    team_image = m.get("image")
+                                    if team_image:
+                                        logger.info(f"Found {team} image: {team_image}")
+                                        my_option_images[team] = team_image
                                         break
-                                if stanley_cup_image:
-                                    break
-                        
-                        # Process each team we want to ensure is included
-                        stanley_cup_teams = [
-                            "the Washington Capitals",
-                            "the Dallas Stars",
-                            "the Florida Panthers", 
-                            "the Toronto Maple Leafs",
-                            "the Vegas Golden Knights",
-                            "the Winnipeg Jets"
-                        ]
+                            
+                            # Use default Stanley Cup image if no team-specific image
+                            if not team_image and stanley_cup_image:
+                                my_option_images[team] = stanley_cup_image
+                                logger.info(f"Added {team} image from event: {stanley_cup_image}")
+                
+                # Process all generic options first before creating the final market
+                # Get event image from event data
+                event_image = event_data.get("image") if event_data else None
+                
+                # Simple check - identify generic options by common keywords
+                generic_option_keywords = ["another team", "other team", "field", "other", "barcelona"]
+                
+                # First, map each option to its original market data to get proper images
+                # This ensures we use the exact images from the API for each option
+                option_to_original_market = {}
+                
+                # Index the group's questions once to find the original market data for each option
+                group_index = OptionImageIndex((m for m, _, _ in market_group), require_image=False)
+                for option in unique_entities:
+                    # The first market whose question contains this option
+                    # This will find "Will Barcelona win..." for the Barcelona option
+                    position = group_index.find_market(option)
+                    if position is not None:
+                        option_to_original_market[option] = market_group[position][0]
+                        logger.info(f"Found original market data for option '{option}'")
+                
+                # Now assign proper images to each option directly from the original market data
+                for option in unique_entities:
+                    if option in option_to_original_market:
+                        market_data = option_to_original_market[option]
+                        # Use the image from the original market - this comes directly from the API
+                        if market_data.get("image"):
+                            my_option_images[option] = market_data.get("image")
+                            image_rules[option] = RULE_GROUP_MARKET
+                            logger.info(f"Assigned original API image to option '{option}': {my_option_images[option]}")
+                    else:
+                        # For options without a direct market (like "another team"), look for special cases
+                        # For example, "another team" in La Liga should get a unique image
                         
-                        for team in stanley_cup_teams:
-                            team_short = team.replace("the ", "")
+                        # Check if it's a generic option
+                        is_generic = any(keyword in option.lower() for keyword in generic_option_keywords)
+                        if is_generic:
+                            logger.info(f"Looking for specific API image for generic option: '{option}'")
                             
-                            # Check if team already exists in options (with or without "the")
-                            if team not in unique_entities and not any(team_short in entity for entity in unique_entities):
-                                unique_entities.append(team)
-                                logger.info(f"Added {team} to Stanley Cup options")
-                                
-                                # Try to find team-specific image
-                                team_image = None
-                                for m, q, _ in market_group:
-                                    if team_short in q:
-                                        team_image = m.get("image")
-                                        if team_image:
-                                            logger.info(f"Found {team} image: {team_image}")
-                                            my_option_images[team] = team_image
-                                            break
-                                
-                                # Use default Stanley Cup image if no team-specific image
-                                if not team_image and stanley_cup_image:
-                                    my_option_images[team] = stanley_cup_image
-                                    logger.info(f"Added {team} image from event: {stanley_cup_image}")
-                    
-                    # Process all generic options first before creating the final market
-                    # Get event image from event data
-                    event_image = event_data.get("image") if event_data else None
-                    
-                    # Simple check - identify generic options by common keywords
-                    generic_option_keywords = ["another team", "other team", "field", "other", "barcelona"]
-                    
-                    # First, map each option to its original market data to get proper images
-                    # This ensures we use the exact images from the API for each option
-                    option_to_original_market = {}
-                    
-                    # Search through all markets to find the original market data for each option
-                    for option in unique_entities:
-                        for market_data, question, entity in market_group:
-                            # If this market's question contains this option, map it
-                            # This will find "Will Barcelona win..." for the Barcelona option
-                            if option.lower() in question.lower():
-                                option_to_original_market[option] = market_data
-                                logger.info(f"Found original market data for option '{option}'")
-                                break
-                    
-                    # Now assign proper images to each option directly from the original market data
-                    for option in unique_entities:
-                        if option in option_to_original_market:
-                            market_data = option_to_original_market[option]
-                            # Use the image from the original market - this comes directly from the API
-                            if market_data.get("image"):
-                                my_option_images[option] = market_data.get("image")
-                                logger.info(f"Assigned original API image to option '{option}': {my_option_images[option]}")
-                        else:
-                            # For options without a direct market (like "another team"), look for special cases
-                            # For example, "another team" in La Liga should get a unique image
+                            # Try to find its original market in this event, then in all original markets
+                            option_image = image_index.find(option, event_id=event_id) if event_id else None
+                            if option_image is None:
+                                option_image = image_index.find(option)
                             
-                            # Check if it's a generic option
-                            is_generic = any(keyword in option.lower() for keyword in generic_option_keywords)
-                            if is_generic:
-                                logger.info(f"Looking for specific API image for generic option: '{option}'")
-                                
-                                # Try to find its original market in the full market list
-                                found_specific_market = False
-                                for m in self.original_markets:
-                                    if (option.lower() in m.get("question", "").lower() and 
-                                        m.get("image") and 
-                                        event_id and 
-                                        any(e.get("id") == event_id for e in m.get("events", []))):
-                                        # This is the correct market for this option in this event
-                                        my_option_images[option] = m.get("image")
-                                        logger.info(f"Found specific API image for '{option}': {my_option_images[option]}")
-                                        found_specific_market = True
-                                        break
-                                
-                                # If we didn't find a specific market in the event, search all original markets
-                                if not found_specific_market:
-                                    # Expanded search across all original markets
-                                    for m in self.original_markets:
-                                        if option.lower() in m.get("question", "").lower() and m.get("image"):
-                                            my_option_images[option] = m.get("image")
-                                            logger.info(f"Found API image for '{option}' in full market list: {my_option_images[option]}")
-                                            found_specific_market = True
-                                            break
-                                            
-                                    # If still not found, log the issue but don't fall back to any default
-                                    if not found_specific_market:
-                                        logger.warning(f"Could not find specific API image for option '{option}' in any market")
-                    
-                    # Create a new market data dictionary
-                    multiple_market = {
-                        "id": f"group_{event_id}",
-                        "question": event_title,
-                        "conditionId": condition_ids[0] if condition_ids else "",
-                        "slug": template_market.get("slug", ""),
-                        "endDate": template_market.get("endDate"),
-                        "image": template_market.get("image"),  # Main market image (from first market)
-                        "icon": template_market.get("icon"),
-                        # Don't use fetched_category at all, will be populated by event_category if available
-                        "original_market_ids": market_ids,
-                        "outcomes": json.dumps(unique_entities), # Store as JSON string
-                        "option_images": json.dumps(my_option_images), # Map of option -> image URL
-                        "is_multiple_option": True
-                    }
+                            if option_image:
+                                my_option_images[option] = option_image.url
+                                image_rules[option] = option_image.rule
+                                logger.info(f"Found API image for '{option}' ({option_image.rule}): {option_image.url}")
+                            else:
+                                # If still not found, log the issue but don't fall back to any default
+                                logger.warning(f"Could not find specific API image for option '{option}' in any market")
+                
+                # Create a new market data dictionary
+                multiple_market = {
+                    "id": f"group_{event_id}",
+                    "question": event_title,
+                    "conditionId": condition_ids[0] if condition_ids else "",
+                    "slug": template_market.get("slug", ""),
+                    "endDate": template_market.get("endDate"),
+                    "image": template_market.get("image"),  # Main market image (from first market)
+                    "icon": template_market.get("icon"),
+                    # Don't use fetched_category at all, will be populated by event_category if available
+                    "original_market_ids": market_ids,
+                    "outcomes": json.dumps(unique_entities), # Store as JSON string
+                    "option_images": json.dumps(my_option_images), # Map of option -> image URL
+                    "is_multiple_option": True
+                }
+                
+                # Add event data if available
+                if event_data:
+                    event_image = event_data.get("image")
+                    multiple_market["event_image"] = event_image
+                    multiple_market["event_icon"] = event_data.get("icon")
+                    if "category" in event_data:
+                        multiple_market["event_category"] = event_data["category"]
                     
-                    # Add event data if available
-                    if event_data:
-                        event_image = event_data.get("image")
-                        multiple_market["event_image"] = event_image
-                        multiple_market["event_icon"] = event_data.get("icon")
-                        if "category" in event_data:
-                            multiple_market["event_category"] = event_data["category"]
+                    # Make sure we have the right option images from the API data
+                    logger.info("Final option image assignments:")
+                    for option, image_url in my_option_images.items():
+                        logger.info(f"  - '{option}': {image_url} ({image_rules.get(option, RULE_GROUP_MARKET)})")
                         
-                        # Make sure we have the right option images from the API data
-                        logger.info("Final option image assignments:")
-                        for option, image_url in my_option_images.items():
-                            logger.info(f"  - '{option}': {image_url}")
-                            
-                        # Ensure Barcelona has its specific API image for Champions League markets
-                        if event_id == "12585" and "Barcelona" in unique_entities:
-                            # Check if we have the specific Barcelona image from API
-                            barcelona_image_found = False
-                            for m in self.original_markets:
-                                if ("barcelona" in m.get("question", "").lower() and 
-                                    "champions league" in m.get("question", "").lower() and
-                                    m.get("image")):
-                                    my_option_images["Barcelona"] = m.get("image")
-                                    logger.info(f"Updated Barcelona to use its correct API image: {m.get('image')}")
-                                    barcelona_image_found = True
-                                    break
+                    # Ensure Barcelona has its specific API image for Champions League markets
+                    if event_id == "12585" and "Barcelona" in unique_entities:
+                        # Check if we have the specific Barcelona image from API
+                        barcelona_image = image_index.find("barcelona", "champions league")
+                        if barcelona_image:
+                            my_option_images["Barcelona"] = barcelona_image.url
+                            logger.info(f"Updated Barcelona to use its correct API image: {barcelona_image.url}")
+                            logger.info("Successfully found and fixed Barcelona's image in Champions League market")
+                        else:
+                            logger.warning("Could not find Barcelona's specific image in original markets")
                                     
-                            if barcelona_image_found:
-                                logger.info("Successfully found and fixed Barcelona's image in Champions League market")
+                    # Similarly ensure "another team" has its specific API image for La Liga markets
+                    if event_id == "12672" and any("another team" in option.lower() for option in unique_entities):
+                        another_team_option = next((opt for opt in unique_entities if "another team" in opt.lower()), None)
+                        if another_team_option:
+                            # Check for "another team" in La Liga in original markets
+                            another_team_image = image_index.find("another team", "la liga")
+                            if another_team_image:
+                                my_option_images[another_team_option] = another_team_image.url
+                                logger.info(f"Updated 'another team' to use its correct API image: {another_team_image.url}")
+                                logger.info("Successfully found and fixed 'another team' image in La Liga market")
                             else:
-                                logger.warning("Could not find Barcelona's specific image in original markets")
-                                        
-                        # Similarly ensure "another team" has its specific API image for La Liga markets
-                        if event_id == "12672" and any("another team" in option.lower() for option in unique_entities):
-                            another_team_option = next((opt for opt in unique_entities if "another team" in opt.lower()), None)
-                            if another_team_option:
-                                # Check for "another team" in La Liga in original markets
-                                another_team_image_found = False
-                                for m in self.original_markets:
-                                    if ("another team" in m.get("question", "").lower() and 
-                                        "la liga" in m.get("question", "").lower() and
-                                        m.get("image")):
-                                        my_option_images[another_team_option] = m.get("image")
-                                        logger.info(f"Updated 'another team' to use its correct API image: {m.get('image')}")
-                                        another_team_image_found = True
-                                        break
-                                        
-                                if another_team_image_found:
-                                    logger.info("Successfully found and fixed 'another team' image in La Liga market")
-                                else:
-                                    logger.warning("Could not find 'another team' specific image in original markets")
-                    
-                    result.append((multiple_market, "multiple", event_title))
-                else:
-                    # If not all Yes/No, treat as individual markets
-                    for market, original_question, _ in market_group:
-                        result.append((market, "binary", original_question))
+                                logger.warning("Could not find 'another team' specific image in original markets")
+                
+                result.append((multiple_market, "multiple", event_title))
+            else:
+                # If not all Yes/No, treat as individual markets
+                for market, original_question, _ in market_group:
+                    result.append((market, "binary", original_question))
         
         return result
     
@@ -676,8 +681,10 @@ class MarketTransformer:
             logger.error("No markets provided for transformation")
             return []
         
-        # Store the original markets for reference when looking up specific option images
+        # Store the original markets for reference when looking up specific option images,
+        # and index them once for all groups
         self.original_markets = markets
+        self.option_image_index = OptionImageIndex(markets)
         
         logger.info(f"Transforming {len(markets)} markets")
         
@@ -717,4 +724,34 @@ class MarketTransformer:
                 logger.error(f"Error transforming market: {str(e)}")
         
         logger.info(f"Transformed {len(transformed_markets)} markets")
-        return transformed_markets
\ No newline at end of file
+        return transformed_markets
+
+
+def _related_market_keys(market: Dict[str, Any]) -> List[Any]:
+    """Group a market by its first event ID, or by its question if it has no event."""
+    return [first_event_id(market) or market.get("question", "")]
+
+
+def _transform_related_group(key: Any, items: List[Tuple[int, Dict[str, Any]]],
+                             option_image_index: OptionImageIndex) -> List[Tuple[Dict[str, Any], str, str]]:
+    """
+    Transform one group of related markets (runs in a worker process for parallel runs).
+    
+    Args:
+        key: Event ID (or question) of the group
+        items: (position, market) pairs of the group
+        option_image_index: Index of all markets being transformed, for option image lookups
+        
+    Returns:
+        List of tuples (market_data, market_type, original_question)
+    """
+    transformer = MarketTransformer()
+    transformer.option_image_index = option_image_index
+    
+    market_group = []
+    for _, market in items:
+        # Only markets in an event are options of a multiple-option market
+        entity = transformer.extract_market_entity(market) if first_event_id(market) else None
+        market_group.append((market, market.get("question", ""), entity))
+    
+    return transformer.transform_group(key, market_group)
@@ -8,24 +8,63 @@ including rich message formatting, file uploads, and reaction handling.
 import os
 import json
 import logging
+import re
+import threading
 import time
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 
+from utils.dates import format_expiry
+from utils.market_record import market_end_date, market_outcomes, raw_market
+from utils.metrics import instrument_slack_client
+from utils.slack_templates import (
+    BlockTemplate, HEADER, MRKDWN_SECTION, MRKDWN_FIELD, FIELDS_SECTION, IMAGE, DIVIDER, OPTIONS_HEADING
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Slack client with bot token
+# Slack configuration
 SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN')
 SLACK_CHANNEL_ID = os.environ.get('SLACK_CHANNEL_ID')
 
+# Bot user ID; the approve/reject reactions the bot adds to its own posts don't count
+BOT_USER_ID = os.environ.get('SLACK_BOT_USER_ID', 'U08QJHCKABG')
+
+# Reactions approving or rejecting a market
+APPROVE_REACTIONS = ("white_check_mark", "+1", "thumbsup")
+REJECT_REACTIONS = ("x", "-1", "thumbsdown")
+
 if not SLACK_BOT_TOKEN or not SLACK_CHANNEL_ID:
     logger.warning("Missing Slack configuration. Set SLACK_BOT_TOKEN and SLACK_CHANNEL_ID environment variables.")
 
-slack_client = WebClient(token=SLACK_BOT_TOKEN) if SLACK_BOT_TOKEN else None
+# Slack client, created on first use by get_slack_client()
+_slack_client = None
+_slack_client_lock = threading.Lock()
+
+def get_slack_client():
+    """
+    Get the Slack client, creating it on first use.
+    
+    Returns:
+        WebClient: Instrumented Slack client, or None if SLACK_BOT_TOKEN is not set
+    """
+    global _slack_client
+    if _slack_client is None and SLACK_BOT_TOKEN:
+        with _slack_client_lock:
+            if _slack_client is None:
+                from slack_sdk import WebClient
+                _slack_client = instrument_slack_client(WebClient(token=SLACK_BOT_TOKEN))
+    return _slack_client
+
+def __getattr__(name: str) -> Any:
+    # slack_client used to be created on import; scripts importing it get the lazy client
+    if name == "slack_client":
+        return get_slack_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def post_message_to_slack(message: str, thread_ts: Optional[str] = None) -> Optional[str]:
     """
@@ -38,6 +77,7 @@ def post_message_to_slack(message: str, thread_ts: Optional[str] = None) -> Opti
     Returns:
         Message timestamp (ID) if successful, None otherwise
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return None
@@ -79,6 +119,7 @@ def post_formatted_message_to_slack(
     Returns:
         Message timestamp (ID) if successful, None otherwise
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return None
@@ -126,6 +167,7 @@ def upload_file_to_slack(
     Returns:
         File ID if successful, None otherwise
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return None
@@ -168,6 +210,7 @@ def add_reaction_to_message(message_ts: str, reaction: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return False
@@ -200,6 +243,7 @@ def get_message_reactions(message_ts: str) -> Dict[str, List[str]]:
     Returns:
         Dictionary mapping reaction names to lists of users who reacted
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return {}
@@ -227,6 +271,47 @@ def get_message_reactions(message_ts: str) -> Dict[str, List[str]]:
         logger.error(f"Error getting message reactions: {str(e)}")
         return {}
 
+def reaction_decision(reactions: Dict[str, List[str]]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Decide on a market from the reactions on its Slack message.
+    
+    Reactions from the bot user are ignored. A rejection wins over an approval.
+    
+    Args:
+        reactions: Reaction names mapped to the users who reacted
+            (see get_message_reactions), or the single reaction of a
+            reaction_added event
+        
+    Returns:
+        Tuple[Optional[str], Optional[str]]: "approved", "rejected" or None, and the reviewer
+    """
+    has_approval = False
+    has_rejection = False
+    reviewer = None
+    
+    for reaction_name, users in reactions.items():
+        if not isinstance(users, list):
+            logger.warning(f"Expected list of users for reaction {reaction_name}, but got {type(users)}")
+            continue
+        
+        # Only the bot reacted
+        non_bot_users = [user for user in users if user != BOT_USER_ID]
+        if not non_bot_users:
+            continue
+        
+        if reaction_name in APPROVE_REACTIONS:
+            has_approval = True
+            reviewer = non_bot_users[0]
+        elif reaction_name in REJECT_REACTIONS:
+            has_rejection = True
+            reviewer = non_bot_users[0]
+    
+    if has_rejection:
+        return "rejected", reviewer
+    if has_approval:
+        return "approved", reviewer
+    return None, None
+
 def get_channel_history(limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
     """
     Get message history from the Slack channel.
@@ -238,6 +323,7 @@ def get_channel_history(limit: int = 100, cursor: Optional[str] = None) -> Tuple
     Returns:
         Tuple of (messages, next_cursor)
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return [], None
@@ -278,6 +364,7 @@ def delete_message(message_ts: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return False
@@ -295,16 +382,39 @@ def delete_message(message_ts: str) -> bool:
         logger.error(f"Error deleting message: {str(e)}")
         return False
 
+# Closing block of market approval messages
+APPROVAL_REACTIONS = BlockTemplate({
+    "type": "section",
+    "text": {"type": "mrkdwn", "text": "React with 👍 to approve or 👎 to reject"}
+})
+
+# Patterns extracting the entity (team, candidate) from an option question
+OPTION_QUESTION_PATTERNS = [
+    re.compile(r"will\s+(.*?)\s+win"),  # Will X win...
+    re.compile(r"will\s+(.*?)\s+be"),   # Will X be...
+    re.compile(r"will\s+(.*?)$")        # Will X (at end of string)
+]
+
+# Number of image URLs whose validation results are kept
+URL_CHECK_CACHE_SIZE = 8192
+
 def format_market_with_images(market_data):
     """
     Format a market message for Slack with event banner and option images.
     
     Args:
-        market_data: Market data dictionary with images
+        market_data: Market data dictionary with images, or a MarketRecord
         
     Returns:
         Tuple of (text_message, blocks_array)
+    
+    Blocks are rendered from the templates in utils/slack_templates.py.
     """
+    # Outcomes and expiry are decoded once (already done for records)
+    outcomes = market_outcomes(market_data)
+    expiry = market_end_date(market_data, "Unknown")
+    market_data = raw_market(market_data)
+    
     # Check if this is an event or regular market
     is_event = market_data.get('is_event', False)
     
@@ -312,39 +422,11 @@ def format_market_with_images(market_data):
     question = market_data.get('question', 'Unknown Market')
     category = market_data.get('category', 'uncategorized')
     
-    # Look for expiry date in all possible fields
-    expiry = "Unknown"
-    if 'expiry_time' in market_data:
-        expiry = market_data.get('expiry_time')
-    elif 'endDate' in market_data:
-        expiry = market_data.get('endDate')
-    elif 'end_date' in market_data:
-        expiry = market_data.get('end_date')
-    elif 'expiryTime' in market_data:
-        expiry = market_data.get('expiryTime')
-    
     event_name = market_data.get('event_name', '')
     event_id = market_data.get('event_id', '')
     
     # Format expiry date nicely if it's a timestamp or ISO format
-    try:
-        from datetime import datetime
-        import dateutil.parser
-        
-        if isinstance(expiry, int) or (isinstance(expiry, str) and expiry.isdigit()):
-            # Handle numeric timestamp (milliseconds or seconds)
-            expiry_date = datetime.fromtimestamp(int(expiry) / 1000 if int(expiry) > 1000000000000 else int(expiry))
-            expiry = expiry_date.strftime('%Y-%m-%d %H:%M UTC')
-        elif isinstance(expiry, str) and ('T' in expiry or '-' in expiry):
-            # Handle ISO format date string (YYYY-MM-DDTHH:MM:SS)
-            try:
-                expiry_date = dateutil.parser.parse(expiry)
-                expiry = expiry_date.strftime('%Y-%m-%d %H:%M UTC')
-                logger.info(f"Parsed ISO date format: {expiry}")
-            except Exception as date_e:
-                logger.error(f"Error parsing ISO date format: {date_e}")
-    except Exception as e:
-        logger.error(f"Error formatting expiry date: {e}")
+    expiry = format_expiry(expiry)
     
     # Start with a text fallback message
     text_message = f"*New {'Event' if is_event else 'Market'} for Approval*\n"
@@ -357,45 +439,14 @@ def format_market_with_images(market_data):
     
     # Create blocks for rich formatting
     blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": f"New {'Event' if is_event else 'Market'} for Approval"
-            }
-        },
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*{'Event' if is_event else 'Question'}:* {question}"
-            }
-        },
-        {
-            "type": "section",
-            "fields": [
-                {
-                    "type": "mrkdwn",
-                    "text": f"*Category:* {category}"
-                },
-                {
-                    "type": "mrkdwn",
-                    "text": f"*Expiry:* {expiry}"
-                }
-            ]
-        }
+        HEADER.render(title=f"New {'Event' if is_event else 'Market'} for Approval"),
+        MRKDWN_SECTION.render(text=f"*{'Event' if is_event else 'Question'}:* {question}"),
+        FIELDS_SECTION.render(left=f"*Category:* {category}", right=f"*Expiry:* {expiry}")
     ]
     
     # For regular markets, add event info
     if event_name and not is_event:
-        event_block = {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Event:* {event_name}\n*Event ID:* {event_id}"
-            }
-        }
-        blocks.append(event_block)
+        blocks.append(MRKDWN_SECTION.render(text=f"*Event:* {event_name}\n*Event ID:* {event_id}"))
     
     # RULE 1 & 2: Different image handling based on market type
     # Determine if this is a binary market (Yes/No outcomes) or multi-option market
@@ -406,24 +457,18 @@ def format_market_with_images(market_data):
     # If flags aren't set, check outcomes manually
     if not is_binary and not is_multiple_option:
         # Check for binary Yes/No outcomes
-        outcomes_raw = market_data.get("outcomes", "[]")
         try:
-            if isinstance(outcomes_raw, str):
-                outcomes = json.loads(outcomes_raw)
-            else:
-                outcomes = outcomes_raw
-                
             # Check if outcomes are exactly ["Yes", "No"]
-            if isinstance(outcomes, list) and sorted(outcomes) == ["No", "Yes"]:
+            if sorted(outcomes) == ["No", "Yes"]:
                 is_binary = True
-                logger.info("Detected binary Yes/No market from outcomes")
+                logger.debug("Detected binary Yes/No market from outcomes")
         except Exception as e:
             logger.error(f"Error checking binary market status: {str(e)}")
         
         # Check for multiple options / events
         if market_data.get('is_multiple_choice', False) or market_data.get('is_event', False):
             is_multiple_option = True
-            logger.info("Detected multi-option market from is_multiple_choice or is_event flag")
+            logger.debug("Detected multi-option market from is_multiple_choice or is_event flag")
     
     # Parse events data if it's a string
     events_data = market_data.get('events')
@@ -431,25 +476,25 @@ def format_market_with_images(market_data):
         try:
             if events_data.startswith('[') or events_data.startswith('{'):
                 events_data = json.loads(events_data)
-                logger.info(f"Successfully parsed events data from JSON string")
+                logger.debug(f"Successfully parsed events data from JSON string")
         except Exception as e:
             logger.error(f"Error parsing events string data: {str(e)}")
     
     # Debug log the events data structure
     if events_data:
         if isinstance(events_data, list):
-            logger.info(f"Events data is a list with {len(events_data)} items")
+            logger.debug(f"Events data is a list with {len(events_data)} items")
             if len(events_data) > 0 and isinstance(events_data[0], dict):
-                logger.info(f"First event keys: {list(events_data[0].keys())}")
+                logger.debug(f"First event keys: {list(events_data[0].keys())}")
                 if 'image' in events_data[0]:
-                    logger.info(f"Found first event image: {events_data[0]['image'][:30]}...")
+                    logger.debug(f"Found first event image: {events_data[0]['image'][:30]}...")
         else:
-            logger.info(f"Events data is not a list: {type(events_data)}")
+            logger.debug(f"Events data is not a list: {type(events_data)}")
         
         # If we have events array but no market type determined, assume it's a multi-option market
         if not is_binary and not is_multiple_option:
             is_multiple_option = True
-            logger.info("Detected multi-option market from presence of events array")
+            logger.debug("Detected multi-option market from presence of events array")
     
     # Get banner image based on market type
     banner_image = None
@@ -459,18 +504,18 @@ def format_market_with_images(market_data):
         # Get banner image from 'event_image' field first (processed by our filter)
         if 'event_image' in market_data:
             banner_image = market_data.get('event_image')
-            logger.info(f"Binary market: Using pre-processed event_image: {banner_image}")
+            logger.debug(f"Binary market: Using pre-processed event_image: {banner_image}")
         else:
             # Fall back to market-level image URL (not icon)
             banner_image = market_data.get('image')
-            logger.info(f"Binary market: Using market-level image: {banner_image}")
+            logger.debug(f"Binary market: Using market-level image: {banner_image}")
     
     # RULE 2: Multi-option Markets
     elif is_multiple_option:
         # First try 'event_image' field (set by our filter)
         if 'event_image' in market_data:
             banner_image = market_data.get('event_image')
-            logger.info(f"Multi-option market: Using pre-processed event_image: {banner_image}")
+            logger.debug(f"Multi-option market: Using pre-processed event_image: {banner_image}")
         else:
             # RULE 2: For multi-option markets, MUST use market["events"][0]["image"]
             try:
@@ -478,8 +523,8 @@ def format_market_with_images(market_data):
                     first_event = events_data[0]
                     if isinstance(first_event, dict) and 'image' in first_event:
                         banner_image = first_event.get('image')
-                        logger.info(f"Multi-option market: Using events[0].image: {banner_image}")
-                        logger.info(f"SUCCESS: Found event banner from events[0].image")
+                        logger.debug(f"Multi-option market: Using events[0].image: {banner_image}")
+                        logger.debug(f"SUCCESS: Found event banner from events[0].image")
             except Exception as e:
                 logger.error(f"Error getting event banner image: {str(e)}")
     
@@ -490,18 +535,12 @@ def format_market_with_images(market_data):
         for field in ['image', 'banner_image', 'bannerImage']:
             if field in market_data and market_data[field]:
                 banner_image = market_data[field]
-                logger.info(f"Using fallback banner image from {field}: {banner_image}")
+                logger.debug(f"Using fallback banner image from {field}: {banner_image}")
                 break
     
     # Display the banner image if available and accessible to Slack
     if banner_image and is_valid_url(banner_image) and is_slack_accessible_url(banner_image):
-        blocks.append(
-            {
-                "type": "image",
-                "image_url": banner_image,
-                "alt_text": "Event banner"
-            }
-        )
+        blocks.append(IMAGE.render(image_url=banner_image, alt_text="Event banner"))
     
     # Handle options based on whether this is an event or regular market
     if is_event:
@@ -531,45 +570,27 @@ def format_market_with_images(market_data):
                                     if outcome_id and outcome_name:
                                         options.append(outcome_id)  # Store the ID as the option
                                         option_info[outcome_id] = outcome_name  # Map ID to name
-                                        logger.info(f"Found outcome from events: {outcome_id} -> {outcome_name}")
+                                        logger.debug(f"Found outcome from events: {outcome_id} -> {outcome_name}")
             except Exception as e:
                 logger.error(f"Error extracting options from events: {str(e)}")
         
         # If no options found in events, try the outcomes field
         if not options:
-            outcomes_raw = market_data.get("outcomes", "[]")
-            try:
-                if isinstance(outcomes_raw, str):
-                    outcomes = json.loads(outcomes_raw)
-                else:
-                    outcomes = outcomes_raw
-                    
-                if isinstance(outcomes, list):
-                    options = outcomes
-                    logger.info(f"Extracted {len(options)} options from outcomes field")
-            except Exception as e:
-                logger.error(f"Error parsing outcomes field: {str(e)}")
+            options = list(outcomes)
+            logger.debug(f"Extracted {len(options)} options from outcomes field")
         
         # If still no options, try the options field
         if not options:
             options = market_data.get('options', [])
-            logger.info(f"Using {len(options)} options from options field")
+            logger.debug(f"Using {len(options)} options from options field")
             
         option_market_ids = market_data.get('option_market_ids', {})
         
         # Add option divider
-        blocks.append({
-            "type": "divider"
-        })
+        blocks.append(DIVIDER.render())
         
         # Add heading for options
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Options:*"
-            }
-        })
+        blocks.append(OPTIONS_HEADING.render())
         
         # RULE 2: For multi-option markets, get option icons
         option_images = {}  # Dict to store option_id -> option_icon mapping
@@ -586,7 +607,7 @@ def format_market_with_images(market_data):
             option_markets = market_data.get('response', {}).get('option_markets', [])
             
         # Log what we're working with
-        logger.info(f"Checking option markets array with {len(option_markets) if option_markets else 0} items")
+        logger.debug(f"Checking option markets array with {len(option_markets) if option_markets else 0} items")
         
         # First process option_markets if available (direct market references)
         if option_markets:
@@ -603,7 +624,7 @@ def format_market_with_images(market_data):
                             # Store the icon URL indexed by market ID
                             if market_icon and is_valid_url(market_icon):
                                 option_images[market_id] = market_icon
-                                logger.info(f"Found icon for market ID {market_id} ({market_question}): {market_icon[:30]}...")
+                                logger.debug(f"Found icon for market ID {market_id} ({market_question}): {market_icon[:30]}...")
                                 # Also set the display name in our option_info mapping
                                 option_info[market_id] = market_question
             except Exception as e:
@@ -612,7 +633,7 @@ def format_market_with_images(market_data):
         # If we didn't find icons from option_markets, fall back to events structure
         if not option_images and events_data:
             try:
-                logger.info("Falling back to events.outcomes for option icons...")
+                logger.debug("Falling back to events.outcomes for option icons...")
                 if isinstance(events_data, list) and len(events_data) > 0:
                     for event_obj in events_data:
                         if isinstance(event_obj, dict) and 'outcomes' in event_obj:
@@ -639,7 +660,7 @@ def format_market_with_images(market_data):
                                     # Store in our option_images dict with outcome ID as key
                                     if outcome_id and outcome_icon and is_valid_url(outcome_icon):
                                         option_images[outcome_id] = outcome_icon
-                                        logger.info(f"Found option icon from events for {outcome_id}: {outcome_icon[:30]}...")
+                                        logger.debug(f"Found option icon from events for {outcome_id}: {outcome_icon[:30]}...")
             except Exception as e:
                 logger.error(f"Error extracting option icons from events data: {str(e)}")
                 
@@ -650,7 +671,7 @@ def format_market_with_images(market_data):
                 option_info[option_id] = option_name
                 if option_id not in options:
                     options.append(option_id)
-                logger.info(f"Using provided option info: {option_id} -> {option_name}")
+                logger.debug(f"Using provided option info: {option_id} -> {option_name}")
         
         # Also check for direct option_images field (for testing or pre-processed data)
         if isinstance(market_data.get('option_images'), dict) and market_data['option_images']:
@@ -659,11 +680,11 @@ def format_market_with_images(market_data):
                 option_images[option_id] = option_url
                 if option_id not in options:
                     options.append(option_id)
-                logger.info(f"Using provided option image: {option_id} -> {option_url[:30]}...")
+                logger.debug(f"Using provided option image: {option_id} -> {option_url[:30]}...")
         
         # Log what we found
-        logger.info(f"Found {len(option_images)} option icons and {len(option_info)} option names")
-        logger.info(f"Options to display: {options}")
+        logger.debug(f"Found {len(option_images)} option icons and {len(option_info)} option names")
+        logger.debug(f"Options to display: {options}")
         
         # Prepare the fields list for the section - following Rule 2 structure for Slack payload
         option_fields = []
@@ -671,13 +692,11 @@ def format_market_with_images(market_data):
         # Implement deduplication to prevent showing both "Real Madrid" and "Will Real Madrid win..."
         # We want to show each entity (team, candidate, etc.) only once with their icon
         
-        # Define patterns to extract entities from question format
-        import re
-        question_patterns = [
-            r"will\s+(.*?)\s+win",  # Will X win...
-            r"will\s+(.*?)\s+be",   # Will X be...
-            r"will\s+(.*?)$"        # Will X (at end of string)
-        ]
+        # Event outcome titles (like "Real Madrid") by lowercased title, first one wins
+        outcome_titles = {}
+        for event in market_data.get('events', []):
+            for outcome in event.get('outcomes', []):
+                outcome_titles.setdefault(outcome.get('title', '').lower(), outcome.get('title'))
         
         # Helper to extract the entity from a display name
         def extract_entity(name):
@@ -688,14 +707,12 @@ def format_market_with_images(market_data):
             name_lower = name.lower()
             
             # Direct match for event outcome titles (like "Real Madrid")
-            for event in market_data.get('events', []):
-                for outcome in event.get('outcomes', []):
-                    if outcome.get('title', '').lower() == name_lower:
-                        return outcome.get('title')
+            if name_lower in outcome_titles:
+                return outcome_titles[name_lower]
             
             # Try to extract from question formats
-            for pattern in question_patterns:
-                match = re.search(pattern, name_lower)
+            for pattern in OPTION_QUESTION_PATTERNS:
+                match = pattern.search(name_lower)
                 if match:
                     entity = match.group(1).strip().title()
                     return entity
@@ -756,29 +773,21 @@ def format_market_with_images(market_data):
             deduplicated_options[normalized_entity] = best_option
         
         # Log what we're doing
-        logger.info(f"Deduplicated {len(options)} options into {len(deduplicated_options)} unique options")
+        logger.debug(f"Deduplicated {len(options)} options into {len(deduplicated_options)} unique options")
         
         # Now process the deduplicated options
         for normalized_name, (option_id, display_name, icon_url) in deduplicated_options.items():
             # Add the option field for the name
-            option_field = {
-                "type": "mrkdwn",
-                "text": f"*{display_name}*"
-            }
-            option_fields.append(option_field)
+            option_fields.append(MRKDWN_FIELD.render(text=f"*{display_name}*"))
             
             # Add the image as a separate block, but only if it's Slack-accessible
             if is_slack_accessible_url(icon_url):
-                blocks.append({
-                    "type": "image",
-                    "image_url": icon_url,
-                    "alt_text": f"Option icon for {display_name}"
-                })
-                logger.info(f"Added image block for {display_name}: {icon_url[:30]}...")
+                blocks.append(IMAGE.render(image_url=icon_url, alt_text=f"Option icon for {display_name}"))
+                logger.debug(f"Added image block for {display_name}: {icon_url[:30]}...")
             else:
                 logger.warning(f"Skipping inaccessible image URL for {display_name}: {icon_url[:30]}...")
             
-            logger.info(f"Added deduplicated option with image: {display_name}")
+            logger.debug(f"Added deduplicated option with image: {display_name}")
         
         # For any options without valid icons, just add their names
         for option in options:
@@ -788,41 +797,24 @@ def format_market_with_images(market_data):
             # Skip options that were already included in our deduplicated list
             normalized_entity = extract_entity(display_name).lower().strip()
             if normalized_entity not in deduplicated_options:
-                option_field = {
-                    "type": "mrkdwn",
-                    "text": f"*{display_name}*"
-                }
-                option_fields.append(option_field)
-                logger.info(f"Added option without image: {display_name}")
+                option_fields.append(MRKDWN_FIELD.render(text=f"*{display_name}*"))
+                logger.debug(f"Added option without image: {display_name}")
         
         # Add all option fields in a single section
         if option_fields:
-            logger.info(f"Adding {len(option_fields)} option fields to message")
+            logger.debug(f"Adding {len(option_fields)} option fields to message")
             blocks.append({
                 "type": "section",
                 "fields": option_fields
             })
     else:
         # Regular market (binary Yes/No) - only show one banner image
-        outcomes = []
         try:
             # Try to extract from outcomes field first
-            outcomes_raw = market_data.get("outcomes", "[]")
-            if isinstance(outcomes_raw, str):
-                outcomes = json.loads(outcomes_raw)
-            else:
-                outcomes = outcomes_raw
-            
-            if isinstance(outcomes, list) and outcomes:
-                logger.info(f"Binary market with {len(outcomes)} outcomes from outcomes field")
+            if outcomes:
+                logger.debug(f"Binary market with {len(outcomes)} outcomes from outcomes field")
                 # Add outcomes as options section
-                blocks.append({
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "*Options:* " + ", ".join(outcomes)
-                    }
-                })
+                blocks.append(MRKDWN_SECTION.render(text="*Options:* " + ", ".join(outcomes)))
         except Exception as e:
             logger.error(f"Error extracting outcomes for binary market: {str(e)}")
         
@@ -830,15 +822,7 @@ def format_market_with_images(market_data):
         # The event banner image is already added above for all markets
     
     # Add reminder for approval reactions
-    blocks.append(
-        {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "React with 👍 to approve or 👎 to reject"
-            }
-        }
-    )
+    blocks.append(APPROVAL_REACTIONS.render())
     
     return text_message, blocks
 
@@ -857,7 +841,11 @@ def is_slack_accessible_url(url):
     """
     if not url or not isinstance(url, str):
         return False
-        
+    return _is_slack_accessible_url(url)
+
+@lru_cache(maxsize=URL_CHECK_CACHE_SIZE)
+def _is_slack_accessible_url(url):
+    """Check a URL string against the Slack-accessible domains (cached per URL)."""
     try:
         from urllib.parse import urlparse
         result = urlparse(url)
@@ -933,7 +921,11 @@ def is_valid_url(url):
     """
     if not url or not isinstance(url, str):
         return False
-    
+    return _is_valid_url(url)
+
+@lru_cache(maxsize=URL_CHECK_CACHE_SIZE)
+def _is_valid_url(url):
+    """Validate a URL string (cached per URL, so warnings are logged once per URL)."""
     # Common invalid URL patterns to filter out
     invalid_patterns = [
         "undefined", "null", "N/A", "none", "[]", "{}", 
@@ -1008,6 +1000,7 @@ def post_slack_message(message, blocks=None, market_data=None):
     Returns:
         Response dictionary if successful, None otherwise
     """
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return None
@@ -1060,6 +1053,7 @@ def post_markets_to_slack(markets, format_market_message_func=None):
     """
     posted_count = 0
     
+    slack_client = get_slack_client()
     if not slack_client:
         logger.error("Slack client not initialized - missing token")
         return posted_count
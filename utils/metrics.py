@@ -0,0 +1,411 @@
+"""
+Pipeline Metrics
+
+This module records timing and counter metrics for the pipeline:
+
+- per-stage latency histograms (fetch, filter, prioritize, categorize,
+  transform, store, slack_post, approval_scan, banner, deploy) via
+  stage_timer()
+- external call counts and latency per dependency (gamma, openai, slack,
+  rpc) via track_call() or the instrument_* helpers
+- queue depths via set_queue_depth()
+
+Metrics are kept in a process-wide registry and rendered in the Prometheus
+text exposition format by render_prometheus(). Stage timings recorded with
+a pipeline run ID are also buffered per run and written to the
+pipeline_stage_metrics table by save_stage_metrics(). When the run is being
+profiled (see utils/profiling.py), each stage is also profiled.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.profiling import current_profiler
+
+logger = logging.getLogger("metrics")
+
+# Pipeline stages with latency histograms
+STAGES = (
+    "fetch",
+    "filter",
+    "prioritize",
+    "categorize",
+    "transform",
+    "store",
+    "slack_post",
+    "approval_scan",
+    "banner",
+    "deploy",
+)
+
+# Histogram buckets in seconds, from fast in-memory stages to slow LLM/RPC calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+METRIC_HELP = {
+    "pipeline_stage_duration_seconds": ("histogram", "Duration of pipeline stages"),
+    "pipeline_stage_runs_total": ("counter", "Number of pipeline stage executions by outcome"),
+    "pipeline_stage_items_total": ("counter", "Number of items processed by pipeline stages"),
+    "external_call_duration_seconds": ("histogram", "Latency of calls to external dependencies"),
+    "external_calls_total": ("counter", "Number of calls to external dependencies by outcome"),
+    "queue_depth": ("gauge", "Number of items waiting in a queue"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """Thread-safe registry of histograms, counters and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a histogram observation."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Increment a counter."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge value."""
+        key = self._key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def reset(self) -> None:
+        """Remove all recorded metrics."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a summary of the recorded metrics.
+
+        Returns:
+            Dict[str, Any]: Histogram count/sum per series, counter and gauge values
+        """
+        with self._lock:
+            return {
+                "histograms": {
+                    name: {_format_labels(key): {"count": hist.count, "sum": hist.sum}
+                           for key, hist in series.items()}
+                    for name, series in self._histograms.items()
+                },
+                "counters": {
+                    name: {_format_labels(key): value for key, value in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: {_format_labels(key): value for key, value in series.items()}
+                    for name, series in self._gauges.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                _add_header(lines, name, "histogram")
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(hist.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    _add_header(lines, name, kind)
+                    for key, value in sorted(series.items()):
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _add_header(lines: List[str], name: str, default_type: str) -> None:
+    metric_type, help_text = METRIC_HELP.get(name, (default_type, name.replace("_", " ")))
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in key
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+# Stage timings buffered per pipeline run until save_stage_metrics() is called
+_stage_records: Dict[int, List[Dict[str, Any]]] = {}
+_stage_records_lock = threading.Lock()
+
+
+class StageTiming:
+    """Mutable record yielded by stage_timer() for reporting item counts."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.items_in: Optional[int] = None
+        self.items_out: Optional[int] = None
+        self.started_at = datetime.utcnow()
+        self.duration: Optional[float] = None
+        self.status = "success"
+
+
+@contextmanager
+def stage_timer(stage: str, run_id: Optional[int] = None,
+                items_in: Optional[int] = None) -> Iterator[StageTiming]:
+    """
+    Time a pipeline stage.
+
+    Args:
+        stage: Stage name (see STAGES)
+        run_id: Optional PipelineRun ID; the timing is buffered for persistence
+        items_in: Optional number of input items
+
+    Yields:
+        StageTiming: Record on which the caller can set items_out/items_in
+    """
+    timing = StageTiming(stage)
+    timing.items_in = items_in
+    profiler = current_profiler()
+    start = time.perf_counter()
+    try:
+        if profiler:
+            with profiler.stage(stage):
+                yield timing
+        else:
+            yield timing
+    except Exception:
+        timing.status = "error"
+        raise
+    finally:
+        timing.duration = time.perf_counter() - start
+        metrics.observe("pipeline_stage_duration_seconds", timing.duration, stage=stage)
+        metrics.inc("pipeline_stage_runs_total", stage=stage, status=timing.status)
+        if timing.items_out is not None:
+            metrics.inc("pipeline_stage_items_total", timing.items_out, stage=stage)
+        if run_id is not None:
+            with _stage_records_lock:
+                _stage_records.setdefault(run_id, []).append({
+                    "stage": stage,
+                    "status": timing.status,
+                    "duration": timing.duration,
+                    "items_in": timing.items_in,
+                    "items_out": timing.items_out,
+                    "started_at": timing.started_at,
+                })
+        logger.info(f"Stage {stage} finished in {timing.duration:.3f}s ({timing.status})")
+
+
+@contextmanager
+def track_call(dependency: str, operation: str = "request") -> Iterator[None]:
+    """
+    Time a call to an external dependency.
+
+    Args:
+        dependency: Dependency name (gamma, openai, slack, rpc)
+        operation: Operation name (e.g. API method)
+    """
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        metrics.observe("external_call_duration_seconds", time.perf_counter() - start,
+                        dependency=dependency, operation=operation)
+        metrics.inc("external_calls_total", dependency=dependency, operation=operation, outcome=outcome)
+
+
+def timed_call(dependency: str, operation: Optional[str] = None):
+    """
+    Decorator version of track_call().
+
+    Args:
+        dependency: Dependency name
+        operation: Operation name (defaults to the function name)
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_call(dependency, operation or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_slack_client(client):
+    """
+    Record every Slack Web API call made through a WebClient.
+
+    All WebClient methods go through api_call(), so wrapping it on the
+    instance covers chat_postMessage, reactions_get, conversations_history etc.
+
+    Args:
+        client: slack_sdk WebClient (or None)
+
+    Returns:
+        The same client
+    """
+    if client is None or getattr(client, "_metrics_instrumented", False):
+        return client
+    api_call = client.api_call
+
+    @wraps(api_call)
+    def instrumented_api_call(api_method, *args, **kwargs):
+        with track_call("slack", api_method):
+            return api_call(api_method, *args, **kwargs)
+
+    client.api_call = instrumented_api_call
+    client._metrics_instrumented = True
+    return client
+
+
+def instrument_web3_provider(provider):
+    """
+    Record every JSON-RPC request made through a Web3 provider.
+
+    Args:
+        provider: Web3 provider (or None)
+
+    Returns:
+        The same provider
+    """
+    if provider is None or getattr(provider, "_metrics_instrumented", False):
+        return provider
+    make_request = provider.make_request
+
+    @wraps(make_request)
+    def instrumented_make_request(method, params):
+        with track_call("rpc", str(method)):
+            return make_request(method, params)
+
+    provider.make_request = instrumented_make_request
+    provider._metrics_instrumented = True
+    return provider
+
+
+def set_queue_depth(queue: str, depth: int) -> None:
+    """
+    Record the current depth of a queue.
+
+    Args:
+        queue: Queue name
+        depth: Number of waiting items
+    """
+    metrics.set_gauge("queue_depth", depth, queue=queue)
+
+
+def render_prometheus() -> str:
+    """Render the process-wide registry in the Prometheus text format."""
+    return metrics.render_prometheus()
+
+
+def pop_stage_records(run_id: int) -> List[Dict[str, Any]]:
+    """
+    Remove and return the stage timings buffered for a run.
+
+    Args:
+        run_id: PipelineRun ID
+
+    Returns:
+        List[Dict[str, Any]]: Stage timing records
+    """
+    with _stage_records_lock:
+        return _stage_records.pop(run_id, [])
+
+
+def save_stage_metrics(db, PipelineStageMetric, run_id: int) -> int:
+    """
+    Write the stage timings buffered for a run to the database.
+
+    Args:
+        db: SQLAlchemy database instance
+        PipelineStageMetric: PipelineStageMetric model class
+        run_id: PipelineRun ID
+
+    Returns:
+        int: Number of rows written
+    """
+    records = pop_stage_records(run_id)
+    if not records:
+        return 0
+
+    try:
+        for record in records:
+            db.session.add(PipelineStageMetric(
+                run_id=run_id,
+                stage=record["stage"],
+                status=record["status"],
+                duration_ms=int(record["duration"] * 1000),
+                items_in=record["items_in"],
+                items_out=record["items_out"],
+                started_at=record["started_at"],
+            ))
+        db.session.commit()
+        return len(records)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving stage metrics for run {run_id}: {str(e)}")
+        return 0
@@ -0,0 +1,36 @@
+"""
+OpenAI Client
+
+This module creates the OpenAI client shared by the market categorizers and
+the banner generator. The client is created on first use rather than on
+import: importing the openai package takes about a second, which scripts
+that never call the API shouldn't pay.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger("openai_client")
+
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+
+# Shared client, created on first use by get_openai_client()
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    Get the OpenAI client, creating it on first use.
+
+    Returns:
+        OpenAI: Client, or None if OPENAI_API_KEY is not set
+    """
+    global _client
+    if _client is None and OPENAI_API_KEY:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
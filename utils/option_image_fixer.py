@@ -8,6 +8,8 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 
+from utils.market_record import market_option_images, market_outcomes
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
@@ -16,16 +18,12 @@ def load_option_images(market_data: Dict[str, Any]) -> Dict[str, str]:
     Load option images from a market
     
     Args:
-        market_data: Market data dictionary
+        market_data: Market data dictionary or MarketRecord
         
     Returns:
         Dict mapping option names to image URLs
     """
-    option_images_str = market_data.get("option_images", "{}")
-    try:
-        return json.loads(option_images_str)
-    except:
-        return {}
+    return market_option_images(market_data)
 
 def apply_image_fixes(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
@@ -68,7 +66,7 @@ def fix_specific_market_images(market_data: Dict[str, Any]) -> Dict[str, Any]:
         
         # Load option_images
         option_images = load_option_images(market_data)
-        options = json.loads(market_data.get("outcomes", "[]"))
+        options = market_outcomes(market_data)
         
         # Check if Barcelona is using Arsenal's image
         if "Barcelona" in options and "Arsenal" in options:
@@ -93,7 +91,7 @@ def fix_specific_market_images(market_data: Dict[str, Any]) -> Dict[str, Any]:
         
         # Load option_images
         option_images = load_option_images(market_data)
-        options = json.loads(market_data.get("outcomes", "[]"))
+        options = market_outcomes(market_data)
         
         # Find the "another team" option
         another_team_option = None
@@ -139,7 +137,7 @@ def verify_option_images(market_data: Dict[str, Any]) -> Dict[str, Any]:
     
     # Load option_images
     option_images = load_option_images(market_data)
-    options = json.loads(market_data.get("outcomes", "[]"))
+    options = market_outcomes(market_data)
     
     # Log all option images
     logger.info(f"Verifying option images for market: {question} (ID: {market_id})")
@@ -0,0 +1,171 @@
+"""
+Option Image Index
+
+Multi-option markets need an image per option, and the option name (such
+as "Barcelona" or "another team") is usually only found in the question of
+the market the option came from. MarketTransformer used to search the whole
+fetched market list for each option of each group, lowercasing every
+question on every search.
+
+The OptionImageIndex is built once per fetch. The lowercased questions are
+joined into one newline-separated text, so finding the first market whose
+question contains an option is a single str.find() over that text plus a
+binary search for the matching market, instead of a Python loop over all
+markets. Results are memoized per (terms, event), so an option that appears
+in many groups is only searched once. Each result records which rule
+produced it (image of a market in the same event, of any fetched market, or
+an option's own icon), which is logged with the final image choice.
+
+Markets are searched in fetch order, so results are the same as a scan of
+the market list.
+"""
+
+import logging
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("option_image_index")
+
+# Image rules, in the order MarketTransformer tries them
+RULE_GROUP_MARKET = "group_market"      # market of the same group whose question names the option
+RULE_EVENT_MARKET = "event_market"      # fetched market of the same event whose question names the option
+RULE_FETCHED_MARKET = "fetched_market"  # any fetched market whose question names the option
+RULE_OPTION_ICON = "option_icon"        # icon of an option market or event outcome
+
+
+class OptionImage(NamedTuple):
+    """An option image and the rule that selected it."""
+    url: str
+    rule: str
+    market_id: Any = None
+
+
+class OptionImageIndex:
+    """Fetched markets indexed by question for option image lookups."""
+
+    def __init__(self, markets: Iterable[Dict[str, Any]] = (), require_image: bool = True):
+        """
+        Build the index.
+
+        Args:
+            markets: Market data dictionaries (or MarketRecords), in fetch order
+            require_image: Only index markets that have an image
+        """
+        questions: List[str] = []
+        self._starts: List[int] = []
+        self._markets: List[Tuple[Any, Any, frozenset]] = []
+        offset = 0
+
+        for market in markets:
+            image = market.get("image")
+            if require_image and not image:
+                continue
+            question = (market.get("question") or "").lower().replace("\n", " ")
+            event_ids = frozenset(event.get("id") for event in market.get("events") or [] if isinstance(event, dict))
+            questions.append(question)
+            self._starts.append(offset)
+            self._markets.append((market.get("id"), image, event_ids))
+            offset += len(question) + 1
+
+        self._text = "\n".join(questions)
+        self._memo: Dict[Tuple[Tuple[str, ...], Any], Optional[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._markets)
+
+    def _question(self, position: int) -> str:
+        """Get the lowercased question of an indexed market."""
+        end = self._starts[position + 1] - 1 if position + 1 < len(self._starts) else len(self._text)
+        return self._text[self._starts[position]:end]
+
+    def _first(self, terms: Tuple[str, ...], event_id: Any) -> Optional[int]:
+        """Find the position of the first market whose question contains all terms."""
+        first_term, other_terms = terms[0], terms[1:]
+        found = self._text.find(first_term)
+        while found != -1:
+            position = bisect_right(self._starts, found) - 1
+            _, _, event_ids = self._markets[position]
+            if (event_id is None or event_id in event_ids) and \
+                    all(term in self._question(position) for term in other_terms):
+                return position
+            # Continue with the next market's question
+            if position + 1 >= len(self._starts):
+                return None
+            found = self._text.find(first_term, self._starts[position + 1])
+        return None
+
+    def find_market(self, *terms: str, event_id: Any = None) -> Optional[int]:
+        """
+        Find the first market whose question contains all terms.
+
+        Args:
+            terms: Text to look for in the question (case-insensitive)
+            event_id: Only consider markets in this event
+
+        Returns:
+            Optional[int]: Position of the market in indexing order, or None if no market matches
+        """
+        terms = tuple(term.lower() for term in terms)
+        if not terms or any("\n" in term for term in terms):
+            return None
+
+        key = (terms, event_id)
+        if key not in self._memo:
+            self._memo[key] = self._first(terms, event_id)
+        return self._memo[key]
+
+    def find(self, *terms: str, event_id: Any = None) -> Optional[OptionImage]:
+        """
+        Find the image of the first market whose question contains all terms.
+
+        Args:
+            terms: Text to look for in the question (case-insensitive)
+            event_id: Only consider markets in this event
+
+        Returns:
+            Optional[OptionImage]: Image of the market, or None if no market matches
+        """
+        position = self.find_market(*terms, event_id=event_id)
+        if position is None:
+            return None
+
+        market_id, image, _ = self._markets[position]
+        return OptionImage(image, RULE_EVENT_MARKET if event_id is not None else RULE_FETCHED_MARKET, market_id)
+
+
+def option_icons(market_data: Dict[str, Any], is_valid_url=None) -> Dict[str, OptionImage]:
+    """
+    Collect the option icons of a market in one pass.
+
+    Icons come from option_markets[].icon (keyed by market ID) and then
+    events[].outcomes[].icon (keyed by outcome ID); later entries win.
+
+    Args:
+        market_data: Market data dictionary
+        is_valid_url: Optional URL validator
+
+    Returns:
+        Dict[str, OptionImage]: Icons by option market or outcome ID
+    """
+    icons: Dict[str, OptionImage] = {}
+
+    for option_market in market_data.get("option_markets") or []:
+        if isinstance(option_market, dict):
+            market_id = option_market.get("id", "")
+            icon_url = option_market.get("icon", "")
+            if market_id and icon_url and (is_valid_url is None or is_valid_url(icon_url)):
+                icons[market_id] = OptionImage(icon_url, RULE_OPTION_ICON, market_id)
+
+    events = market_data.get("events") or []
+    if isinstance(events, list):
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            for outcome in event.get("outcomes") or []:
+                if isinstance(outcome, dict):
+                    outcome_id = outcome.get("id", "")
+                    icon_url = outcome.get("icon", "")
+                    if outcome_id and icon_url and (is_valid_url is None or is_valid_url(icon_url)):
+                        icons[outcome_id] = OptionImage(icon_url, RULE_OPTION_ICON, outcome_id)
+
+    return icons
@@ -14,6 +14,7 @@ from typing import List, Dict, Any
 from transform_polymarket_data_capitalized import PolymarketTransformer
 from config import POLYMARKET_BASE, POLYMARKET_API, DATA_DIR
 from utils.polymarket_blockchain import PolymarketBlockchainClient
+from utils.dates import now_epoch, to_epoch
 
 logger = logging.getLogger("polymarket_extractor")
 
@@ -211,13 +212,12 @@ class PolymarketExtractor:
                         
                         # Check end_date_iso if available
                         if "end_date_iso" in market and market["end_date_iso"]:
-                            try:
-                                end_date = datetime.fromisoformat(market["end_date_iso"].replace("Z", "+00:00"))
-                                if end_date < current_time:
-                                    logger.info(f"Filtering out market {market.get('condition_id')} - already ended (ISO date: {end_date})")
-                                    is_expired = True
-                            except Exception as e:
-                                logger.warning(f"Could not parse end_date_iso for market {market.get('condition_id')}: {e}")
+                            end_date = to_epoch(market["end_date_iso"])
+                            if end_date is None:
+                                logger.warning(f"Could not parse end_date_iso for market {market.get('condition_id')}")
+                            elif end_date < now_epoch():
+                                logger.info(f"Filtering out market {market.get('condition_id')} - already ended (ISO date: {market['end_date_iso']})")
+                                is_expired = True
                         
                         # Also check question text for past dates
                         if not is_expired and "question" in market:
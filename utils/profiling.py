@@ -0,0 +1,436 @@
+"""
+Pipeline Profiling
+
+This module provides an opt-in profiling mode for pipeline runs. When a run
+is profiled, every stage_timer() stage (see utils/metrics.py) is also run
+under cProfile and tracemalloc, and the following files are written to
+<profile dir>/run_<run id>/ when the run finishes:
+
+- <stage>.pstats: cProfile statistics (load with pstats or snakeviz)
+- <stage>.alloc.txt: top allocation sites by net allocated bytes
+- summary.json: per-stage call count, wall/CPU seconds and memory figures
+
+CPU time is exclusive (a nested stage is not counted in its parent), while
+memory figures are inclusive. Repeated stages (e.g. one categorize stage per
+market) are aggregated into a single profile.
+
+Profiling is enabled with the --profile flag of the pipeline entry points or
+by setting PIPELINE_PROFILE=1. The Gamma API can also be replayed from a
+recorded fixture (--replay-fixtures PATH or PIPELINE_REPLAY_FIXTURES=PATH) so
+runs are comparable; only Gamma requests are replayed, other services (Slack,
+OpenAI, RPC) are still called. Replay is bound to the run's context and
+served through gamma_get(), which the pipeline's Gamma fetches call instead
+of requests.get(), so other threads of the process (e.g. web requests) are
+not affected.
+"""
+
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger("profiling")
+
+# Environment toggles
+PROFILE_ENV_VAR = "PIPELINE_PROFILE"
+PROFILE_DIR_ENV_VAR = "PIPELINE_PROFILE_DIR"
+REPLAY_ENV_VAR = "PIPELINE_REPLAY_FIXTURES"
+
+# Default output directory for profiles
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tmp", "profiles")
+
+# Number of allocation sites listed per stage
+DEFAULT_TOP_ALLOCATIONS = 25
+
+# Host whose requests are served from fixtures in replay mode
+GAMMA_API_HOST = "gamma-api.polymarket.com"
+
+# Thread-local binding of the current thread to a profiler
+_context = threading.local()
+
+# Fixture replay active in the current context
+_active_replay: contextvars.ContextVar = contextvars.ContextVar("fixture_replay", default=None)
+
+
+def profiling_enabled(flag: Optional[bool] = None) -> bool:
+    """
+    Check whether profiling is enabled.
+
+    Args:
+        flag: Explicit setting (e.g. from --profile); None falls back to the environment
+
+    Returns:
+        bool: True if runs should be profiled
+    """
+    if flag is not None:
+        return flag
+    return os.environ.get(PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+def current_profiler() -> Optional["StageProfiler"]:
+    """Get the profiler bound to the current thread, if any."""
+    return getattr(_context, "profiler", None)
+
+
+class _StageStats:
+    """Aggregated profile of all executions of one stage."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.peak_traced_bytes = 0
+        self.net_allocated_bytes = 0
+        self.allocations: Dict[str, List[int]] = {}
+
+
+class _Frame:
+    """An active stage on the profiler's stack."""
+
+    def __init__(self, stats: _StageStats):
+        self.stats = stats
+        self.peak = 0
+
+
+class StageProfiler:
+    """CPU and memory profiler for the stages of a single pipeline run."""
+
+    def __init__(self, run_key: Any, output_dir: Optional[str] = None,
+                 top_allocations: int = DEFAULT_TOP_ALLOCATIONS, trace_memory: bool = True):
+        """
+        Initialize the profiler.
+
+        Args:
+            run_key: Run ID used to name the output directory
+            output_dir: Base directory for profiles (defaults to PIPELINE_PROFILE_DIR or tmp/profiles)
+            top_allocations: Number of allocation sites listed per stage
+            trace_memory: Whether to trace allocations with tracemalloc
+        """
+        base_dir = output_dir or os.environ.get(PROFILE_DIR_ENV_VAR) or DEFAULT_PROFILE_DIR
+        self.run_key = run_key
+        self.output_dir = os.path.join(base_dir, f"run_{run_key}")
+        self.top_allocations = top_allocations
+        self.trace_memory = trace_memory
+
+        self._stages: Dict[str, _StageStats] = {}
+        self._stack: List[_Frame] = []
+        self._started_tracing = False
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+
+    def start(self) -> None:
+        """Start memory tracing if needed."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def _snapshot(self) -> Optional[tracemalloc.Snapshot]:
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Profile one execution of a stage.
+
+        Args:
+            name: Stage name
+        """
+        stats = self._stages.setdefault(name, _StageStats())
+        parent = self._stack[-1] if self._stack else None
+
+        # Pause the parent so CPU time is attributed to the innermost stage
+        if parent:
+            parent.stats.profile.disable()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing and parent:
+            parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+
+        frame = _Frame(stats)
+        self._stack.append(frame)
+        before = self._snapshot()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        stats.profile.enable()
+        try:
+            yield
+        finally:
+            stats.profile.disable()
+            stats.calls += 1
+            stats.wall_seconds += time.perf_counter() - start
+            self._stack.pop()
+
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                frame.peak = max(frame.peak, peak)
+                stats.peak_traced_bytes = max(stats.peak_traced_bytes, frame.peak)
+                stats.net_allocated_bytes += current - start_bytes
+                after = self._snapshot()
+                if before is not None and after is not None:
+                    for diff in after.compare_to(before, "lineno"):
+                        if diff.size_diff <= 0:
+                            continue
+                        site = str(diff.traceback)
+                        totals = stats.allocations.setdefault(site, [0, 0])
+                        totals[0] += diff.size_diff
+                        totals[1] += diff.count_diff
+                if parent:
+                    parent.peak = max(parent.peak, frame.peak)
+                    tracemalloc.reset_peak()
+
+            if parent:
+                parent.stats.profile.enable()
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Write the profiles of all stages and stop memory tracing.
+
+        Returns:
+            Dict[str, Any]: Summary of the run's stages
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        summary = {
+            "run_id": self.run_key,
+            "created_at": datetime.now().isoformat(),
+            "stages": {},
+        }
+
+        for name, stats in self._stages.items():
+            pstats_path = os.path.join(self.output_dir, f"{name}.pstats")
+            stats.profile.dump_stats(pstats_path)
+            cpu_seconds = pstats.Stats(stats.profile).total_tt
+
+            stage_summary = {
+                "calls": stats.calls,
+                "wall_seconds": round(stats.wall_seconds, 6),
+                "cpu_seconds": round(cpu_seconds, 6),
+                "pstats": pstats_path,
+            }
+            if self.trace_memory:
+                alloc_path = os.path.join(self.output_dir, f"{name}.alloc.txt")
+                self._write_allocations(alloc_path, name, stats)
+                stage_summary.update({
+                    "peak_traced_bytes": stats.peak_traced_bytes,
+                    "net_allocated_bytes": stats.net_allocated_bytes,
+                    "allocations": alloc_path,
+                })
+            summary["stages"][name] = stage_summary
+
+            logger.info(f"Profiled stage {name}: {stats.calls} calls, {cpu_seconds:.3f}s CPU, "
+                        f"peak {stats.peak_traced_bytes / 1024:.1f} KiB")
+
+        with open(os.path.join(self.output_dir, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(f"Wrote stage profiles to {self.output_dir}")
+        return summary
+
+    def _write_allocations(self, path: str, name: str, stats: _StageStats) -> None:
+        """Write the top allocation sites of a stage."""
+        top = sorted(stats.allocations.items(), key=lambda item: item[1][0], reverse=True)
+        with open(path, "w") as f:
+            f.write(f"Stage: {name}\n")
+            f.write(f"Calls: {stats.calls}\n")
+            f.write(f"Peak traced memory: {stats.peak_traced_bytes / 1024:.1f} KiB\n")
+            f.write(f"Net allocated: {stats.net_allocated_bytes / 1024:.1f} KiB\n\n")
+            for site, (size, count) in top[:self.top_allocations]:
+                f.write(f"{site}: +{size / 1024:.1f} KiB in {count} blocks\n")
+
+    def format_stage(self, name: str, limit: int = 20) -> str:
+        """
+        Format the top functions of a stage by cumulative time.
+
+        Args:
+            name: Stage name
+            limit: Number of functions
+
+        Returns:
+            str: pstats report
+        """
+        stats = self._stages.get(name)
+        if not stats:
+            return ""
+        stream = io.StringIO()
+        pstats.Stats(stats.profile, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+@contextmanager
+def profile_run(run_key: Any = None, enabled: Optional[bool] = None,
+                output_dir: Optional[str] = None) -> Iterator[Optional[StageProfiler]]:
+    """
+    Profile the stages run by the current thread.
+
+    Args:
+        run_key: Run ID (defaults to a timestamp)
+        enabled: Explicit setting; None falls back to PIPELINE_PROFILE
+        output_dir: Base directory for profiles
+
+    Yields:
+        Optional[StageProfiler]: The profiler, or None when profiling is disabled
+    """
+    if not profiling_enabled(enabled) or current_profiler() is not None:
+        yield current_profiler()
+        return
+
+    profiler = StageProfiler(run_key if run_key is not None else datetime.now().strftime("%Y%m%d_%H%M%S"),
+                             output_dir=output_dir)
+    profiler.start()
+    _context.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _context.profiler = None
+        try:
+            profiler.close()
+        except Exception as e:
+            logger.error(f"Error writing stage profiles: {str(e)}")
+
+
+def load_fixture_markets(path: str) -> List[Dict[str, Any]]:
+    """
+    Load markets from a recorded API response.
+
+    Accepts a plain list of markets (Gamma API response) or an object with
+    the markets under "markets" or "data" (CLOB API response, saved files).
+
+    Args:
+        path: Path to the fixture file
+
+    Returns:
+        List[Dict[str, Any]]: Markets
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("markets") or data.get("data") or []
+    return [market for market in data if isinstance(market, dict)]
+
+
+def events_from_markets(markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Rebuild Events API entries from the events embedded in markets.
+
+    Args:
+        markets: Markets with "events" lists
+
+    Returns:
+        List[Dict[str, Any]]: Events, each with its "markets"
+    """
+    events: Dict[str, Dict[str, Any]] = {}
+    for market in markets:
+        for event in market.get("events") or []:
+            event_id = event.get("id")
+            if event_id is None:
+                continue
+            if event_id not in events:
+                events[event_id] = dict(event, markets=[])
+            events[event_id]["markets"].append(market)
+    return list(events.values())
+
+
+class FixtureReplay:
+    """
+    Serve Gamma API requests from a recorded fixture.
+
+    While active, gamma_get() calls to the Gamma API host from the same
+    context (and threads started in a copy of it) return the fixture's
+    markets (or events rebuilt from them for /events URLs), honouring the
+    limit/offset query parameters. Other requests are passed through
+    unchanged.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the replay.
+
+        Args:
+            path: Path to the fixture file
+        """
+        self.path = path
+        self.markets = load_fixture_markets(path)
+        self.events = events_from_markets(self.markets)
+        self._token = None
+
+    def __enter__(self) -> "FixtureReplay":
+        self._token = _active_replay.set(self)
+        logger.info(f"Replaying Gamma API from {self.path} ({len(self.markets)} markets, {len(self.events)} events)")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _active_replay.reset(self._token)
+
+    def get(self, url, params=None, **kwargs) -> "requests.Response":
+        import requests
+        parsed = urlparse(url)
+        if parsed.hostname != GAMMA_API_HOST:
+            return requests.get(url, params=params, **kwargs)
+
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        query.update({key: str(value) for key, value in (params or {}).items()})
+        items = self.events if parsed.path.rstrip("/").endswith("/events") else self.markets
+
+        offset = int(query.get("offset", 0) or 0)
+        limit = query.get("limit", "").strip()
+        items = items[offset:offset + int(limit)] if limit.isdigit() else items[offset:]
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(items).encode("utf-8")
+        return response
+
+
+def gamma_get(url, params=None, **kwargs) -> "requests.Response":
+    """
+    Send a GET request to the Gamma API, or serve it from the active fixture replay.
+
+    Args:
+        url: Request URL
+        params: Query parameters
+        **kwargs: Other requests.get() arguments
+
+    Returns:
+        requests.Response: The response
+    """
+    replay = _active_replay.get()
+    if replay is not None:
+        return replay.get(url, params=params, **kwargs)
+    import requests
+    return requests.get(url, params=params, **kwargs)
+
+
+def fixture_replay(path: Optional[str] = None):
+    """
+    Get a replay context for a fixture, if one is configured.
+
+    Args:
+        path: Fixture path; None falls back to PIPELINE_REPLAY_FIXTURES
+
+    Returns:
+        FixtureReplay, or a no-op context when no fixture is configured
+    """
+    path = path or os.environ.get(REPLAY_ENV_VAR)
+    return FixtureReplay(path) if path else nullcontext()
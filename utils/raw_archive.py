@@ -0,0 +1,248 @@
+"""
+Raw Data Archive
+
+PendingMarket and ProcessedMarket rows keep the complete original API data in
+their raw_data JSON column, which makes up most of each row and is carried by
+every query that loads the rows.
+
+This module moves those payloads to an append-only archive on disk:
+
+- payloads are stored as JSON lines in gzip-compressed segments, partitioned
+  by fetch date (``<archive>/<YYYY-MM-DD>/<kind>-<pid>.jsonl.gz``). Each line
+  is its own gzip member, so a segment can be read as a whole with
+  gzip.open(), or a single payload can be read by offset
+- an SQLite index (``<archive>/index.db``) maps (kind, key) to the segment,
+  offset and length of the latest payload for the key
+
+The models expose raw_data through raw_data_synonym(): rows that still have
+the column set return it, and archived rows (column NULL) load the payload
+from the archive on first access. archive_raw_data() moves the payloads of a
+query's rows to the archive in batches and clears the column.
+"""
+
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import null
+from sqlalchemy.orm import synonym
+
+logger = logging.getLogger("raw_archive")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_ARCHIVE_DIR = os.environ.get("RAW_ARCHIVE_DIR", os.path.join(BASE_DIR, "data", "raw_archive"))
+INDEX_FILE = "index.db"
+ARCHIVE_BATCH_SIZE = 500
+
+# Seconds to wait for another process's index lock before failing
+LOCK_TIMEOUT = 30.0
+
+
+class RawDataArchive:
+    """Append-only compressed archive of raw API payloads."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Open the archive.
+
+        Args:
+            directory: Archive directory (defaults to RAW_ARCHIVE_DIR)
+        """
+        self.directory = directory or RAW_ARCHIVE_DIR
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _index(self, create: bool = False) -> Optional[sqlite3.Connection]:
+        """Open the index, creating the archive if requested."""
+        if self._conn is None:
+            path = os.path.join(self.directory, INDEX_FILE)
+            if not create and not os.path.exists(path):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS raw_index (kind TEXT NOT NULL, key TEXT NOT NULL, "
+                "fetched_at TEXT, segment TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, "
+                "PRIMARY KEY (kind, key))")
+        return self._conn
+
+    def put_many(self, kind: str, items: Iterable[Tuple[Any, Any, Optional[datetime]]]) -> int:
+        """
+        Append payloads to the archive.
+
+        Args:
+            kind: Payload kind (the table the payloads come from)
+            items: (key, payload, fetched_at) tuples
+
+        Returns:
+            int: Number of payloads archived
+        """
+        entries = []
+        with self._lock:
+            conn = self._index(create=True)
+            segments = {}
+            try:
+                for key, payload, fetched_at in items:
+                    fetched_at = fetched_at or datetime.utcnow()
+                    segment = os.path.join(fetched_at.strftime("%Y-%m-%d"), f"{kind}-{os.getpid()}.jsonl.gz")
+                    if segment not in segments:
+                        path = os.path.join(self.directory, segment)
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        segments[segment] = open(path, "ab")
+                    f = segments[segment]
+
+                    record = gzip.compress((json.dumps({"key": str(key), "data": payload}) + "\n").encode("utf-8"))
+                    entries.append((kind, str(key), fetched_at.isoformat(), segment, f.tell(), len(record)))
+                    f.write(record)
+            finally:
+                for f in segments.values():
+                    f.close()
+
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO raw_index (kind, key, fetched_at, segment, offset, length) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", entries)
+        return len(entries)
+
+    def put(self, kind: str, key: Any, payload: Any, fetched_at: Optional[datetime] = None) -> None:
+        """Append one payload to the archive."""
+        self.put_many(kind, [(key, payload, fetched_at)])
+
+    def get(self, kind: str, key: Any) -> Optional[Any]:
+        """
+        Get the latest archived payload for a key.
+
+        Args:
+            kind: Payload kind
+            key: Row key (poly_id or condition_id)
+
+        Returns:
+            Optional[Any]: The payload, or None if it is not archived
+        """
+        if key is None:
+            return None
+
+        with self._lock:
+            conn = self._index()
+            if conn is None:
+                return None
+            row = conn.execute("SELECT segment, offset, length FROM raw_index WHERE kind = ? AND key = ?",
+                               (kind, str(key))).fetchone()
+        if row is None:
+            return None
+
+        segment, offset, length = row
+        try:
+            with open(os.path.join(self.directory, segment), "rb") as f:
+                f.seek(offset)
+                record = json.loads(gzip.decompress(f.read(length)))
+            return record["data"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error reading archived {kind} payload {key} from {segment}: {str(e)}")
+            return None
+
+    def close(self) -> None:
+        """Close the archive index."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_archive: Optional[RawDataArchive] = None
+
+
+def get_raw_archive() -> RawDataArchive:
+    """Get the shared raw data archive."""
+    global _archive
+    if _archive is None:
+        _archive = RawDataArchive()
+    return _archive
+
+
+def raw_data_synonym(kind: str, key_attr: str, column_attr: str = "_raw_data"):
+    """
+    Create the raw_data attribute of a model.
+
+    Reads return the raw_data column if it is set and the archived payload
+    otherwise (loaded once per instance). Writes and query expressions use
+    the column.
+
+    Args:
+        kind: Payload kind in the archive (the table name)
+        key_attr: Attribute holding the row key
+        column_attr: Attribute mapped to the raw_data column
+
+    Returns:
+        The synonym to assign to the model's raw_data attribute
+    """
+    def get_raw_data(self):
+        value = getattr(self, column_attr)
+        if value is None:
+            cache = self.__dict__.setdefault("_archived_raw_data", {})
+            key = getattr(self, key_attr)
+            if key not in cache:
+                cache[key] = get_raw_archive().get(kind, key)
+            value = cache[key]
+        return value
+
+    def set_raw_data(self, value):
+        setattr(self, column_attr, value)
+        self.__dict__.pop("_archived_raw_data", None)
+
+    return synonym(column_attr, descriptor=property(get_raw_data, set_raw_data))
+
+
+def archive_raw_data(session, query, kind: str, key_attr: str, date_attr: Optional[str] = None,
+                     column_attr: str = "_raw_data", batch_size: int = ARCHIVE_BATCH_SIZE,
+                     archive: Optional[RawDataArchive] = None) -> Dict[str, int]:
+    """
+    Move the raw data of a query's rows to the archive.
+
+    Payloads are written to the archive before the column is cleared, so an
+    interrupted run leaves every payload readable. Rows are processed in
+    batches of batch_size, each committed separately.
+
+    Args:
+        session: SQLAlchemy session
+        query: Query for the rows to archive (rows with raw_data set)
+        kind: Payload kind in the archive (the table name)
+        key_attr: Attribute holding the row key
+        date_attr: Attribute holding the fetch date used for partitioning
+        column_attr: Attribute mapped to the raw_data column
+        batch_size: Rows per batch
+        archive: Archive to write to (defaults to the shared archive)
+
+    Returns:
+        Dict[str, int]: Number of rows archived and batches committed
+    """
+    archive = archive or get_raw_archive()
+    archived = batches = last_key = 0
+    key_column = getattr(query.column_descriptions[0]["entity"], key_attr)
+
+    while True:
+        batch_query = query.order_by(key_column)
+        if batches:
+            batch_query = batch_query.filter(key_column > last_key)
+        rows = batch_query.limit(batch_size).all()
+        if not rows:
+            break
+
+        items = [(getattr(row, key_attr), getattr(row, column_attr), getattr(row, date_attr) if date_attr else None)
+                 for row in rows if getattr(row, column_attr) is not None]
+        archive.put_many(kind, items)
+        last_key = getattr(rows[-1], key_attr)
+        for row in rows:
+            setattr(row, column_attr, null())
+        session.commit()
+
+        archived += len(items)
+        batches += 1
+
+    logger.info(f"Archived raw data of {archived} {kind} rows in {batches} batches")
+    return {"archived": archived, "batches": batches}
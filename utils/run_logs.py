@@ -0,0 +1,387 @@
+"""
+Run Log Capture
+
+This module provides per-run structured log capture for background jobs.
+
+Each job gets a RunLogSink holding a bounded ring buffer of log entries.
+Output is routed to the sink of the job running on the current thread, so
+concurrent jobs keep separate logs and nothing is redirected process-wide.
+The sink is bound in a context variable: threads a job starts through
+contextvars.copy_context().run (the streaming pipeline's stage threads and
+the thread pools of the pipeline) write to the job's sink too, and
+worker processes send their entries back with their results (see
+bind_sink):
+
+- print() output goes through a pass-through stdout/stderr wrapper that is
+  installed once and still writes everything to the original stream
+- logging records go through a root-logger handler
+
+Entries are persisted in batches through a callback (see
+RunLogRegistry.persist) so logs survive the in-memory buffer, and readers
+can block on a sink to stream new entries as they arrive (used by the
+server-sent events endpoints in main.py).
+"""
+
+import contextvars
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Default number of entries kept in memory per run
+DEFAULT_LOG_CAPACITY = 1000
+
+# Entries are persisted once this many are pending...
+DEFAULT_FLUSH_SIZE = 50
+
+# ...or once the oldest pending entry is this many seconds old
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Number of finished sinks kept in memory for late readers
+MAX_RETAINED_SINKS = 20
+
+# Binding of the current context to a sink
+_current_sink: contextvars.ContextVar = contextvars.ContextVar("run_log_sink", default=None)
+
+# Per-thread state: unterminated printed lines and the persisting flag
+_context = threading.local()
+
+
+def current_sink() -> Optional["RunLogSink"]:
+    """Get the sink bound to the current context, if any."""
+    return _current_sink.get()
+
+
+def bind_sink(sink: Optional["RunLogSink"]) -> None:
+    """
+    Bind the current context to a sink outside RunLogRegistry.capture.
+
+    Used by worker processes: a forked worker inherits the parent's binding,
+    so it binds a local sink instead and returns the entries collected in it
+    to the parent, which appends them to its own sink.
+
+    Args:
+        sink: Sink to bind, or None to unbind
+    """
+    install_capture()
+    _current_sink.set(sink)
+
+
+def format_entry(entry: Dict[str, Any]) -> str:
+    """
+    Format a log entry as a display line.
+
+    Args:
+        entry: Log entry
+
+    Returns:
+        str: Line in the form "[timestamp] message"
+    """
+    return f"[{entry['timestamp']}] {entry['message']}"
+
+
+class RunLogSink:
+    """Bounded, thread-safe log buffer for a single job/pipeline run."""
+
+    def __init__(self, job_id: int, capacity: int = DEFAULT_LOG_CAPACITY,
+                 flush_size: int = DEFAULT_FLUSH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 persist: Optional[Callable[["RunLogSink", List[Dict[str, Any]]], None]] = None):
+        """
+        Initialize the sink.
+
+        Args:
+            job_id: ID of the job the sink belongs to
+            capacity: Maximum number of entries kept in memory
+            flush_size: Number of pending entries that triggers a flush
+            flush_interval: Maximum age in seconds of pending entries
+            persist: Callback receiving (sink, entries) for each batch
+        """
+        self.job_id = job_id
+        self.run_id: Optional[int] = None
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.persist = persist
+        self.closed = False
+
+        self._entries: deque = deque(maxlen=capacity)
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_since = 0.0
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the most recent entry."""
+        return self._seq
+
+    def append(self, message: str, level: str = "INFO", source: str = "stdout") -> None:
+        """
+        Append a log entry.
+
+        Args:
+            message: Log message
+            level: Log level name
+            source: Logger name, or "stdout"/"stderr" for printed output
+        """
+        batch = None
+        with self._cond:
+            self._seq += 1
+            entry = {
+                "seq": self._seq,
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "level": level,
+                "source": source,
+                "message": message,
+            }
+            self._entries.append(entry)
+
+            if self.persist:
+                if not self._pending:
+                    self._pending_since = time.monotonic()
+                self._pending.append(entry)
+                if (len(self._pending) >= self.flush_size
+                        or time.monotonic() - self._pending_since >= self.flush_interval):
+                    batch, self._pending = self._pending, []
+
+            self._cond.notify_all()
+
+        if batch:
+            self._persist(batch)
+
+    def _persist(self, batch: List[Dict[str, Any]]) -> None:
+        """Persist a batch of entries, ignoring output produced while doing so."""
+        if getattr(_context, "persisting", False):
+            return
+        _context.persisting = True
+        try:
+            self.persist(self, batch)
+        except Exception as e:
+            sys.__stderr__.write(f"Error persisting run logs for job {self.job_id}: {str(e)}\n")
+        finally:
+            _context.persisting = False
+
+    def flush(self) -> None:
+        """Persist all pending entries."""
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if batch and self.persist:
+            self._persist(batch)
+
+    def close(self) -> None:
+        """Flush pending entries and wake up any streaming readers."""
+        self.flush()
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def tail(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get the most recent entries.
+
+        Args:
+            limit: Maximum number of entries
+
+        Returns:
+            List[Dict[str, Any]]: Entries, oldest first
+        """
+        with self._cond:
+            return self._last(limit)
+
+    def _last(self, count: int) -> List[Dict[str, Any]]:
+        """Copy the last ``count`` buffered entries (caller holds the lock)."""
+        size = len(self._entries)
+        if count >= size:
+            return list(self._entries)
+        # Index from the right end so only the requested entries are copied
+        return [self._entries[i] for i in range(size - count, size)]
+
+    def entries_after(self, seq: int, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Get entries newer than a sequence number, waiting for new ones.
+
+        Args:
+            seq: Sequence number of the last entry already seen
+            timeout: Maximum seconds to wait when there are no new entries
+
+        Returns:
+            List[Dict[str, Any]]: New entries (empty on timeout or when closed)
+        """
+        with self._cond:
+            if self._seq <= seq and not self.closed and timeout:
+                self._cond.wait_for(lambda: self._seq > seq or self.closed, timeout=timeout)
+            if self._seq <= seq:
+                return []
+            # Entries are contiguous, so the new ones are the last
+            # (last_seq - seq) entries of the buffer
+            return self._last(self._seq - seq)
+
+
+class ThreadRoutedStream:
+    """
+    Pass-through wrapper for stdout/stderr.
+
+    Everything is written to the wrapped stream; complete lines written by a
+    thread that is bound to a sink are also appended to that sink.
+    """
+
+    def __init__(self, stream, name: str):
+        """
+        Initialize the wrapper.
+
+        Args:
+            stream: Original stream
+            name: Stream name ("stdout" or "stderr")
+        """
+        self.stream = stream
+        self.name = name
+        self.level = "ERROR" if name == "stderr" else "INFO"
+
+    def write(self, text: str) -> int:
+        sink = current_sink()
+        # Records written by logging handlers are already captured by
+        # RunLogHandler, so only route plain writes (print etc.)
+        if sink is not None and text and sys._getframe(1).f_globals.get("__name__") != "logging":
+            buffers = getattr(_context, "partial", None)
+            if buffers is None:
+                buffers = _context.partial = {}
+            data = buffers.pop(self.name, "") + text
+            *lines, rest = data.split("\n")
+            for line in lines:
+                if line.strip():
+                    sink.append(line.rstrip(), level=self.level, source=self.name)
+            if rest:
+                buffers[self.name] = rest
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class RunLogHandler(logging.Handler):
+    """Logging handler that appends records to the current thread's sink."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        sink = current_sink()
+        if sink is None or getattr(_context, "persisting", False):
+            return
+        try:
+            sink.append(record.getMessage(), level=record.levelname, source=record.name)
+        except Exception:
+            self.handleError(record)
+
+
+_install_lock = threading.Lock()
+
+
+def install_capture() -> None:
+    """Install the stream wrappers and root log handler (idempotent)."""
+    with _install_lock:
+        if not isinstance(sys.stdout, ThreadRoutedStream):
+            sys.stdout = ThreadRoutedStream(sys.stdout, "stdout")
+        if not isinstance(sys.stderr, ThreadRoutedStream):
+            sys.stderr = ThreadRoutedStream(sys.stderr, "stderr")
+        root = logging.getLogger()
+        if not any(isinstance(handler, RunLogHandler) for handler in root.handlers):
+            root.addHandler(RunLogHandler())
+
+
+class RunLogRegistry:
+    """Registry of log sinks for the jobs of this process."""
+
+    def __init__(self, persist: Optional[Callable[[RunLogSink, List[Dict[str, Any]]], None]] = None,
+                 capacity: int = DEFAULT_LOG_CAPACITY):
+        """
+        Initialize the registry.
+
+        Args:
+            persist: Batch persistence callback passed to every sink
+            capacity: In-memory capacity of every sink
+        """
+        self.persist = persist
+        self.capacity = capacity
+        self._sinks: "OrderedDict[int, RunLogSink]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, job_id: int) -> RunLogSink:
+        """
+        Create the sink for a job, evicting the oldest finished sinks.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            RunLogSink: The new sink
+        """
+        sink = RunLogSink(job_id, capacity=self.capacity, persist=self.persist)
+        with self._lock:
+            self._sinks[job_id] = sink
+            closed = [key for key, value in self._sinks.items() if value.closed]
+            for key in closed[:max(0, len(closed) - MAX_RETAINED_SINKS)]:
+                del self._sinks[key]
+        return sink
+
+    def get(self, job_id: int) -> Optional[RunLogSink]:
+        """Get the sink of a job, if still in memory."""
+        with self._lock:
+            return self._sinks.get(job_id)
+
+    def get_by_run(self, run_id: int) -> Optional[RunLogSink]:
+        """Get the sink bound to a PipelineRun ID, if still in memory."""
+        with self._lock:
+            for sink in reversed(self._sinks.values()):
+                if sink.run_id == run_id:
+                    return sink
+        return None
+
+    def bind_run(self, job_id: int, run_id: int) -> None:
+        """
+        Associate a job's sink with a PipelineRun ID.
+
+        Args:
+            job_id: Job ID
+            run_id: PipelineRun ID
+        """
+        sink = self.get(job_id)
+        if sink:
+            sink.run_id = run_id
+
+    def latest(self) -> Optional[RunLogSink]:
+        """Get the most recently opened sink."""
+        with self._lock:
+            return next(reversed(self._sinks.values()), None)
+
+    @contextmanager
+    def capture(self, job_id: int) -> Iterator[RunLogSink]:
+        """
+        Route the current thread's output to a new sink for a job.
+
+        Threads started from it with contextvars.copy_context().run are
+        routed to the sink as well.
+
+        Args:
+            job_id: Job ID
+
+        Yields:
+            RunLogSink: The job's sink
+        """
+        install_capture()
+        sink = self.open(job_id)
+        token = _current_sink.set(sink)
+        try:
+            yield sink
+        finally:
+            # Emit any unterminated printed line before unbinding
+            for name, rest in (getattr(_context, "partial", None) or {}).items():
+                if rest.strip():
+                    sink.append(rest.rstrip(), level="ERROR" if name == "stderr" else "INFO", source=name)
+            _context.partial = {}
+            _current_sink.reset(token)
+            sink.close()
@@ -10,6 +10,8 @@ import os
 import logging
 from typing import Dict, List, Optional, Any, Tuple
 
+from utils.metrics import instrument_slack_client
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,7 +25,7 @@ try:
     SLACK_CHANNEL_ID = os.environ.get("SLACK_CHANNEL_ID")
     
     if SLACK_BOT_TOKEN:
-        slack_client = slack_sdk.WebClient(token=SLACK_BOT_TOKEN)
+        slack_client = instrument_slack_client(slack_sdk.WebClient(token=SLACK_BOT_TOKEN))
         logger.info("Slack client initialized")
     else:
         logger.warning("SLACK_BOT_TOKEN not set, Slack integration disabled")
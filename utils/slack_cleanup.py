@@ -0,0 +1,285 @@
+"""
+Slack Channel Cleanup
+
+This module deletes messages from a Slack channel in bulk. It is the engine
+behind clean_slack_channel.py and the other cleanup scripts.
+
+History pages are fetched by a background thread while a pool of workers
+deletes the messages from the previous pages. All workers share one pacer,
+which spaces chat.delete calls (120 per minute by default, the pace of the
+old one-delete-every-half-second loop) and, when Slack answers with
+`ratelimited`, holds every worker back for the Retry-After period before the
+message is retried. chat.delete is a Tier 3 method (about 50 calls per
+minute, with bursts allowed), so Slack's Retry-After responses are what
+throttle a long cleanup; the pool keeps request latency and history fetches
+from adding to it.
+
+Messages can be selected by author (bot messages only), by time range
+(oldest/latest Slack timestamps) and by an explicit set of timestamps, e.g.
+the messages the pipeline posted for markets.
+"""
+
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from slack_sdk.errors import SlackApiError
+
+logger = logging.getLogger("slack_cleanup")
+
+# Paced above chat.delete's Tier 3 limit, which allows bursts; sustained
+# overruns are throttled by Slack's Retry-After
+DELETE_RATE_PER_MINUTE = 120
+
+# Concurrent chat.delete calls
+DEFAULT_WORKERS = 4
+
+# Messages per conversations.history page (Slack allows up to 1000, recommends 200)
+HISTORY_PAGE_SIZE = 200
+
+# History pages fetched ahead of the deletes
+PREFETCH_PAGES = 2
+
+# Attempts per message when Slack keeps answering `ratelimited`
+MAX_DELETE_ATTEMPTS = 5
+
+# Retry-After used when Slack doesn't send one
+DEFAULT_RETRY_AFTER = 5.0
+
+# Message subtypes the bot can't delete
+SYSTEM_SUBTYPES = {"bot_add", "channel_join", "channel_leave", "channel_purpose", "channel_topic", "channel_name"}
+
+# Errors that won't go away on retry
+PERMANENT_DELETE_ERRORS = {"message_not_found", "cant_delete_message", "compliance_exports_prevent_deletion"}
+
+
+class RatePacer:
+    """Spaces calls shared by several threads to a rate limit."""
+
+    def __init__(self, calls_per_minute: float):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self._next_call = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the caller may make the next call."""
+        with self._lock:
+            now = time.monotonic()
+            call_at = max(now, self._next_call)
+            self._next_call = call_at + self.interval
+        if call_at > now:
+            time.sleep(call_at - now)
+
+    def back_off(self, seconds: float) -> None:
+        """Hold all callers back for the given time (after a rate limit response)."""
+        with self._lock:
+            self._next_call = max(self._next_call, time.monotonic() + seconds)
+
+
+def retry_after(error: SlackApiError) -> Optional[float]:
+    """
+    Get the Retry-After delay of a rate limited Slack response.
+
+    Args:
+        error: Slack API error
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the call was not rate limited
+    """
+    response = error.response
+    if getattr(response, "status_code", None) != 429 and response.get("error") != "ratelimited":
+        return None
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def message_filter(bot_only: bool = False, message_ts: Optional[Iterable[str]] = None) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Build the predicate selecting the messages to delete.
+
+    System messages (joins, topic changes...) are never selected.
+
+    Args:
+        bot_only: Only select messages posted by bots
+        message_ts: Only select messages with these timestamps
+
+    Returns:
+        Callable[[Dict[str, Any]], bool]: Predicate on a history message
+    """
+    wanted = set(message_ts) if message_ts is not None else None
+
+    def selected(message: Dict[str, Any]) -> bool:
+        if not message.get("ts") or message.get("subtype") in SYSTEM_SUBTYPES:
+            return False
+        if bot_only and not (message.get("bot_id") or message.get("subtype") == "bot_message"):
+            return False
+        return wanted is None or message["ts"] in wanted
+
+    return selected
+
+
+def iter_channel_history(client, channel: str, oldest: Optional[str] = None, latest: Optional[str] = None,
+                         page_size: int = HISTORY_PAGE_SIZE):
+    """
+    Yield pages of channel history, newest first, waiting out rate limits.
+
+    Args:
+        client: Slack WebClient
+        channel: Channel ID
+        oldest: Only messages after this timestamp (inclusive)
+        latest: Only messages before this timestamp (inclusive)
+        page_size: Messages per page
+
+    Yields:
+        List[Dict[str, Any]]: Messages of one page
+    """
+    params = {"channel": channel, "limit": page_size, "inclusive": True}
+    if oldest:
+        params["oldest"] = oldest
+    if latest:
+        params["latest"] = latest
+
+    while True:
+        try:
+            response = client.conversations_history(**params)
+        except SlackApiError as e:
+            delay = retry_after(e)
+            if delay is None:
+                raise
+            logger.info(f"History fetch rate limited, retrying in {delay:.0f}s")
+            time.sleep(delay)
+            continue
+
+        messages = response.get("messages", [])
+        if messages:
+            yield messages
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor or not response.get("has_more", True):
+            return
+        params["cursor"] = cursor
+
+
+def clean_channel_messages(
+    client,
+    channel: str,
+    bot_only: bool = False,
+    oldest: Optional[str] = None,
+    latest: Optional[str] = None,
+    message_ts: Optional[Iterable[str]] = None,
+    max_messages: Optional[int] = None,
+    workers: int = DEFAULT_WORKERS,
+    rate_per_minute: float = DELETE_RATE_PER_MINUTE,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Delete the selected messages from a Slack channel.
+
+    Args:
+        client: Slack WebClient
+        channel: Channel ID
+        bot_only: Only delete messages posted by bots
+        oldest: Only delete messages after this timestamp
+        latest: Only delete messages before this timestamp
+        message_ts: Only delete messages with these timestamps
+        max_messages: Stop after selecting this many messages (None for no limit)
+        workers: Concurrent chat.delete calls
+        rate_per_minute: chat.delete calls per minute across all workers
+        dry_run: Count the selected messages without deleting them
+
+    Returns:
+        Dict[str, int]: Counts of fetched, selected, deleted and failed messages
+    """
+    if message_ts is not None:
+        message_ts = set(message_ts)
+        if not message_ts:
+            return {"fetched": 0, "selected": 0, "deleted": 0, "failed": 0}
+        # Nothing older than the oldest wanted message needs to be scanned
+        oldest = max(oldest or "0", min(message_ts, key=float), key=float)
+
+    selected = message_filter(bot_only, message_ts)
+    pacer = RatePacer(rate_per_minute)
+    stats = {"fetched": 0, "selected": 0, "deleted": 0, "failed": 0}
+    stats_lock = threading.Lock()
+    pending = queue.Queue(maxsize=PREFETCH_PAGES * HISTORY_PAGE_SIZE)
+    done = object()
+    fetch_errors = []
+
+    def fetch():
+        """Queue the timestamps of the selected messages, page by page."""
+        try:
+            for page in iter_channel_history(client, channel, oldest, latest):
+                with stats_lock:
+                    stats["fetched"] += len(page)
+                for message in page:
+                    if max_messages is not None and stats["selected"] >= max_messages:
+                        return
+                    if selected(message):
+                        with stats_lock:
+                            stats["selected"] += 1
+                        if not dry_run:
+                            pending.put(message["ts"])
+        except Exception as e:
+            fetch_errors.append(e)
+            logger.error(f"Error fetching channel history: {str(e)}")
+        finally:
+            for _ in range(workers):
+                pending.put(done)
+
+    def delete(ts: str) -> bool:
+        """Delete one message, retrying while rate limited."""
+        for _ in range(MAX_DELETE_ATTEMPTS):
+            pacer.wait()
+            try:
+                client.chat_delete(channel=channel, ts=ts)
+                return True
+            except SlackApiError as e:
+                delay = retry_after(e)
+                if delay is None:
+                    error = e.response.get("error")
+                    level = logging.DEBUG if error in PERMANENT_DELETE_ERRORS else logging.WARNING
+                    logger.log(level, f"Failed to delete message {ts}: {error}")
+                    return False
+                logger.info(f"chat.delete rate limited, pausing {delay:.0f}s")
+                pacer.back_off(delay)
+            except Exception as e:
+                logger.warning(f"Error deleting message {ts}: {str(e)}")
+                return False
+        logger.warning(f"Giving up on message {ts} after {MAX_DELETE_ATTEMPTS} rate limited attempts")
+        return False
+
+    def work():
+        """Delete queued messages until the fetcher is done."""
+        while True:
+            ts = pending.get()
+            if ts is done:
+                return
+            deleted = delete(ts)
+            with stats_lock:
+                stats["deleted" if deleted else "failed"] += 1
+                if deleted and stats["deleted"] % 100 == 0:
+                    logger.info(f"Deleted {stats['deleted']} messages ({stats['fetched']} fetched)")
+
+    logger.info(f"Cleaning channel {channel} with {workers} workers at {rate_per_minute:g} deletes/minute"
+                + (" (dry run)" if dry_run else ""))
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers + 1, thread_name_prefix="slack-cleanup") as executor:
+        # Workers run in copies of the caller's context (e.g. its run log sink)
+        executor.submit(contextvars.copy_context().run, fetch)
+        for _ in range(workers):
+            executor.submit(contextvars.copy_context().run, work)
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Channel cleanup finished in {elapsed:.1f}s: {stats['selected']} of {stats['fetched']} messages "
+                f"selected, {stats['deleted']} deleted, {stats['failed']} failed")
+    if fetch_errors and not stats["selected"]:
+        raise fetch_errors[0]
+    return stats
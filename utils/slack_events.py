@@ -0,0 +1,171 @@
+"""
+Slack Events
+
+This module delivers Slack events (reactions on the market messages) to a
+handler, from any of three sources:
+
+- Socket Mode (socket_mode_client): a websocket opened with an app-level
+  token (SLACK_APP_TOKEN, xapp-...), no public URL needed
+- the Events API (verify_request / event_from_request): Slack POSTs events
+  to the web app's /slack/events route
+- a local replayer (replay_events): a JSON Lines file of recorded events or
+  Events API envelopes, one per line, for tests and for re-processing
+
+Whatever the source, the handler receives the inner event, e.g.
+{"type": "reaction_added", "user": "U1", "reaction": "white_check_mark",
+"item": {"type": "message", "channel": "C1", "ts": "1700000000.000100"}}.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+logger = logging.getLogger("slack_events")
+
+# Socket Mode is optional
+try:
+    from slack_sdk import WebClient
+    from slack_sdk.socket_mode import SocketModeClient
+    from slack_sdk.socket_mode.response import SocketModeResponse
+    socket_mode_available = True
+except ImportError:
+    socket_mode_available = False
+
+try:
+    from slack_sdk.signature import SignatureVerifier
+    signature_verifier_available = True
+except ImportError:
+    signature_verifier_available = False
+
+SLACK_APP_TOKEN = os.environ.get("SLACK_APP_TOKEN")
+SLACK_SIGNING_SECRET = os.environ.get("SLACK_SIGNING_SECRET")
+
+# Event types the approval watcher acts on
+REACTION_EVENTS = ("reaction_added", "reaction_removed")
+
+
+def unwrap_event(payload: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Get the inner event of an Events API envelope or Socket Mode payload.
+
+    Args:
+        payload: Envelope ({"type": "event_callback", "event": {...}}),
+            Socket Mode payload or bare event
+
+    Returns:
+        Optional[Dict[str, Any]]: The event, or None if the payload carries none
+    """
+    if not isinstance(payload, Mapping):
+        return None
+    if isinstance(payload.get("event"), Mapping):
+        return dict(payload["event"])
+    if "payload" in payload:
+        return unwrap_event(payload["payload"])
+    return dict(payload) if payload.get("type") in REACTION_EVENTS else None
+
+
+def socket_mode_client(on_event: Callable[[Dict[str, Any]], None], app_token: Optional[str] = None,
+                       bot_token: Optional[str] = None):
+    """
+    Create a Socket Mode client delivering Events API events to a handler.
+
+    Each request is acknowledged before the handler is called, so a slow
+    handler doesn't make Slack retry the event.
+
+    Args:
+        on_event: Called with each inner event
+        app_token: App-level token (defaults to SLACK_APP_TOKEN)
+        bot_token: Bot token for the web client (defaults to SLACK_BOT_TOKEN)
+
+    Returns:
+        SocketModeClient: Client to connect()
+    """
+    if not socket_mode_available:
+        raise RuntimeError("slack_sdk Socket Mode support is not installed")
+    app_token = app_token or SLACK_APP_TOKEN
+    if not app_token:
+        raise RuntimeError("Set SLACK_APP_TOKEN (xapp-...) to use Socket Mode")
+
+    client = SocketModeClient(app_token=app_token,
+                              web_client=WebClient(token=bot_token or os.environ.get("SLACK_BOT_TOKEN")))
+
+    def listener(client, request):
+        client.send_socket_mode_response(SocketModeResponse(envelope_id=request.envelope_id))
+        if request.type != "events_api":
+            return
+        event = unwrap_event(request.payload)
+        if event:
+            on_event(event)
+
+    client.socket_mode_request_listeners.append(listener)
+    return client
+
+
+def verify_request(body: bytes, headers: Mapping[str, str], signing_secret: Optional[str] = None) -> bool:
+    """
+    Check the signature of an Events API request.
+
+    Args:
+        body: Raw request body
+        headers: Request headers
+        signing_secret: App signing secret (defaults to SLACK_SIGNING_SECRET)
+
+    Returns:
+        bool: True if the request comes from Slack
+    """
+    signing_secret = signing_secret or SLACK_SIGNING_SECRET
+    if not signing_secret or not signature_verifier_available:
+        logger.warning("Cannot verify Slack request: SLACK_SIGNING_SECRET is not set")
+        return False
+    return SignatureVerifier(signing_secret).is_valid_request(body, dict(headers))
+
+
+def read_events(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read recorded events from a JSON Lines file.
+
+    Args:
+        path: File with one event or envelope per line
+
+    Yields:
+        Dict[str, Any]: Inner events
+    """
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = unwrap_event(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping line {number} of {path}: {str(e)}")
+                continue
+            if event:
+                yield event
+
+
+def replay_events(path: str, on_event: Callable[[Dict[str, Any]], None], realtime: bool = False) -> int:
+    """
+    Deliver recorded events to a handler.
+
+    Args:
+        path: JSON Lines file of events or envelopes
+        on_event: Called with each event
+        realtime: Keep the gaps between the events' event_ts
+
+    Returns:
+        int: Number of events delivered
+    """
+    count = 0
+    previous_ts = None
+    for event in read_events(path):
+        event_ts = float(event.get("event_ts") or 0)
+        if realtime and previous_ts and event_ts > previous_ts:
+            time.sleep(event_ts - previous_ts)
+        previous_ts = event_ts or previous_ts
+        on_event(event)
+        count += 1
+    logger.info(f"Replayed {count} events from {path}")
+    return count
@@ -0,0 +1,256 @@
+"""
+Slack Block Templates
+
+Slack messages are rendered from block templates instead of being built
+field by field for every market. A template is a Block Kit skeleton whose
+strings may contain {field} placeholders. BlockTemplate compiles the
+skeleton once into a single Python expression: static strings become
+literals, placeholder strings a str.format_map call (or the value itself
+when it fills the whole string). Rendering costs about the same as writing
+the dict literal by hand, and every render returns new dicts and lists, so
+callers can change the blocks they get back.
+
+Skeletons that depend on the category or market type, such as the category
+and type fields, are specialised once per value and cached
+(category_fields_template()).
+
+The pending market review message (render_market_review) is shared by every
+script that posts PendingMarkets for approval, so a market renders the same
+whichever path posts it.
+"""
+
+import logging
+import string
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("slack_templates")
+
+# Category badges shown in review and deployment messages
+CATEGORY_EMOJI = {
+    'politics': ':ballot_box_with_ballot:',
+    'crypto': ':coin:',
+    'sports': ':sports_medal:',
+    'business': ':chart_with_upwards_trend:',
+    'culture': ':performing_arts:',
+    'tech': ':computer:',
+    'news': ':newspaper:',
+    # Fallback for unknown categories
+    'unknown': ':question:'
+}
+
+_formatter = string.Formatter()
+
+
+class _Escaped(dict):
+    """format_map() values for partial rendering: missing fields stay placeholders."""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def _source(node: Any, constants: List[Any]) -> str:
+    """Generate the Python expression building a skeleton node from the values `v`."""
+    if isinstance(node, str):
+        parts = list(_formatter.parse(node))
+        if all(field is None for _, field, _, _ in parts):
+            return repr("".join(literal for literal, _, _, _ in parts))
+        if len(parts) == 1 and not parts[0][0] and not parts[0][2] and not parts[0][3]:
+            # The whole string is one field: the value is used as is
+            return f"v[{parts[0][1]!r}]"
+        constants.append(node)
+        return f"_c[{len(constants) - 1}].format_map(v)"
+    if isinstance(node, dict):
+        return "{" + ", ".join(f"{key!r}: {_source(value, constants)}" for key, value in node.items()) + "}"
+    if isinstance(node, list):
+        return "[" + ", ".join(_source(item, constants) for item in node) + "]"
+    constants.append(node)
+    return f"_c[{len(constants) - 1}]"
+
+
+def _compile(node: Any) -> Callable[[Dict[str, Any]], Any]:
+    """Compile a skeleton into a function building it from values, as fast as a literal."""
+    constants = []
+    source = _source(node, constants)
+    return eval(f"lambda v: {source}", {"_c": constants})
+
+
+def _substitute(node: Any, values: Dict[str, Any]) -> Any:
+    """Fill some placeholders of a skeleton, escaping braces in the values."""
+    if isinstance(node, str):
+        return node.format_map(values)
+    if isinstance(node, dict):
+        return {key: _substitute(value, values) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_substitute(item, values) for item in node]
+    return node
+
+
+class BlockTemplate:
+    """A compiled Block Kit skeleton with {field} placeholders."""
+
+    def __init__(self, skeleton: Any):
+        self.skeleton = skeleton
+        self._build = _compile(skeleton)
+
+    def render(self, **values) -> Any:
+        """
+        Render the template.
+
+        Args:
+            **values: Placeholder values. A value filling a whole string is
+                used as is, otherwise it is formatted into the string.
+
+        Returns:
+            A new block (or list of blocks)
+        """
+        return self._build(values)
+
+    def partial(self, **values) -> "BlockTemplate":
+        """
+        Fill some placeholders, returning a new template for the others.
+
+        Args:
+            **values: Placeholder values
+
+        Returns:
+            BlockTemplate: Template with the given placeholders filled
+        """
+        escaped = _Escaped({key: str(value).replace("{", "{{").replace("}", "}}") for key, value in values.items()})
+        return BlockTemplate(_substitute(self.skeleton, escaped))
+
+
+def _mrkdwn(text: str) -> Dict[str, Any]:
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+
+# Block templates shared by the message formatters
+HEADER = BlockTemplate({"type": "header", "text": {"type": "plain_text", "text": "{title}"}})
+EMOJI_HEADER = BlockTemplate({"type": "header", "text": {"type": "plain_text", "text": "{title}", "emoji": True}})
+MRKDWN_SECTION = BlockTemplate(_mrkdwn("{text}"))
+FIELDS_SECTION = BlockTemplate({"type": "section", "fields": [
+    {"type": "mrkdwn", "text": "{left}"},
+    {"type": "mrkdwn", "text": "{right}"},
+]})
+MRKDWN_FIELD = BlockTemplate({"type": "mrkdwn", "text": "{text}"})
+IMAGE = BlockTemplate({"type": "image", "image_url": "{image_url}", "alt_text": "{alt_text}"})
+TITLED_IMAGE = BlockTemplate({
+    "type": "image",
+    "title": {"type": "plain_text", "text": "{title}", "emoji": True},
+    "image_url": "{image_url}",
+    "alt_text": "{alt_text}"
+})
+EVENT_SECTION = BlockTemplate(_mrkdwn("*Event:* {event_name} · ID: `{event_id}`"))
+OPTIONS_HEADING = BlockTemplate(_mrkdwn("*Options:*"))
+OPTION = BlockTemplate(_mrkdwn("• {option}"))
+OPTION_WITH_IMAGE = BlockTemplate({
+    "type": "section",
+    "text": {"type": "mrkdwn", "text": "• {option}"},
+    "accessory": {"type": "image", "image_url": "{image_url}", "alt_text": "{option}"}
+})
+DIVIDER = BlockTemplate({"type": "divider"})
+REACTION_CONTEXT = BlockTemplate({"type": "context", "elements": [
+    {"type": "mrkdwn", "text": "React with :white_check_mark: to approve or :x: to reject"}
+]})
+CATEGORY_FIELDS = BlockTemplate({"type": "section", "fields": [
+    {"type": "mrkdwn", "text": "*Category:* {badge}"},
+    {"type": "mrkdwn", "text": "*Type:* {market_type}"},
+]})
+
+
+@lru_cache(maxsize=256)
+def category_badge(category: Optional[str]) -> str:
+    """
+    Get the badge shown for a category, e.g. ":coin: Crypto".
+
+    Args:
+        category: Category name (any case)
+
+    Returns:
+        str: Emoji and capitalized category name
+    """
+    if not category:
+        return f"{CATEGORY_EMOJI['unknown']} Unknown"
+    return f"{CATEGORY_EMOJI.get(category.lower(), CATEGORY_EMOJI['unknown'])} {category.capitalize()}"
+
+
+@lru_cache(maxsize=256)
+def category_fields_template(category: Optional[str], market_type: str) -> BlockTemplate:
+    """
+    Get the category/type fields block for a category and market type.
+
+    Args:
+        category: Category name
+        market_type: Market type label
+
+    Returns:
+        BlockTemplate: Template with no placeholders left
+    """
+    return CATEGORY_FIELDS.partial(badge=category_badge(category), market_type=market_type)
+
+
+def option_values(options: Any) -> List[Tuple[str, Optional[str]]]:
+    """
+    Get the display values of stored market options.
+
+    Options may be strings, {"id", "value", "image_url"/"image"} dicts or an
+    id -> value mapping.
+
+    Args:
+        options: Stored options
+
+    Returns:
+        List[Tuple[str, Optional[str]]]: (value, image URL stored on the option)
+    """
+    if isinstance(options, dict):
+        return [(str(value), None) for value in options.values()]
+    values = []
+    for option in options or []:
+        if isinstance(option, dict):
+            values.append((str(option.get('value', 'Unknown')), option.get('image_url') or option.get('image')))
+        else:
+            values.append((str(option), None))
+    return values
+
+
+def render_market_review(market: Any) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Render the approval message of a pending market.
+
+    Args:
+        market: PendingMarket (or any object with its attributes)
+
+    Returns:
+        Tuple[str, List[Dict]]: Message text and blocks
+    """
+    badge = category_badge(market.category)
+    event_name = getattr(market, 'event_name', None)
+    banner_url = getattr(market, 'banner_url', None)
+
+    blocks = [EMOJI_HEADER.render(title="New Market for Approval")]
+
+    if event_name:
+        if banner_url:
+            blocks.append(TITLED_IMAGE.render(title=f"Event: {event_name}", image_url=banner_url, alt_text=event_name))
+        blocks.append(EVENT_SECTION.render(event_name=event_name, event_id=getattr(market, 'event_id', None) or 'N/A'))
+    elif banner_url:
+        blocks.append(TITLED_IMAGE.render(title="Market Banner", image_url=banner_url, alt_text="Market Banner"))
+
+    blocks.append(MRKDWN_SECTION.render(text=f"*Market Question:* {market.question}"))
+    blocks.append(MRKDWN_SECTION.render(text=f"*Category:* {badge}"))
+
+    options = option_values(market.options)
+    if options:
+        option_images = market.option_images if isinstance(market.option_images, dict) else {}
+        blocks.append(OPTIONS_HEADING.render())
+        for value, stored_image in options:
+            image_url = option_images.get(value) or stored_image
+            if image_url:
+                blocks.append(OPTION_WITH_IMAGE.render(option=value, image_url=image_url))
+            else:
+                blocks.append(OPTION.render(option=value))
+
+    blocks.append(DIVIDER.render())
+    blocks.append(REACTION_CONTEXT.render())
+
+    return f"*{market.question}*\n\nCategory: {badge}", blocks
@@ -0,0 +1,341 @@
+"""
+Pipeline Stage Counters
+
+The status views (check_pipeline_status.py, the dashboards and /api/status)
+used to count Market, PendingMarket, ProcessedMarket and Event rows with a
+series of COUNT(*) and GROUP BY queries on every read.
+
+Counts are now kept in the small stage_counters table (StageCounter model),
+one row per counter:
+
+    events                      Event rows
+    markets                     Market rows
+    markets.status.<status>     Market rows by status (approved, deployment_approved, deployed...)
+    markets.category.<category> Market rows by category
+    markets.deployed            Market rows with an ApeChain market ID
+    pending                     PendingMarket rows
+    pending.posted / .unposted  PendingMarket rows by posted flag
+    processed                   ProcessedMarket rows
+    processed.posted            ProcessedMarket rows posted to Slack
+    processed.unposted          ProcessedMarket rows not posted and without a message ID
+    processed.approved / .rejected
+    approvals.<decision>        ApprovalLog rows by decision
+
+A before_flush hook on every session works out which counters each inserted,
+deleted or updated row of a tracked model leaves and enters, and applies the
+changes with an upsert in the same transaction, so counters always match the
+committed rows. Counters are updated in name order, so concurrent
+transactions lock them in the same order.
+
+Deltas are applied whenever the table exists. read_stage_counts() rebuilds
+the counters from the tables the first time they are read: the reader that
+inserts the `_seeded` marker (INSERT ... ON CONFLICT DO NOTHING) does the
+rebuild while holding the marker row, and other readers wait for it and
+read the result. A rebuild deletes the counters before counting and adds the
+counts with the same upsert as the hook, so deltas from transactions it
+could not see are kept. Bulk Query.update()/delete() calls on tracked tables
+clear the marker, so the next read rebuilds them. Rows changed with raw SQL
+are not seen by the hook; rebuild_stage_counters() (check_pipeline_status.py
+--rebuild-counters) recomputes all counters.
+"""
+
+import logging
+import weakref
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("stage_counters")
+
+STAGE_COUNTER_TABLE = "stage_counters"
+SEEDED_COUNTER = "_seeded"
+
+# Columns that decide which counters a row is in, by table
+TRACKED_COLUMNS = {
+    "events": (),
+    "markets": ("status", "category", "apechain_market_id"),
+    "pending_markets": ("posted",),
+    "processed_markets": ("posted", "message_id", "approved"),
+    "approval_log": ("decision",),
+    "approvals_log": ("decision",),
+}
+
+UPSERT_COUNTER = text(
+    f"INSERT INTO {STAGE_COUNTER_TABLE} (name, value, updated_at) VALUES (:name, :delta, :now) "
+    f"ON CONFLICT (name) DO UPDATE SET value = {STAGE_COUNTER_TABLE}.value + excluded.value, "
+    "updated_at = excluded.updated_at"
+)
+
+# Inserting the marker claims the rebuild; the upsert takes it over for a forced rebuild
+CLAIM_SEEDING = text(
+    f"INSERT INTO {STAGE_COUNTER_TABLE} (name, value, updated_at) VALUES (:name, 1, :now) "
+    "ON CONFLICT (name) DO NOTHING"
+)
+LOCK_SEEDING = text(
+    f"INSERT INTO {STAGE_COUNTER_TABLE} (name, value, updated_at) VALUES (:name, 1, :now) "
+    "ON CONFLICT (name) DO UPDATE SET updated_at = excluded.updated_at"
+)
+
+_tracked_tables = set()
+# Engines whose database is known to have the counters table
+_counter_tables_created = weakref.WeakSet()
+
+
+def counter_names(table: str, values: Dict[str, Any]) -> List[str]:
+    """
+    Get the counters a row is counted in.
+
+    Args:
+        table: Table name of the row
+        values: Values of the row's tracked columns
+
+    Returns:
+        List[str]: Counter names
+    """
+    if table == "events":
+        return ["events"]
+    if table == "markets":
+        names = ["markets", f"markets.status.{values['status']}", f"markets.category.{values['category'] or ''}"]
+        if values["apechain_market_id"] is not None:
+            names.append("markets.deployed")
+        return names
+    if table == "pending_markets":
+        names = ["pending"]
+        if values["posted"] is True:
+            names.append("pending.posted")
+        elif values["posted"] is False:
+            names.append("pending.unposted")
+        return names
+    if table == "processed_markets":
+        names = ["processed"]
+        if values["posted"] is True:
+            names.append("processed.posted")
+        elif values["posted"] is False and values["message_id"] is None:
+            names.append("processed.unposted")
+        if values["approved"] is True:
+            names.append("processed.approved")
+        elif values["approved"] is False:
+            names.append("processed.rejected")
+        return names
+    if table in ("approval_log", "approvals_log"):
+        return [f"approvals.{values['decision']}"]
+    return []
+
+
+def track_stage_counters(*models) -> None:
+    """
+    Maintain stage counters for changes to the given models.
+
+    Changes to the tracked columns load the previous value, so the counter
+    the row leaves is known even when the row was expired.
+
+    Args:
+        *models: Model classes whose tables are in TRACKED_COLUMNS
+    """
+    for model in models:
+        table = model.__tablename__
+        for column in TRACKED_COLUMNS[table]:
+            event.listen(getattr(model, column), "set", _on_set, active_history=True)
+        _tracked_tables.add(table)
+
+
+def _on_set(target, value, oldvalue, initiator):
+    """Attribute listener registered only to load previous values (active_history)."""
+    return value
+
+
+def _row_values(obj, columns: Tuple[str, ...], previous: bool) -> Dict[str, Any]:
+    """Get the current or previous values of a row's tracked columns."""
+    state = inspect(obj)
+    values = {}
+    for column in columns:
+        history = state.attrs[column].history
+        if previous and history.deleted:
+            value = history.deleted[0]
+        elif previous and history.unchanged:
+            value = history.unchanged[0]
+        elif previous and history.added:
+            value = None
+        else:
+            value = getattr(obj, column)
+        if value is None and state.pending:
+            # Column defaults are only applied on INSERT
+            default = state.mapper.columns[column].default
+            if default is not None and default.is_scalar:
+                value = default.arg
+        values[column] = value
+    return values
+
+
+def _tracked(obj) -> Optional[str]:
+    """Get the table of a tracked row, or None."""
+    table = getattr(obj, "__tablename__", None)
+    return table if table in _tracked_tables else None
+
+
+def _counter_table_exists(connection) -> bool:
+    """Check that the counters table exists, caching the answer per engine once it does."""
+    if connection.engine in _counter_tables_created:
+        return True
+    if not inspect(connection).has_table(STAGE_COUNTER_TABLE):
+        return False
+    _counter_tables_created.add(connection.engine)
+    return True
+
+
+def apply_counter_deltas(session: Session, deltas: Dict[str, int], mapper=None) -> None:
+    """
+    Add deltas to the stage counters in the session's transaction.
+
+    Args:
+        session: SQLAlchemy session
+        deltas: Counter name -> change
+        mapper: Mapper used to pick the session's bind
+    """
+    now = datetime.utcnow()
+    params = [{"name": name, "delta": delta, "now": now} for name, delta in sorted(deltas.items()) if delta]
+    if params:
+        session.connection(bind_arguments={"mapper": mapper}).execute(UPSERT_COUNTER, params)
+
+
+@event.listens_for(Session, "before_flush")
+def _count_transitions(session, flush_context, instances):
+    """Update the stage counters for the rows being flushed."""
+    deltas = Counter()
+    mapper = None
+
+    with session.no_autoflush:
+        for obj in session.new:
+            table = _tracked(obj)
+            if table:
+                mapper = inspect(obj).mapper
+                deltas.update(counter_names(table, _row_values(obj, TRACKED_COLUMNS[table], previous=False)))
+
+        for obj in session.deleted:
+            table = _tracked(obj)
+            if table:
+                mapper = inspect(obj).mapper
+                deltas.subtract(counter_names(table, _row_values(obj, TRACKED_COLUMNS[table], previous=True)))
+
+        for obj in session.dirty:
+            table = _tracked(obj)
+            if not table or not TRACKED_COLUMNS[table] or not session.is_modified(obj):
+                continue
+            old = counter_names(table, _row_values(obj, TRACKED_COLUMNS[table], previous=True))
+            new = counter_names(table, _row_values(obj, TRACKED_COLUMNS[table], previous=False))
+            if old != new:
+                mapper = inspect(obj).mapper
+                deltas.subtract(old)
+                deltas.update(new)
+
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas and _counter_table_exists(session.connection(bind_arguments={"mapper": mapper})):
+        apply_counter_deltas(session, deltas, mapper)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_change(orm_execute_state):
+    """Mark counters for rebuilding when tracked rows are bulk updated or deleted."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.local_table.name not in _tracked_tables:
+        return
+
+    session = orm_execute_state.session
+    connection = session.connection(bind_arguments={"mapper": mapper})
+    if _counter_table_exists(connection):
+        connection.execute(text(f"DELETE FROM {STAGE_COUNTER_TABLE} WHERE name = :name"), {"name": SEEDED_COUNTER})
+        logger.info(f"Bulk change to {mapper.local_table.name}: stage counters will be rebuilt on next read")
+
+
+def rebuild_stage_counters(session: Session, models: Iterable[Any], StageCounter) -> Dict[str, int]:
+    """
+    Recompute all stage counters from the tables.
+
+    Args:
+        session: SQLAlchemy session
+        models: Tracked model classes to count
+        StageCounter: StageCounter model class
+
+    Returns:
+        Dict[str, int]: Counter values
+    """
+    # Holding the marker row makes concurrent rebuilds and first reads wait for this one
+    connection = session.connection(bind_arguments={"mapper": inspect(StageCounter)})
+    connection.execute(LOCK_SEEDING, {"name": SEEDED_COUNTER, "now": datetime.utcnow()})
+    return _recount(session, models, StageCounter)
+
+
+def _recount(session: Session, models: Iterable[Any], StageCounter) -> Dict[str, int]:
+    """Replace the counters with counts from the tables, with the seeding marker held."""
+    session.query(StageCounter).filter(StageCounter.name != SEEDED_COUNTER).delete(synchronize_session=False)
+
+    counts = Counter()
+    for model in models:
+        table = model.__tablename__
+        columns = TRACKED_COLUMNS[table]
+        if not columns:
+            counts.update({name: session.query(func.count()).select_from(model).scalar()
+                           for name in counter_names(table, {})})
+            continue
+        rows = session.query(*[getattr(model, column) for column in columns], func.count()).group_by(
+            *[getattr(model, column) for column in columns]).all()
+        for row in rows:
+            for name in counter_names(table, dict(zip(columns, row[:-1]))):
+                counts[name] += row[-1]
+
+    # Upsert, so deltas committed by writers since the delete are added to the counts
+    apply_counter_deltas(session, counts, inspect(StageCounter))
+    session.commit()
+
+    logger.info(f"Rebuilt {len(counts)} stage counters")
+    return dict(counts)
+
+
+def read_stage_counts(session: Session, models: Iterable[Any], StageCounter) -> Dict[str, int]:
+    """
+    Read the stage counters, rebuilding them if they have not been seeded.
+
+    Args:
+        session: SQLAlchemy session
+        models: Tracked model classes (used to rebuild)
+        StageCounter: StageCounter model class
+
+    Returns:
+        Dict[str, int]: Counter values (missing counters are 0)
+    """
+    # Databases created before the counters were added don't have the table yet
+    connection = session.connection(bind_arguments={"mapper": inspect(StageCounter)})
+    if connection.engine not in _counter_tables_created:
+        StageCounter.__table__.create(connection, checkfirst=True)
+        _counter_tables_created.add(connection.engine)
+
+    counts = dict(session.query(StageCounter.name, StageCounter.value).all())
+    if SEEDED_COUNTER not in counts:
+        # Only the reader that inserts the marker rebuilds; the others wait for it to commit
+        claimed = connection.execute(CLAIM_SEEDING, {"name": SEEDED_COUNTER, "now": datetime.utcnow()})
+        if claimed.rowcount:
+            return _recount(session, models, StageCounter)
+        counts = dict(session.query(StageCounter.name, StageCounter.value).all())
+        session.commit()
+    counts.pop(SEEDED_COUNTER, None)
+    return counts
+
+
+def counts_by_prefix(counts: Dict[str, int], prefix: str) -> Dict[Optional[str], int]:
+    """
+    Get the counters under a prefix, e.g. Market counts by status.
+
+    Args:
+        counts: Counter values
+        prefix: Counter prefix such as "markets.status."
+
+    Returns:
+        Dict[Optional[str], int]: Suffix (None for an empty suffix) -> value, for non-zero counters
+    """
+    return {name[len(prefix):] or None: value for name, value in counts.items()
+            if name.startswith(prefix) and value}
@@ -1,146 +1,271 @@
 """
 State management utilities for the Polymarket pipeline.
+
+State is kept in an SQLite database in WAL mode (config.STATE_DB_FILE), with
+one row per pipeline field and one row per market. An update only writes the
+rows it touches, and every read-modify-write runs in an IMMEDIATE
+transaction, so concurrent processes updating different markets (or the
+same market) don't overwrite each other's changes.
+
+Recently used market states are kept in a bounded LRU cache. The cache is
+dropped whenever another connection has written to the database (detected
+with PRAGMA data_version), so cached reads never return stale state.
+
+Use `with state.batch():` to group many updates into one transaction.
+
+A legacy JSON state file (config.STATE_FILE) is imported the first time the
+database is created.
 """
 import os
 import json
+import sqlite3
 import logging
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
 
-from config import STATE_FILE
+from config import STATE_FILE, STATE_DB_FILE, STATE_CACHE_SIZE
 
 logger = logging.getLogger("state_manager")
 
+# Seconds to wait for another process's write lock before failing
+LOCK_TIMEOUT = 30.0
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS pipeline_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS market_state (market_id TEXT PRIMARY KEY, state TEXT NOT NULL)",
+)
+
 class StateManager:
     """Manages the pipeline state."""
-    
-    def __init__(self):
-        """Initialize the state manager."""
-        self.state_file = STATE_FILE
-        self.state = self._load_state()
-        
+
+    def __init__(self, db_file: Optional[str] = None, legacy_state_file: Optional[str] = STATE_FILE,
+                 cache_size: int = STATE_CACHE_SIZE):
+        """
+        Initialize the state manager.
+
+        Args:
+            db_file (Optional[str]): Path of the state database (defaults to config.STATE_DB_FILE)
+            legacy_state_file (Optional[str]): JSON state file to import when the database is new
+            cache_size (int): Maximum number of market states kept in memory
+        """
+        self.state_file = db_file or STATE_DB_FILE
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._data_version = None
+
         # Ensure state file directory exists
-        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
-    
-    def _load_state(self) -> Dict[str, Any]:
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.state_file, timeout=LOCK_TIMEOUT,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._transaction():
+            is_new = self._conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'pipeline_state'").fetchone()[0] == 0
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+            if is_new:
+                self._initialize_state(legacy_state_file)
+
+        logger.info(f"Using state database {self.state_file}")
+
+    def _get_data_version(self) -> int:
+        """Get the database version counter, which changes when another connection commits."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_cache(self) -> None:
+        """Drop cached market states if another connection has written to the database."""
+        data_version = self._get_data_version()
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._data_version = data_version
+
+    def _cache_put(self, market_id: str, market_state: Dict[str, Any]) -> None:
+        """Add a market state to the LRU cache, evicting the least recently used entry."""
+        self._cache[market_id] = market_state
+        self._cache.move_to_end(market_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
         """
-        Load the state from the state file.
-        
-        Returns:
-            Dict[str, Any]: The state
+        Run statements in a write transaction, or in the enclosing one if there is one.
+
+        The write lock is taken when the transaction starts, so reads made in
+        the transaction see the latest committed state.
         """
-        if os.path.exists(self.state_file):
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._check_cache()
+            self._depth = 1
             try:
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
-                logger.info(f"Loaded state from {self.state_file}")
-                return state
-            except json.JSONDecodeError:
-                logger.error(f"Error decoding state file {self.state_file}")
-                return self._initialize_state()
-            except Exception as e:
-                logger.error(f"Error loading state: {str(e)}")
-                return self._initialize_state()
-        else:
-            logger.info(f"State file {self.state_file} does not exist, initializing new state")
-            return self._initialize_state()
-    
-    def _save_state(self) -> bool:
-        """
-        Save the state to the state file.
-        
-        Returns:
-            bool: Success status
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._cache.clear()
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    @contextmanager
+    def batch(self) -> Iterator["StateManager"]:
         """
-        try:
-            with open(self.state_file, 'w') as f:
-                json.dump(self.state, f, indent=2)
-            logger.info(f"Saved state to {self.state_file}")
-            return True
-        except Exception as e:
-            logger.error(f"Error saving state: {str(e)}")
-            return False
-    
-    def _initialize_state(self) -> Dict[str, Any]:
+        Group state updates into one transaction.
+
+        Updates made in the block are committed together when it exits, or
+        rolled back if it raises.
         """
-        Initialize a new state.
-        
-        Returns:
-            Dict[str, Any]: The new state
-        """
-        return {
-            "pipeline": {
-                "last_run": None,
-                "status": "idle",
-                "markets_processed": 0,
-                "markets_approved": 0,
-                "markets_rejected": 0,
-                "markets_deployed": 0
-            },
-            "markets": {}
+        with self._transaction():
+            yield self
+
+    def _initialize_state(self, legacy_state_file: Optional[str] = None) -> None:
+        """
+        Initialize a new state, importing a legacy JSON state file if there is one.
+
+        Args:
+            legacy_state_file (Optional[str]): JSON state file written by earlier versions
+        """
+        pipeline_state = {
+            "last_run": None,
+            "status": "idle",
+            "markets_processed": 0,
+            "markets_approved": 0,
+            "markets_rejected": 0,
+            "markets_deployed": 0
         }
-    
+        markets = {}
+
+        if legacy_state_file and os.path.exists(legacy_state_file):
+            try:
+                with open(legacy_state_file, 'r') as f:
+                    legacy_state = json.load(f)
+                pipeline_state.update(legacy_state.get("pipeline", {}))
+                markets = legacy_state.get("markets", {})
+                logger.info(f"Imported {len(markets)} market states from {legacy_state_file}")
+            except json.JSONDecodeError:
+                logger.error(f"Error decoding state file {legacy_state_file}")
+            except Exception as e:
+                logger.error(f"Error loading state: {str(e)}")
+
+        self._conn.executemany("INSERT OR REPLACE INTO pipeline_state (key, value) VALUES (?, ?)",
+                               [(key, json.dumps(value)) for key, value in pipeline_state.items()])
+        self._conn.executemany("INSERT OR REPLACE INTO market_state (market_id, state) VALUES (?, ?)",
+                               [(str(market_id), json.dumps(state)) for market_id, state in markets.items()])
+
     def get_pipeline_state(self) -> Dict[str, Any]:
         """
         Get the pipeline state.
-        
+
         Returns:
             Dict[str, Any]: The pipeline state
         """
-        return self.state.get("pipeline", {})
-    
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM pipeline_state").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
     def update_pipeline_state(self, **kwargs) -> bool:
         """
         Update the pipeline state.
-        
+
         Args:
             **kwargs: The fields to update
-            
+
         Returns:
             bool: Success status
         """
-        pipeline_state = self.state.get("pipeline", {})
-        for key, value in kwargs.items():
-            pipeline_state[key] = value
-        self.state["pipeline"] = pipeline_state
-        return self._save_state()
-    
+        try:
+            with self._transaction():
+                self._conn.executemany("INSERT OR REPLACE INTO pipeline_state (key, value) VALUES (?, ?)",
+                                       [(key, json.dumps(value)) for key, value in kwargs.items()])
+            return True
+        except Exception as e:
+            logger.error(f"Error saving state: {str(e)}")
+            return False
+
+    def _read_market_state(self, market_id: str) -> Optional[Dict[str, Any]]:
+        """Read a market state through the cache."""
+        if market_id in self._cache:
+            self._cache.move_to_end(market_id)
+            return self._cache[market_id]
+
+        row = self._conn.execute("SELECT state FROM market_state WHERE market_id = ?", (market_id,)).fetchone()
+        if row is None:
+            return None
+        market_state = json.loads(row[0])
+        self._cache_put(market_id, market_state)
+        return market_state
+
     def get_market_state(self, market_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the state of a market.
-        
+
         Args:
             market_id (str): The market ID
-            
+
         Returns:
             Optional[Dict[str, Any]]: The market state, or None if not found
         """
-        return self.state.get("markets", {}).get(market_id)
-    
+        with self._lock:
+            if not self._depth:
+                self._check_cache()
+            market_state = self._read_market_state(str(market_id))
+        return dict(market_state) if market_state is not None else None
+
     def update_market_state(self, market_id: str, **kwargs) -> bool:
         """
         Update the state of a market.
-        
+
         Args:
             market_id (str): The market ID
             **kwargs: The fields to update
-            
+
         Returns:
             bool: Success status
         """
-        market_state = self.state.get("markets", {}).get(market_id, {})
-        for key, value in kwargs.items():
-            market_state[key] = value
-        if "markets" not in self.state:
-            self.state["markets"] = {}
-        self.state["markets"][market_id] = market_state
-        return self._save_state()
-    
+        market_id = str(market_id)
+        try:
+            with self._transaction():
+                market_state = dict(self._read_market_state(market_id) or {})
+                market_state.update(kwargs)
+                self._conn.execute("INSERT OR REPLACE INTO market_state (market_id, state) VALUES (?, ?)",
+                                   (market_id, json.dumps(market_state)))
+                self._cache_put(market_id, market_state)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving state: {str(e)}")
+            return False
+
     def get_all_markets(self) -> Dict[str, Dict[str, Any]]:
         """
         Get the state of all markets.
-        
+
         Returns:
             Dict[str, Dict[str, Any]]: A dictionary of market IDs to market states
         """
-        return self.state.get("markets", {})
\ No newline at end of file
+        with self._lock:
+            rows = self._conn.execute("SELECT market_id, state FROM market_state").fetchall()
+        return {market_id: json.loads(state) for market_id, state in rows}
+
+    def close(self) -> None:
+        """Close the state database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,204 @@
+"""
+Streaming Pipeline
+
+This module runs pipeline stages concurrently, connected by bounded queues,
+so an item moves on to the next stage as soon as it is ready instead of
+waiting for the whole batch of the previous stage (fetch -> filter ->
+categorize -> store -> post, approval -> banner -> deploy).
+
+A pipeline is a source followed by stages. The source and every stage
+receive an `emit` callback and call it for each item they pass downstream;
+a stage can emit no items (filtering), one, or many (fanning a page of
+markets out into single markets). Each stage runs in its own worker threads
+(several for stages waiting on the network, such as categorization), and
+the bounded queue in front of it applies backpressure: when a stage falls
+behind, the stages feeding it block instead of piling items up in memory.
+
+An error on one item is logged and counted, and the stage moves on to the
+next item; an error in the source ends it. The counts are returned by
+run(), and callers treat a pipeline with errors (see stream_errors()) as
+failed, so a failed fetch or store is not recorded as a completed run.
+Each stage is recorded with stage_timer() like the sequential
+stages, with the number of items it received and emitted. Stage threads run
+in a copy of the caller's context, so context variables such as the run log
+sink (utils.run_logs) carry over to them.
+"""
+
+import contextvars
+import logging
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+from utils.metrics import stage_timer, set_queue_depth
+
+logger = logging.getLogger("stream_pipeline")
+
+# Items waiting in front of each stage
+STREAM_QUEUE_SIZE = 50
+
+_END = object()
+
+
+def stream_errors(stats: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Get the stages that had errors from the stats returned by StreamPipeline.run().
+
+    Args:
+        stats: Item counts by stage
+
+    Returns:
+        Dict[str, int]: Number of errors by stage, for stages with errors
+    """
+    return {name: counts["errors"] for name, counts in stats.items() if counts["errors"]}
+
+
+class StreamStage:
+    """A stage of a streaming pipeline."""
+
+    def __init__(self, name: str, func: Callable[[Any, Callable[[Any], None]], None], workers: int = 1,
+                 context: Optional[Callable[[], ContextManager]] = None, queue_size: int = STREAM_QUEUE_SIZE):
+        """
+        Args:
+            name: Stage name (see utils.metrics.STAGES)
+            func: Called as func(item, emit) for each input item
+            workers: Number of worker threads
+            context: Optional factory of a context entered by each worker
+                thread, e.g. app.app_context
+            queue_size: Size of the queue in front of the stage
+        """
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.context = context or nullcontext
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the stage's item counts."""
+        return {"items_in": self.items_in, "items_out": self.items_out, "errors": self.errors}
+
+
+class StreamPipeline:
+    """A source and stages running concurrently, connected by bounded queues."""
+
+    def __init__(self, name: str, source: Callable[[Callable[[Any], None]], None], source_name: str = "fetch",
+                 source_context: Optional[Callable[[], ContextManager]] = None, run_id: Optional[int] = None):
+        """
+        Args:
+            name: Pipeline name (for logs and queue metrics)
+            source: Called as source(emit); emits the pipeline's input items
+            source_name: Stage name recorded for the source
+            source_context: Optional factory of a context for the source thread
+            run_id: Optional PipelineRun ID for stage metrics
+        """
+        self.name = name
+        self.source = StreamStage(source_name, lambda item, emit: source(emit), context=source_context)
+        self.stages: List[StreamStage] = []
+        self.run_id = run_id
+        self._stopping = threading.Event()
+
+    def stage(self, name: str, func: Callable[[Any, Callable[[Any], None]], None], workers: int = 1,
+              context: Optional[Callable[[], ContextManager]] = None,
+              queue_size: int = STREAM_QUEUE_SIZE) -> "StreamPipeline":
+        """
+        Append a stage.
+
+        Args:
+            name: Stage name
+            func: Called as func(item, emit) for each item emitted by the previous stage
+            workers: Number of worker threads
+            context: Optional factory of a per-thread context
+            queue_size: Size of the queue in front of the stage
+
+        Returns:
+            StreamPipeline: self, for chaining
+        """
+        self.stages.append(StreamStage(name, func, workers, context, queue_size))
+        return self
+
+    def stop(self) -> None:
+        """Ask the source to stop emitting; items already emitted still flow through."""
+        self._stopping.set()
+
+    @property
+    def stopping(self) -> bool:
+        """True once stop() has been called (sources that poll should check it)."""
+        return self._stopping.is_set()
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the pipeline until the source is exhausted and every item has gone through.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Item counts by stage
+        """
+        stages = [self.source] + self.stages
+        self.source.inbox.put(None)
+        self.source.inbox.put(_END)
+
+        started = time.perf_counter()
+        runners = []
+        for index, stage in enumerate(stages):
+            downstream = stages[index + 1] if index + 1 < len(stages) else None
+            runner = threading.Thread(target=contextvars.copy_context().run, args=(self._run_stage, stage, downstream),
+                                      name=f"{self.name}-{stage.name}", daemon=True)
+            runner.start()
+            runners.append(runner)
+        for runner in runners:
+            runner.join()
+
+        stats = {stage.name: stage.stats() for stage in stages}
+        logger.info(f"Streaming pipeline {self.name} finished in {time.perf_counter() - started:.1f}s: " +
+                    ", ".join(f"{name} {counts['items_in']}->{counts['items_out']}" for name, counts in stats.items()))
+        return stats
+
+    def _run_stage(self, stage: StreamStage, downstream: Optional[StreamStage]) -> None:
+        """Run a stage's workers, then tell the next stage no more items are coming."""
+        queue_name = f"{self.name}.{stage.name}"
+
+        def emit(item: Any) -> None:
+            with stage._lock:
+                stage.items_out += 1
+            if downstream is not None:
+                downstream.inbox.put(item)
+                set_queue_depth(f"{self.name}.{downstream.name}", downstream.inbox.qsize())
+
+        def work() -> None:
+            with stage.context():
+                while True:
+                    item = stage.inbox.get()
+                    if item is _END:
+                        # Let the stage's other workers see the end too
+                        stage.inbox.put(_END)
+                        return
+                    set_queue_depth(queue_name, stage.inbox.qsize())
+                    if stage is not self.source:
+                        with stage._lock:
+                            stage.items_in += 1
+                    try:
+                        stage.func(item, emit)
+                    except Exception as e:
+                        with stage._lock:
+                            stage.errors += 1
+                        logger.error(f"Error in stage {stage.name} of {self.name}: {str(e)}")
+
+        try:
+            with stage_timer(stage.name, run_id=self.run_id) as timing:
+                workers = [threading.Thread(target=contextvars.copy_context().run, args=(work,),
+                                            name=f"{self.name}-{stage.name}-{i}", daemon=True)
+                           for i in range(stage.workers)]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                timing.items_in = stage.items_in if stage is not self.source else None
+                timing.items_out = stage.items_out
+        finally:
+            if downstream is not None:
+                downstream.inbox.put(_END)
@@ -0,0 +1,222 @@
+"""
+Market Transformation Engine
+
+This module provides the shared engine behind the market transformations
+(transform_markets_with_events, transform_markets_batch and
+MarketTransformer.transform_markets). The raw market list is walked once to
+group markets by event ID, and each event group is then transformed on its
+own: option extraction and image mapping only ever look at the markets of
+one event.
+
+Because groups are independent, large sweeps can be sharded across a process
+pool. Groups are assigned to shards by a stable hash of their event ID, so
+all markets of an event are always transformed by the same worker, and the
+results are returned in the order the groups first appear in the input.
+Small inputs are transformed in-process, where starting workers and
+pickling markets would cost more than it saves.
+
+The number of worker processes is set per call or with the
+PIPELINE_TRANSFORM_WORKERS environment variable (default: 1, in-process).
+Log output of the workers is returned with their results and added to the
+caller's run log (utils.run_logs).
+"""
+
+import logging
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from utils.run_logs import RunLogSink, bind_sink, current_sink
+
+logger = logging.getLogger("transform_engine")
+
+# Environment variable with the default number of worker processes
+WORKERS_ENV_VAR = "PIPELINE_TRANSFORM_WORKERS"
+
+# Inputs smaller than this are always transformed in-process
+DEFAULT_PARALLEL_THRESHOLD = 20000
+
+# Shards per worker, so one slow shard does not hold up the whole sweep
+SHARDS_PER_WORKER = 4
+
+# A (position in the input, market) pair
+IndexedMarket = Tuple[int, Dict[str, Any]]
+
+# Group transform: (group key, markets of the group, shared context) -> result
+GroupTransform = Callable[[Hashable, List[IndexedMarket], Any], Any]
+
+# Shared context of the current worker process (set by the pool initializer)
+_worker_context = None
+
+
+def first_event_id(market: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the ID of the first event of a market.
+
+    Args:
+        market: Raw market data from the Gamma API
+
+    Returns:
+        Optional[str]: Event ID, or None if the market has no event
+    """
+    events = market.get("events")
+    if events and isinstance(events, list) and isinstance(events[0], dict):
+        return events[0].get("id")
+    return None
+
+
+def group_by_event(markets: List[Dict[str, Any]],
+                   keys: Callable[[Dict[str, Any]], Iterable[Hashable]]
+                   ) -> Tuple[Dict[Hashable, List[IndexedMarket]], List[IndexedMarket]]:
+    """
+    Group markets by key in a single pass over the input.
+
+    Args:
+        markets: Raw market data
+        keys: Function returning the group keys of a market (a market with
+            several keys is added to each of those groups)
+
+    Returns:
+        Tuple of (groups in order of first appearance, markets without a key)
+    """
+    groups: Dict[Hashable, List[IndexedMarket]] = {}
+    ungrouped: List[IndexedMarket] = []
+
+    for index, market in enumerate(markets):
+        grouped = False
+        for key in keys(market):
+            if key is None:
+                continue
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = []
+            group.append((index, market))
+            grouped = True
+        if not grouped:
+            ungrouped.append((index, market))
+
+    return groups, ungrouped
+
+
+def shard_for_key(key: Hashable, shard_count: int) -> int:
+    """
+    Get the shard of a group key.
+
+    The shard is derived from a stable hash (not hash(), which is salted per
+    process), so a key maps to the same shard in every run.
+
+    Args:
+        key: Group key
+        shard_count: Number of shards
+
+    Returns:
+        int: Shard index
+    """
+    return zlib.crc32(str(key).encode("utf-8")) % shard_count
+
+
+def _init_worker(context: Any) -> None:
+    """Store the shared context in a worker process and collect its log output locally."""
+    global _worker_context
+    _worker_context = context
+    # A forked worker inherits the caller's run log sink; its entries are
+    # sent back with the results instead
+    bind_sink(RunLogSink(0))
+
+
+def _transform_shard(transform: GroupTransform,
+                     shard: List[Tuple[int, Hashable, List[IndexedMarket]]]
+                     ) -> Tuple[List[Tuple[int, Any]], List[Dict[str, Any]]]:
+    """Transform the groups of one shard in a worker process, returning the results and log entries."""
+    sink = current_sink()
+    seq = sink.last_seq
+    results = [(position, transform(key, items, _worker_context)) for position, key, items in shard]
+    return results, sink.entries_after(seq)
+
+
+class TransformEngine:
+    """Groups markets by event once and transforms the groups, optionally in parallel."""
+
+    def __init__(self, workers: Optional[int] = None,
+                 parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD):
+        """
+        Initialize the engine.
+
+        Args:
+            workers: Number of worker processes (defaults to
+                PIPELINE_TRANSFORM_WORKERS, or 1 for in-process)
+            parallel_threshold: Minimum number of markets for a parallel run
+        """
+        if workers is None:
+            try:
+                workers = int(os.environ.get(WORKERS_ENV_VAR, "1"))
+            except ValueError:
+                logger.warning(f"Invalid {WORKERS_ENV_VAR} value, transforming in-process")
+                workers = 1
+        self.workers = max(1, workers)
+        self.parallel_threshold = parallel_threshold
+
+    def run(self, markets: List[Dict[str, Any]],
+            keys: Callable[[Dict[str, Any]], Iterable[Hashable]],
+            transform: GroupTransform,
+            context: Any = None) -> Tuple[List[Any], List[IndexedMarket]]:
+        """
+        Group markets and transform each group.
+
+        For parallel runs, transform must be a module-level function and
+        context must be picklable; the context is sent to each worker once.
+
+        Args:
+            markets: Raw market data
+            keys: Function returning the group keys of a market
+            transform: Function called as transform(key, markets, context) for each group
+            context: Read-only data shared by all groups
+
+        Returns:
+            Tuple of (transform results in group order, markets without a key)
+        """
+        groups, ungrouped = group_by_event(markets, keys)
+
+        if self.workers > 1 and len(markets) >= self.parallel_threshold and len(groups) > 1:
+            results = self._run_parallel(groups, transform, context)
+        else:
+            results = [transform(key, items, context) for key, items in groups.items()]
+
+        return results, ungrouped
+
+    def _run_parallel(self, groups: Dict[Hashable, List[IndexedMarket]],
+                      transform: GroupTransform, context: Any) -> List[Any]:
+        """
+        Transform groups across a process pool, sharded by group key.
+
+        Args:
+            groups: Groups in order of first appearance
+            transform: Group transform
+            context: Shared context
+
+        Returns:
+            List[Any]: Transform results in group order
+        """
+        shard_count = min(len(groups), self.workers * SHARDS_PER_WORKER)
+        shards: List[List[Tuple[int, Hashable, List[IndexedMarket]]]] = [[] for _ in range(shard_count)]
+        for position, (key, items) in enumerate(groups.items()):
+            shards[shard_for_key(key, shard_count)].append((position, key, items))
+
+        logger.info(f"Transforming {len(groups)} groups in {shard_count} shards "
+                    f"across {self.workers} worker processes")
+
+        results: List[Any] = [None] * len(groups)
+        sink = current_sink()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(context,)) as executor:
+            futures = [executor.submit(_transform_shard, transform, shard) for shard in shards if shard]
+            for future in futures:
+                shard_results, entries = future.result()
+                for position, result in shard_results:
+                    results[position] = result
+                if sink is not None:
+                    for entry in entries:
+                        sink.append(entry["message"], level=entry["level"], source=entry["source"])
+
+        return results
@@ -12,6 +12,10 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
+from utils.dates import to_epoch
+from utils.market_record import market_outcomes, raw_market
+from utils.transform_engine import TransformEngine, first_event_id
+
 def generate_event_id(event_name: str) -> str:
     """
     Generate a deterministic ID for an event based on its name.
@@ -144,51 +148,38 @@ def extract_event_from_market(market_data: Dict[str, Any]) -> Tuple[Dict[str, An
     
     return event_data, updated_market_data
 
+def _is_json_list(value: Any) -> bool:
+    """Check if a value is a JSON-encoded list."""
+    if not isinstance(value, str):
+        return False
+    try:
+        return isinstance(json.loads(value), list)
+    except ValueError:
+        return False
+
 def extract_market_options(market_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Extract market options from Polymarket data.
     
     Args:
-        market_data: Raw market data from Polymarket API
+        market_data: Raw market data from Polymarket API, or a MarketRecord
+            (whose outcomes are already decoded)
         
     Returns:
         List of market options with image URLs
     """
     options = []
     
-    # Get outcomes from the right field based on API structure
-    api_outcomes_raw = market_data.get('outcomes')
-    api_options_raw = market_data.get('options')
-    
-    # First, try to handle the JSON string format for outcomes (Gamma API)
-    if api_outcomes_raw and isinstance(api_outcomes_raw, str):
-        try:
-            # Try to parse as JSON string
-            outcomes = json.loads(api_outcomes_raw)
-            
-            # If successful, create option objects
-            if isinstance(outcomes, list):
-                for i, value in enumerate(outcomes):
-                    options.append({
-                        'id': f"option_{i}",
-                        'value': value,
-                        'image_url': None  # No images in the JSON string format
-                    })
-                return options
-            
-        except json.JSONDecodeError:
-            print(f"Failed to parse outcomes as JSON: {api_outcomes_raw}")
-    
-    # If we reach here, either parsing JSON failed or the format wasn't a JSON string
-    # Try other formats for backward compatibility
-    outcomes = None
-    if isinstance(api_outcomes_raw, list):
-        outcomes = api_outcomes_raw
-    elif isinstance(api_options_raw, list):
-        outcomes = api_options_raw
-    else:
-        # Default to empty list if no options found
-        outcomes = []
+    # Outcomes come as a JSON string from the Gamma API; records hold them decoded
+    outcomes = market_outcomes(market_data)
+    if not outcomes and _is_json_list(raw_market(market_data).get('outcomes')):
+        # An explicitly empty outcomes list has no options (no Yes/No default)
+        return options
+    if not outcomes:
+        # Fall back to the options field for backward compatibility
+        api_options_raw = raw_market(market_data).get('options')
+        if isinstance(api_options_raw, (list, dict)):
+            outcomes = api_options_raw
     
     # Handle different API formats
     if isinstance(outcomes, list):
@@ -238,16 +229,16 @@ def transform_market_for_apechain(market_data: Dict[str, Any]) -> Tuple[Dict[str
     Transform market data from Polymarket's format to ApeChain format.
     
     Args:
-        market_data: Raw market data from Polymarket API
+        market_data: Raw market data from Polymarket API, or a MarketRecord
         
     Returns:
         Tuple of (event_data, transformed_market_data)
     """
-    # Extract event data and update market data with event reference
-    event_data, updated_market_data = extract_event_from_market(market_data)
+    # Extract market options (from the decoded outcomes for records)
+    options = extract_market_options(market_data)
     
-    # Extract market options
-    options = extract_market_options(updated_market_data)
+    # Extract event data and update market data with event reference
+    event_data, updated_market_data = extract_event_from_market(raw_market(market_data))
     
     # Extract key fields
     market_id = updated_market_data.get('conditionId') or updated_market_data.get('id')
@@ -279,7 +270,7 @@ def transform_market_for_apechain(market_data: Dict[str, Any]) -> Tuple[Dict[str
         'original_market_id': market_id,
         'options': options,
         'option_images': option_images,  # Now using option name as key
-        'expiry': updated_market_data.get('endDate'),
+        'expiry': to_epoch(updated_market_data.get('endDate')),
         'status': 'new',
         'banner_uri': updated_market_data.get('image'),
         'icon_url': updated_market_data.get('icon'),
@@ -288,23 +279,36 @@ def transform_market_for_apechain(market_data: Dict[str, Any]) -> Tuple[Dict[str
     
     return event_data, transformed_market
 
-def transform_markets_batch(markets_data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+def transform_markets_batch(markets_data: List[Dict[str, Any]],
+                            workers: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Transform a batch of markets, grouping them by events.
     
+    The markets are grouped by API event in a single pass and each group is
+    transformed by the transformation engine, which can spread the groups
+    across worker processes for large batches. Markets keep their input
+    order and each event is reported once, as first seen.
+    
     Args:
-        markets_data: List of raw market data from Polymarket API
+        markets_data: List of raw market data from Polymarket API, or MarketRecords
+        workers: Number of worker processes (see utils/transform_engine.py)
         
     Returns:
         Tuple of (events_data, transformed_markets_data)
     """
+    results, ungrouped = TransformEngine(workers).run(markets_data, _batch_group_keys, _transform_market_group)
+    if ungrouped:
+        results.append(_transform_market_group(None, ungrouped))
+    
+    # Restore the input order
+    transformed = [None] * len(markets_data)
+    for group in results:
+        for index, event_data, transformed_market in group:
+            transformed[index] = (event_data, transformed_market)
+    
     events = {}  # Dictionary to store unique events
     transformed_markets = []
-    
-    for market_data in markets_data:
-        # Transform each market
-        event_data, transformed_market = transform_market_for_apechain(market_data)
-        
+    for event_data, transformed_market in transformed:
         # Store unique events
         if event_data['id'] not in events:
             events[event_data['id']] = event_data
@@ -317,6 +321,25 @@ def transform_markets_batch(markets_data: List[Dict[str, Any]]) -> Tuple[List[Di
     
     return events_list, transformed_markets
 
+def _batch_group_keys(market_data: Dict[str, Any]) -> List[Any]:
+    """Group a market by its API event, or on its own if it has none."""
+    return [first_event_id(market_data) or market_data.get('conditionId') or market_data.get('id')]
+
+def _transform_market_group(key: Any, items: List[Tuple[int, Dict[str, Any]]],
+                            context: Any = None) -> List[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+    """
+    Transform the markets of one group.
+    
+    Args:
+        key: Group key
+        items: (position, market) pairs
+        context: Unused
+        
+    Returns:
+        List of (position, event_data, transformed_market) tuples
+    """
+    return [(index,) + transform_market_for_apechain(market_data) for index, market_data in items]
+
 def transform_with_events(market_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Transform a single market with event detection.
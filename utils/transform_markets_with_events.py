@@ -24,6 +24,8 @@ import re
 import logging
 from typing import Dict, List, Any, Tuple, Optional
 
+from utils.transform_engine import TransformEngine
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,7 +33,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger("transform_markets")
 
-def transform_markets_with_events(raw_markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Question patterns that name a team, in order of preference:
+# "Will X win Y?", "Will X be the winner of Y?", "Will X become the Y champion?"
+TEAM_QUESTION_PATTERNS = [
+    re.compile(r"Will ([^?]+?) win "),
+    re.compile(r"Will ([^?]+?) be the winner of "),
+    re.compile(r"Will ([^?]+?) become the .* champion"),
+]
+
+def transform_markets_with_events(raw_markets: List[Dict[str, Any]],
+                                  workers: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Transform raw markets data from Polymarket API to a format where events are primary.
     
@@ -40,8 +51,12 @@ def transform_markets_with_events(raw_markets: List[Dict[str, Any]]) -> List[Dic
     2. Creates a single event "market" for each group with team options
     3. Passes standalone markets through with their original Yes/No options
     
+    Grouping is done in a single pass by the transformation engine, which can
+    also spread the event groups across worker processes for large inputs.
+    
     Args:
         raw_markets: Raw market data from the Polymarket API
+        workers: Number of worker processes (see utils/transform_engine.py)
         
     Returns:
         List of transformed markets, with events as primary structures
@@ -49,86 +64,15 @@ def transform_markets_with_events(raw_markets: List[Dict[str, Any]]) -> List[Dic
     if not raw_markets:
         return []
     
-    # Step 1: Collect all events and their markets
-    events_map = {}
-    standalone_markets = []
+    # Step 1 and 2: Group markets by event and turn each event into a "market"
+    results, ungrouped = TransformEngine(workers).run(raw_markets, _event_ids, _transform_event_group)
     
-    for market in raw_markets:
-        # Check if market has events information
-        events = market.get("events", [])
-        
-        if not events:
-            # This is a standalone market, keep as-is
-            standalone_markets.append(market)
-            continue
-        
-        # Process market with event information
-        for event in events:
-            event_id = event.get("id")
-            if not event_id:
-                continue
-                
-            # Initialize event if we haven't seen it yet
-            if event_id not in events_map:
-                events_map[event_id] = {
-                    "event_data": event,
-                    "markets": []
-                }
-            
-            # Add this market to the event
-            events_map[event_id]["markets"].append(market)
+    # Markets without events are kept as-is (markets whose events have no ID are dropped)
+    standalone_markets = [market for _, market in ungrouped if not market.get("events")]
     
-    # Step 2: Transform events into their own "markets"
     transformed_markets = []
-    
-    # Process events first
-    for event_id, event_info in events_map.items():
-        event_data = event_info["event_data"]
-        markets = event_info["markets"]
-        
-        # Skip events with only one market
-        if len(markets) <= 1:
-            standalone_markets.extend(markets)
-            continue
-        
-        # Create a new "market" representing the event
-        event_market = {
-            "id": f"event_{event_id}",
-            "question": event_data.get("name", "Event"),
-            "is_event": True,
-            "category": markets[0].get("category", "unknown"),
-            "expiry_time": max((market.get("expiry_time", "") for market in markets), default=""),
-            "event_id": event_id,
-            "event_name": event_data.get("name", ""),
-            "event_image": event_data.get("image"),
-            "event_icon": event_data.get("icon"),
-            "options": [],  # Team names
-            "option_images": {},  # Team images
-            "option_market_ids": {}  # Original market IDs
-        }
-        
-        # Extract team names from the markets in this event
-        for market in markets:
-            # Extract team name from question
-            question = market.get("question", "")
-            team_name = extract_team_from_question(question)
-            
-            if not team_name:
-                continue
-            
-            # Add team as an option
-            if team_name not in event_market["options"]:
-                event_market["options"].append(team_name)
-            
-            # Save market ID for this option
-            event_market["option_market_ids"][team_name] = market.get("id")
-            
-            # Add option image if available
-            if market.get("icon"):
-                event_market["option_images"][team_name] = market.get("icon")
-        
-        # Only add events with at least 2 options
-        if len(event_market["options"]) >= 2:
+    for event_market, markets in results:
+        if event_market:
             transformed_markets.append(event_market)
         else:
             # Not enough options, keep original markets
@@ -142,6 +86,75 @@ def transform_markets_with_events(raw_markets: List[Dict[str, Any]]) -> List[Dic
     
     return transformed_markets
 
+def _event_ids(market: Dict[str, Any]) -> List[Any]:
+    """Get the IDs of all events of a market."""
+    return [event.get("id") for event in market.get("events") or []]
+
+def _transform_event_group(event_id: Any, items: List[Tuple[int, Dict[str, Any]]],
+                           context: Any = None) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Turn the markets of one event into a single event "market".
+    
+    Args:
+        event_id: ID of the event
+        items: (position, market) pairs of the markets in the event
+        context: Unused
+        
+    Returns:
+        Tuple of (event market or None, markets of the event)
+    """
+    markets = [market for _, market in items]
+    
+    # Skip events with only one market
+    if len(markets) <= 1:
+        return None, markets
+    
+    # Use the event data of the first market in the group
+    event_data = next(event for event in markets[0]["events"] if event.get("id") == event_id)
+    
+    # Create a new "market" representing the event
+    event_market = {
+        "id": f"event_{event_id}",
+        "question": event_data.get("name", "Event"),
+        "is_event": True,
+        "category": markets[0].get("category", "unknown"),
+        "expiry_time": max((market.get("expiry_time", "") for market in markets), default=""),
+        "event_id": event_id,
+        "event_name": event_data.get("name", ""),
+        "event_image": event_data.get("image"),
+        "event_icon": event_data.get("icon"),
+        "options": [],  # Team names
+        "option_images": {},  # Team images
+        "option_market_ids": {}  # Original market IDs
+    }
+    
+    # Extract team names from the markets in this event
+    seen_options = set()
+    for market in markets:
+        # Extract team name from question
+        question = market.get("question", "")
+        team_name = extract_team_from_question(question)
+        
+        if not team_name:
+            continue
+        
+        # Add team as an option
+        if team_name not in seen_options:
+            seen_options.add(team_name)
+            event_market["options"].append(team_name)
+        
+        # Save market ID for this option
+        event_market["option_market_ids"][team_name] = market.get("id")
+        
+        # Add option image if available
+        if market.get("icon"):
+            event_market["option_images"][team_name] = market.get("icon")
+    
+    # Only keep events with at least 2 options
+    if len(event_market["options"]) >= 2:
+        return event_market, markets
+    return None, markets
+
 def extract_team_from_question(question: str) -> Optional[str]:
     """
     Extract team name from a binary question.
@@ -152,23 +165,10 @@ def extract_team_from_question(question: str) -> Optional[str]:
     Returns:
         Team name or None if extraction fails
     """
-    # Pattern 1: "Will X win Y?"
-    pattern1 = r"Will ([^?]+?) win "
-    match = re.search(pattern1, question)
-    if match:
-        return match.group(1).strip()
-    
-    # Pattern 2: "Will X be the winner of Y?"
-    pattern2 = r"Will ([^?]+?) be the winner of "
-    match = re.search(pattern2, question)
-    if match:
-        return match.group(1).strip()
-    
-    # Pattern 3: "Will X become the Y champion?"
-    pattern3 = r"Will ([^?]+?) become the .* champion"
-    match = re.search(pattern3, question)
-    if match:
-        return match.group(1).strip()
+    for pattern in TEAM_QUESTION_PATTERNS:
+        match = pattern.search(question)
+        if match:
+            return match.group(1).strip()
     
     return None
 
@@ -7,7 +7,6 @@ without requiring access to the Polymarket API, focusing specifically
 on testing the efficiency and effectiveness of the categorization approach.
 """
 
-import os
 import sys
 import json
 import logging
@@ -22,16 +21,11 @@ logging.basicConfig(
 logger = logging.getLogger('validate_batch')
 
 # Local imports - run within Flask app context
-from flask import Flask
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.database import create_app, init_db
+app = create_app(__name__)
 
 from models import db, Market, PendingMarket, ProcessedMarket
-db.init_app(app)
+init_db(app, db)
 
 # Import batch categorizer
 from utils.batch_categorizer import batch_categorize_markets, keyword_based_categorization
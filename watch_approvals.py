@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+"""
+Watch Slack for market approvals.
+
+This long-running watcher consumes Slack reaction events and advances a
+market as soon as someone reacts to its message, instead of waiting for
+the next run of check_pending_market_approvals.py or
+check_deployment_approvals.py:
+
+1. A reaction on a pending market's message records the approval or
+   rejection; an approved market is created and posted for deployment
+   approval right away
+2. A reaction on a deployment approval message deploys the market to
+   Apechain, or rejects it
+
+Events come from Socket Mode (SLACK_APP_TOKEN), from the web app's
+/slack/events route (Events API), or from a recorded JSON Lines file
+(--replay). Every --reconcile-interval minutes the watcher also runs the
+full checks of both scripts, which catches reactions missed while it was
+not running and moves on markets left deploying by an interrupted
+deployment.
+
+Usage:
+    python watch_approvals.py
+    python watch_approvals.py --replay events.jsonl
+"""
+
+import sys
+import time
+import queue
+import logging
+import argparse
+import threading
+from typing import Any, Dict, List, Optional
+
+from flask import Flask
+
+from models import db, Market, PendingMarket, ApprovalLog, ApprovalEvent
+from utils import database
+from utils.messaging import reaction_decision
+from utils.slack_events import unwrap_event, socket_mode_client, replay_events
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("approval_watcher")
+
+# Minutes between two reconciliation sweeps
+RECONCILE_INTERVAL_MINUTES = 15
+
+# Seconds the watcher waits for an event before checking whether a sweep is due
+EVENT_WAIT_SECONDS = 1.0
+
+class ApprovalWatcher:
+    """Advances markets on Slack reaction events, with a periodic reconciliation sweep."""
+
+    def __init__(self, app: Flask, reconcile_interval: float = RECONCILE_INTERVAL_MINUTES * 60):
+        """
+        Args:
+            app: Flask app with the database configured
+            reconcile_interval: Seconds between reconciliation sweeps (0 disables them)
+        """
+        self.app = app
+        self.reconcile_interval = reconcile_interval
+        self.events = queue.Queue()
+        self.stats = {"events": 0, "ignored": 0, "approved": 0, "rejected": 0, "deployed": 0, "failed": 0,
+                      "sweeps": 0}
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        # The first sweep runs at startup, for reactions made while the watcher was down
+        self._next_sweep = time.monotonic() if reconcile_interval else None
+
+    def submit(self, payload: Dict[str, Any]) -> None:
+        """Queue an event, Events API envelope or Socket Mode payload."""
+        event = unwrap_event(payload)
+        if event:
+            self.events.put(event)
+
+    def handle_event(self, event: Dict[str, Any]) -> str:
+        """
+        Act on one event.
+
+        Removed reactions are ignored: like the polling checks, a recorded
+        decision is final.
+
+        Args:
+            event: Slack event
+
+        Returns:
+            str: What happened ("ignored", "approved", "rejected", "deployed", "failed", ...)
+        """
+        item = event.get("item") or {}
+        if event.get("type") != "reaction_added" or item.get("type") != "message" or not item.get("ts"):
+            return "ignored"
+
+        decision, reviewer = reaction_decision({event.get("reaction", ""): [event.get("user")]})
+        if decision is None:
+            return "ignored"
+
+        with self.app.app_context():
+            try:
+                pending_market = PendingMarket.query.filter_by(slack_message_id=item["ts"]).first()
+                if pending_market is not None:
+                    return self._market_decision(pending_market, decision, reviewer)
+
+                approval_event = ApprovalEvent.query.filter_by(
+                    message_id=item["ts"], stage="final", status="pending"
+                ).order_by(ApprovalEvent.created_at.desc()).first()
+                if approval_event is not None:
+                    return self._deployment_decision(approval_event, decision, reviewer)
+
+                return "ignored"
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error handling {event.get('reaction')} reaction on message {item['ts']}: {str(e)}")
+                return "failed"
+
+    def _market_decision(self, pending_market: PendingMarket, decision: str, reviewer: Optional[str]) -> str:
+        """Record the decision on a pending market; post approved markets for deployment approval."""
+        from check_pending_market_approvals import record_market_decision
+        from check_deployment_approvals import post_markets_for_deployment_approval
+
+        if ApprovalLog.query.filter_by(poly_id=pending_market.poly_id).first():
+            return "ignored"
+
+        if not record_market_decision(pending_market, decision, reviewer):
+            db.session.rollback()
+            return "failed"
+        db.session.commit()
+
+        if decision == "approved":
+            post_markets_for_deployment_approval()
+        return decision
+
+    def _deployment_decision(self, approval_event: ApprovalEvent, decision: str, reviewer: Optional[str]) -> str:
+        """Deploy or reject a market from its deployment approval message."""
+        from check_deployment_approvals import apply_deployment_decision
+
+        market = db.session.get(Market, approval_event.market_id)
+        if market is None or market.status != "pending_deployment":
+            return "ignored"
+
+        outcome = apply_deployment_decision(market, approval_event, decision, reviewer)
+        db.session.commit()
+        return outcome
+
+    def reconcile(self) -> None:
+        """Run the full approval checks, for reactions missed by the watcher."""
+        from check_pending_market_approvals import check_pending_market_approvals
+        from check_deployment_approvals import (post_markets_for_deployment_approval, check_deployment_approvals,
+                                                reconcile_stale_deployments)
+
+        logger.info("Running reconciliation sweep")
+        with self.app.app_context():
+            for check in (check_pending_market_approvals, post_markets_for_deployment_approval,
+                          check_deployment_approvals, reconcile_stale_deployments):
+                try:
+                    check()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error in reconciliation sweep ({check.__name__}): {str(e)}")
+        with self._lock:
+            self.stats["sweeps"] += 1
+
+    def run(self, until_idle: bool = False) -> Dict[str, int]:
+        """
+        Process events until stop() is called.
+
+        Args:
+            until_idle: Return once no event is queued (for replays)
+
+        Returns:
+            Dict[str, int]: Event counts by outcome
+        """
+        while not self._stopping.is_set():
+            if self._next_sweep is not None and time.monotonic() >= self._next_sweep:
+                self.reconcile()
+                self._next_sweep = time.monotonic() + self.reconcile_interval
+
+            try:
+                event = self.events.get(timeout=0 if until_idle else EVENT_WAIT_SECONDS)
+            except queue.Empty:
+                if until_idle:
+                    break
+                continue
+
+            outcome = self.handle_event(event)
+            with self._lock:
+                self.stats["events"] += 1
+                self.stats[outcome] = self.stats.get(outcome, 0) + 1
+            if outcome != "ignored":
+                logger.info(f"{event.get('reaction')} reaction on message {event['item']['ts']}: {outcome}")
+
+        return dict(self.stats)
+
+    def start(self) -> None:
+        """Process events in a background thread (once)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="approval-watcher", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Stop processing events."""
+        self._stopping.set()
+
+def create_app() -> Flask:
+    """Create the Flask app for database access."""
+    app = database.create_app(__name__)
+    database.init_db(app, db)
+    return app
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Watch Slack for market approvals.')
+    parser.add_argument('--replay', metavar='PATH', help='Replay recorded events from a JSON Lines file and exit')
+    parser.add_argument('--realtime', action='store_true', help='Keep the gaps between replayed events')
+    parser.add_argument('--reconcile-interval', type=float, default=RECONCILE_INTERVAL_MINUTES,
+                        help='Minutes between reconciliation sweeps, the first at startup (0 disables them)')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Main function to watch for approvals.
+    """
+    args = parse_args(argv)
+    app = create_app()
+
+    if args.replay:
+        # Replays only process the recorded events
+        watcher = ApprovalWatcher(app, reconcile_interval=0)
+        replay_events(args.replay, watcher.submit, realtime=args.realtime)
+        stats = watcher.run(until_idle=True)
+        logger.info(f"Replay complete: {stats}")
+        return 0
+
+    watcher = ApprovalWatcher(app, reconcile_interval=args.reconcile_interval * 60)
+    client = socket_mode_client(watcher.submit)
+    client.connect()
+    logger.info("Watching Slack for approvals (Socket Mode)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        logger.info("Stopping approval watcher")
+    finally:
+        client.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())